@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""Benchmarks dos caminhos críticos do Editor de Vídeo
+
+Uso:
+    python benchmarks/bench.py run [--sizes 10,60,300] [--repeat 5] [--output baseline.json]
+    python benchmarks/bench.py compare baseline.json atual.json [--threshold 0.15]
+
+`run` gera mídia sintética em um diretório temporário, mede cada caso e salva um JSON.
+`compare` compara as medianas de dois JSONs e sai com código 1 se algum caso ficou
+mais lento que o limite.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import datetime
+import statistics
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import synthetic  # noqa: E402
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / 'baselines' / 'latest.json'
+DEFAULT_SIZES = [10, 60, 300]
+
+
+def timeit(function, repeat, setup=None):
+    """Executa function `repeat` vezes e retorna os tempos (s); setup roda antes de cada execução"""
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        function(state)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def audio_cases(workdir, seconds):
+    """Casos de AudioProcessor para um áudio sintético de `seconds` segundos"""
+    from src.core import denoise, loudness
+    from src.core.audio_processor import AudioProcessor
+
+    audio_path = synthetic.generate_speech_audio(workdir / f'speech-{seconds}s.wav', seconds)
+    output_path = workdir / f'speech-{seconds}s-out.wav'
+
+    def loaded():
+        processor = AudioProcessor(audio_path)
+        processor.load_audio()
+        return processor
+
+    return {
+        f'load_audio[{seconds}s]': (lambda _: AudioProcessor(audio_path).load_audio(), None),
+        f'detect_silences[{seconds}s]': (lambda p: p.detect_silences(), loaded),
+        f'remove_silence[{seconds}s]': (lambda p: p.remove_silence(output_path), loaded),
+        f'measure_loudness[{seconds}s]': (lambda p: loudness.measure_segment(p.audio_segment), loaded),
+        f'denoise[{seconds}s]': (lambda p: denoise.denoise_segment(p.audio_segment), loaded),
+    }
+
+
+def metadata_cases(workdir, seconds):
+    """Casos de MetadataHandler para um bundle sintético"""
+    from src.core.metadata_handler import MetadataHandler
+
+    log_lines = seconds * 100
+    bundle = synthetic.generate_screenstudio_bundle(workdir / f'bundle-{seconds}s.screenstudio',
+                                                    seconds=seconds, log_lines=log_lines)
+    return {
+        f'extract_screenstudio_metadata[{log_lines} linhas]':
+            (lambda _: MetadataHandler(bundle).extract_screenstudio_metadata(), None),
+    }
+
+
+def seo_cases(seconds):
+    """Casos de extração do JSON de SEO com descrições proporcionais ao tamanho"""
+    from src.llm.gemini import extract_seo_json
+
+    paragraphs = max(1, seconds // 10)
+    fenced = synthetic.seo_response_text(description_paragraphs=paragraphs, fenced=True)
+    plain = synthetic.seo_response_text(description_paragraphs=paragraphs, fenced=False)
+    return {
+        f'extract_seo_json[{paragraphs} parágrafos, markdown]': (lambda _: extract_seo_json(fenced), None),
+        f'extract_seo_json[{paragraphs} parágrafos, puro]': (lambda _: extract_seo_json(plain), None),
+    }
+
+
+def sync_cases(seconds):
+    """Caso da correlação cruzada de envelopes (sem a decodificação pelo ffmpeg)"""
+    import numpy as np
+    from src.core import sync
+
+    rate = 8000
+    samples = synthetic.speech_like_samples(seconds, rate, seed=1)
+    shifted = samples[int(0.25 * rate):]
+    block = rate // sync.ENVELOPE_RATE
+
+    def envelope(x):
+        usable = len(x) - len(x) % block
+        return np.abs(x[:usable]).reshape(-1, block).mean(axis=1)
+
+    reference, signal = envelope(samples), envelope(shifted)
+    return {
+        f'sync_estimate_offset[{seconds}s]': (lambda _: sync.estimate_offset(reference, signal), None),
+    }
+
+
+def scene_cases(seconds):
+    """Casos da pontuação de cenas e da escolha de capítulos (sem a decodificação pelo ffmpeg)"""
+    import numpy as np
+    from src.core import scenes
+
+    rng = np.random.default_rng(2)
+    count = int(seconds * scenes.DEFAULT_FPS)
+    screens = rng.integers(0, 256, (max(1, count // 60 + 1), 90 * scenes.DEFAULT_WIDTH), dtype=np.uint8)
+    frames = screens[np.arange(count) // 60]
+    times = np.arange(1, count) / scenes.DEFAULT_FPS
+    pauses = [{'start': t, 'end': t + 1.5, 'duration': 1.5} for t in np.arange(5.0, seconds, 12.0)]
+
+    def chapters(_):
+        cuts = scenes.scene_cuts(scenes.frame_scores(frames), times)
+        return scenes.find_chapters(cuts, pauses, seconds)
+
+    return {
+        f'scene_chapters[{seconds}s]': (chapters, None),
+    }
+
+
+def thumbnail_cases(seconds):
+    """Caso da pontuação de keyframes (um keyframe a cada 2 s, sem a decodificação pelo ffmpeg)"""
+    import numpy as np
+    from src.core import thumbnails
+
+    rng = np.random.default_rng(3)
+    frames = rng.integers(0, 256, (max(1, seconds // 2), 180, thumbnails.ANALYSIS_WIDTH, 3), dtype=np.uint8)
+
+    def score(_):
+        for index in range(0, len(frames), thumbnails.SCORE_BATCH):
+            thumbnails.score_frames(frames[index:index + thumbnails.SCORE_BATCH])
+
+    return {
+        f'thumbnail_scores[{len(frames)} keyframes]': (score, None),
+    }
+
+
+def search_cases(workdir, seconds):
+    """Casos do índice de busca com uma biblioteca de `seconds` * 4 vídeos"""
+    from src.core.search_index import SearchIndex
+
+    videos = seconds * 4
+    library = synthetic.generate_transcript_library(workdir / f'library-{seconds}', videos, seed=seconds)
+    db_path = workdir / f'index-{seconds}.db'
+
+    def empty():
+        for path in workdir.glob(f'index-{seconds}.db*'):
+            path.unlink()
+        return SearchIndex(db_path)
+
+    index = SearchIndex(workdir / f'index-{seconds}-search.db')
+    index.update([library])
+    return {
+        f'search_index_build[{videos} vídeos]': (lambda i: i.update([library]), empty),
+        f'search_index_rescan[{videos} vídeos]': (lambda _: index.update(), None),
+        f'search_query[{videos} vídeos]': (lambda _: index.search('programação python', limit=10), None),
+        f'search_query_prefix[{videos} vídeos]': (lambda _: index.search('capít', limit=10), None),
+    }
+
+
+def keyword_cases(seconds):
+    """Casos da extração local de palavras-chave (cerca de 150 palavras faladas por minuto)"""
+    from src.core import keywords
+
+    words = max(100, seconds * 150 // 60)
+    text = synthetic.transcript_text(words, seed=seconds)
+    # Biblioteca de 1000 vídeos em que o vocabulário comum aparece em quase todos
+    idf = keywords.Idf(1000, {keywords.fold(word): 900 for word in synthetic.TRANSCRIPT_WORDS})
+    return {
+        f'extract_keywords[{words} palavras]': (lambda _: keywords.extract_keywords(text, idf=idf), None),
+        f'local_seo[{words} palavras]': (lambda _: keywords.local_seo(text, idf=idf), None),
+    }
+
+
+def peak_cases(workdir, seconds):
+    """Casos da pirâmide de picos (sem a decodificação pelo ffmpeg) e das leituras de intervalos"""
+    import numpy as np
+    from src.core import peaks
+
+    samples = (synthetic.speech_like_samples(seconds, peaks.DECODE_RATE, seed=4) * 32767).astype(np.int16)
+    path = workdir / f'peaks-{seconds}s.peaks'
+    levels = peaks.build_pyramid(peaks.block_peaks(samples))
+    peaks.write_peaks(path, levels, os.stat(workdir), float(seconds))
+    peak_file = peaks.PeakFile(path)
+    return {
+        f'peaks_build[{seconds}s]': (lambda _: peaks.build_pyramid(peaks.block_peaks(samples)), None),
+        f'peaks_read_overview[{seconds}s]': (lambda _: peak_file.read(0, None, 1920), None),
+        f'peaks_read_zoom[{seconds}s]': (lambda _: peak_file.read(seconds / 2, seconds / 2 + 5, 1920), None),
+        f'peaks_silences[{seconds}s]': (lambda _: peak_file.silences(), None),
+    }
+
+
+def segment_cases(workdir, seconds):
+    """Casos da transcrição por trechos: divisão, impressões digitais e busca no cache"""
+    from src.core import transcript_segments as segments_module
+
+    rate = segments_module.ANALYSIS_RATE
+    samples = synthetic.speech_like_samples(seconds, rate, seed=6)
+    # Versão "editada": começo cortado e volume menor
+    edited = samples[int(seconds * 0.05 * rate):] * 0.7
+    segments = segments_module.split_segments(samples)
+
+    def pieces(audio, parts):
+        return [audio[int(s.start * rate):int(s.end * rate)] for s in parts]
+
+    cache = segments_module.SegmentCache(workdir / f'transcripts-{seconds}s.db')
+    for piece in pieces(samples, segments):
+        cache.store(segments_module.audio_fingerprint(piece), 'bench', 'texto', len(piece) / rate)
+    edited_prints = [segments_module.audio_fingerprint(piece)
+                     for piece in pieces(edited, segments_module.split_segments(edited))]
+    return {
+        f'segments_split[{seconds}s]': (lambda _: segments_module.split_segments(samples), None),
+        f'segments_fingerprint[{seconds}s]': (
+            lambda _: [segments_module.audio_fingerprint(piece) for piece in pieces(samples, segments)], None),
+        f'segments_lookup[{seconds}s]': (
+            lambda _: [cache.lookup(fingerprint, 'bench') for fingerprint in edited_prints], None),
+    }
+
+
+def duplicate_cases(workdir, seconds):
+    """Casos das impressões digitais de duplicatas: hashes de picos e busca no índice invertido"""
+    import numpy as np
+    from src.core import duplicates
+
+    rate = duplicates.DECODE_RATE
+    samples = synthetic.speech_like_samples(seconds, rate, seed=7)
+    index = duplicates.FingerprintIndex(workdir / f'fingerprints-{seconds}s.db')
+    # Biblioteca com a gravação e outras 20, sem arquivos de verdade por trás
+    for number in range(21):
+        audio = samples if number == 0 else synthetic.speech_like_samples(min(seconds, 120), rate, seed=100 + number)
+        media = workdir / f'library-{seconds}s-{number}.wav'
+        media.write_bytes(b'')
+        index.add(media, duplicates.fingerprint_samples(audio))
+    # Re-export: volume menor e um pouco de ruído
+    rng = np.random.default_rng(7)
+    export = duplicates.fingerprint_samples(samples * 0.5 + rng.normal(0, 1e-3, len(samples)).astype(np.float32))
+    return {
+        f'duplicates_fingerprint[{seconds}s]': (lambda _: duplicates.fingerprint_samples(samples), None),
+        f'duplicates_match[{seconds}s]': (lambda _: index.matches(export), None),
+    }
+
+
+def run(args):
+    sizes = [int(size) for size in args.sizes.split(',')]
+    selected = args.only.split(',') if args.only else None
+    results = {}
+
+    workdir = Path(tempfile.mkdtemp(prefix='edit-video-bench-'))
+    try:
+        for seconds in sizes:
+            cases = {}
+            cases.update(audio_cases(workdir, seconds))
+            cases.update(metadata_cases(workdir, seconds))
+            cases.update(seo_cases(seconds))
+            cases.update(sync_cases(seconds))
+            cases.update(scene_cases(seconds))
+            cases.update(thumbnail_cases(seconds))
+            cases.update(search_cases(workdir, seconds))
+            cases.update(keyword_cases(seconds))
+            cases.update(peak_cases(workdir, seconds))
+            cases.update(segment_cases(workdir, seconds))
+            cases.update(duplicate_cases(workdir, seconds))
+
+            for name, (function, setup) in cases.items():
+                if selected and not any(name.startswith(prefix) for prefix in selected):
+                    continue
+                timings = timeit(function, args.repeat, setup)
+                results[name] = {
+                    'median': statistics.median(timings),
+                    'min': min(timings),
+                    'max': max(timings),
+                    'runs': timings,
+                }
+                print(f"{name:<55} mediana {results[name]['median'] * 1000:10.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = {
+        'meta': {
+            'created_at': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'ffmpeg': shutil.which('ffmpeg') is not None,
+            'repeat': args.repeat,
+            'sizes': sizes,
+        },
+        'results': results,
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados salvos em {output}")
+    return 0
+
+
+def compare(args):
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)['results']
+
+    regressions = []
+    print(f"{'caso':<55} {'base (ms)':>10} {'atual (ms)':>11} {'variação':>9}")
+    for name in sorted(set(baseline) | set(current)):
+        if name not in baseline or name not in current:
+            status = 'novo' if name not in baseline else 'removido'
+            print(f"{name:<55} {status:>32}")
+            continue
+        before = baseline[name]['median']
+        after = current[name]['median']
+        change = (after - before) / before if before else 0.0
+        flag = ''
+        if change > args.threshold and (after - before) * 1000 >= args.min_delta_ms:
+            flag = '  REGRESSÃO'
+            regressions.append(name)
+        print(f"{name:<55} {before * 1000:10.2f} {after * 1000:11.2f} {change:+9.1%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} caso(s) acima do limite de {args.threshold:.0%}")
+        return 1
+    print(f"\nNenhuma regressão acima de {args.threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do Editor de Vídeo")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Executa os benchmarks e salva um baseline JSON')
+    run_parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                            help='Durações (s) da mídia sintética, separadas por vírgula')
+    run_parser.add_argument('--repeat', type=int, default=5, help='Execuções por caso')
+    run_parser.add_argument('--only', help='Prefixos de casos a executar, separados por vírgula')
+    run_parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Arquivo JSON de saída')
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = subparsers.add_parser('compare', help='Compara dois baselines')
+    compare_parser.add_argument('baseline', help='JSON de referência')
+    compare_parser.add_argument('current', help='JSON a comparar')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help='Aumento relativo da mediana considerado regressão (0.15 = 15%%)')
+    compare_parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                                help='Aumento absoluto mínimo (ms) para contar como regressão, '
+                                     'evitando falsos positivos em casos muito rápidos')
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    # Os logs dos módulos medidos atrapalham a leitura e o tempo
+    logging.disable(logging.CRITICAL)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
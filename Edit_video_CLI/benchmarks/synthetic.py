@@ -0,0 +1,171 @@
+"""Geradores de mídia sintética para os benchmarks
+
+- Áudio "parecido com fala": rajadas de tons com harmônicos e envelope, ruído de fundo e
+  pausas de duração variável, para que a detecção de silêncio tenha trabalho realista.
+- Bundles do ScreenStudio: project.json, recording/polyrecorder.log e arquivos de canal.
+- Bibliotecas de transcrições e SEOs, para o índice de busca.
+"""
+import json
+import wave
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+
+def speech_like_samples(seconds, sample_rate=16000, seed=0, speech_ratio=0.7,
+                        noise_db=-60.0):
+    """
+    Gera amostras mono float32 em [-1, 1] que alternam "fala" e pausas
+
+    Args:
+        seconds: Duração total
+        sample_rate: Taxa de amostragem (Hz)
+        seed: Semente para resultados reproduzíveis
+        speech_ratio: Fração aproximada do tempo com "fala"
+        noise_db: Nível do ruído de fundo (dBFS)
+
+    Returns:
+        np.ndarray: Amostras float32
+    """
+    rng = np.random.default_rng(seed)
+    total = int(seconds * sample_rate)
+    samples = np.zeros(total, dtype=np.float32)
+
+    position = 0
+    while position < total:
+        # Rajada de "fala": 0.3-3 s de tons com harmônicos e modulação silábica
+        burst = int(rng.uniform(0.3, 3.0) * sample_rate)
+        end = min(total, position + burst)
+        t = np.arange(end - position, dtype=np.float32) / sample_rate
+        f0 = rng.uniform(90, 250)
+        tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 5))
+        syllables = 0.5 * (1 + np.sin(2 * np.pi * rng.uniform(3, 6) * t))
+        samples[position:end] = (0.3 * tone * syllables).astype(np.float32)
+        position = end
+
+        # Pausa proporcional ao speech_ratio
+        mean_gap = burst * (1 - speech_ratio) / speech_ratio
+        position += int(rng.uniform(0.2, 1.8) * mean_gap)
+
+    noise_amplitude = 10 ** (noise_db / 20)
+    samples += rng.normal(0, noise_amplitude, total).astype(np.float32)
+    return np.clip(samples, -1.0, 1.0)
+
+
+def write_wav(path, samples, sample_rate=16000):
+    """Salva amostras float32 como WAV PCM 16 bits mono"""
+    pcm = (samples * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return Path(path)
+
+
+def generate_speech_audio(path, seconds, sample_rate=16000, seed=0):
+    """Gera um WAV sintético de `seconds` segundos em `path`"""
+    return write_wav(path, speech_like_samples(seconds, sample_rate, seed), sample_rate)
+
+
+def _ffmpeg_available():
+    return shutil.which('ffmpeg') is not None
+
+
+def _write_media(path, seconds, kind):
+    """Cria um arquivo de mídia real com ffmpeg, ou um arquivo de preenchimento sem ele"""
+    if _ffmpeg_available():
+        if kind == 'audio':
+            source = ['-f', 'lavfi', '-i', f'sine=frequency=220:duration={seconds}']
+        else:
+            source = ['-f', 'lavfi', '-i', f'testsrc=size=320x180:rate=10:duration={seconds}']
+        subprocess.run(['ffmpeg', '-y', '-v', 'quiet', *source, str(path)], check=True)
+    else:
+        path.write_bytes(b'\0' * 1024)
+
+
+def generate_screenstudio_bundle(directory, seconds=10, log_lines=5000, seed=0):
+    """
+    Gera um bundle .screenstudio sintético
+
+    Args:
+        directory: Caminho do bundle a ser criado
+        seconds: Duração dos arquivos de mídia
+        log_lines: Número de linhas do polyrecorder.log (controla o custo das regex)
+        seed: Semente para resultados reproduzíveis
+
+    Returns:
+        Path: Caminho do bundle
+    """
+    rng = np.random.default_rng(seed)
+    bundle = Path(directory)
+    recording = bundle / 'recording'
+    recording.mkdir(parents=True, exist_ok=True)
+
+    project = {
+        'json': {
+            'name': bundle.stem,
+            'id': f"{rng.integers(1 << 62):x}",
+            'createdAt': '2025-03-16T10:00:00.000Z',
+            'updatedAt': '2025-03-16T11:00:00.000Z',
+            'scenes': [{'id': i, 'zoom': float(rng.uniform(1, 2))} for i in range(100)],
+        }
+    }
+    with open(bundle / 'project.json', 'w', encoding='utf-8') as f:
+        json.dump(project, f)
+
+    lines = [f"2025-03-16T10:00:00.{i:06d} [info] frame {i} captured" for i in range(log_lines)]
+    lines.insert(log_lines // 2, "device modelIdentifier=MacBookPro18,3")
+    lines.insert(log_lines // 2, "operatingSystem=macOS 14.3")
+    lines.append(f"Duração:{seconds:.3f}")
+    (recording / 'polyrecorder.log').write_text('\n'.join(lines), encoding='utf-8')
+
+    _write_media(bundle / 'channel-1-display-0.mp4', seconds, 'video')
+    _write_media(bundle / 'channel-2-microphone-0.m4a', seconds, 'audio')
+    _write_media(bundle / 'channel-3-webcam-0.mp4', seconds, 'video')
+    return bundle
+
+
+def seo_response_text(tags=15, description_paragraphs=10, fenced=True):
+    """Gera uma resposta do modelo com o JSON de SEO, opcionalmente dentro de ```json"""
+    data = {
+        'title': 'Como processar vídeos longos em segundos',
+        'description': '\n\n'.join(f"{i:02d}:00 Parágrafo {i} " + 'lorem ipsum ' * 40
+                                   for i in range(description_paragraphs)),
+        'tags': [f'tag {i}' for i in range(tags)],
+    }
+    body = json.dumps(data, ensure_ascii=False, indent=2)
+    return f"Aqui está o SEO:\n```json\n{body}\n```\n" if fenced else body
+
+
+TRANSCRIPT_WORDS = ('vídeo', 'edição', 'áudio', 'python', 'programação', 'função', 'classe', 'teste',
+                    'arquivo', 'pasta', 'gravação', 'microfone', 'tela', 'webcam', 'corte', 'silêncio',
+                    'capítulo', 'título', 'descrição', 'banco', 'dados', 'índice', 'busca', 'fila',
+                    'servidor', 'cliente', 'desempenho', 'memória', 'processo', 'thread', 'então',
+                    'aqui', 'agora', 'vamos', 'fazer', 'isso', 'para', 'com', 'uma', 'que')
+
+
+def transcript_text(words, seed=0, vocabulary=None):
+    """Texto com frequências de palavras em lei de Zipf, como uma transcrição de fala"""
+    rng = np.random.default_rng(seed)
+    if vocabulary is None:
+        vocabulary = np.array(TRANSCRIPT_WORDS + tuple(f'termo{i}' for i in range(2000)))
+    return ' '.join(vocabulary[rng.zipf(1.3, words) % len(vocabulary)])
+
+
+def generate_transcript_library(directory, videos, words=1500, seed=0):
+    """Gera `videos` transcrições (.txt ao lado de um .mp3 vazio) com SEO, como o pipeline deixa"""
+    rng = np.random.default_rng(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    vocabulary = np.array(TRANSCRIPT_WORDS + tuple(f'termo{i}' for i in range(2000)))
+    for index in range(videos):
+        text = transcript_text(words, seed=rng.integers(1 << 31), vocabulary=vocabulary)
+        base = directory / f'video-{index:05d}'
+        base.with_suffix('.txt').write_text(text, encoding='utf-8')
+        base.with_suffix('.mp3').touch()
+        seo = {'title': f'Vídeo {index} sobre {vocabulary[index % len(TRANSCRIPT_WORDS)]}',
+               'description': text[:500], 'tags': list(vocabulary[rng.integers(0, 200, 10)])}
+        base.with_name(f'{base.name}-seo.json').write_text(json.dumps(seo, ensure_ascii=False), encoding='utf-8')
+    return directory
@@ -3,19 +3,11 @@ import os
 import sys
 import logging
 import json
-import re
-import shutil
-import subprocess
 from pathlib import Path
 from typing import Optional, List
 
 import click
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
-from rich.table import Table
-from rich import print as rprint
 
-from ..core import transcription, seo_generator
 from ..utils import file_utils
 
 # Configurar logger
@@ -28,13 +20,129 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger(__name__)
-console = Console()
+
+# Dependências pesadas (rich, pydub, aiohttp, cliente do Gemini) são importadas dentro de
+# cada comando, para que `edit-video --help` e comandos rápidos não paguem por elas.
+# A extensão do VS Code inicia este CLI várias vezes, então o tempo de início importa.
+
+class _LazyConsole:
+    """Console do rich criado apenas no primeiro uso"""
+    _console = None
+    
+    def __getattr__(self, name):
+        if _LazyConsole._console is None:
+            from rich.console import Console
+            _LazyConsole._console = Console()
+        return getattr(_LazyConsole._console, name)
+
+console = _LazyConsole()
 
 @click.group()
 @click.version_option(version="1.0.0")
-def cli():
+@click.option('--profile', 'profile_file', type=click.Path(dir_okay=False, path_type=Path),
+              help='Salvar spans de tempo/CPU/memória no formato Chrome trace-event (JSON)')
+@click.option('--profile-summary', is_flag=True, help='Exibir uma tabela de tempos por etapa ao final')
+@click.option('--profile-memory/--no-profile-memory', default=True,
+              help='Medir o pico de memória Python com tracemalloc durante o perfil')
+@click.option('--server/--local', default=None,
+              help='Enviar analyze, detect-silence, transcribe e converter-transcrever-seo para o serviço '
+                   'do `edit-video serve` (padrão: ativo quando EDIT_VIDEO_SERVER está definida)')
+@click.pass_context
+def cli(ctx, profile_file: Optional[Path], profile_summary: bool, profile_memory: bool, server: Optional[bool]):
     """CLI para o Editor de Vídeo - Transcrição e SEO para YouTube"""
-    pass
+    if not (profile_file or profile_summary):
+        return
+    
+    from ..utils import tracing
+    tracing.enable(trace_memory=profile_memory)
+    
+    # O span do comando fica aberto até o contexto do click ser fechado
+    command_span = tracing.span(f"command:{ctx.invoked_subcommand}", category="cli")
+    command_span.__enter__()
+    
+    def finish():
+        command_span.__exit__(None, None, None)
+        if profile_file:
+            tracing.write_chrome_trace(profile_file)
+            console.print(f"[green]Perfil salvo em: [bold]{profile_file}[/bold][/green]")
+        if profile_summary:
+            _print_profile_summary(tracing.summary())
+    
+    ctx.call_on_close(finish)
+
+def _server_address() -> Optional[str]:
+    """Endereço do serviço quando o modo cliente está ativo (--server, ou EDIT_VIDEO_SERVER sem --local)"""
+    ctx = click.get_current_context(silent=True)
+    server = ctx.find_root().params.get('server') if ctx else None
+    if server is None:
+        server = bool(os.environ.get('EDIT_VIDEO_SERVER'))
+    if not server:
+        return None
+    from ..utils.service_client import default_address
+    return default_address()
+
+def _run_remote(kind: str, params: dict, description: str) -> Optional[dict]:
+    """Executa um job no serviço local, mostrando seus eventos
+    
+    Returns:
+        O resultado do job, ou None se o serviço não estiver no ar (o comando roda localmente)
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+    from ..utils.service_client import ServiceClient, ServiceError, ServiceUnavailable
+    
+    client = ServiceClient(_server_address())
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold blue]{task.description}"),
+            BarColumn()
+        ) as progress:
+            task = progress.add_task(description, total=100)
+            
+            def on_event(event):
+                if event.get('message'):
+                    progress.update(task, description=event['message'])
+                if event.get('percent') is not None:
+                    progress.update(task, completed=event['percent'])
+            
+            return client.run(kind, params, on_event)
+    except ServiceUnavailable as e:
+        console.print(f"[yellow]{e}; executando localmente[/yellow]")
+        return None
+    except ServiceError as e:
+        console.print(f"[red]✗ Erro no serviço:[/red] {str(e)}")
+        raise click.Abort()
+
+def _print_profile_summary(rows):
+    """Exibe a tabela de resumo dos spans registrados"""
+    from rich.table import Table
+    
+    def size(value):
+        return f"{value / (1024 * 1024):.2f}" if value else "-"
+    
+    table = Table(show_header=True, title="Perfil por etapa")
+    table.add_column("Etapa", no_wrap=True)
+    table.add_column("Chamadas", justify="right")
+    table.add_column("Tempo (ms)", justify="right")
+    # CPU do processo inteiro durante cada span: spans simultâneos contam a CPU uns dos outros
+    table.add_column("CPU processo (ms)", justify="right")
+    table.add_column("CPU filhos (ms)", justify="right")
+    table.add_column("Entrada (MB)", justify="right")
+    table.add_column("Saída (MB)", justify="right")
+    table.add_column("Pico mem. (MB)", justify="right")
+    
+    for row in rows:
+        table.add_row(
+            row['name'],
+            str(row['count']),
+            f"{row['wall_ms']:.1f}",
+            f"{row['process_cpu_ms']:.1f}",
+            f"{row['child_cpu_ms']:.1f}" if row['child_cpu_ms'] else "-",
+            size(row['bytes_in']),
+            size(row['bytes_out']),
+            f"{row['peak_py_memory_kb'] / 1024:.2f}" if row['peak_py_memory_kb'] else "-"
+        )
+    console.print(table)
 
 #
 # Comandos de processamento de vídeo
@@ -46,31 +154,70 @@ def cli():
 @click.option('--pip-webcam/--no-pip-webcam', default=True, help='Adicionar webcam como picture-in-picture')
 @click.option('--pip-position', type=click.Choice(['top-left', 'top-right', 'bottom-left', 'bottom-right', 'center']), 
               default='bottom-right', help='Posição do PiP da webcam')
-def process(input_dir: Path, output_file: Path, pip_webcam: bool, pip_position: str):
-    """Processa uma gravação do ScreenStudio combinando todos os canais."""
+@click.option('--pip-scale', type=click.FloatRange(0.05, 1.0), default=0.25,
+              help='Largura do PiP como fração da largura da tela')
+@click.option('--preset', type=click.Choice(['ultrafast', 'superfast', 'veryfast', 'faster', 'fast',
+                                             'medium', 'slow', 'slower', 'veryslow']),
+              default=None, help='Preset do libx264 (padrão: veryfast, ou ultrafast com --preview)')
+@click.option('--crf', type=click.IntRange(0, 51), default=23, help='Qualidade do libx264 (menor = melhor)')
+@click.option('--threads', type=int, default=0, help='Threads do ffmpeg (0 = automático)')
+@click.option('--preview', is_flag=True, help='Prévia rápida em resolução reduzida (540p)')
+@click.option('--sync/--no-sync', default=True,
+              help='Alinhar tela e webcam ao microfone pela correlação do áudio')
+@click.option('--jump-cuts', is_flag=True, help='Cortar os silêncios do microfone em todos os canais')
+@click.option('--min-silence-len', type=int, default=500, help='Duração mínima do silêncio cortado (ms)')
+@click.option('--silence-thresh', type=int, default=-40, help='Limiar de silêncio (dB)')
+@click.option('--keep-silence', type=int, default=100, help='Silêncio mantido em cada lado do corte (ms)')
+def process(input_dir: Path, output_file: Path, pip_webcam: bool, pip_position: str, pip_scale: float,
+            preset: Optional[str], crf: int, threads: int, preview: bool, sync: bool, jump_cuts: bool,
+            min_silence_len: int, silence_thresh: int, keep_silence: int):
+    """Processa uma gravação do ScreenStudio combinando todos os canais.
+    
+    A composição (tela, webcam em PiP e áudio do microfone) é feita em uma única
+    execução do ffmpeg.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn, TimeRemainingColumn
+    from ..core.video_processor import VideoProcessor, RenderOptions
+    
     try:
         with Progress(
             SpinnerColumn(),
             TextColumn("[bold blue]{task.description}"),
             BarColumn(),
-            TimeElapsedColumn()
+            TimeElapsedColumn(),
+            TimeRemainingColumn()
         ) as progress:
-            task = progress.add_task("[cyan]Processando vídeo...", total=100)
-            
-            # Atualizar progresso
-            progress.update(task, advance=10, description="Carregando arquivos...")
+            task = progress.add_task("[cyan]Carregando arquivos...", total=None)
             
             processor = VideoProcessor(input_dir)
             processor.load_screenstudio_recording()
             
-            # Atualizar progresso
-            progress.update(task, advance=30, description="Processando vídeo...")
+            offsets = None
+            if sync:
+                progress.update(task, description="Sincronizando canais...")
+                offsets = processor.estimate_offsets()
+            
+            keep = None
+            if jump_cuts:
+                from ..core.jump_cut import detect_keep_intervals
+                if 'microphone' not in processor.channels:
+                    raise ValueError("--jump-cuts exige o canal do microfone")
+                progress.update(task, description="Detectando silêncios do microfone...")
+                keep = detect_keep_intervals(processor.channels['microphone'],
+                                             processor.media['display']['duration'],
+                                             min_silence_len, silence_thresh, keep_silence)
+            
+            progress.update(task, description="Renderizando vídeo...")
+            
+            def on_progress(done, total):
+                progress.update(task, completed=done, total=total)
             
-            # Processar o vídeo
-            processor.process_video(output_file, pip_webcam=pip_webcam, pip_position=pip_position)
+            options = RenderOptions(pip_scale=pip_scale, preset=preset, crf=crf, threads=threads,
+                                    preview=preview, keep=keep, offsets=offsets)
+            processor.process_video(output_file, pip_webcam=pip_webcam, pip_position=pip_position,
+                                    options=options, on_progress=on_progress)
             
-            # Atualizar progresso
-            progress.update(task, advance=60, description="Finalizado!")
+            progress.update(task, description="Finalizado!")
             
         console.print(f"[green]✓[/green] Vídeo processado com sucesso: [bold]{output_file}[/bold]")
         
@@ -79,12 +226,103 @@ def process(input_dir: Path, output_file: Path, pip_webcam: bool, pip_position:
         logger.exception("Erro no processamento de vídeo")
         raise click.Abort()
 
+@cli.command(name="jump-cut")
+@click.argument('input_dir', type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path))
+@click.argument('output_dir', type=click.Path(file_okay=False, path_type=Path))
+@click.option('--smart-render', is_flag=True,
+              help='Copiar os GOPs inteiros entre os cortes e recodificar só as bordas (muito mais rápido)')
+@click.option('--min-silence-len', type=int, default=500, help='Duração mínima do silêncio cortado (ms)')
+@click.option('--silence-thresh', type=int, default=-40, help='Limiar de silêncio (dB)')
+@click.option('--keep-silence', type=int, default=100, help='Silêncio mantido em cada lado do corte (ms)')
+@click.option('--preset', default=None, help='Preset do libx264 para os trechos recodificados')
+@click.option('--crf', type=click.IntRange(0, 51), default=18, help='Qualidade dos trechos recodificados')
+@click.option('--jobs', '-j', type=int, default=None, help='Execuções do ffmpeg em paralelo no smart render')
+@click.option('--sync/--no-sync', default=True,
+              help='Alinhar tela e webcam ao microfone pela correlação do áudio')
+def jump_cut(input_dir: Path, output_dir: Path, smart_render: bool, min_silence_len: int,
+             silence_thresh: int, keep_silence: int, preset: Optional[str], crf: int, jobs: Optional[int],
+             sync: bool):
+    """Remove os silêncios do microfone de todos os canais da gravação.
+    
+    INPUT_DIR: Gravação do ScreenStudio
+    
+    OUTPUT_DIR: Pasta onde os canais cortados são salvos, com os mesmos nomes
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn, TimeRemainingColumn
+    from ..core.video_processor import VideoProcessor, RenderOptions
+    from ..core.jump_cut import JumpCutter, detect_keep_intervals, kept_duration
+    
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold blue]{task.description}"),
+            BarColumn(),
+            TimeElapsedColumn(),
+            TimeRemainingColumn()
+        ) as progress:
+            task = progress.add_task("[cyan]Carregando arquivos...", total=None)
+            
+            processor = VideoProcessor(input_dir)
+            processor.load_screenstudio_recording()
+            if 'microphone' not in processor.channels:
+                raise ValueError("O corte de silêncios exige o canal do microfone")
+            
+            progress.update(task, description="Detectando silêncios do microfone...")
+            duration = processor.media['display']['duration']
+            keep = detect_keep_intervals(processor.channels['microphone'], duration,
+                                         min_silence_len, silence_thresh, keep_silence)
+            
+            def on_progress(done, total):
+                progress.update(task, completed=done, total=total)
+            
+            offsets = None
+            if sync:
+                progress.update(task, description="Sincronizando canais...")
+                offsets = processor.estimate_offsets()
+            
+            cutter = JumpCutter(processor, keep, RenderOptions(preset=preset, crf=crf, offsets=offsets))
+            progress.update(task, description="Renderizando cortes...")
+            if smart_render:
+                outputs = cutter.smart_render(output_dir, workers=jobs, on_progress=on_progress)
+            else:
+                outputs = cutter.render(output_dir, on_progress=on_progress)
+            
+            progress.update(task, description="Finalizado!")
+        
+        removed = duration - kept_duration(keep)
+        console.print(f"[green]✓[/green] {len(keep)} trechos mantidos, {removed:.1f}s de silêncio removidos")
+        for path in outputs.values():
+            console.print(f"  [bold]{path}[/bold]")
+        
+    except Exception as e:
+        console.print(f"[red]✗ Erro ao cortar silêncios:[/red] {str(e)}")
+        logger.exception("Erro no corte de silêncios")
+        raise click.Abort()
+
 @cli.command()
 @click.argument('input_dir', type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path))
 @click.option('--output-file', '-o', type=click.Path(dir_okay=False, path_type=Path), 
               help='Arquivo de saída para os metadados (JSON)')
-def analyze(input_dir: Path, output_file: Optional[Path] = None):
+@click.option('--sync/--no-sync', default=True,
+              help='Estimar o deslocamento entre os canais com áudio por correlação cruzada')
+def analyze(input_dir: Path, output_file: Optional[Path] = None, sync: bool = True):
     """Analisa uma gravação do ScreenStudio e extrai metadados."""
+    if _server_address() is not None:
+        result = _run_remote('analyze', {
+            'folder': str(input_dir.resolve()),
+            'sync': sync,
+            'output_file': str(output_file.resolve()) if output_file else None,
+        }, "[cyan]Analisando gravação...")
+        if result is not None:
+            if output_file:
+                console.print(f"[green]Metadados salvos em: [bold]{output_file}[/bold][/green]")
+            console.print("\n[bold cyan]Resumo da Gravação:[/bold cyan]")
+            console.print(result['summary'])
+            return
+    
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from ..core.metadata_handler import MetadataHandler
+    
     try:
         with Progress(
             SpinnerColumn(),
@@ -98,6 +336,10 @@ def analyze(input_dir: Path, output_file: Optional[Path] = None):
             # Extrair metadados
             metadata = metadata_handler.extract_screenstudio_metadata()
             
+            if sync:
+                progress.update(task, description="Sincronizando canais...")
+                metadata_handler.estimate_sync()
+            
             # Se o arquivo de saída foi especificado, salvar metadados
             if output_file:
                 metadata_handler.save_metadata(output_file)
@@ -128,8 +370,17 @@ def analyze(input_dir: Path, output_file: Optional[Path] = None):
               help='Limiar para detecção de silêncio (dB)')
 @click.option('--keep-silence', '-k', type=int, default=100, 
               help='Quantidade de silêncio a manter em cada extremidade (ms)')
-def remove_silence(input_file: Path, output_file: Path, min_silence: int, silence_threshold: int, keep_silence: int):
+@click.option('--jobs', '-j', type=int, default=1,
+              help='Processos de codificação em paralelo para saídas MP3/M4A (0 = número de CPUs)')
+@click.option('--normalize', is_flag=True, help='Normalizar o loudness (EBU R128) na mesma exportação')
+@click.option('--target', type=float, default=-14.0, help='Loudness integrado desejado com --normalize (LUFS)')
+@click.option('--max-peak', type=float, default=-1.0, help='Pico máximo após o ganho com --normalize (dBFS)')
+def remove_silence(input_file: Path, output_file: Path, min_silence: int, silence_threshold: int, keep_silence: int,
+                   jobs: int, normalize: bool, target: float, max_peak: float):
     """Remove períodos de silêncio de um arquivo de áudio."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+    from ..core.audio_processor import AudioProcessor
+    
     try:
         with Progress(
             SpinnerColumn(),
@@ -138,34 +389,118 @@ def remove_silence(input_file: Path, output_file: Path, min_silence: int, silenc
         ) as progress:
             task = progress.add_task("[cyan]Removendo silêncio...", total=100)
             
-            # Atualizar progresso
-            progress.update(task, advance=10, description="Carregando áudio...")
+            # Progresso real da decodificação (0-40%) e da codificação (60-100%)
+            def stage_progress(start, width):
+                def update(job):
+                    if job.fraction is not None:
+                        progress.update(task, completed=start + width * job.fraction)
+                return update
+            
+            progress.update(task, description="Carregando áudio...")
             
             # Processar o áudio
             processor = AudioProcessor(input_file)
-            processor.load_audio()
+            processor.load_audio(on_progress=stage_progress(0, 40))
             
-            # Atualizar progresso
-            progress.update(task, advance=40, description="Detectando e removendo silêncio...")
+            progress.update(task, completed=40, description="Detectando e removendo silêncio...")
             
             # Remover silêncio
             processor.remove_silence(
                 output_file,
                 min_silence_len=min_silence,
                 silence_thresh=silence_threshold,
-                keep_silence=keep_silence
+                keep_silence=keep_silence,
+                jobs=jobs or os.cpu_count(),
+                normalize=target if normalize else None,
+                max_peak=max_peak,
+                on_progress=stage_progress(60, 40)
             )
             
-            # Atualizar progresso
-            progress.update(task, advance=50, description="Finalizado!")
+            progress.update(task, completed=100, description="Finalizado!")
             
         console.print(f"[green]✓[/green] Silêncio removido com sucesso: [bold]{output_file}[/bold]")
+        if processor.loudness:
+            _print_loudness(processor.loudness)
         
     except Exception as e:
         console.print(f"[red]✗ Erro ao remover silêncio:[/red] {str(e)}")
         logger.exception("Erro na remoção de silêncio")
         raise click.Abort()
 
+@cli.command()
+@click.argument('input_file', type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path))
+@click.argument('output_file', type=click.Path(dir_okay=False, path_type=Path))
+@click.option('--reduction', type=float, default=12.0, help='Atenuação aplicada ao ruído (dB)')
+@click.option('--sensitivity', type=float, default=1.5,
+              help='Desvios padrão acima do ruído para uma frequência ser mantida (maior = mais agressivo)')
+@click.option('--min-silence', '-m', type=int, default=500,
+              help='Duração mínima dos silêncios usados no perfil de ruído (ms)')
+@click.option('--silence-threshold', '-t', type=int, default=-40,
+              help='Limiar para detecção dos silêncios usados no perfil de ruído (dB)')
+def denoise(input_file: Path, output_file: Path, reduction: float, sensitivity: float, min_silence: int,
+            silence_threshold: int):
+    """Reduz ruído constante (ventoinha, zumbido) de um arquivo de áudio."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from ..core.audio_processor import AudioProcessor
+    
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold blue]{task.description}"),
+        ) as progress:
+            progress.add_task("[cyan]Reduzindo ruído...", total=None)
+            
+            processor = AudioProcessor(input_file)
+            processor.load_audio()
+            processor.denoise(output_file, reduction_db=reduction, threshold_std=sensitivity,
+                              min_silence_len=min_silence, silence_thresh=silence_threshold)
+            
+        console.print(f"[green]✓[/green] Ruído reduzido: [bold]{output_file}[/bold]")
+        
+    except Exception as e:
+        console.print(f"[red]✗ Erro ao reduzir ruído:[/red] {str(e)}")
+        logger.exception("Erro na redução de ruído")
+        raise click.Abort()
+
+@cli.command()
+@click.argument('input_file', type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path))
+@click.argument('output_file', type=click.Path(dir_okay=False, path_type=Path))
+@click.option('--target', type=float, default=-14.0, help='Loudness integrado desejado (LUFS)')
+@click.option('--max-peak', type=float, default=-1.0, help='Pico máximo após o ganho (dBFS)')
+@click.option('--jobs', '-j', type=int, default=1,
+              help='Processos de codificação em paralelo para saídas MP3/M4A (0 = número de CPUs)')
+def normalize(input_file: Path, output_file: Path, target: float, max_peak: float, jobs: int):
+    """Normaliza o loudness de um arquivo de áudio (EBU R128), com uma única decodificação."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from ..core.audio_processor import AudioProcessor
+    
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold blue]{task.description}"),
+        ) as progress:
+            progress.add_task("[cyan]Normalizando loudness...", total=None)
+            
+            processor = AudioProcessor(input_file)
+            processor.load_audio()
+            processor.normalize(output_file, target=target, max_peak=max_peak, jobs=jobs or os.cpu_count())
+            
+        console.print(f"[green]✓[/green] Áudio normalizado: [bold]{output_file}[/bold]")
+        _print_loudness(processor.loudness)
+        
+    except Exception as e:
+        console.print(f"[red]✗ Erro ao normalizar o áudio:[/red] {str(e)}")
+        logger.exception("Erro na normalização de loudness")
+        raise click.Abort()
+
+def _print_loudness(info):
+    """Exibe a medição de loudness e o ganho aplicado"""
+    console.print(f"  Loudness medido: {info['integrated']:.1f} LUFS (pico {info['peak']:.1f} dBFS)")
+    console.print(f"  Ganho aplicado: {info['gain']:+.1f} dB")
+    if info['limited']:
+        console.print(f"  [yellow]Ganho limitado pelo pico máximo; o resultado ficará abaixo de "
+                      f"{info['target']:.1f} LUFS[/yellow]")
+
 @cli.command()
 @click.argument('input_file', type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path))
 @click.option('--min-silence', '-m', type=int, default=500, 
@@ -176,6 +511,19 @@ def remove_silence(input_file: Path, output_file: Path, min_silence: int, silenc
               help='Arquivo de saída para os períodos de silêncio (JSON)')
 def detect_silence(input_file: Path, min_silence: int, silence_threshold: int, output_file: Optional[Path] = None):
     """Detecta períodos de silêncio em um arquivo de áudio."""
+    if _server_address() is not None:
+        result = _run_remote('silence', {
+            'file': str(input_file.resolve()),
+            'min_silence': min_silence,
+            'silence_threshold': silence_threshold,
+        }, "[cyan]Detectando silêncio...")
+        if result is not None:
+            _print_silences(result['silences'], output_file)
+            return
+    
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from ..core.audio_processor import AudioProcessor
+    
     try:
         with Progress(
             SpinnerColumn(),
@@ -196,37 +544,235 @@ def detect_silence(input_file: Path, min_silence: int, silence_threshold: int, o
             progress.stop()
             
             # Exibir resultados
-            if not silences:
-                console.print("[yellow]Nenhum período de silêncio detectado com os parâmetros atuais.[/yellow]")
-            else:
-                console.print(f"[green]Detectados [bold]{len(silences)}[/bold] períodos de silêncio:[/green]")
-                
-                # Criar tabela
-                table = Table(show_header=True)
-                table.add_column("Início (s)", justify="right")
-                table.add_column("Fim (s)", justify="right")
-                table.add_column("Duração (s)", justify="right")
-                
-                for silence in silences:
-                    table.add_row(
-                        f"{silence['start']:.2f}",
-                        f"{silence['end']:.2f}",
-                        f"{silence['duration']:.2f}"
-                    )
-                
-                console.print(table)
-                
-                # Salvar em arquivo se solicitado
-                if output_file:
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        json.dump(silences, f, indent=2)
-                    console.print(f"[green]Dados de silêncio salvos em: [bold]{output_file}[/bold][/green]")
+            _print_silences(silences, output_file)
         
     except Exception as e:
         console.print(f"[red]✗ Erro ao detectar silêncio:[/red] {str(e)}")
         logger.exception("Erro na detecção de silêncio")
         raise click.Abort()
 
+def _print_silences(silences, output_file: Optional[Path] = None):
+    """Exibe a tabela de silêncios detectados e a salva em JSON se solicitado"""
+    from rich.table import Table
+    
+    if not silences:
+        console.print("[yellow]Nenhum período de silêncio detectado com os parâmetros atuais.[/yellow]")
+        return
+    
+    console.print(f"[green]Detectados [bold]{len(silences)}[/bold] períodos de silêncio:[/green]")
+    
+    # Criar tabela
+    table = Table(show_header=True)
+    table.add_column("Início (s)", justify="right")
+    table.add_column("Fim (s)", justify="right")
+    table.add_column("Duração (s)", justify="right")
+    
+    for silence in silences:
+        table.add_row(
+            f"{silence['start']:.2f}",
+            f"{silence['end']:.2f}",
+            f"{silence['duration']:.2f}"
+        )
+    
+    console.print(table)
+    
+    # Salvar em arquivo se solicitado
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(silences, f, indent=2)
+        console.print(f"[green]Dados de silêncio salvos em: [bold]{output_file}[/bold][/green]")
+
+@cli.command()
+@click.argument('input_file', type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path))
+@click.option('--start', type=click.FloatRange(0), default=0.0, help='Início do intervalo (s)')
+@click.option('--end', type=click.FloatRange(0), default=None, help='Fim do intervalo (s; padrão: fim da mídia)')
+@click.option('--width', '-w', type=click.IntRange(1), default=1000, help='Colunas (pixels) do intervalo')
+@click.option('--silences', is_flag=True, help='Incluir os silêncios aproximados, calculados a partir dos picos')
+@click.option('--min-silence', '-m', type=int, default=500, help='Duração mínima do silêncio (ms)')
+@click.option('--silence-threshold', '-t', type=int, default=-40, help='Limiar de silêncio (dB)')
+@click.option('--json', 'as_json', is_flag=True, help='Exibir os picos do intervalo em JSON')
+@click.option('--force', is_flag=True, help='Gerar o arquivo de picos de novo, mesmo sem mudanças na mídia')
+def peaks(input_file: Path, start: float, end: Optional[float], width: int, silences: bool, min_silence: int,
+          silence_threshold: int, as_json: bool, force: bool):
+    """Gera a forma de onda de um áudio ou vídeo em vários níveis de zoom.
+    
+    Na primeira vez, o áudio é decodificado e os picos (mínimo e máximo) de cada nível
+    são salvos em <arquivo>.peaks, ao lado da mídia. Depois disso, qualquer intervalo em
+    qualquer zoom é lido desse arquivo sem decodificar o áudio de novo (--json para a
+    extensão e outros programas).
+    """
+    if _server_address() is not None:
+        result = _run_remote('peaks', {
+            'file': str(input_file.resolve()),
+            'start': start,
+            'end': end,
+            'width': width,
+            'silences': silences,
+            'min_silence': min_silence,
+            'silence_threshold': silence_threshold,
+        }, "[cyan]Calculando picos...")
+        if result is not None:
+            result.pop('reused', None)
+            if as_json:
+                click.echo(json.dumps(result))
+            else:
+                console.print(f"[green]✓[/green] Picos em [bold]{result['peaks_path']}[/bold]: "
+                              f"{len(result['min'])} colunas de {result['start']:.2f}s a {result['end']:.2f}s")
+            return
+    
+    import time
+    from ..core import peaks as peak_builder
+    from ..llm.gemini import run_async
+    
+    started = time.perf_counter()
+    try:
+        with console.status("[cyan]Calculando picos..."):
+            peak_file, reused = run_async(peak_builder.ensure_peaks_async(input_file, force=force))
+    except Exception as e:
+        console.print(f"[red]✗ Erro ao gerar os picos:[/red] {str(e)}")
+        logger.exception("Erro na geração dos picos")
+        raise click.Abort()
+    built = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    peak_range = peak_file.read(start, end, width)
+    result = peak_range.to_dict()
+    if silences:
+        result['silences'] = peak_file.silences(silence_threshold, min_silence / 1000)
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    if as_json:
+        click.echo(json.dumps({'peaks_path': str(peak_file.path), 'duration': peak_file.duration, **result}))
+        return
+    
+    from rich.table import Table
+    
+    if reused:
+        console.print(f"[green]↺[/green] Picos reaproveitados: [bold]{peak_file.path}[/bold]")
+    else:
+        console.print(f"[green]✓[/green] Picos salvos em [bold]{peak_file.path}[/bold] em {built:.1f}s")
+    table = Table(show_header=True, title=f"Níveis ({peak_file.duration:.1f}s de áudio, "
+                                          f"{peak_file.path.stat().st_size / 1024:.0f} KB)")
+    table.add_column("Nível", justify="right")
+    table.add_column("Amostras por pico", justify="right")
+    table.add_column("Picos por segundo", justify="right")
+    table.add_column("Picos", justify="right")
+    for level, (_, count) in enumerate(peak_file.levels):
+        size = peak_file.samples_per_peak(level)
+        table.add_row(str(level), str(size), f"{peak_file.sample_rate / size:.2f}", str(count))
+    console.print(table)
+    console.print(f"Intervalo {peak_range.start:.2f}s-{peak_range.end:.2f}s: {len(peak_range.min)} colunas "
+                  f"lidas em {elapsed:.1f} ms")
+    if silences:
+        console.print(f"{len(result['silences'])} silêncio(s) aproximado(s) de pelo menos {min_silence} ms")
+
+@cli.command()
+@click.argument('input_path', type=click.Path(exists=True, path_type=Path))
+@click.option('--audio', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='Áudio da narração (padrão: o microfone da gravação ou o próprio vídeo)')
+@click.option('--keyframes', is_flag=True, help='Decodificar apenas os keyframes (mais rápido, menos preciso)')
+@click.option('--fps', type=click.FloatRange(0.1, 30), default=2.0, help='Quadros analisados por segundo')
+@click.option('--min-chapter', type=click.FloatRange(10), default=60.0, help='Duração mínima de um capítulo (s)')
+@click.option('--output-file', '-o', type=click.Path(dir_okay=False, path_type=Path),
+              help='Arquivo de saída para os capítulos (JSON)')
+def chapters(input_path: Path, audio: Optional[Path], keyframes: bool, fps: float, min_chapter: float,
+             output_file: Optional[Path] = None):
+    """Detecta capítulos pelas mudanças de cena da tela e pelas pausas da fala.
+    
+    INPUT_PATH pode ser uma gravação do ScreenStudio (usa channel-1-display-0.mp4 e o
+    microfone) ou um arquivo de vídeo.
+    """
+    from rich.table import Table
+    from ..core import organizer, scenes
+    from ..core.watcher import DISPLAY_FILE, microphone_file
+    from ..llm.gemini import run_async
+    
+    try:
+        if input_path.is_dir():
+            _, recording_path = organizer.find_recording_path(input_path)
+            display = recording_path / DISPLAY_FILE
+            if not display.exists():
+                console.print(f"[red]✗ Canal de tela ({DISPLAY_FILE}) não encontrado em {recording_path}[/red]")
+                raise click.Abort()
+            audio = audio or microphone_file(input_path)
+        else:
+            display = input_path
+            audio = audio or input_path
+        
+        with console.status("[cyan]Analisando cenas e pausas..."):
+            found = run_async(scenes.detect_chapters_async(display, audio, fps=fps, keyframes=keyframes,
+                                                           min_chapter=min_chapter))
+    except click.Abort:
+        raise
+    except Exception as e:
+        console.print(f"[red]✗ Erro ao detectar capítulos:[/red] {str(e)}")
+        logger.exception("Erro na detecção de capítulos")
+        raise click.Abort()
+    
+    if not found:
+        console.print(f"[yellow]Menos de {scenes.MIN_CHAPTERS} capítulos encontrados; "
+                      "o YouTube não exibiria capítulos para este vídeo.[/yellow]")
+        return
+    
+    table = Table(show_header=True)
+    table.add_column("Início")
+    table.add_column("Duração (s)", justify="right")
+    table.add_column("Origem")
+    for chapter in found:
+        table.add_row(chapter['timestamp'], f"{chapter['end'] - chapter['start']:.0f}",
+                      {'start': "início", 'scene': "mudança de cena", 'pause': "pausa"}[chapter['source']])
+    console.print(table)
+    
+    if output_file:
+        file_utils.save_json(found, output_file)
+        console.print(f"[green]Capítulos salvos em: [bold]{output_file}[/bold][/green]")
+
+@cli.command()
+@click.argument('source', type=click.Path(exists=True, path_type=Path))
+@click.option('--output-dir', '-o', type=click.Path(file_okay=False, path_type=Path),
+              help='Pasta das imagens (padrão: <gravação>/thumbnails ou <vídeo>-thumbnails)')
+@click.option('--count', '-n', type=click.IntRange(1, 50), default=5, help='Número de thumbnails')
+@click.option('--jobs', '-j', type=int, default=None, help='Execuções do ffmpeg em paralelo por canal')
+@click.option('--min-gap', type=float, default=20.0, help='Intervalo mínimo entre thumbnails do mesmo canal (s)')
+def thumbnails(source: Path, output_dir: Optional[Path], count: int, jobs: Optional[int], min_gap: float):
+    """Extrai candidatas a thumbnail dos keyframes da tela e da webcam.
+    
+    SOURCE pode ser uma gravação do ScreenStudio ou um arquivo de vídeo. Só os keyframes
+    são decodificados; as melhores imagens (nitidez, brilho e cor) são salvas com o
+    instante de cada uma em thumbnails.json.
+    """
+    from rich.table import Table
+    from ..core import thumbnails as thumbnail_extractor
+    from ..llm.gemini import run_async
+    
+    if output_dir is None:
+        output_dir = source / 'thumbnails' if source.is_dir() else source.with_name(f"{source.stem}-thumbnails")
+    
+    try:
+        with console.status("[cyan]Pontuando keyframes..."):
+            chosen = run_async(thumbnail_extractor.extract_thumbnails_async(
+                source, output_dir, count=count, jobs=jobs, min_gap=min_gap))
+    except Exception as e:
+        console.print(f"[red]✗ Erro ao extrair thumbnails:[/red] {str(e)}")
+        logger.exception("Erro na extração de thumbnails")
+        raise click.Abort()
+    
+    if not chosen:
+        console.print("[yellow]Nenhum keyframe encontrado.[/yellow]")
+        return
+    
+    table = Table(show_header=True)
+    table.add_column("#", justify="right")
+    table.add_column("Canal")
+    table.add_column("Instante")
+    table.add_column("Pontuação", justify="right")
+    table.add_column("Arquivo")
+    for index, candidate in enumerate(chosen, 1):
+        table.add_row(str(index), candidate.channel, candidate.timestamp, f"{candidate.score:.2f}",
+                      Path(candidate.path).name)
+    console.print(table)
+    console.print(f"[green]Thumbnails salvas em: [bold]{output_dir}[/bold][/green]")
+
 #
 # Comandos de transcrição e SEO
 #
@@ -234,8 +780,16 @@ def detect_silence(input_file: Path, min_silence: int, silence_threshold: int, o
 @cli.command()
 @click.argument('audio_file', type=click.Path(exists=True))
 @click.option('--output', '-o', help='Arquivo de saída para a transcrição')
-def transcribe(audio_file, output):
-    """Transcreve um arquivo de áudio"""
+@click.option('--whole', is_flag=True,
+              help='Enviar o áudio inteiro em uma requisição, sem o cache de trechos já transcritos')
+def transcribe(audio_file, output, whole):
+    """Transcreve um arquivo de áudio.
+    
+    Por padrão o áudio é transcrito por trechos divididos nas pausas, e os trechos já
+    transcritos antes (de outra versão editada do mesmo áudio) saem do cache sem novo envio.
+    """
+    from ..core import transcription, search_index
+    
     click.echo(f"Transcrevendo arquivo: {audio_file}")
     
     # Verificar extensão
@@ -243,9 +797,12 @@ def transcribe(audio_file, output):
         click.echo("Formato de arquivo não suportado. Use MP3, WAV, M4A, OGG ou FLAC.")
         return
     
+    if _server_address() is not None and _transcribe_remote(Path(audio_file), output, whole):
+        return
+    
     # Processar o áudio
     try:
-        text = transcription.transcribe_audio(audio_file)
+        text = transcription.transcribe_audio(audio_file, segmented=not whole)
         
         # Determinar arquivo de saída
         if not output:
@@ -253,8 +810,8 @@ def transcribe(audio_file, output):
             output = f"{base_name}.transcription.txt"
         
         # Salvar transcrição
-        with open(output, 'w', encoding='utf-8') as f:
-            f.write(text)
+        file_utils.atomic_write_text(output, text)
+        search_index.notify(Path(output))
             
         click.echo(f"Transcrição salva em: {output}")
         
@@ -265,6 +822,34 @@ def transcribe(audio_file, output):
     except Exception as e:
         click.echo(f"Erro ao transcrever áudio: {str(e)}")
 
+def _transcribe_remote(audio_file: Path, output: Optional[str], whole: bool = False) -> bool:
+    """Fluxo do comando transcribe no serviço local; False se o serviço não estiver no ar"""
+    result = _run_remote('transcribe', {'file': str(audio_file.resolve()), 'whole': whole},
+                         "[cyan]Transcrevendo áudio...")
+    if result is None:
+        return False
+    
+    # Mesmo arquivo de saída do modo local, além da transcrição do pipeline gravada pelo serviço
+    output = output or f"{os.path.splitext(audio_file)[0]}.transcription.txt"
+    file_utils.atomic_write_text(output, result['transcription'])
+    click.echo(f"Transcrição salva em: {output}")
+    
+    if click.confirm("Deseja gerar SEO para YouTube?"):
+        result = _run_remote('seo', {'file': str(audio_file.resolve()), 'style': 'professional'},
+                             "[cyan]Gerando SEO...")
+        if result is not None:
+            click.echo(f"SEO salvo em: {result['seo_path']}")
+            _print_seo_summary(result['seo'])
+    return True
+
+def _print_seo_summary(seo_data):
+    """Exibe título, tags e o início da descrição do SEO gerado"""
+    console.print("\n[bold cyan]SEO Gerado:[/bold cyan]")
+    console.print(f"Título: [bold]{seo_data['title']}[/bold]")
+    console.print(f"Tags: {', '.join(seo_data['tags'])}")
+    console.print("Descrição:")
+    console.print(seo_data['description'][:200] + "..." if len(seo_data['description']) > 200 else seo_data['description'])
+
 @cli.command()
 @click.argument('transcription_file', type=click.Path(exists=True))
 @click.option('--style', '-s', 
@@ -272,13 +857,27 @@ def transcribe(audio_file, output):
               default='professional',
               help='Estilo do SEO')
 @click.option('--output', '-o', help='Arquivo de saída para o SEO (formato JSON)')
-def seo(transcription_file, style, output):
+@click.option('--compact', is_flag=True,
+              help='Enviar ao modelo só as palavras-chave e as frases principais, não a transcrição inteira')
+@click.option('--no-llm', is_flag=True, help='Gerar o SEO localmente, sem chamar o modelo (mais rápido, menos polido)')
+def seo(transcription_file, style, output, compact, no_llm):
     """Gera SEO para YouTube com base em uma transcrição"""
-    generate_seo(transcription_file, style, output)
+    generate_seo(transcription_file, style, output, mode=_seo_mode(compact, no_llm))
 
-def generate_seo(transcription_file, style='professional', output=None):
+def _seo_mode(compact: bool, no_llm: bool) -> str:
+    """Modo de SEO (veja seo_generator.SEO_MODES) a partir de --compact e --no-llm"""
+    if compact and no_llm:
+        raise click.UsageError("Use --compact ou --no-llm, não os dois")
+    return 'local' if no_llm else 'compact' if compact else 'full'
+
+def generate_seo(transcription_file, style='professional', output=None, mode='full'):
     """Função compartilhada para gerar SEO"""
-    click.echo(f"Gerando SEO em estilo '{style}' para: {transcription_file}")
+    from ..core import seo_generator, search_index
+    
+    if mode == 'local':
+        click.echo(f"Gerando SEO localmente (sem o modelo) para: {transcription_file}")
+    else:
+        click.echo(f"Gerando SEO em estilo '{style}' para: {transcription_file}")
     
     try:
         # Ler transcrição
@@ -286,7 +885,7 @@ def generate_seo(transcription_file, style='professional', output=None):
             text = f.read()
         
         # Gerar SEO
-        seo_data = seo_generator.generate_seo(text, style)
+        seo_data = seo_generator.generate_seo(text, style, mode=mode)
         
         # Determinar arquivo de saída
         if not output:
@@ -295,6 +894,7 @@ def generate_seo(transcription_file, style='professional', output=None):
         
         # Salvar SEO
         file_utils.save_json(seo_data, output)
+        search_index.notify(Path(output))
         click.echo(f"SEO salvo em: {output}")
         
         # Mostrar resumo
@@ -307,118 +907,110 @@ def generate_seo(transcription_file, style='professional', output=None):
     except Exception as e:
         click.echo(f"Erro ao gerar SEO: {str(e)}")
 
+@cli.command()
+@click.argument('transcription_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--limit', '-n', type=int, default=15, help='Máximo de palavras-chave')
+@click.option('--json', 'as_json', is_flag=True, help='Exibir palavras-chave e tags em JSON')
+@click.option('--db', 'db_path', type=click.Path(dir_okay=False, path_type=Path), envvar='EDIT_VIDEO_INDEX',
+              help='Índice de busca usado para o IDF (padrão: ~/.cache/edit-video/index.db)')
+def keywords(transcription_file: Path, limit: int, as_json: bool, db_path: Optional[Path]):
+    """Extrai palavras-chave e tags de uma transcrição, localmente e sem o modelo.
+    
+    As palavras comuns na sua biblioteca (o índice do comando `index`) pesam menos; sem
+    índice, só as stopwords do português e do inglês ficam de fora.
+    """
+    import time
+    from ..core import keywords as keyword_extractor
+    
+    text = transcription_file.read_text(encoding='utf-8')
+    started = time.perf_counter()
+    idf = keyword_extractor.library_idf(db_path)
+    found = keyword_extractor.extract_keywords(text, limit=limit, idf=idf)
+    tags = keyword_extractor.candidate_tags(found, limit=limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    if as_json:
+        click.echo(json.dumps({'keywords': [keyword.to_dict() for keyword in found], 'tags': tags},
+                              indent=2, ensure_ascii=False))
+        return
+    
+    if not found:
+        console.print("[yellow]Nenhuma palavra-chave encontrada.[/yellow]")
+        return
+    
+    from rich.table import Table
+    
+    table = Table(show_header=True)
+    table.add_column("#", justify="right")
+    table.add_column("Palavra-chave")
+    table.add_column("Ocorrências", justify="right")
+    table.add_column("Pontuação", justify="right")
+    for index, keyword in enumerate(found, 1):
+        table.add_row(str(index), keyword.term, str(keyword.count), f"{keyword.score:.2f}")
+    console.print(table)
+    console.print(f"[bold cyan]Tags:[/bold cyan] {', '.join(tags)}")
+    source = f"IDF de {idf.documents} transcrição(ões) do índice" if idf else "sem índice, só stopwords"
+    console.print(f"[dim]{elapsed:.1f} ms ({source})[/dim]")
+
 @cli.command(name="pre-producao")
 @click.argument('recording_dir', type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path))
 @click.option('--files-to-keep', '-f', multiple=True, help='Lista de arquivos para manter (use múltiplas vezes)')
-def organize(recording_dir: Path, files_to_keep):
+@click.option('--mode', '-m', type=click.Choice(['copy', 'reflink', 'hardlink', 'move']), default='copy',
+              help='Como colocar os arquivos: copy usa reflink quando o sistema de arquivos suporta '
+                   '(btrfs/XFS), senão copy_file_range ou cópia em blocos')
+@click.option('--jobs', '-j', type=int, default=4, help='Arquivos colocados em paralelo')
+@click.option('--checksums/--no-checksums', default=True,
+              help='Salvar checksums.json na pasta criada (conferido depois com o comando verify)')
+def organize(recording_dir: Path, files_to_keep, mode: str, jobs: int, checksums: bool):
     """Organizado para pré produção.
     
     RECORDING_DIR: Diretório da gravação do ScreenStudio (ex: Built-in Retina Display 2025-03-16.screenstudio)
     
     O arquivo channel-2-microphone-0-seo.json será buscado automaticamente dentro da pasta recording.
     """
+    from rich.progress import (Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn,
+                               TransferSpeedColumn, TimeRemainingColumn)
+    from ..core import organizer
+    
     try:
-        # Verificar se há uma pasta 'recording' no diretório
-        recording_path = recording_dir / 'recording'
-        if not recording_path.exists():
-            # Tenta encontrar uma pasta recording dentro do diretório fornecido
-            for item in recording_dir.iterdir():
-                if item.is_dir() and item.name == 'recording':
-                    recording_path = item
-                    recording_dir = item.parent
-                    break
-            
-            if not recording_path.exists():
-                console.print(f"[red]✗ Pasta 'recording' não encontrada em {recording_dir}[/red]")
-                return
-        
-        # Define automaticamente o caminho para o arquivo channel-2-microphone-0-seo.json
-        template_json = recording_path / 'channel-2-microphone-0-seo.json'
-        
-        # Verificar se o arquivo existe
-        if not template_json.exists():
-            console.print(f"[red]✗ Arquivo 'channel-2-microphone-0-seo.json' não encontrado em {recording_path}[/red]")
-            return
-        
         with Progress(
             SpinnerColumn(),
             TextColumn("[bold blue]{task.description}"),
             BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
         ) as progress:
-            # Extrair o título do arquivo JSON
-            task = progress.add_task("[cyan]Extraindo título do arquivo JSON modelo...", total=100)
+            task = progress.add_task("[cyan]Organizando gravação...", total=None)
             
-            # Ler o arquivo JSON modelo
-            try:
-                with open(template_json, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                
-                # Adicionar log para depuração
-                console.print(f"[cyan]DEBUG: Conteúdo do JSON modelo:[/cyan] {json.dumps(json_data, indent=2)}")
-                
-                title = json_data.get('title', '')
-                if not title:
-                    console.print("[red]✗ Não foi possível encontrar a chave 'title' no arquivo JSON[/red]")
-                    return
-                
-                console.print(f"[cyan]DEBUG: Título extraído:[/cyan] {title}")
-                
-                progress.update(task, advance=25, description="Criando diretório destino...")
-                
-                # Criar o nome do diretório seguro para o sistema de arquivos
-                # Remover caracteres especiais e limitar o comprimento
-                safe_title = re.sub(r'[^\w\s-]', '', title).strip()
-                safe_title = re.sub(r'[-\s]+', '-', safe_title)
-                
-                # Limitar o comprimento para evitar caminhos muito longos
-                if len(safe_title) > 50:
-                    safe_title = safe_title[:50]
-                
-                # Criando a pasta de destino (no mesmo nível da pasta recording)
-                destination_path = recording_dir.parent / safe_title
-                if destination_path.exists():
-                    # Adicionar um sufixo numérico se a pasta já existir
-                    counter = 1
-                    while (recording_dir.parent / f"{safe_title}_{counter}").exists():
-                        counter += 1
-                    destination_path = recording_dir.parent / f"{safe_title}_{counter}"
-                
-                # Criar pasta de destino
-                destination_path.mkdir(exist_ok=True, parents=True)
-                
-                progress.update(task, advance=25, description=f"Copiando arquivos para {destination_path.name}...")
-                
-                # Definir arquivos para manter se não fornecidos
-                files_to_keep_list = list(files_to_keep) if files_to_keep else [
-                    'channel-1-display-0.mp4',
-                    'channel-2-microphone-0.mp3',
-                    'channel-2-microphone-0-seo.json', 
-                    'channel-3-webcam-0.mp4'
-                ]
-                
-                # Copiar apenas os arquivos necessários
-                for file_name in files_to_keep_list:
-                    source_file = recording_path / file_name
-                    if source_file.exists():
-                        shutil.copy2(source_file, destination_path)
-                    else:
-                        console.print(f"[yellow]⚠ Arquivo {file_name} não encontrado na pasta de origem[/yellow]")
-                
-                progress.update(task, advance=25, description="Organização concluída!")
+            def on_step(description):
+                progress.update(task, description=description)
             
-            except json.JSONDecodeError:
-                console.print(f"[red]✗ O arquivo {template_json} não é um JSON válido[/red]")
-                return
-            except Exception as e:
-                console.print(f"[red]✗ Erro ao processar o arquivo JSON: {str(e)}[/red]")
+            def on_bytes(done, total):
+                progress.update(task, completed=done, total=total)
+            
+            try:
+                result = organizer.organize_recording(recording_dir, files_to_keep, progress=on_step,
+                                                      mode=mode, workers=jobs, on_bytes=on_bytes,
+                                                      checksums=checksums)
+            except (OSError, ValueError) as e:
+                console.print(f"[red]✗ {str(e)}[/red]")
                 return
-                
+            
+            for file_name in result.missing:
+                console.print(f"[yellow]⚠ Arquivo {file_name} não encontrado na pasta de origem[/yellow]")
+            
             # Finalizar
-            progress.update(task, advance=25, description="Organização concluída!")
+            progress.update(task, description="Organização concluída!")
             
         # Mensagem de sucesso
-        console.print(f"[green]✓[/green] Pasta criada com sucesso: [bold]{destination_path}[/bold]")
-        console.print(f"[green]✓[/green] Título extraído: [bold]{title}[/bold]")
+        console.print(f"[green]✓[/green] Pasta criada com sucesso: [bold]{result.destination}[/bold]")
+        console.print(f"[green]✓[/green] Título extraído: [bold]{result.title}[/bold]")
+        for file_name, method in result.methods.items():
+            console.print(f"  {file_name}: {method}")
+        if result.checksums:
+            console.print(f"[green]✓[/green] Checksums salvos em [bold]{result.checksums.name}[/bold] "
+                          f"(confira com: edit-video verify \"{result.destination}\")")
         
     except Exception as e:
         console.print(f"[red]✗ Erro ao organizar gravação:[/red] {str(e)}")
@@ -426,21 +1018,127 @@ def organize(recording_dir: Path, files_to_keep):
         raise click.Abort()
 
 @cli.command()
-@click.argument('input_file', type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path))
+@click.argument('folder', type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path))
+@click.option('--full', is_flag=True,
+              help='Recalcular todos os arquivos, inclusive os já verificados e sem alteração')
+@click.option('--jobs', '-j', type=int, default=None, help='Threads de cálculo dos checksums')
+def verify(folder: Path, full: bool, jobs: Optional[int]):
+    """Confere a integridade de uma pasta criada por pre-producao.
+    
+    FOLDER: Pasta com o arquivo checksums.json
+    
+    Arquivos já verificados cujo tamanho e data de modificação não mudaram são pulados,
+    a menos que --full seja usado. Sai com código 1 se algum arquivo estiver corrompido
+    ou ausente.
+    """
+    from rich.progress import (Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn,
+                               TransferSpeedColumn, TimeRemainingColumn)
+    from ..core import integrity
+    
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[bold blue]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+        ) as progress:
+            task = progress.add_task("[cyan]Verificando checksums...", total=None)
+            
+            def on_bytes(done, total):
+                progress.update(task, completed=done, total=total)
+            
+            result = integrity.verify_folder(folder, full=full, workers=jobs, on_bytes=on_bytes)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]✗ {str(e)}[/red]")
+        raise click.Abort()
+    
+    for name in result.ok:
+        console.print(f"[green]✓[/green] {name}")
+    for name in result.skipped:
+        console.print(f"[dim]↺ {name} (sem alterações desde a última verificação)[/dim]")
+    for name, reason in result.corrupted.items():
+        console.print(f"[red]✗ {name}: {reason}[/red]")
+    for name in result.missing:
+        console.print(f"[red]✗ {name}: ausente[/red]")
+    
+    if not result.passed:
+        console.print(f"[red]✗ Verificação falhou em {folder}[/red]")
+        sys.exit(1)
+    console.print("[green]✓[/green] Todos os arquivos conferem com o manifesto")
+
+@cli.command()
+@click.argument('inputs', nargs=-1, required=True)
 @click.option('--style', '-s', 
               type=click.Choice(['clickbait', 'professional', 'educational', 'neutral']),
               default='clickbait',
               help='Estilo do SEO')
-def converter_transcrever_seo(input_file: Path, style: str):
+@click.option('--jobs', '-j', type=int, default=None,
+              help='Conversões em paralelo no modo em lote (padrão: número de CPUs)')
+@click.option('--concurrency', '-c', type=int, default=2,
+              help='Arquivos transcritos/gerando SEO ao mesmo tempo no modo em lote')
+@click.option('--recursive', '-r', is_flag=True, help='Buscar arquivos em subdiretórios')
+@click.option('--report', type=click.Path(dir_okay=False, path_type=Path),
+              help='Arquivo JSON para o relatório do lote')
+@click.option('--force', is_flag=True, help='Refazer todas as etapas, ignorando o manifesto')
+@click.option('--denoise', is_flag=True, help='Reduzir o ruído do áudio antes de enviá-lo para transcrição')
+@click.option('--chapters', is_flag=True,
+              help='Detectar capítulos pelas mudanças de cena dos vídeos e usá-los na descrição do SEO')
+@click.option('--compact', is_flag=True,
+              help='Enviar ao modelo só as palavras-chave e as frases principais, não a transcrição inteira')
+@click.option('--no-llm', is_flag=True, help='Gerar o SEO localmente, sem chamar o modelo (mais rápido, menos polido)')
+@click.option('--skip-duplicates', is_flag=True,
+              help='No lote, pular arquivos com o mesmo áudio de outro já indexado ou anterior no lote')
+def converter_transcrever_seo(inputs, style: str, jobs: Optional[int], concurrency: int,
+                              recursive: bool, report: Optional[Path], force: bool, denoise: bool, chapters: bool,
+                              compact: bool, no_llm: bool, skip_duplicates: bool):
     """Converte, transcreve e gera SEO para um arquivo de áudio/vídeo em uma só operação.
     
     Similar à funcionalidade da extensão VS Code "Agent for YouTuber".
+    
+    INPUTS pode ser um arquivo, vários arquivos, diretórios ou padrões glob
+    (ex: "gravacoes/*.mp4"). Com mais de um arquivo, o processamento é feito em lote:
+    a conversão roda em paralelo enquanto os arquivos já convertidos são transcritos.
+    
+    Cada entrada ganha um manifesto (<nome>.manifest.json) com os hashes das entradas,
+    parâmetros e saídas de cada etapa. Ao rodar de novo, etapas sem mudanças são puladas
+    e suas saídas reaproveitadas, então um lote interrompido continua de onde parou.
+    
+    Com --chapters, os vídeos ganham capítulos (<nome>-chapters.json) detectados nas
+    mudanças de cena e nas pausas da fala, e a descrição usa esses timestamps.
+    
+    Com --compact, o modelo recebe só as palavras-chave e as frases principais extraídas
+    localmente; com --no-llm, o SEO sai só delas, sem nenhuma chamada ao modelo.
+    
+    Com --skip-duplicates, o lote primeiro calcula as impressões digitais do áudio e pula
+    as gravações exportadas duas vezes (veja o comando duplicates).
     """
+    from ..core import pipeline
+    
+    seo_mode = _seo_mode(compact, no_llm)
+    if len(inputs) == 1 and Path(inputs[0]).is_file():
+        if _server_address() is not None and _converter_transcrever_seo_remote(Path(inputs[0]), style, force,
+                                                                              denoise, chapters, seo_mode):
+            return
+        _converter_transcrever_seo_single(Path(inputs[0]), style, force, denoise, chapters, seo_mode)
+        return
+    
+    files = pipeline.collect_inputs(inputs, recursive=recursive, prefer_video=chapters)
+    if not files:
+        console.print("[red]✗ Nenhum arquivo de áudio/vídeo suportado encontrado[/red]")
+        raise click.Abort()
+    
+    _converter_transcrever_seo_batch(files, style, jobs, concurrency, report, force, denoise, chapters, seo_mode,
+                                     skip_duplicates)
+
+def _converter_transcrever_seo_single(input_file: Path, style: str, force: bool = False, denoise: bool = False,
+                                      chapters: bool = False, seo_mode: str = 'full'):
+    """Fluxo de um único arquivo do comando converter-transcrever-seo"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+    
     try:
-        from ..core.audio_processor import AudioProcessor
-        from ..utils import file_utils
-        from ..core import transcription, seo_generator
-        import os
+        from ..core import pipeline
         
         # 1. Processar o arquivo de entrada (converter para MP3)
         with Progress(
@@ -454,83 +1152,606 @@ def converter_transcrever_seo(input_file: Path, style: str):
             file_ext = input_file.suffix.lower()
             mp3_path = input_file
             
-            # Se não for MP3, converter
+            # Se não for MP3, converter (progresso real do ffmpeg em 0-40%)
             if file_ext != '.mp3':
-                progress.update(task, advance=10, description="Convertendo para MP3...")
+                progress.update(task, description="Convertendo para MP3...")
                 
-                # Criar o caminho do arquivo MP3
-                mp3_path = input_file.with_suffix('.mp3')
+                if file_ext not in pipeline.VIDEO_FORMATS + pipeline.AUDIO_FORMATS:
+                    console.print(f"[red]✗ Formato não suportado: {file_ext}[/red]")
+                    return
                 
-                # Verificar se é vídeo ou áudio
-                video_formats = ['.mp4', '.avi', '.mov', '.mkv', '.webm']
-                audio_formats = ['.m4a', '.wav', '.ogg', '.flac']
-                is_video = file_ext in video_formats
-                is_audio = file_ext in audio_formats
+                def on_convert(job):
+                    if job.fraction is not None:
+                        progress.update(task, completed=40 * job.fraction)
                 
-                if not (is_audio or is_video):
-                    console.print(f"[red]✗ Formato não suportado: {file_ext}[/red]")
+                try:
+                    mp3_path, reused = pipeline.convert_stage(input_file, force=force, on_progress=on_convert)
+                except RuntimeError as e:
+                    console.print(f"[red]✗ {str(e)}[/red]")
                     return
                 
-                if is_video:
-                    # Para vídeo, extrair o áudio usando ffmpeg
-                    cmd = ['ffmpeg', '-i', str(input_file), '-q:a', '0', '-map', 'a', str(mp3_path), '-y']
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode != 0:
-                        console.print(f"[red]✗ Erro ao extrair áudio do vídeo: {result.stderr}[/red]")
-                        return
+                if reused:
+                    console.print(f"[green]↺[/green] MP3 sem mudanças, reaproveitado: [bold]{mp3_path}[/bold]")
                 else:
-                    # Para áudio, converter para MP3
-                    cmd = ['ffmpeg', '-i', str(input_file), '-codec:a', 'libmp3lame', '-qscale:a', '2', str(mp3_path), '-y']
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    if result.returncode != 0:
-                        console.print(f"[red]✗ Erro ao converter áudio: {result.stderr}[/red]")
-                        return
-                        
-                console.print(f"[green]✓[/green] Arquivo convertido para MP3: [bold]{mp3_path}[/bold]")
+                    console.print(f"[green]✓[/green] Arquivo convertido para MP3: [bold]{mp3_path}[/bold]")
             
             # 2. Transcrever o arquivo MP3
-            progress.update(task, advance=40, description="Transcrevendo áudio...")
+            progress.update(task, completed=40, description="Reduzindo ruído e transcrevendo áudio..."
+                            if denoise else "Transcrevendo áudio...")
             
             try:
-                text = transcription.transcribe_audio(str(mp3_path))
+                # Transcrever e salvar a transcrição em arquivo
+                _, transcription_path, reused = pipeline.transcribe_stage(mp3_path, force=force, denoise=denoise)
                 
-                # Salvar a transcrição em arquivo
-                transcription_path = mp3_path.with_suffix('.txt')
-                with open(transcription_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                    
-                console.print(f"[green]✓[/green] Transcrição salva em: [bold]{transcription_path}[/bold]")
+                if reused:
+                    console.print(f"[green]↺[/green] Transcrição reaproveitada: [bold]{transcription_path}[/bold]")
+                else:
+                    console.print(f"[green]✓[/green] Transcrição salva em: [bold]{transcription_path}[/bold]")
                 
-                # 3. Gerar SEO
-                progress.update(task, advance=40, description=f"Gerando SEO com estilo '{style}'...")
+                # Capítulos pelas mudanças de cena (só para vídeos)
+                if chapters and file_ext in pipeline.VIDEO_FORMATS:
+                    progress.update(task, description="Detectando capítulos...")
+                    found, chapters_path, reused = pipeline.chapters_stage(input_file, input_file, mp3_path,
+                                                                           force=force)
+                    if reused:
+                        console.print(f"[green]↺[/green] Capítulos reaproveitados: [bold]{chapters_path}[/bold]")
+                    else:
+                        console.print(f"[green]✓[/green] {len(found)} capítulos salvos em: [bold]{chapters_path}[/bold]")
+                elif chapters:
+                    console.print("[yellow]⚠ --chapters ignorado: a entrada não é um vídeo[/yellow]")
                 
-                seo_data = seo_generator.generate_seo(text, style=style)
+                # 3. Gerar SEO
+                progress.update(task, completed=80, description=f"Gerando SEO com estilo '{style}'...")
                 
-                # Salvar SEO em arquivo JSON
-                seo_path = mp3_path.with_suffix('-seo.json')
-                with open(seo_path, 'w', encoding='utf-8') as f:
-                    json.dump(seo_data, f, indent=2)
+                # Gerar e salvar SEO em arquivo JSON
+                seo_data, seo_path, reused = pipeline.seo_stage(mp3_path, style, force=force, mode=seo_mode)
                 
-                console.print(f"[green]✓[/green] SEO salvo em: [bold]{seo_path}[/bold]")
+                if reused:
+                    console.print(f"[green]↺[/green] SEO reaproveitado: [bold]{seo_path}[/bold]")
+                else:
+                    console.print(f"[green]✓[/green] SEO salvo em: [bold]{seo_path}[/bold]")
                 
                 # Mostrar resumo
-                console.print("\n[bold cyan]SEO Gerado:[/bold cyan]")
-                console.print(f"Título: [bold]{seo_data['title']}[/bold]")
-                console.print(f"Tags: {', '.join(seo_data['tags'])}")
-                console.print("Descrição:")
-                console.print(seo_data['description'][:200] + "..." if len(seo_data['description']) > 200 else seo_data['description'])
+                _print_seo_summary(seo_data)
                 
-                progress.update(task, advance=10, description="Concluído!")
+                progress.update(task, completed=100, description="Concluído!")
                 
             except Exception as e:
                 console.print(f"[red]✗ Erro ao processar: {str(e)}[/red]")
                 logger.exception("Erro durante processamento")
                 raise click.Abort()
                 
+    except click.Abort:
+        raise
     except Exception as e:
         console.print(f"[red]✗ Erro: {str(e)}[/red]")
         logger.exception("Erro no processamento completo")
         raise click.Abort()
 
+def _converter_transcrever_seo_remote(input_file: Path, style: str, force: bool = False,
+                                     denoise: bool = False, chapters: bool = False, seo_mode: str = 'full') -> bool:
+    """Fluxo de um único arquivo no serviço local; False se o serviço não estiver no ar"""
+    result = _run_remote('seo', {
+        'file': str(input_file.resolve()),
+        'style': style,
+        'force': force,
+        'denoise': denoise,
+        'chapters': chapters,
+        'seo_mode': seo_mode,
+    }, "[cyan]Processando arquivo...")
+    if result is None:
+        return False
+    
+    outputs = [('convert', "MP3 sem mudanças, reaproveitado", "Arquivo convertido para MP3", result['mp3']),
+               ('transcribe', "Transcrição reaproveitada", "Transcrição salva em", result['transcription_path']),
+               ('chapters', "Capítulos reaproveitados", "Capítulos salvos em", result.get('chapters_path')),
+               ('seo', "SEO reaproveitado", "SEO salvo em", result['seo_path'])]
+    for stage, reused, created, path in outputs:
+        if (stage == 'convert' and input_file.suffix.lower() == '.mp3') or not path:
+            continue
+        if stage in result['reused']:
+            console.print(f"[green]↺[/green] {reused}: [bold]{path}[/bold]")
+        else:
+            console.print(f"[green]✓[/green] {created}: [bold]{path}[/bold]")
+    _print_seo_summary(result['seo'])
+    return True
+
+def _stage_cell(result, stage: str) -> str:
+    """Formata a célula de uma etapa na tabela de resumo do lote"""
+    if stage in result.reused:
+        return "↺"
+    if stage in result.timings:
+        return f"{result.timings[stage]:.1f}"
+    return "-"
+
+def _converter_transcrever_seo_batch(files: List[Path], style: str, jobs: Optional[int],
+                                     concurrency: int, report: Optional[Path], force: bool = False,
+                                     denoise: bool = False, chapters: bool = False, seo_mode: str = 'full',
+                                     skip_duplicates: bool = False):
+    """Fluxo em lote do comando converter-transcrever-seo"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeElapsedColumn
+    from rich.table import Table
+    from ..core import pipeline
+    
+    console.print(f"[cyan]Processando [bold]{len(files)}[/bold] arquivos em lote...[/cyan]")
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[bold blue]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed}/{task.total}"),
+        TimeElapsedColumn()
+    ) as progress:
+        tasks = {
+            'convert': progress.add_task("Convertendo para MP3", total=len(files)),
+            'transcribe': progress.add_task("Transcrevendo", total=len(files)),
+            'seo': progress.add_task("Gerando SEO", total=len(files)),
+            'failed': progress.add_task("[red]Falhas", total=len(files)),
+        }
+        
+        def on_event(stage, result):
+            if stage == 'duplicate':
+                progress.console.print(f"[yellow]= {result.input_file.name}: mesmo áudio de "
+                                       f"{Path(result.duplicate_of).name}, pulado[/yellow]")
+                return
+            progress.advance(tasks[stage])
+            if stage == 'failed':
+                progress.console.print(f"[red]✗ {result.input_file.name}: {result.error}[/red]")
+        
+        batch = pipeline.BatchPipeline(style=style, workers=jobs, concurrency=concurrency,
+                                       on_event=on_event, force=force, denoise=denoise, chapters=chapters,
+                                       seo_mode=seo_mode, skip_duplicates=skip_duplicates)
+        if skip_duplicates:
+            progress.console.print("[cyan]Procurando gravações duplicadas...[/cyan]")
+        results = batch.run(files)
+    
+    # Tabela de resumo por arquivo
+    table = Table(show_header=True, title="Resumo do lote")
+    table.add_column("Arquivo")
+    table.add_column("Status")
+    for stage in pipeline.STAGES:
+        table.add_column(f"{stage} (s)", justify="right")
+    table.add_column("Título")
+    table.caption = "↺ = etapa sem mudanças, saída reaproveitada"
+    
+    for result in results:
+        table.add_row(
+            result.input_file.name,
+            ("[yellow]= duplicata[/yellow]" if result.duplicate_of else
+             "[green]✓[/green]" if result.ok else f"[red]✗ {result.failed_stage}[/red]"),
+            *(_stage_cell(result, stage) for stage in pipeline.STAGES),
+            result.title or (f"= {Path(result.duplicate_of).name}" if result.duplicate_of else "")
+        )
+    console.print(table)
+    
+    skipped = [result for result in results if result.duplicate_of]
+    if skipped:
+        console.print(f"[yellow]{len(skipped)} arquivo(s) pulado(s) por repetir o áudio de outra gravação[/yellow]")
+    
+    # Relatório de falhas
+    failures = [result for result in results if not result.ok]
+    if failures:
+        console.print(f"\n[red]Falhas em [bold]{len(failures)}[/bold] de {len(results)} arquivos:[/red]")
+        for result in failures:
+            console.print(f"[red]✗[/red] {result.input_file} ([bold]{result.failed_stage}[/bold]): {result.error}")
+    else:
+        console.print(f"\n[green]✓[/green] Todos os {len(results)} arquivos foram processados com sucesso")
+    
+    if report:
+        file_utils.save_json({
+            'style': style,
+            'total': len(results),
+            'failed': len(failures),
+            'files': [result.to_dict() for result in results]
+        }, report)
+        console.print(f"[green]Relatório salvo em: [bold]{report}[/bold][/green]")
+    
+    if failures:
+        raise click.Abort()
+
+@cli.command()
+@click.option('--address', '-a', default=None,
+              help='Socket Unix ou endereço TCP (padrão: EDIT_VIDEO_SERVER ou um socket no diretório do usuário)')
+@click.option('--port', '-p', type=int, default=None, help='Escutar em 127.0.0.1 nesta porta em vez do socket Unix')
+@click.option('--jobs', '-j', type=int, default=4, help='Jobs executados ao mesmo tempo')
+def serve(address: Optional[str], port: Optional[int], jobs: int):
+    """Inicia o serviço local usado pelo modo cliente do CLI e pela extensão.
+    
+    O serviço mantém a sessão HTTP do Gemini, o cache do ffprobe e os resultados
+    recentes entre as chamadas, então cada ação deixa de pagar a inicialização do
+    Python e das bibliotecas. Use `edit-video --server <comando>` para enviar jobs.
+    """
+    import asyncio
+    from ..core import service
+    
+    if port is not None:
+        address = f"http://127.0.0.1:{port}"
+    
+    def on_ready(address):
+        console.print(f"[green]✓[/green] Serviço escutando em [bold]{address}[/bold] (Ctrl+C para sair)")
+    
+    try:
+        asyncio.run(service.serve(address, max_jobs=jobs, on_ready=on_ready))
+    except KeyboardInterrupt:
+        console.print("\n[cyan]Serviço encerrado[/cyan]")
+    except (RuntimeError, OSError, ValueError) as e:
+        console.print(f"[red]✗ {str(e)}[/red]")
+        raise click.Abort()
+
+@cli.command()
+@click.argument('folder', type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path))
+@click.option('--style', '-s', 
+              type=click.Choice(['clickbait', 'professional', 'educational', 'neutral']),
+              default='clickbait',
+              help='Estilo do SEO')
+@click.option('--concurrency', '-c', type=int, default=2, help='Gravações processadas ao mesmo tempo')
+@click.option('--api-concurrency', type=int, default=2, help='Chamadas simultâneas à API do Gemini')
+@click.option('--api-per-minute', type=float, default=None, help='Limite de chamadas à API por minuto')
+@click.option('--queue-size', type=int, default=8, help='Tamanho máximo da fila de gravações prontas')
+@click.option('--stable-seconds', type=float, default=10.0,
+              help='Segundos sem mudanças para considerar uma gravação completa')
+@click.option('--poll-interval', type=float, default=2.0, help='Intervalo entre verificações (s)')
+@click.option('--process-existing/--skip-existing', default=True,
+              help='Processar gravações que já estão na pasta ao iniciar')
+@click.option('--polling', is_flag=True, help='Usar varredura periódica em vez de inotify')
+def watch(folder: Path, style: str, concurrency: int, api_concurrency: int, api_per_minute: Optional[float],
+          queue_size: int, stable_seconds: float, poll_interval: float, process_existing: bool, polling: bool):
+    """Monitora uma pasta e processa automaticamente novas gravações do ScreenStudio.
+    
+    Cada bundle .screenstudio novo é processado, quando para de crescer, por
+    analyze, converter-transcrever-seo (canal do microfone) e pre-producao.
+    O estado fica em .edit-video-watch.json dentro da pasta monitorada.
+    """
+    from ..core.watcher import FolderWatcher
+    
+    styles = {
+        'discovered': "[cyan]●[/cyan] Nova gravação",
+        'queued': "[cyan]→[/cyan] Na fila",
+        'started': "[blue]▶[/blue] Processando",
+        'done': "[green]✓[/green] Concluído",
+        'failed': "[red]✗[/red] Falha",
+    }
+    
+    def on_event(event, bundle, message):
+        console.print(f"{styles.get(event, event)}: [bold]{bundle.name}[/bold] {message}")
+    
+    watcher = FolderWatcher(
+        folder,
+        style=style,
+        concurrency=concurrency,
+        api_concurrency=api_concurrency,
+        api_per_minute=api_per_minute,
+        queue_size=queue_size,
+        stable_seconds=stable_seconds,
+        poll_interval=poll_interval,
+        process_existing=process_existing,
+        use_inotify=not polling,
+        on_event=on_event
+    )
+    
+    console.print(f"[cyan]Monitorando [bold]{folder}[/bold] (Ctrl+C para sair)...[/cyan]")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        stats = watcher.stats
+        console.print(f"\n[cyan]Monitoramento encerrado:[/cyan] {stats.processed} processadas, "
+                      f"{stats.failed} falhas, {len(stats.in_progress)} interrompidas")
+
+#
+# Fila persistente
+#
+
+@cli.group()
+@click.option('--db', 'db_path', type=click.Path(dir_okay=False, path_type=Path), envvar='EDIT_VIDEO_QUEUE',
+              help='Banco SQLite da fila (padrão: EDIT_VIDEO_QUEUE ou ~/.cache/edit-video/queue.db)')
+@click.pass_context
+def queue(ctx, db_path: Optional[Path]):
+    """Fila persistente de jobs, processada por um ou mais workers.
+    
+    Os jobs sobrevivem ao processo: um worker interrompido (ou que travou) tem seus
+    jobs retomados por outro worker ou na próxima execução, a partir da etapa em que parou.
+    """
+    ctx.obj = db_path
+
+@queue.command(name='add')
+@click.argument('inputs', nargs=-1, required=True)
+@click.option('--style', '-s', 
+              type=click.Choice(['clickbait', 'professional', 'educational', 'neutral']),
+              default='clickbait',
+              help='Estilo do SEO')
+@click.option('--stages', help='Etapas separadas por vírgula (padrão: convert,transcribe,seo para arquivos e '
+                               'analyze,convert,transcribe,chapters,seo,pre-producao para gravações .screenstudio)')
+@click.option('--recursive', '-r', is_flag=True, help='Buscar arquivos em subdiretórios')
+@click.option('--force', is_flag=True, help='Refazer todas as etapas, ignorando o manifesto')
+@click.option('--denoise', is_flag=True, help='Reduzir o ruído do áudio antes de enviá-lo para transcrição')
+@click.option('--compact', is_flag=True,
+              help='Enviar ao modelo só as palavras-chave e as frases principais, não a transcrição inteira')
+@click.option('--no-llm', is_flag=True, help='Gerar o SEO localmente, sem chamar o modelo (mais rápido, menos polido)')
+@click.pass_obj
+def queue_add(db_path: Optional[Path], inputs, style: str, stages: Optional[str], recursive: bool,
+              force: bool, denoise: bool, compact: bool, no_llm: bool):
+    """Adiciona arquivos ou gravações do ScreenStudio à fila."""
+    from ..core import pipeline
+    from ..core.job_queue import JobQueue, RECORDING_SUFFIX
+    
+    job_queue = JobQueue(db_path)
+    recordings = [Path(i) for i in inputs if Path(i).is_dir() and Path(i).name.endswith(RECORDING_SUFFIX)]
+    others = [i for i in inputs if Path(i) not in recordings]
+    stage_list = [stage.strip() for stage in stages.split(',')] if stages else None
+    prefer_video = 'chapters' in (stage_list or ())
+    targets = recordings + (pipeline.collect_inputs(others, recursive=recursive, prefer_video=prefer_video)
+                            if others else [])
+    if not targets:
+        console.print("[red]✗ Nenhum arquivo ou gravação suportada encontrada[/red]")
+        raise click.Abort()
+    
+    seo_mode = _seo_mode(compact, no_llm)
+    added = 0
+    for target in targets:
+        try:
+            job_id = job_queue.add(target, stage_list, style=style, force=force, denoise=denoise, seo_mode=seo_mode)
+        except ValueError as e:
+            console.print(f"[red]✗ {str(e)}[/red]")
+            raise click.Abort()
+        if job_id is None:
+            console.print(f"[yellow]↺[/yellow] Já está na fila: [bold]{target}[/bold]")
+        else:
+            added += 1
+            console.print(f"[green]✓[/green] Job {job_id}: [bold]{target}[/bold]")
+    console.print(f"[cyan]{added} job(s) adicionados em {job_queue.path}[/cyan]")
+
+@queue.command(name='work')
+@click.option('--concurrency', '-c', type=int, default=2, help='Jobs processados ao mesmo tempo por este worker')
+@click.option('--lease', type=float, default=120.0,
+              help='Validade do lease (s); sem heartbeat nesse tempo, outro worker assume o job')
+@click.option('--drain', is_flag=True, help='Encerrar quando a fila estiver vazia')
+@click.pass_obj
+def queue_work(db_path: Optional[Path], concurrency: int, lease: float, drain: bool):
+    """Processa jobs da fila (vários workers podem rodar ao mesmo tempo)."""
+    from ..core.job_queue import JobQueue, QueueWorker
+    
+    styles = {
+        'stage': "[blue]▶[/blue] Etapa",
+        'retry': "[yellow]↻[/yellow] Nova tentativa",
+        'done': "[green]✓[/green] Concluído",
+        'failed': "[red]✗[/red] Falha",
+    }
+    
+    def on_event(event, job, message):
+        console.print(f"{styles.get(event, event)}: [bold]{job.target.name}[/bold] (job {job.id}) {message}")
+    
+    worker = QueueWorker(JobQueue(db_path), concurrency=concurrency, lease=lease, drain=drain, on_event=on_event)
+    console.print(f"[cyan]Worker [bold]{worker.owner}[/bold] processando {worker.queue.path} "
+                  f"(Ctrl+C para sair)...[/cyan]")
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        console.print("\n[cyan]Worker encerrado; jobs em andamento voltaram para a fila[/cyan]")
+    stats = worker.stats
+    console.print(f"[cyan]{stats['jobs']} job(s) concluídos, {stats['stages']} etapas, "
+                  f"{stats['retries']} novas tentativas agendadas, {stats['failed']} falhas[/cyan]")
+
+@queue.command(name='status')
+@click.option('--window', type=float, default=60.0, help='Janela (min) usada para calcular a vazão')
+@click.option('--json', 'as_json', is_flag=True, help='Exibir o resumo em JSON')
+@click.pass_obj
+def queue_status(db_path: Optional[Path], window: float, as_json: bool):
+    """Mostra backlog, vazão e jobs em execução ou falhos."""
+    from rich.table import Table
+    from ..core.job_queue import JobQueue
+    
+    status = JobQueue(db_path).status(window=window * 60)
+    if as_json:
+        click.echo(json.dumps(status, indent=2, ensure_ascii=False))
+        return
+    
+    counts = status['counts']
+    console.print(f"[bold cyan]Fila:[/bold cyan] {counts.get('queued', 0)} na fila "
+                  f"({status['ready']} prontos, {status['delayed']} aguardando nova tentativa), "
+                  f"{counts.get('running', 0)} em execução, {counts.get('done', 0)} concluídos, "
+                  f"{counts.get('failed', 0)} falhos")
+    throughput = f"{status['throughput_per_hour']:.1f} jobs/h nos últimos {window:g} min"
+    if status['eta_seconds'] is not None:
+        throughput += f"; backlog de {status['backlog']} job(s) em ~{status['eta_seconds'] / 60:.0f} min"
+    console.print(f"[bold cyan]Vazão:[/bold cyan] {throughput}")
+    if status['oldest_wait'] is not None:
+        console.print(f"[bold cyan]Job mais antigo na fila:[/bold cyan] há {status['oldest_wait'] / 60:.1f} min")
+    
+    if status['stages']:
+        table = Table(title="Etapas", show_header=True)
+        table.add_column("Etapa")
+        table.add_column("Execuções", justify="right")
+        table.add_column("Falhas", justify="right")
+        table.add_column("Tempo médio (s)", justify="right")
+        for row in status['stages']:
+            average = f"{row['average']:.1f}" if row['average'] is not None else "-"
+            table.add_row(row['stage'], str(row['runs']), str(row['failures']), average)
+        console.print(table)
+    
+    if status['running']:
+        table = Table(title="Em execução", show_header=True)
+        table.add_column("Job", justify="right")
+        table.add_column("Alvo")
+        table.add_column("Etapa")
+        table.add_column("Worker")
+        table.add_column("Lease (s)", justify="right")
+        for row in status['running']:
+            table.add_row(str(row['id']), Path(row['target']).name, row['stage'], row['lease_owner'],
+                          f"{row['lease_left']:.0f}")
+        console.print(table)
+    
+    for row in status['failed']:
+        console.print(f"[red]✗[/red] Job {row['id']} [bold]{Path(row['target']).name}[/bold] "
+                      f"na etapa '{row['stage']}' após {row['attempts']} tentativas: {row['error']}")
+
+@queue.command(name='retry')
+@click.argument('job_ids', nargs=-1, type=int)
+@click.pass_obj
+def queue_retry(db_path: Optional[Path], job_ids):
+    """Devolve jobs falhos à fila (todos, ou apenas JOB_IDS)."""
+    from ..core.job_queue import JobQueue
+    
+    count = JobQueue(db_path).retry_failed(list(job_ids) or None)
+    console.print(f"[green]✓[/green] {count} job(s) voltaram para a fila")
+
+#
+# Busca na biblioteca
+#
+
+@cli.command()
+@click.argument('roots', nargs=-1, type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path))
+@click.option('--db', 'db_path', type=click.Path(dir_okay=False, path_type=Path), envvar='EDIT_VIDEO_INDEX',
+              help='Banco do índice (padrão: ~/.cache/edit-video/index.db)')
+def index(roots, db_path: Optional[Path]):
+    """Indexa transcrições e SEOs das pastas ROOTS para a busca.
+    
+    Sem ROOTS, atualiza as pastas já indexadas. Só os vídeos novos ou alterados são
+    relidos; depois disso, o pipeline atualiza o índice sozinho a cada transcrição ou SEO.
+    """
+    import time
+    from ..core.search_index import SearchIndex
+    
+    search_index = SearchIndex(db_path)
+    if not roots and not search_index.roots():
+        console.print("[yellow]Nenhuma pasta indexada. Informe ao menos uma pasta.[/yellow]")
+        return
+    
+    started = time.perf_counter()
+    with console.status("[cyan]Indexando..."):
+        stats = search_index.update(roots)
+    elapsed = time.perf_counter() - started
+    
+    info = search_index.stats()
+    console.print(f"[green]✓[/green] {stats['added']} adicionado(s), {stats['updated']} atualizado(s), "
+                  f"{stats['removed']} removido(s), {stats['unchanged']} sem mudanças em {elapsed:.2f}s")
+    console.print(f"[bold cyan]Índice:[/bold cyan] {info['videos']} vídeo(s) em {len(info['roots'])} pasta(s) "
+                  f"({info['bytes'] / 1024 / 1024:.1f} MB) - {info['path']}")
+
+@cli.command()
+@click.argument('query')
+@click.option('--limit', '-n', type=int, default=10, help='Máximo de resultados')
+@click.option('--raw', is_flag=True, help='Usar QUERY como consulta FTS5 (AND, OR, NEAR, "frase", prefixo*)')
+@click.option('--json', 'as_json', is_flag=True, help='Exibir os resultados em JSON')
+@click.option('--db', 'db_path', type=click.Path(dir_okay=False, path_type=Path), envvar='EDIT_VIDEO_INDEX',
+              help='Banco do índice (padrão: ~/.cache/edit-video/index.db)')
+def search(query: str, limit: int, raw: bool, as_json: bool, db_path: Optional[Path]):
+    """Busca vídeos por título, tags, descrição e transcrição.
+    
+    Os resultados vêm ordenados por relevância (bm25), com um trecho em volta dos termos
+    encontrados. Acentos e maiúsculas são ignorados.
+    """
+    import time
+    from ..core import search_index as search_module
+    
+    path = db_path or search_module.default_path()
+    if not path.exists():
+        console.print("[yellow]Índice não encontrado. Rode `edit-video index PASTA` primeiro.[/yellow]")
+        raise click.Abort()
+    
+    started = time.perf_counter()
+    try:
+        results = search_module.SearchIndex(path).search(query, limit=limit, raw=raw)
+    except ValueError as e:
+        console.print(f"[red]✗[/red] {e}")
+        raise click.Abort()
+    elapsed = (time.perf_counter() - started) * 1000
+    
+    if as_json:
+        click.echo(json.dumps([result.to_dict() for result in results], indent=2, ensure_ascii=False))
+        return
+    
+    from rich.markup import escape
+    from rich.table import Table
+    from rich.text import Text
+    
+    if not results:
+        console.print(f"[yellow]Nenhum resultado para '{escape(query)}' ({elapsed:.1f} ms).[/yellow]")
+        return
+    
+    table = Table(show_header=True, show_lines=True)
+    table.add_column("#", justify="right")
+    table.add_column("Vídeo")
+    table.add_column("Trecho")
+    for number, result in enumerate(results, 1):
+        video = Text(result.title or Path(result.key).name, style="bold")
+        video.append(f"\n{result.key}", style="dim")
+        snippet = Text()
+        for part, highlighted in search_module.iter_highlights(result.snippet):
+            snippet.append(part, style="bold yellow" if highlighted else None)
+        table.add_row(str(number), video, snippet)
+    console.print(table)
+    console.print(f"[dim]{len(results)} resultado(s) em {elapsed:.1f} ms[/dim]")
+
+@cli.command()
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, path_type=Path))
+@click.option('--min-overlap', type=float, default=0.2, show_default=True,
+              help='Sobreposição mínima (0 a 1) de um dos lados para reportar')
+@click.option('--jobs', '-j', type=int, default=None, help='Arquivos decodificados ao mesmo tempo')
+@click.option('--json', 'as_json', is_flag=True, help='Exibir as correspondências em JSON')
+@click.option('--db', 'db_path', type=click.Path(dir_okay=False, path_type=Path), envvar='EDIT_VIDEO_FINGERPRINTS',
+              help='Banco das impressões digitais (padrão: ~/.cache/edit-video/fingerprints.db)')
+def duplicates(paths, min_overlap: float, jobs: Optional[int], as_json: bool, db_path: Optional[Path]):
+    """Encontra gravações duplicadas ou com trechos em comum pelo áudio.
+    
+    PATHS são arquivos ou pastas (recursivo). Cada arquivo novo ou alterado ganha uma
+    impressão digital (hashes de picos espectrais) guardada em um índice, e cada um é
+    procurado em todo o índice, inclusive nos arquivos de execuções anteriores. Para cada
+    par, mostra a sobreposição de cada lado e o deslocamento entre eles.
+    """
+    import asyncio
+    import time
+    from ..core import duplicates as duplicates_module
+    from ..core.pipeline import AUDIO_FORMATS, VIDEO_FORMATS
+    
+    files = duplicates_module.media_files(paths, VIDEO_FORMATS + AUDIO_FORMATS)
+    if not files:
+        console.print("[red]✗ Nenhum arquivo de áudio/vídeo suportado encontrado[/red]")
+        raise click.Abort()
+    index = duplicates_module.FingerprintIndex(db_path)
+    
+    started = time.perf_counter()
+    counts = {'new': 0, 'reused': 0}
+    with console.status(f"[cyan]Calculando impressões digitais de {len(files)} arquivo(s)...") as status:
+        def on_file(media, reused):
+            counts['reused' if reused else 'new'] += 1
+            status.update(f"[cyan]Impressões digitais: {sum(counts.values())}/{len(files)}")
+        
+        found = asyncio.run(duplicates_module.find_duplicates_async(files, index, min_overlap=min_overlap,
+                                                                    jobs=jobs, on_file=on_file))
+    elapsed = time.perf_counter() - started
+    
+    if as_json:
+        click.echo(json.dumps({str(media): [match.to_dict() for match in matches]
+                               for media, matches in found.items()}, indent=2, ensure_ascii=False))
+        return
+    
+    console.print(f"[green]✓[/green] {counts['new']} arquivo(s) analisado(s), {counts['reused']} já no índice, "
+                  f"em {elapsed:.1f}s")
+    if not found:
+        console.print("[green]Nenhuma duplicata encontrada.[/green]")
+        return
+    
+    from rich.table import Table
+    
+    table = Table(show_header=True, title="Gravações com o mesmo áudio")
+    table.add_column("Arquivo")
+    table.add_column("Igual a")
+    table.add_column("Tipo")
+    table.add_column("Sobreposição", justify="right")
+    table.add_column("Deslocamento", justify="right")
+    shown = set()
+    for media, matches in found.items():
+        for match in matches:
+            # Cada par aparece uma vez, na ordem em que os arquivos foram informados
+            pair = frozenset((str(media.resolve()), match.path))
+            if pair in shown:
+                continue
+            shown.add(pair)
+            kind = "[red]duplicata[/red]" if match.duplicate else "[yellow]trecho em comum[/yellow]"
+            table.add_row(str(media), match.path, kind, f"{match.overlap:.0%} / {match.other_overlap:.0%}",
+                          f"{match.offset:+.2f}s")
+    table.caption = "Sobreposição: fração do arquivo presente no outro / do outro presente no arquivo"
+    console.print(table)
+
 if __name__ == '__main__':
     cli() 
\ No newline at end of file
@@ -1,4 +1 @@
 """Módulo core com funcionalidades principais do Editor de Vídeo"""
-
-from . import transcription
-from . import seo_generator
@@ -1,65 +1,78 @@
 from pathlib import Path
 import logging
-import subprocess
-import json
-import tempfile
-from pydub import AudioSegment
-from pydub.silence import split_on_silence, detect_silence
+
+from . import denoise, loudness, segmented_export
+from ..utils import file_utils, media_executor, tracing
 
 logger = logging.getLogger(__name__)
 
+# Formatos decodificados pelo ffmpeg (WAV é lido direto pelo pydub)
+DECODED_FORMATS = ['.mp3', '.m4a', '.ogg', '.flac']
+
+# Argumentos de codificação do ffmpeg por formato de saída
+EXPORT_ARGS = {
+    'mp3': ['-c:a', 'libmp3lame', '-f', 'mp3'],
+    'm4a': ['-c:a', 'aac', '-f', 'ipod'],
+    'ogg': ['-c:a', 'libvorbis', '-f', 'ogg'],
+    'flac': ['-c:a', 'flac', '-f', 'flac'],
+}
+
 class AudioProcessor:
     def __init__(self, audio_path: Path):
         self.audio_path = audio_path
         self.audio_segment = None
+        self.loudness = None
+        
+    @tracing.traced("audio:load_audio", category="audio")
+    def load_audio(self, on_progress=None):
+        """
+        Carrega o arquivo de áudio
+        
+        WAV é lido direto pelo pydub; os demais formatos são decodificados para PCM de 16 bits
+        pelo ffmpeg (via MediaExecutor) em uma única passada.
+        
+        Args:
+            on_progress: Função opcional chamada com o JobProgress da decodificação
+        """
+        # pydub é importado sob demanda para não pesar no início do CLI
+        from pydub import AudioSegment
         
-    def load_audio(self):
-        """Carrega o arquivo de áudio"""
         logger.info(f"Carregando áudio de {self.audio_path}")
         
         if not self.audio_path.exists():
             raise FileNotFoundError(f"Arquivo de áudio não encontrado: {self.audio_path}")
         
-        # Verifica a extensão e carrega com pydub
         extension = self.audio_path.suffix.lower()
-        if extension == '.m4a':
-            # Para m4a, podemos precisar converter para mp3 primeiro
-            logger.info("Convertendo M4A para MP3 temporariamente para processamento")
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as temp_file:
-                temp_path = Path(temp_file.name)
+        if extension not in DECODED_FORMATS + ['.wav']:
+            raise ValueError(f"Formato de áudio não suportado: {extension}")
             
-            # Usar ffmpeg para converter
+        if extension == '.wav':
+            with tracing.span("audio:decode", category="audio", bytes_in=tracing.file_size(self.audio_path)):
+                self.audio_segment = AudioSegment.from_wav(str(self.audio_path))
+        else:
+            info = self.extract_metadata()
+            if not info.get('channels'):
+                raise ValueError(f"Nenhum stream de áudio em {self.audio_path}")
             cmd = [
-                'ffmpeg', '-i', str(self.audio_path), 
-                '-vn', '-acodec', 'libmp3lame', '-q:a', '2', 
-                str(temp_path)
+                'ffmpeg', '-v', 'error', '-i', str(self.audio_path),
+                '-map', '0:a:0', '-vn', '-ac', str(info['channels']), '-ar', str(info['sample_rate']),
+                '-f', 's16le', '-'
             ]
-            subprocess.run(cmd, check=True, capture_output=True)
-            
-            # Carregar o MP3 temporário
-            self.audio_segment = AudioSegment.from_mp3(str(temp_path))
-            # Remover arquivo temporário
-            temp_path.unlink()
-        else:
-            # Carregar diretamente outros formatos
-            formats = {
-                '.mp3': 'mp3',
-                '.wav': 'wav',
-                '.ogg': 'ogg',
-                '.flac': 'flac'
-            }
-            format_name = formats.get(extension)
-            if not format_name:
-                raise ValueError(f"Formato de áudio não suportado: {extension}")
-                
-            load_method = getattr(AudioSegment, f"from_{format_name}")
-            self.audio_segment = load_method(str(self.audio_path))
+            with tracing.span("ffmpeg:decode_audio", category="ffmpeg",
+                              bytes_in=tracing.file_size(self.audio_path)) as sp:
+                result = media_executor.run(cmd, duration=info['duration'], on_progress=on_progress)
+                sp.bytes_out = len(result.stdout)
+            self.audio_segment = AudioSegment(data=result.stdout, sample_width=2,
+                                              frame_rate=info['sample_rate'], channels=info['channels'])
             
         logger.info(f"Áudio carregado: {len(self.audio_segment)/1000:.2f} segundos")
         return self.audio_segment
         
+    @tracing.traced("audio:detect_silences", category="audio")
     def detect_silences(self, min_silence_len=500, silence_thresh=-40, keep_silence=100):
         """Detecta períodos de silêncio no áudio"""
+        from pydub.silence import detect_silence
+        
         if not self.audio_segment:
             self.load_audio()
             
@@ -85,34 +98,70 @@ class AudioProcessor:
         logger.info(f"Detectados {len(result)} períodos de silêncio")
         return result
         
-    def remove_silence(self, output_path: Path, min_silence_len=500, silence_thresh=-40, keep_silence=100):
-        """Remove períodos de silêncio do áudio"""
+    @tracing.traced("audio:denoise_stage", category="audio")
+    def denoise(self, output_path: Path = None, reduction_db=denoise.DEFAULT_REDUCTION_DB,
+                threshold_std=denoise.DEFAULT_THRESHOLD_STD, min_silence_len=500, silence_thresh=-40, jobs=None):
+        """
+        Reduz ruído constante (ventoinha, zumbido da sala) por gate espectral (veja core.denoise)
+        
+        O perfil de ruído é estimado nos silêncios detectados. O áudio filtrado substitui o
+        áudio carregado, então detect_silences e remove_silence chamados depois já trabalham
+        sobre ele; com output_path, ele também é exportado.
+        """
+        if not self.audio_segment:
+            self.load_audio()
+            
+        silences = self.detect_silences(min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+        silences_ms = [(int(s['start'] * 1000), int(s['end'] * 1000)) for s in silences]
+        
+        logger.info(f"Reduzindo ruído (atenuação de {reduction_db:.0f} dB)")
+        self.audio_segment = denoise.denoise_segment(self.audio_segment, silences_ms,
+                                                     reduction_db=reduction_db, threshold_std=threshold_std)
+        if output_path:
+            self._export(self.audio_segment, output_path, jobs)
+        return self.audio_segment
+        
+    @tracing.traced("audio:remove_silence", category="audio")
+    def remove_silence(self, output_path: Path, min_silence_len=500, silence_thresh=-40, keep_silence=100,
+                       jobs=None, normalize=None, max_peak=loudness.DEFAULT_MAX_PEAK, on_progress=None):
+        """
+        Remove períodos de silêncio do áudio
+        
+        Com jobs > 1 e saída MP3/M4A, a codificação é dividida em segmentos codificados em
+        paralelo (veja core.segmented_export). Com normalize (LUFS), o loudness do resultado é
+        medido e o ganho é aplicado antes da mesma exportação, sem decodificar de novo.
+        on_progress recebe o JobProgress da codificação final.
+        """
+        from pydub import AudioSegment
+        from pydub.silence import split_on_silence
+        
         if not self.audio_segment:
             self.load_audio()
             
         logger.info(f"Removendo silêncios do áudio para {output_path}")
         
         # Dividir o áudio nos silêncios
-        audio_chunks = split_on_silence(
-            self.audio_segment,
-            min_silence_len=min_silence_len,
-            silence_thresh=silence_thresh,
-            keep_silence=keep_silence
-        )
+        with tracing.span("audio:split_on_silence", category="audio"):
+            audio_chunks = split_on_silence(
+                self.audio_segment,
+                min_silence_len=min_silence_len,
+                silence_thresh=silence_thresh,
+                keep_silence=keep_silence
+            )
         
         logger.info(f"Áudio dividido em {len(audio_chunks)} segmentos não silenciosos")
         
         # Concatenar os chunks sem silêncio
-        output_audio = AudioSegment.empty()
-        for chunk in audio_chunks:
-            output_audio += chunk
+        with tracing.span("audio:concatenate", category="audio"):
+            output_audio = AudioSegment.empty()
+            for chunk in audio_chunks:
+                output_audio += chunk
+            
+        if normalize is not None:
+            output_audio = self._apply_loudness(output_audio, normalize, max_peak)
             
-        # Exportar para o caminho especificado
-        extension = output_path.suffix.lower()
-        format_name = extension[1:] if extension.startswith('.') else extension
-        
         logger.info(f"Exportando áudio sem silêncio ({len(output_audio)/1000:.2f}s)")
-        output_audio.export(str(output_path), format=format_name)
+        self._export(output_audio, output_path, jobs, on_progress)
         
         # Calcular a redução de duração
         original_duration = len(self.audio_segment)/1000
@@ -124,21 +173,71 @@ class AudioProcessor:
         
         return output_path
         
+    @tracing.traced("audio:normalize", category="audio")
+    def normalize(self, output_path: Path, target=loudness.DEFAULT_TARGET, max_peak=loudness.DEFAULT_MAX_PEAK,
+                  jobs=None, on_progress=None):
+        """
+        Normaliza o loudness integrado (EBU R128) para `target` LUFS
+        
+        O arquivo é decodificado uma vez, medido em memória e codificado uma vez; não há a
+        segunda passada de análise do filtro loudnorm do ffmpeg. on_progress recebe o
+        JobProgress da codificação.
+        """
+        if not self.audio_segment:
+            self.load_audio()
+            
+        output_audio = self._apply_loudness(self.audio_segment, target, max_peak)
+        self._export(output_audio, output_path, jobs, on_progress)
+        return self.loudness
+        
+    def _apply_loudness(self, audio, target, max_peak):
+        """Mede o loudness de audio e aplica o ganho até `target`, guardando o resultado em self.loudness"""
+        measured = loudness.measure_segment(audio)
+        gain, limited = loudness.normalization_gain(measured, target, max_peak)
+        self.loudness = {
+            'integrated': measured.integrated,
+            'peak': measured.peak,
+            'target': target,
+            'gain': gain,
+            'limited': limited,
+        }
+        logger.info(f"Loudness: {measured.integrated:.1f} LUFS, pico {measured.peak:.1f} dBFS, "
+                    f"ganho {gain:+.1f} dB" + (" (limitado pelo pico)" if limited else ""))
+        return audio.apply_gain(gain) if gain else audio
+        
+    def _export(self, audio, output_path: Path, jobs=None, on_progress=None):
+        """
+        Exporta audio no formato indicado pela extensão de output_path
+        
+        Os formatos de EXPORT_ARGS são codificados pelo ffmpeg via MediaExecutor, com o PCM
+        enviado pelo stdin; os demais ficam com o pydub.
+        """
+        extension = output_path.suffix.lower()
+        format_name = extension[1:] if extension.startswith('.') else extension
+        
+        with tracing.span("audio:export", category="audio", format=format_name) as sp:
+            if jobs and jobs > 1 and segmented_export.supports(format_name):
+                segmented_export.export_segment(audio, output_path, format_name, workers=jobs,
+                                                on_progress=on_progress)
+            elif format_name in EXPORT_ARGS:
+                if audio.sample_width != 2:
+                    audio = audio.set_sample_width(2)
+                cmd = ['ffmpeg', '-y', '-v', 'error', '-f', 's16le', '-ar', str(audio.frame_rate),
+                       '-ac', str(audio.channels), '-i', '-', *EXPORT_ARGS[format_name]]
+                with file_utils.atomic_path(output_path) as temp_path:
+                    media_executor.run(cmd + [temp_path], input=audio.raw_data,
+                                       duration=len(audio) / 1000, on_progress=on_progress)
+            else:
+                audio.export(str(output_path), format=format_name)
+            sp.bytes_out = tracing.file_size(output_path)
+        
+    @tracing.traced("audio:extract_metadata", category="audio")
     def extract_metadata(self):
         """Extrai metadados do arquivo de áudio usando ffprobe"""
         logger.info(f"Extraindo metadados de {self.audio_path}")
         
-        cmd = [
-            'ffprobe', 
-            '-v', 'quiet', 
-            '-print_format', 'json', 
-            '-show_format', 
-            '-show_streams',
-            str(self.audio_path)
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        metadata = json.loads(result.stdout)
+        with tracing.span("ffprobe", category="ffmpeg", path=str(self.audio_path)):
+            metadata = media_executor.probe(self.audio_path)
         
         # Extrair informações importantes
         audio_info = {
@@ -0,0 +1,531 @@
+"""Detecção de gravações duplicadas por impressão digital do áudio
+
+Cada arquivo vira um conjunto compacto de hashes de picos espectrais (a "constelação" usada em
+reconhecimento de música), calculado com NumPy sobre o áudio em mono a 8 kHz:
+
+- picos são os máximos locais do espectrograma (em uma vizinhança de tempo e frequência), no
+  máximo PEAKS_PER_SECOND por segundo, ignorando o silêncio
+- cada pico âncora forma pares com os FAN_OUT picos seguintes mais próximos; o hash junta as
+  duas frequências e a distância no tempo, e é guardado com o instante da âncora
+
+Os hashes ficam em um índice invertido (SQLite, hash -> arquivo e instante), então a busca de
+um arquivo consulta só as listas dos seus hashes, sem comparar com cada gravação da biblioteca.
+Hashes iguais com a mesma diferença de instantes indicam o mesmo áudio; a diferença mais comum
+dá o deslocamento entre os arquivos, e os segundos com hashes nesse deslocamento dão a
+sobreposição de cada lado. Como os picos sobrevivem a outro encode, outro volume e ruído
+moderado, um re-export com outro nome ou um corte da mesma sessão também é encontrado.
+"""
+import os
+import time
+import asyncio
+import logging
+import sqlite3
+import contextlib
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..utils import media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT = 30.0
+
+# Áudio analisado: mono, 8 kHz
+DECODE_RATE = 8000
+
+# Espectrograma: janela de 64 ms e passo de 16 ms (a resolução do deslocamento)
+FFT_WINDOW = 512
+FFT_HOP = 128
+
+# Vizinhança dos máximos locais (quadros e bins para cada lado) e densidade máxima de picos
+PEAK_TIME = 8
+PEAK_FREQ = 8
+PEAKS_PER_SECOND = 8
+# Picos abaixo do mais forte do trecho menos PEAK_RANGE_DB são ignorados
+PEAK_RANGE_DB = 60.0
+
+# Pares de cada âncora: até FAN_OUT alvos de 1 a MAX_DT quadros depois e até MAX_DF bins
+FAN_OUT = 4
+MAX_DT = 63
+MAX_DF = 63
+
+# Quadros analisados por vez (limita a memória do espectrograma)
+CHUNK_FRAMES = 4096
+
+# Mínimo de hashes no mesmo deslocamento para considerar uma correspondência, e para um
+# deslocamento sair do histograma (abaixo disso é coincidência)
+MIN_MATCHES = 20
+PEAK_COINCIDENCES = 3
+# Sobreposição mínima para reportar e sobreposição de cada lado para chamar de duplicata
+MIN_OVERLAP = 0.2
+DUPLICATE_OVERLAP = 0.9
+
+# Segundos usados para medir a sobreposição
+OVERLAP_BIN = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    hashes INTEGER NOT NULL,
+    seconds INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    hash INTEGER NOT NULL,
+    media INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    PRIMARY KEY (hash, media, time)
+) WITHOUT ROWID;
+"""
+
+
+def default_path() -> Path:
+    """Banco padrão: EDIT_VIDEO_FINGERPRINTS ou ~/.cache/edit-video/fingerprints.db"""
+    path = os.environ.get('EDIT_VIDEO_FINGERPRINTS')
+    return Path(path) if path else Path.home() / '.cache' / 'edit-video' / 'fingerprints.db'
+
+
+@dataclass
+class Fingerprint:
+    """Hashes de um arquivo e o instante (quadro) da âncora de cada um"""
+    hashes: object  # np.ndarray int64
+    times: object   # np.ndarray int32
+    duration: float
+
+    @property
+    def seconds(self) -> int:
+        """Segundos distintos com pelo menos um hash (a base da sobreposição)"""
+        import numpy as np
+
+        return int(len(np.unique(_seconds(self.times))))
+
+
+@dataclass
+class Match:
+    """Outro arquivo com o mesmo áudio"""
+    path: str
+    offset: float          # instante do outro arquivo onde começa este (s; negativo: começa antes)
+    overlap: float         # fração deste arquivo presente no outro
+    other_overlap: float   # fração do outro arquivo presente neste
+    matches: int           # hashes no mesmo deslocamento
+
+    @property
+    def duplicate(self) -> bool:
+        return self.overlap >= DUPLICATE_OVERLAP and self.other_overlap >= DUPLICATE_OVERLAP
+
+    @property
+    def kind(self) -> str:
+        return 'duplicate' if self.duplicate else 'near-duplicate'
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'kind': self.kind}
+
+
+def _seconds(times):
+    return (times * (FFT_HOP / DECODE_RATE / OVERLAP_BIN)).astype('int64')
+
+
+def _max_filter(values, size: int, axis: int):
+    """Máximo em uma janela de 2*size+1 ao longo de um eixo (bordas repetidas)"""
+    import numpy as np
+
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (size, size)
+    padded = np.pad(values, pad, mode='edge')
+    return np.lib.stride_tricks.sliding_window_view(padded, 2 * size + 1, axis=axis).max(axis=-1)
+
+
+def spectral_peaks(samples) -> Tuple[object, object]:
+    """
+    Picos do espectrograma
+
+    Args:
+        samples: Amostras mono float32 a DECODE_RATE
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Quadro e bin de cada pico, ordenados por quadro
+    """
+    import numpy as np
+
+    count = (len(samples) - FFT_WINDOW) // FFT_HOP + 1
+    if count < 1:
+        return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+    window = np.hanning(FFT_WINDOW).astype(np.float32)
+    frames_per_second = DECODE_RATE / FFT_HOP
+    all_times, all_bins = [], []
+
+    for first in range(0, count, CHUNK_FRAMES):
+        # Margem dos dois lados para os máximos locais na borda do trecho
+        low = max(0, first - PEAK_TIME)
+        high = min(count, first + CHUNK_FRAMES + PEAK_TIME)
+        frames = np.lib.stride_tricks.sliding_window_view(
+            samples[low * FFT_HOP:(high - 1) * FFT_HOP + FFT_WINDOW], FFT_WINDOW)[::FFT_HOP]
+        spectrum = 20 * np.log10(np.abs(np.fft.rfft(frames * window, axis=1)).astype(np.float32) + 1e-6)
+        spectrum = spectrum[:, 1:-1]  # sem o nível DC e Nyquist: bins de 1 a 255
+
+        local_max = _max_filter(_max_filter(spectrum, PEAK_FREQ, 1), PEAK_TIME, 0)
+        floor = spectrum.max() - PEAK_RANGE_DB
+        times, bins = np.nonzero((spectrum == local_max) & (spectrum > floor))
+        times += low
+        inside = (times >= first) & (times < first + CHUNK_FRAMES)
+        times, bins = times[inside], bins[inside]
+        strength = spectrum[times - low, bins]
+
+        # Densidade máxima: os picos mais fortes de cada segundo
+        second = (times / frames_per_second).astype(np.int64)
+        order = np.lexsort((-strength, second))
+        second, times, bins = second[order], times[order], bins[order]
+        rank = np.arange(len(second)) - np.searchsorted(second, second, side='left')
+        keep = rank < PEAKS_PER_SECOND
+        all_times.append(times[keep])
+        all_bins.append(bins[keep] + 1)
+
+    times = np.concatenate(all_times).astype(np.int32)
+    bins = np.concatenate(all_bins).astype(np.int32)
+    order = np.lexsort((bins, times))
+    return times[order], bins[order]
+
+
+def peak_hashes(times, bins) -> Tuple[object, object]:
+    """
+    Hashes dos pares de picos: bin da âncora (8 bits), bin do alvo (8 bits) e distância (6 bits)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Hashes (int64) e quadro da âncora de cada um
+    """
+    import numpy as np
+
+    hashes, anchors = [], []
+    used = np.zeros(len(times), dtype=np.int32)
+    # Os alvos de cada âncora estão entre os picos seguintes; PEAKS_PER_SECOND limita quantos olhar
+    horizon = int(PEAKS_PER_SECOND * MAX_DT * FFT_HOP / DECODE_RATE) + PEAKS_PER_SECOND
+    for shift in range(1, min(horizon, len(times))):
+        dt = times[shift:] - times[:-shift]
+        df = bins[shift:] - bins[:-shift]
+        valid = (dt >= 1) & (dt <= MAX_DT) & (np.abs(df) <= MAX_DF) & (used[:-shift] < FAN_OUT)
+        if not valid.any():
+            if (dt > MAX_DT).all():
+                break
+            continue
+        anchor = np.flatnonzero(valid)
+        used[anchor] += 1
+        target = anchor + shift
+        hashes.append((bins[anchor].astype(np.int64) << 14) | (bins[target].astype(np.int64) << 6)
+                      | dt[anchor].astype(np.int64))
+        anchors.append(times[anchor])
+    if not hashes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+    return np.concatenate(hashes), np.concatenate(anchors).astype(np.int32)
+
+
+def fingerprint_samples(samples, rate: int = DECODE_RATE) -> Fingerprint:
+    """Impressão digital de amostras mono float32 a DECODE_RATE"""
+    times, bins = spectral_peaks(samples)
+    hashes, anchors = peak_hashes(times, bins)
+    return Fingerprint(hashes, anchors, len(samples) / rate)
+
+
+@tracing.traced("duplicates:fingerprint", category="duplicates")
+async def fingerprint_media_async(media: Path) -> Fingerprint:
+    """Decodifica o primeiro stream de áudio (mono, DECODE_RATE) e calcula a impressão digital"""
+    import numpy as np
+
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-i', str(media), '-map', '0:a:0', '-ac', '1',
+           '-ar', str(DECODE_RATE), '-f', 's16le', 'pipe:1']
+    executor = media_executor.get_executor()
+    info = await executor.probe(media)
+    duration = float(info.get('format', {}).get('duration') or 0)
+    with tracing.span("ffmpeg:decode_fingerprint", category="ffmpeg", path=str(media)) as sp:
+        result = await executor.run(cmd, memory=media_executor.DEFAULT_MEMORY + int(duration * DECODE_RATE) * 6)
+        sp.bytes_out = len(result.stdout)
+    samples = np.frombuffer(result.stdout, dtype='<i2', count=len(result.stdout) // 2).astype(np.float32) / 32768
+    return await asyncio.get_running_loop().run_in_executor(None, fingerprint_samples, samples)
+
+
+class FingerprintIndex:
+    """Índice invertido dos hashes; seguro entre threads e processos (uma conexão por operação)"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self, write: bool = False):
+        """Conexão com WAL; com write, tudo roda em uma transação com o lock de escrita"""
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            if not write:
+                yield db
+                return
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        finally:
+            db.close()
+
+    def is_fresh(self, media: Path) -> bool:
+        """Se o arquivo já está no índice com o mesmo tamanho e mtime"""
+        stat = os.stat(media)
+        with self._connect() as db:
+            row = db.execute("SELECT size, mtime_ns FROM media WHERE path = ?", (str(media.resolve()),)).fetchone()
+        return row is not None and (row['size'], row['mtime_ns']) == (stat.st_size, stat.st_mtime_ns)
+
+    def add(self, media: Path, fingerprint: Fingerprint):
+        """Grava (ou substitui) os hashes de um arquivo"""
+        stat = os.stat(media)
+        path = str(media.resolve())
+        with self._connect(write=True) as db:
+            row = db.execute("SELECT id FROM media WHERE path = ?", (path,)).fetchone()
+            if row:
+                db.execute("DELETE FROM hashes WHERE media = ?", (row['id'],))
+                db.execute("DELETE FROM media WHERE id = ?", (row['id'],))
+            media_id = db.execute(
+                "INSERT INTO media (path, size, mtime_ns, duration, hashes, seconds, indexed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, fingerprint.duration, len(fingerprint.hashes),
+                 fingerprint.seconds, time.time())).lastrowid
+            db.executemany("INSERT OR IGNORE INTO hashes (hash, media, time) VALUES (?, ?, ?)",
+                           ((int(h), media_id, int(t)) for h, t in zip(fingerprint.hashes, fingerprint.times)))
+
+    def remove(self, paths: Iterable[str]) -> int:
+        """Apaga do índice as gravações pelos caminhos absolutos; retorna quantas existiam"""
+        removed = 0
+        with self._connect(write=True) as db:
+            for path in paths:
+                row = db.execute("SELECT id FROM media WHERE path = ?", (path,)).fetchone()
+                if row:
+                    db.execute("DELETE FROM hashes WHERE media = ?", (row['id'],))
+                    db.execute("DELETE FROM media WHERE id = ?", (row['id'],))
+                    removed += 1
+        return removed
+
+    def media_id(self, media: Path) -> Optional[int]:
+        with self._connect() as db:
+            row = db.execute("SELECT id FROM media WHERE path = ?", (str(media.resolve()),)).fetchone()
+        return row['id'] if row else None
+
+    def matches(self, fingerprint: Fingerprint, exclude: Iterable[int] = (),
+                min_overlap: float = MIN_OVERLAP) -> List[Match]:
+        """
+        Arquivos do índice com o mesmo áudio
+
+        Args:
+            fingerprint: Impressão digital consultada
+            exclude: Ids de arquivos ignorados (o próprio arquivo, por exemplo)
+            min_overlap: Sobreposição mínima, de qualquer um dos lados
+
+        Returns:
+            List[Match]: Da maior para a menor sobreposição
+        """
+        import numpy as np
+
+        if not len(fingerprint.hashes):
+            return []
+        exclude = set(exclude)
+        query_seconds = max(fingerprint.seconds, 1)
+        results = []
+        with self._connect() as db:
+            db.execute("CREATE TEMP TABLE query (hash INTEGER NOT NULL, time INTEGER NOT NULL)")
+            db.executemany("INSERT INTO query VALUES (?, ?)",
+                           zip(fingerprint.hashes.tolist(), fingerprint.times.tolist()))
+            # Histograma dos deslocamentos agregado no próprio SQLite; coincidências soltas
+            # (um ou dois hashes no mesmo deslocamento) não saem do banco
+            rows = db.execute("SELECT h.media, h.time - q.time AS delta, COUNT(*) FROM query q"
+                              " JOIN hashes h ON h.hash = q.hash GROUP BY h.media, delta HAVING COUNT(*) >= ?",
+                              (PEAK_COINCIDENCES,)).fetchall()
+            histogram = np.array(rows, dtype=np.int64).reshape(-1, 3)
+            for media_id in np.unique(histogram[:, 0]).tolist():
+                if media_id in exclude:
+                    continue
+                group = histogram[histogram[:, 0] == media_id]
+                deltas, counts = group[:, 1], group[:, 2]
+                # Um quadro de folga para os dois lados (o passo do espectrograma corta os picos)
+                low = deltas.min()
+                smoothed = np.convolve(np.bincount(deltas - low, weights=counts), np.ones(3), mode='same')
+                best = int(np.argmax(smoothed)) + int(low)
+                if counts[np.abs(deltas - best) <= 1].sum() < MIN_MATCHES:
+                    continue
+
+                aligned = np.array(db.execute(
+                    "SELECT q.time, h.time - q.time FROM query q JOIN hashes h ON h.hash = q.hash"
+                    " WHERE h.media = ? AND h.time - q.time BETWEEN ? AND ?",
+                    (media_id, best - 1, best + 1)).fetchall(), dtype=np.int64).reshape(-1, 2)
+                row = db.execute("SELECT path, seconds FROM media WHERE id = ?", (media_id,)).fetchone()
+                overlap = len(np.unique(_seconds(aligned[:, 0]))) / query_seconds
+                other_overlap = len(np.unique(_seconds(aligned[:, 0] + best))) / max(row['seconds'], 1)
+                if max(overlap, other_overlap) < min_overlap:
+                    continue
+                offset = round(float(aligned[:, 1].mean()) * FFT_HOP / DECODE_RATE, 3) or 0.0
+                results.append(Match(row['path'], offset, round(min(overlap, 1.0), 4),
+                                     round(min(other_overlap, 1.0), 4), len(aligned)))
+        return sorted(results, key=lambda match: -max(match.overlap, match.other_overlap))
+
+    def fingerprint(self, media: Path) -> Optional[Fingerprint]:
+        """Impressão digital de um arquivo já indexado, lida do banco"""
+        import numpy as np
+
+        with self._connect() as db:
+            row = db.execute("SELECT id, duration FROM media WHERE path = ?", (str(media.resolve()),)).fetchone()
+            if row is None:
+                return None
+            pairs = db.execute("SELECT hash, time FROM hashes WHERE media = ?", (row['id'],)).fetchall()
+        data = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        return Fingerprint(data[:, 0], data[:, 1].astype(np.int32), row['duration'])
+
+    def stats(self) -> dict:
+        with self._connect() as db:
+            files = db.execute("SELECT COUNT(*), COALESCE(SUM(hashes), 0) FROM media").fetchone()
+        size = sum(p.stat().st_size for p in self.path.parent.glob(self.path.name + '*') if p.is_file())
+        return {'path': str(self.path), 'files': files[0], 'hashes': files[1], 'bytes': size}
+
+
+def media_files(paths: Iterable[Path], formats: Iterable[str]) -> List[Path]:
+    """
+    Arquivos de mídia em `paths` (arquivos ou pastas, recursivo)
+
+    Os MP3 gerados pela conversão do pipeline ao lado de um vídeo com o mesmo nome ficam de
+    fora: são o mesmo áudio por definição.
+    """
+    formats = {suffix.lower() for suffix in formats}
+    found = []
+    for path in paths:
+        if path.is_file():
+            found.append(path)
+            continue
+        for directory, dirs, names in os.walk(path):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            stems = {Path(name).stem for name in names if Path(name).suffix.lower() in formats - {'.mp3'}}
+            found.extend(Path(directory) / name for name in sorted(names)
+                         if Path(name).suffix.lower() in formats
+                         and not (name.lower().endswith('.mp3') and Path(name).stem in stems))
+    return found
+
+
+async def index_files_async(files: List[Path], index: FingerprintIndex, jobs: Optional[int] = None,
+                            on_file: Optional[Callable[[Path, bool], None]] = None) -> Dict[Path, Optional[Fingerprint]]:
+    """
+    Garante que os arquivos estão no índice (só os novos ou alterados são decodificados)
+
+    Um arquivo que não pode ser decodificado (sem stream de áudio, corrompido) só gera um aviso
+    no log; os demais seguem normalmente.
+
+    Args:
+        files: Arquivos de mídia
+        index: Índice
+        jobs: Arquivos processados ao mesmo tempo (padrão: o limite do MediaExecutor)
+        on_file: Função chamada com (arquivo, reaproveitado) ao fim de cada arquivo
+
+    Returns:
+        Dict[Path, Optional[Fingerprint]]: Impressões digitais calculadas agora (os reaproveitados
+            não entram), com None nos arquivos que não puderam ser decodificados
+    """
+    loop = asyncio.get_running_loop()
+    limit = asyncio.Semaphore(jobs or media_executor.get_executor().max_jobs)
+    computed: Dict[Path, Optional[Fingerprint]] = {}
+
+    async def process(media: Path):
+        if await loop.run_in_executor(None, index.is_fresh, media):
+            if on_file:
+                on_file(media, True)
+            return
+        try:
+            async with limit:
+                fingerprint = await fingerprint_media_async(media)
+        except (media_executor.MediaError, OSError, ValueError) as e:
+            logger.warning(f"{media.name}: impressão digital não calculada, arquivo ignorado na busca: {e}")
+            computed[media] = None
+            return
+        await loop.run_in_executor(None, index.add, media, fingerprint)
+        computed[media] = fingerprint
+        if on_file:
+            on_file(media, False)
+
+    await asyncio.gather(*(process(media) for media in files))
+    return computed
+
+
+@tracing.traced("duplicates:find", category="duplicates")
+async def find_duplicates_async(files: List[Path], index: Optional[FingerprintIndex] = None,
+                                min_overlap: float = MIN_OVERLAP, jobs: Optional[int] = None,
+                                on_file: Optional[Callable[[Path, bool], None]] = None) -> Dict[Path, List[Match]]:
+    """
+    Indexa os arquivos e procura cada um no índice inteiro (outros arquivos, não ele mesmo)
+
+    Returns:
+        Dict[Path, List[Match]]: Correspondências de cada arquivo que tem alguma
+    """
+    loop = asyncio.get_running_loop()
+    index = index or FingerprintIndex()
+    computed = await index_files_async(files, index, jobs, on_file)
+
+    def search(media: Path) -> List[Match]:
+        # Arquivos que falharam agora não usam a impressão digital antiga do índice
+        fingerprint = computed[media] if media in computed else index.fingerprint(media)
+        if fingerprint is None:
+            return []
+        return index.matches(fingerprint, exclude=[index.media_id(media)], min_overlap=min_overlap)
+
+    results = await asyncio.gather(*(loop.run_in_executor(None, search, media) for media in files))
+    return {media: matches for media, matches in zip(files, results) if matches}
+
+
+@tracing.traced("duplicates:precheck", category="duplicates")
+async def precheck_async(files: List[Path], index: Optional[FingerprintIndex] = None,
+                         jobs: Optional[int] = None) -> Dict[Path, Match]:
+    """
+    Duplicatas de um lote antes do processamento pesado
+
+    Um arquivo é duplicata quando o mesmo áudio já estava no índice antes do lote ou aparece
+    antes dele no próprio lote; a primeira ocorrência segue normalmente. Arquivos só parecidos
+    (near-duplicates) não são pulados, apenas registrados no log. Arquivos sem impressão
+    digital (ex: sem stream de áudio) nunca são pulados: seguem pelo pipeline, que reporta o erro.
+
+    A gravação de origem de um arquivo (o vídeo de que um MP3 foi convertido, ao retomar um
+    lote) não conta como duplicata dele. Gravações do índice que não existem mais no disco
+    (apagadas ou movidas) são ignoradas e removidas do índice.
+
+    Returns:
+        Dict[Path, Match]: Arquivo pulado -> gravação de que ele é duplicata
+    """
+    from .pipeline import mp3_path_for
+
+    index = index or FingerprintIndex()
+    found = await find_duplicates_async(files, index, jobs=jobs)
+    batch = {str(media.resolve()): position for position, media in enumerate(files)}
+    duplicates: Dict[Path, Match] = {}
+    skipped = set()
+    missing = set()
+    for position, media in enumerate(files):
+        converted = mp3_path_for(media.resolve())
+        for match in found.get(media, []):
+            if mp3_path_for(Path(match.path)) == converted:
+                continue
+            if match.path not in batch and not Path(match.path).exists():
+                missing.add(match.path)
+                continue
+            # Só vale uma gravação que já existia ou que vem antes e não foi pulada
+            earlier = batch.get(match.path, -1) < position and match.path not in skipped
+            if match.duplicate and earlier:
+                duplicates[media] = match
+                skipped.add(str(media.resolve()))
+                break
+            logger.info(f"{media.name}: {match.overlap:.0%} em {Path(match.path).name} "
+                        f"(deslocamento {match.offset:+.1f}s)")
+    if missing:
+        removed = await asyncio.get_running_loop().run_in_executor(None, index.remove, sorted(missing))
+        logger.info(f"{removed} gravações que não existem mais removidas do índice")
+    return duplicates
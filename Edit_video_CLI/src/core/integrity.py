@@ -0,0 +1,225 @@
+"""Manifesto de checksums das pastas organizadas e verificação de integridade
+
+O conteúdo de cada arquivo é dividido em blocos de BLOCK_SIZE bytes, e cada bloco recebe
+um SHA-256. Os blocos são independentes, então vários blocos (de um ou mais arquivos) são
+calculados ao mesmo tempo em threads; o hashlib libera o GIL para buffers grandes e cada
+bloco é lido via mmap, sem cópias. O digest do arquivo é o SHA-256 da concatenação dos
+digests dos blocos; para arquivos de um único bloco ele é o próprio SHA-256 do arquivo.
+"""
+import os
+import json
+import mmap
+import hashlib
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..utils import file_utils, tracing
+
+logger = logging.getLogger(__name__)
+
+CHECKSUMS_NAME = 'checksums.json'
+CHECKSUMS_VERSION = 1
+
+# Múltiplo de mmap.ALLOCATIONGRANULARITY, exigido para o offset do mmap
+BLOCK_SIZE = 64 * 1024 * 1024
+
+
+@dataclass
+class VerifyResult:
+    """Resultado da verificação de uma pasta"""
+    folder: Path
+    ok: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    corrupted: Dict[str, str] = field(default_factory=dict)
+    missing: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.corrupted and not self.missing
+
+
+def _hash_block(path: Path, offset: int, length: int) -> str:
+    """SHA-256 de um trecho do arquivo, lido via mmap"""
+    if length == 0:
+        return hashlib.sha256().hexdigest()
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), length, access=mmap.ACCESS_READ, offset=offset) as view:
+            return hashlib.sha256(view).hexdigest()
+
+
+def combine_blocks(blocks: List[str]) -> str:
+    """Digest do arquivo a partir dos digests dos blocos"""
+    if len(blocks) == 1:
+        return blocks[0]
+    return hashlib.sha256(b''.join(bytes.fromhex(block) for block in blocks)).hexdigest()
+
+
+def hash_files(paths: List[Path], workers: Optional[int] = None,
+               on_bytes: Optional[Callable[[int, int], None]] = None) -> Dict[Path, List[str]]:
+    """
+    Calcula os digests dos blocos de vários arquivos em paralelo
+
+    Args:
+        paths: Arquivos a calcular
+        workers: Threads (padrão: o mesmo do ThreadPoolExecutor)
+        on_bytes: Função opcional chamada com (bytes concluídos, total de bytes)
+
+    Returns:
+        Dict[Path, List[str]]: Digests dos blocos de cada arquivo, em ordem
+    """
+    tasks = []
+    for path in paths:
+        size = os.path.getsize(path)
+        offsets = range(0, size, BLOCK_SIZE) if size else [0]
+        tasks.extend((path, offset, min(BLOCK_SIZE, size - offset)) for offset in offsets)
+
+    total = sum(length for _, _, length in tasks)
+    lock = threading.Lock()
+    done = 0
+
+    def run(task):
+        nonlocal done
+        digest = _hash_block(*task)
+        with lock:
+            done += task[2]
+            current = done
+        if on_bytes:
+            on_bytes(current, total)
+        return digest
+
+    if on_bytes:
+        on_bytes(0, total)
+    with tracing.span("integrity:hash_files", category="io", bytes_in=total, files=len(paths)):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            digests = list(executor.map(run, tasks))
+
+    blocks: Dict[Path, List[str]] = {path: [] for path in paths}
+    for (path, _, _), digest in zip(tasks, digests):
+        blocks[path].append(digest)
+    return blocks
+
+
+def write_checksums(folder: Path, files: Dict[str, Path], workers: Optional[int] = None,
+                    on_bytes: Optional[Callable[[int, int], None]] = None) -> Path:
+    """
+    Calcula e salva o manifesto de checksums de uma pasta
+
+    Args:
+        folder: Pasta onde o manifesto será salvo
+        files: Nome do arquivo na pasta -> arquivo a calcular (normalmente a origem da
+            cópia, para que a verificação compare a cópia com o original)
+        workers: Threads de cálculo
+        on_bytes: Função opcional chamada com (bytes concluídos, total de bytes)
+
+    Returns:
+        Path: Caminho do manifesto
+    """
+    blocks = hash_files(list(files.values()), workers, on_bytes)
+    entries = {}
+    for name, path in files.items():
+        stat = os.stat(folder / name)
+        entries[name] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': combine_blocks(blocks[path]),
+            'blocks': blocks[path],
+        }
+
+    data = {
+        'version': CHECKSUMS_VERSION,
+        'algorithm': 'sha256',
+        'block_size': BLOCK_SIZE,
+        'created_at': datetime.datetime.now().isoformat(),
+        'files': entries,
+        'verified': {},
+    }
+    manifest_path = folder / CHECKSUMS_NAME
+    file_utils.save_json(data, manifest_path)
+    return manifest_path
+
+
+def load_checksums(folder: Path) -> dict:
+    """Carrega o manifesto de checksums de uma pasta"""
+    manifest_path = folder / CHECKSUMS_NAME
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Manifesto '{CHECKSUMS_NAME}' não encontrado em {folder}")
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except json.JSONDecodeError:
+        raise ValueError(f"O arquivo {manifest_path} não é um JSON válido")
+    if data.get('version') != CHECKSUMS_VERSION:
+        raise ValueError(f"Versão de manifesto não suportada em {manifest_path}")
+    return data
+
+
+def verify_folder(folder: Path, full: bool = False, workers: Optional[int] = None,
+                  on_bytes: Optional[Callable[[int, int], None]] = None) -> VerifyResult:
+    """
+    Confere os arquivos de uma pasta com o seu manifesto de checksums
+
+    Arquivos já verificados cujo tamanho e mtime não mudaram desde a última verificação
+    bem-sucedida são pulados, a menos que full seja True.
+
+    Args:
+        folder: Pasta com checksums.json
+        full: Recalcular todos os arquivos
+        workers: Threads de cálculo
+        on_bytes: Função opcional chamada com (bytes concluídos, total de bytes)
+
+    Returns:
+        VerifyResult: Arquivos íntegros, pulados, corrompidos e ausentes
+    """
+    data = load_checksums(folder)
+    if data.get('block_size') != BLOCK_SIZE:
+        raise ValueError(f"Tamanho de bloco do manifesto ({data.get('block_size')}) não suportado")
+
+    result = VerifyResult(folder=folder)
+    verified = data.setdefault('verified', {})
+    to_hash = {}
+    for name, entry in data['files'].items():
+        path = folder / name
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            result.missing.append(name)
+            continue
+
+        if stat.st_size != entry['size']:
+            result.corrupted[name] = f"tamanho {stat.st_size} != {entry['size']}"
+            continue
+
+        previous = verified.get(name)
+        if (not full and previous and previous['size'] == stat.st_size
+                and previous['mtime_ns'] == stat.st_mtime_ns):
+            result.skipped.append(name)
+            continue
+        to_hash[name] = path
+
+    blocks = hash_files(list(to_hash.values()), workers, on_bytes)
+    now = datetime.datetime.now().isoformat()
+    for name, path in to_hash.items():
+        expected = data['files'][name]['blocks']
+        actual = blocks[path]
+        if actual == expected:
+            result.ok.append(name)
+            stat = os.stat(path)
+            verified[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'at': now}
+            continue
+
+        bad = next(index for index, (a, b) in enumerate(zip(actual, expected)) if a != b)
+        result.corrupted[name] = f"bloco {bad} diferente (a partir do byte {bad * BLOCK_SIZE})"
+        verified.pop(name, None)
+
+    for name in result.corrupted:
+        verified.pop(name, None)
+    for name in result.missing:
+        verified.pop(name, None)
+
+    file_utils.save_json(data, folder / CHECKSUMS_NAME)
+    return result
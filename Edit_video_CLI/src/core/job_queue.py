@@ -0,0 +1,556 @@
+"""Fila de jobs persistente em SQLite
+
+Cada job é um arquivo de áudio/vídeo ou uma gravação do ScreenStudio mais uma especificação do
+pipeline (etapas, estilo do SEO, redução de ruído). A fila sobrevive ao processo:
+
+- um worker pega um job com um lease (dono + validade) dentro de uma transação BEGIN IMMEDIATE,
+  então vários processos na mesma máquina dividem a fila sem pegar o mesmo job duas vezes
+- enquanto processa, o worker renova o lease (heartbeat); se ele morrer, o lease expira e outro
+  worker retoma o job, e um worker que reinicia na mesma máquina libera na hora os jobs de
+  processos que já não existem; cada retomada conta como uma tentativa da etapa, para que um job
+  que derruba o worker não seja retomado para sempre
+- a etapa atual é gravada ao fim de cada etapa, então o job continua da etapa interrompida (e os
+  manifestos de cada arquivo evitam refazer trabalho já salvo)
+- uma etapa que falha volta para a fila com espera exponencial até MAX_ATTEMPTS tentativas
+
+Cada execução de etapa fica registrada em `runs`, de onde saem a vazão e o tempo médio por
+etapa mostrados em `queue status`.
+"""
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+import sqlite3
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from ..utils import tracing
+
+logger = logging.getLogger(__name__)
+
+FILE_STAGES = ('convert', 'transcribe', 'seo')
+RECORDING_STAGES = ('analyze', 'convert', 'transcribe', 'chapters', 'seo', 'pre-producao')
+RECORDING_SUFFIX = '.screenstudio'
+
+LEASE_SECONDS = 120.0       # validade do lease sem heartbeat
+MAX_ATTEMPTS = 4            # tentativas por etapa antes de marcar o job como falho
+BACKOFF_BASE = 30.0         # espera antes da 2ª tentativa (s), dobrando a cada falha
+BACKOFF_MAX = 30 * 60.0
+POLL_INTERVAL = 2.0         # espera do worker quando a fila está vazia (s)
+BUSY_TIMEOUT = 30.0         # espera pelo lock de escrita do SQLite (s)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_finished ON runs (finished_at);
+"""
+
+
+def default_path() -> Path:
+    """Banco padrão: EDIT_VIDEO_QUEUE ou ~/.cache/edit-video/queue.db"""
+    path = os.environ.get('EDIT_VIDEO_QUEUE')
+    return Path(path) if path else Path.home() / '.cache' / 'edit-video' / 'queue.db'
+
+
+def default_stages(target: Path) -> List[str]:
+    """Etapas padrão: pipeline completo do watcher para gravações, convert/transcribe/seo para arquivos"""
+    if target.is_dir() and target.name.endswith(RECORDING_SUFFIX):
+        return list(RECORDING_STAGES)
+    return list(FILE_STAGES)
+
+
+def backoff(attempts: int) -> float:
+    """Espera antes da próxima tentativa, com variação aleatória de ±20%"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _owner_alive(owner: str) -> bool:
+    """Verifica se o dono de um lease (host:pid:id) ainda é um processo vivo desta máquina"""
+    host, _, rest = owner.partition(':')
+    pid = rest.partition(':')[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        # Outra máquina (ou formato desconhecido): só a expiração do lease decide
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@dataclass
+class QueuedJob:
+    """Job retirado da fila por um worker"""
+    id: int
+    target: Path
+    spec: dict
+    stage: str
+    attempts: int
+    result: dict
+
+    @property
+    def stages(self) -> List[str]:
+        return self.spec['stages']
+
+    @classmethod
+    def from_row(cls, row) -> 'QueuedJob':
+        return cls(id=row['id'], target=Path(row['target']), spec=json.loads(row['spec']),
+                   stage=row['stage'], attempts=row['attempts'], result=json.loads(row['result']))
+
+
+class JobQueue:
+    """Acesso ao banco da fila; seguro entre threads e processos (uma conexão por operação)"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self, write: bool = False):
+        """Conexão com WAL; com write, a transação começa já com o lock de escrita"""
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            if not write:
+                yield db
+                return
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        finally:
+            db.close()
+
+    def add(self, target: Path, stages: Optional[List[str]] = None, **options) -> Optional[int]:
+        """
+        Adiciona um job, a menos que o mesmo alvo já esteja na fila ou em execução
+
+        Args:
+            target: Arquivo ou gravação
+            stages: Etapas do pipeline (padrão: default_stages)
+            **options: Opções das etapas (style, denoise, force)
+
+        Returns:
+            Optional[int]: Id do job criado, ou None se ele já estava pendente
+        """
+        target = Path(target).resolve()
+        spec = {'stages': list(stages or default_stages(target)), **options}
+        unknown = set(spec['stages']) - set(RECORDING_STAGES)
+        if unknown:
+            raise ValueError(f"Etapas desconhecidas: {', '.join(sorted(unknown))}")
+        now = time.time()
+        with self._connect(write=True) as db:
+            pending = db.execute("SELECT id FROM jobs WHERE target = ? AND status IN ('queued', 'running')",
+                                 (str(target),)).fetchone()
+            if pending:
+                return None
+            cursor = db.execute(
+                "INSERT INTO jobs (target, spec, stage, available_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (str(target), json.dumps(spec), spec['stages'][0], now, now))
+            return cursor.lastrowid
+
+    def _reclaim(self, db, row, reason: str) -> int:
+        """
+        Conta o worker perdido de um job em execução como uma tentativa da etapa
+
+        Returns:
+            int: Tentativas da etapa, já com esta; a partir de MAX_ATTEMPTS o job fica como falho
+        """
+        job = QueuedJob.from_row(row)
+        attempts = job.attempts + 1
+        error = f"Worker {row['lease_owner']} parou durante a etapa '{job.stage}' ({reason})"
+        now = time.time()
+        failed = attempts >= MAX_ATTEMPTS
+        db.execute("UPDATE jobs SET status = ?, attempts = ?, error = ?, lease_owner = NULL, lease_expires = NULL, "
+                   "finished_at = ? WHERE id = ?",
+                   ('failed' if failed else 'queued', attempts, error, now if failed else None, job.id))
+        self._record_run(db, job, row['lease_owner'] or '', 'failed' if failed else 'lost', now, error)
+        if failed:
+            logger.error(f"Job {job.id} falhou: {error}, {attempts} tentativas")
+        return attempts
+
+    def recover(self) -> int:
+        """Devolve à fila os jobs desta máquina cujo worker morreu, sem esperar o lease expirar"""
+        with self._connect(write=True) as db:
+            rows = db.execute("SELECT * FROM jobs WHERE status = 'running'").fetchall()
+            dead = [row for row in rows if not _owner_alive(row['lease_owner'] or '')]
+            for row in dead:
+                self._reclaim(db, row, "processo encerrado")
+        if dead:
+            logger.info(f"{len(dead)} job(s) de workers encerrados voltaram para a fila")
+        return len(dead)
+
+    def claim(self, owner: str, lease: float = LEASE_SECONDS) -> Optional[QueuedJob]:
+        """Pega o próximo job disponível (ou com lease expirado) para o worker `owner`"""
+        now = time.time()
+        with self._connect(write=True) as db:
+            while True:
+                row = db.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?) "
+                    "OR (status = 'running' AND lease_expires < ?) ORDER BY available_at, id LIMIT 1",
+                    (now, now)).fetchone()
+                if row is None:
+                    return None
+                if row['status'] != 'running':
+                    break
+                logger.warning(f"Lease do job {row['id']} expirou ({row['lease_owner']}); retomando")
+                if self._reclaim(db, row, "lease expirado") < MAX_ATTEMPTS:
+                    row = db.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+                    break
+            db.execute("UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, "
+                       "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                       (owner, now + lease, now, row['id']))
+        return QueuedJob.from_row(row)
+
+    def heartbeat(self, job_id: int, owner: str, lease: float = LEASE_SECONDS) -> bool:
+        """Renova o lease; False se o job não pertence mais a este worker"""
+        with self._connect(write=True) as db:
+            cursor = db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? "
+                                "AND status = 'running'", (time.time() + lease, job_id, owner))
+            return cursor.rowcount == 1
+
+    def _record_run(self, db, job: QueuedJob, owner: str, status: str, started: float, error=None):
+        db.execute("INSERT INTO runs (job_id, stage, worker, status, started_at, finished_at, error) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)", (job.id, job.stage, owner, status, started, time.time(), error))
+
+    def complete_stage(self, job: QueuedJob, owner: str, started: float, lease: float = LEASE_SECONDS) -> bool:
+        """
+        Grava o fim da etapa atual e avança o job (ou o conclui)
+
+        Ao avançar, o lease é renovado: a etapa seguinte começa com a validade inteira, mesmo que a
+        anterior tenha terminado perto da expiração, entre dois heartbeats.
+
+        Returns:
+            bool: False se o lease foi perdido (outro worker assumiu o job)
+        """
+        index = job.stages.index(job.stage)
+        following = job.stages[index + 1] if index + 1 < len(job.stages) else None
+        now = time.time()
+        with self._connect(write=True) as db:
+            if following:
+                cursor = db.execute("UPDATE jobs SET stage = ?, attempts = 0, result = ?, error = NULL, "
+                                    "lease_expires = ? WHERE id = ? AND lease_owner = ?",
+                                    (following, json.dumps(job.result), now + lease, job.id, owner))
+            else:
+                cursor = db.execute("UPDATE jobs SET status = 'done', stage = NULL, attempts = 0, result = ?, "
+                                    "error = NULL, lease_owner = NULL, lease_expires = NULL, finished_at = ? "
+                                    "WHERE id = ? AND lease_owner = ?",
+                                    (json.dumps(job.result), now, job.id, owner))
+            if cursor.rowcount != 1:
+                return False
+            self._record_run(db, job, owner, 'done', started)
+        if following:
+            job.stage = following
+            job.attempts = 0
+        return True
+
+    def fail_stage(self, job: QueuedJob, owner: str, started: float, error: str) -> Optional[float]:
+        """
+        Registra a falha da etapa atual
+
+        Returns:
+            Optional[float]: Espera até a próxima tentativa, ou None se o job falhou de vez
+        """
+        attempts = job.attempts + 1
+        delay = backoff(attempts) if attempts < MAX_ATTEMPTS else None
+        now = time.time()
+        with self._connect(write=True) as db:
+            if delay is None:
+                cursor = db.execute("UPDATE jobs SET status = 'failed', attempts = ?, error = ?, "
+                                    "lease_owner = NULL, lease_expires = NULL, finished_at = ? "
+                                    "WHERE id = ? AND lease_owner = ?", (attempts, error, now, job.id, owner))
+            else:
+                cursor = db.execute("UPDATE jobs SET status = 'queued', attempts = ?, error = ?, available_at = ?, "
+                                    "lease_owner = NULL, lease_expires = NULL WHERE id = ? AND lease_owner = ?",
+                                    (attempts, error, now + delay, job.id, owner))
+            if cursor.rowcount == 1:
+                self._record_run(db, job, owner, 'failed' if delay is None else 'retry', started, error)
+        return delay
+
+    def release(self, job: QueuedJob, owner: str):
+        """Devolve um job interrompido à fila (sem contar como tentativa)"""
+        with self._connect(write=True) as db:
+            db.execute("UPDATE jobs SET status = 'queued', lease_owner = NULL, lease_expires = NULL "
+                       "WHERE id = ? AND lease_owner = ?", (job.id, owner))
+
+    def waiting(self) -> int:
+        """Jobs na fila, inclusive os que aguardam uma nova tentativa"""
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+
+    def retry_failed(self, job_ids: Optional[List[int]] = None) -> int:
+        """Devolve jobs falhos à fila, recomeçando pela etapa que falhou"""
+        query = "UPDATE jobs SET status = 'queued', attempts = 0, available_at = ?, finished_at = NULL " \
+                "WHERE status = 'failed'"
+        args: list = [time.time()]
+        if job_ids:
+            query += f" AND id IN ({', '.join('?' for _ in job_ids)})"
+            args.extend(job_ids)
+        with self._connect(write=True) as db:
+            return db.execute(query, args).rowcount
+
+    def status(self, window: float = 3600.0) -> dict:
+        """
+        Resumo da fila: jobs por estado, backlog, vazão e tempo médio por etapa
+
+        Args:
+            window: Janela (s) usada para calcular a vazão
+        """
+        now = time.time()
+        with self._connect() as db:
+            counts = {row['status']: row['total'] for row in
+                      db.execute("SELECT status, COUNT(*) AS total FROM jobs GROUP BY status")}
+            ready = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND available_at <= ?",
+                               (now,)).fetchone()[0]
+            oldest = db.execute("SELECT MIN(created_at) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            finished = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'done' AND finished_at >= ?",
+                                  (now - window,)).fetchone()[0]
+            stages = [dict(row) for row in db.execute(
+                "SELECT stage, COUNT(*) AS runs, SUM(status != 'done') AS failures, "
+                "AVG(CASE WHEN status = 'done' THEN finished_at - started_at END) AS average "
+                "FROM runs WHERE finished_at >= ? GROUP BY stage ORDER BY MIN(id)", (now - window,))]
+            running = [dict(row) for row in db.execute(
+                "SELECT id, target, stage, lease_owner, lease_expires - ? AS lease_left FROM jobs "
+                "WHERE status = 'running' ORDER BY started_at", (now,))]
+            failed = [dict(row) for row in db.execute(
+                "SELECT id, target, stage, attempts, error FROM jobs WHERE status = 'failed' "
+                "ORDER BY finished_at DESC LIMIT 10")]
+
+        backlog = counts.get('queued', 0) + counts.get('running', 0)
+        per_hour = finished * 3600.0 / window
+        return {
+            'counts': counts,
+            'backlog': backlog,
+            'ready': ready,
+            'delayed': counts.get('queued', 0) - ready,
+            'oldest_wait': now - oldest if oldest else None,
+            'throughput_per_hour': per_hour,
+            'eta_seconds': backlog / per_hour * 3600.0 if per_hour and backlog else None,
+            'stages': stages,
+            'running': running,
+            'failed': failed,
+        }
+
+
+def _media_file(job: QueuedJob) -> Path:
+    if job.target.is_dir():
+        from .watcher import microphone_file
+        return microphone_file(job.target)
+    return job.target
+
+
+def _mp3_path(job: QueuedJob) -> Path:
+    """MP3 do job, mesmo quando a conversão foi feita por uma execução anterior"""
+    from . import pipeline
+
+    if job.result.get('mp3'):
+        return Path(job.result['mp3'])
+    media = _media_file(job)
+    return media if media.suffix.lower() == '.mp3' else pipeline.mp3_path_for(media)
+
+
+async def run_stage(job: QueuedJob):
+    """Executa a etapa atual do job, guardando as saídas em job.result"""
+    from . import pipeline, organizer
+    from .watcher import analyze_bundle, recording_chapters
+
+    loop = asyncio.get_running_loop()
+    spec = job.spec
+    force = spec.get('force', False)
+
+    if job.stage == 'analyze':
+        await loop.run_in_executor(None, analyze_bundle, job.target)
+        job.result['metadata'] = str(job.target / 'metadata.json')
+    elif job.stage == 'convert':
+        media = await loop.run_in_executor(None, _media_file, job)
+        mp3_path, _ = await pipeline.convert_stage_async(media, force=force)
+        job.result['mp3'] = str(mp3_path)
+    elif job.stage == 'transcribe':
+        _, path, _ = await pipeline.transcribe_stage_async(_mp3_path(job), force=force,
+                                                           denoise=spec.get('denoise', False))
+        job.result['transcription'] = str(path)
+    elif job.stage == 'chapters':
+        if job.target.is_dir():
+            path = await recording_chapters(job.target, _mp3_path(job), force=force)
+        else:
+            # Arquivo de vídeo: a própria entrada é a tela e o áudio
+            _, path, _ = await pipeline.chapters_stage_async(job.target, job.target, _mp3_path(job), force=force)
+        job.result['chapters'] = str(path) if path else None
+    elif job.stage == 'seo':
+        seo_data, path, _ = await pipeline.seo_stage_async(_mp3_path(job), spec.get('style', 'clickbait'),
+                                                           force=force, mode=spec.get('seo_mode', 'full'))
+        job.result['seo'] = str(path)
+        job.result['title'] = seo_data.get('title')
+    elif job.stage == 'pre-producao':
+        result = await loop.run_in_executor(None, organizer.organize_recording, job.target)
+        job.result['destination'] = str(result.destination)
+    else:
+        raise ValueError(f"Etapa desconhecida: {job.stage}")
+
+
+class QueueWorker:
+    """
+    Processa jobs da fila com até `concurrency` jobs ao mesmo tempo neste processo
+
+    Vários processos podem rodar workers sobre o mesmo banco; os processos do ffmpeg de todos os
+    jobs deste processo passam pelo MediaExecutor compartilhado.
+    """
+
+    def __init__(self, queue: JobQueue, concurrency: int = 2, lease: float = LEASE_SECONDS,
+                 drain: bool = False, on_event: Optional[Callable[[str, QueuedJob, str], None]] = None):
+        """
+        Args:
+            queue: Fila
+            concurrency: Jobs processados ao mesmo tempo
+            lease: Validade do lease (s); o heartbeat o renova a cada terço desse tempo
+            drain: Encerrar quando não houver mais jobs prontos nem em execução neste worker
+            on_event: Função chamada com (evento, job, mensagem)
+        """
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.lease = lease
+        self.drain = drain
+        self.on_event = on_event
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats: Dict[str, int] = {'stages': 0, 'jobs': 0, 'retries': 0, 'failed': 0}
+        self._lost = set()
+        self._heartbeat_executor: Optional[ThreadPoolExecutor] = None
+
+    def _emit(self, event: str, job: QueuedJob, message: str = ''):
+        logger.info(f"[{event}] job {job.id} {job.target.name} {message}".rstrip())
+        if self.on_event:
+            self.on_event(event, job, message)
+
+    async def _heartbeat(self, job: QueuedJob, task: asyncio.Task):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            alive = await loop.run_in_executor(self._heartbeat_executor, self.queue.heartbeat, job.id, self.owner,
+                                               self.lease)
+            if not alive:
+                logger.warning(f"Lease do job {job.id} perdido; interrompendo")
+                self._lost.add(job.id)
+                task.cancel()
+                return
+
+    async def _process(self, job: QueuedJob):
+        """Executa as etapas restantes do job até o fim, uma falha ou a perda do lease"""
+        loop = asyncio.get_running_loop()
+        heartbeat = asyncio.ensure_future(self._heartbeat(job, asyncio.current_task()))
+        try:
+            while True:
+                started = time.time()
+                self._emit('stage', job, job.stage)
+                try:
+                    with tracing.span(f"queue:{job.stage}", category="queue", job=job.id):
+                        await run_stage(job)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    delay = await loop.run_in_executor(None, self.queue.fail_stage, job, self.owner, started, str(e))
+                    if delay is None:
+                        self.stats['failed'] += 1
+                        self._emit('failed', job, f"na etapa '{job.stage}': {e}")
+                    else:
+                        self.stats['retries'] += 1
+                        self._emit('retry', job, f"etapa '{job.stage}' falhou ({e}); nova tentativa em {delay:.0f}s")
+                    return
+
+                stage = job.stage
+                kept = await loop.run_in_executor(None, self.queue.complete_stage, job, self.owner, started,
+                                                  self.lease)
+                if not kept:
+                    logger.warning(f"Job {job.id} assumido por outro worker após a etapa '{stage}'")
+                    return
+                self.stats['stages'] += 1
+                if stage == job.stages[-1]:
+                    self.stats['jobs'] += 1
+                    self._emit('done', job, job.result.get('title') or '')
+                    return
+        except asyncio.CancelledError:
+            # Interrompido (Ctrl+C ou lease perdido): o job volta para a fila na etapa atual. O
+            # release espera o lock do SQLite, então roda fora do loop; o shield o leva até o fim
+            # mesmo se a task for cancelada de novo enquanto espera
+            await asyncio.shield(loop.run_in_executor(None, self.queue.release, job, self.owner))
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def _slot(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await loop.run_in_executor(None, self.queue.claim, self.owner, self.lease)
+            if job is None:
+                # Com drain, espera as novas tentativas agendadas e só sai com a fila vazia
+                if self.drain and not await loop.run_in_executor(None, self.queue.waiting):
+                    return
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            # Cada job em uma task própria: a perda do lease cancela só ele, não o worker
+            task = asyncio.ensure_future(self._process(job))
+            try:
+                await task
+            except asyncio.CancelledError:
+                if job.id not in self._lost:
+                    raise
+                self._lost.discard(job.id)
+
+    async def run_async(self):
+        """Processa jobs até ser cancelado (ou até a fila esvaziar com drain)"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.queue.recover)
+        logger.info(f"Worker {self.owner} processando {self.queue.path} ({self.concurrency} jobs por vez)")
+        # Thread própria para os heartbeats: com o executor padrão ocupado pelas etapas, a
+        # renovação ficaria na fila atrás delas e o lease poderia expirar com o job em andamento
+        self._heartbeat_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='queue-heartbeat')
+        try:
+            await asyncio.gather(*(self._slot() for _ in range(self.concurrency)))
+        finally:
+            self._heartbeat_executor.shutdown(wait=False)
+            self._heartbeat_executor = None
+
+    def run(self):
+        """Versão síncrona de run_async"""
+        asyncio.run(self.run_async())
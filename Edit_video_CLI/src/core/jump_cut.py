@@ -0,0 +1,363 @@
+"""Cortes secos (jump cuts) guiados pelos silêncios do microfone
+
+Os silêncios detectados no canal do microfone viram uma lista de intervalos mantidos,
+aplicada igualmente a todos os canais da gravação, para que tela, webcam e áudio continuem
+alinhados depois dos cortes.
+
+Dois modos de renderização:
+- render: uma única execução do ffmpeg com select/aselect e uma saída por canal
+- smart_render: copia (sem recodificar) os GOPs inteiros entre os cortes e recodifica
+  apenas os trechos entre cada corte e o keyframe seguinte/anterior, em paralelo
+"""
+import bisect
+import shutil
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .audio_processor import AudioProcessor
+from . import sync
+from .video_processor import VideoProcessor, RenderOptions, OUTPUT_FORMATS, run_ffmpeg
+from ..utils import file_utils, media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+# Trechos mantidos mais curtos que isso são descartados (s)
+MIN_KEEP_DURATION = 0.05
+
+# Trechos recodificados mais curtos que isso são ignorados no smart render (s)
+MIN_ENCODE_DURATION = 0.01
+
+# Codificadores compatíveis com o codec de origem, para juntar trechos copiados e recodificados
+SMART_ENCODERS = {
+    'h264': ['-c:v', 'libx264'],
+    'hevc': ['-c:v', 'libx265'],
+}
+
+AUDIO_ENCODERS = {
+    '.m4a': ['-c:a', 'aac', '-b:a', '192k'],
+    '.mp3': ['-c:a', 'libmp3lame', '-q:a', '2'],
+}
+
+Interval = Tuple[float, float]
+
+
+def keep_intervals(silences: List[dict], duration: float, padding: float = 0.1) -> List[Interval]:
+    """
+    Converte silêncios em intervalos mantidos
+
+    Args:
+        silences: Silêncios no formato de AudioProcessor.detect_silences (start/end em s)
+        duration: Duração total da gravação (s)
+        padding: Silêncio mantido em cada lado de um corte (s)
+
+    Returns:
+        List[Interval]: Intervalos (início, fim) mantidos, em ordem
+    """
+    keep = []
+    position = 0.0
+    for silence in sorted(silences, key=lambda item: item['start']):
+        start = silence['start'] + padding
+        end = silence['end'] - padding
+        if end <= start:
+            continue
+        if start > position:
+            keep.append((position, min(start, duration)))
+        position = max(position, end)
+    if position < duration:
+        keep.append((position, duration))
+    return [(start, end) for start, end in keep if end - start >= MIN_KEEP_DURATION]
+
+
+def detect_keep_intervals(microphone: Path, duration: float, min_silence_len: int = 500,
+                          silence_thresh: int = -40, keep_silence: int = 100) -> List[Interval]:
+    """Detecta os silêncios do microfone e retorna os intervalos mantidos"""
+    processor = AudioProcessor(microphone)
+    silences = processor.detect_silences(min_silence_len=min_silence_len, silence_thresh=silence_thresh)
+    return keep_intervals(silences, duration, keep_silence / 1000)
+
+
+def kept_duration(keep: List[Interval]) -> float:
+    return sum(end - start for start, end in keep)
+
+
+def shift_intervals(keep: List[Interval], offset: float) -> List[Interval]:
+    """
+    Converte intervalos da linha do tempo de referência para a de um canal com o offset dado
+
+    Usado quando o canal não passa por filtros (cópia de GOPs) e não pode ser deslocado;
+    trechos antes do início do canal são descartados.
+    """
+    shifted = [(max(0.0, start - offset), end - offset) for start, end in keep]
+    return [(start, end) for start, end in shifted if end - start >= MIN_KEEP_DURATION]
+
+
+def select_expression(keep: List[Interval]) -> str:
+    """Expressão do select/aselect do ffmpeg que mantém apenas os intervalos dados"""
+    return '+'.join(f"between(t,{start:.3f},{end:.3f})" for start, end in keep)
+
+
+def cut_offset_expression(keep: List[Interval]) -> str:
+    """
+    Expressão do ffmpeg (em função de T) com o tempo cortado antes de cada intervalo mantido
+
+    O deslocamento é uma escada: o início do primeiro intervalo mais, a partir do início de cada
+    intervalo seguinte, a pausa que o separa do anterior. Usa os mesmos valores arredondados do
+    select, então todo quadro selecionado cai no degrau do seu intervalo.
+    """
+    rounded = [(round(start, 3), round(end, 3)) for start, end in keep]
+    steps = [f"{rounded[0][0]:.3f}"]
+    for (_, previous_end), (start, _) in zip(rounded, rounded[1:]):
+        steps.append(f"{start - previous_end:.3f}*gte(T,{start:.3f})")
+    return '+'.join(steps)
+
+
+def video_cut_filter(keep: List[Interval]) -> str:
+    """
+    Filtro de vídeo que mantém os intervalos e junta os trechos
+
+    Cada quadro mantido conserva o seu timestamp menos o tempo cortado antes dele. Renumerar os
+    quadros (setpts=N/FRAME_RATE/TB) supõe taxa constante: em gravações com taxa variável, comuns
+    em capturas de tela, o vídeo se afastaria do áudio, que é renumerado pelas amostras
+    (asetpts=N/SR/TB) e continua exato. A saída também tem taxa variável.
+    """
+    return f"select='{select_expression(keep)}',setpts='PTS-({cut_offset_expression(keep)})/TB'"
+
+
+def audio_cut_filter(keep: List[Interval]) -> str:
+    return f"aselect='{select_expression(keep)}',asetpts=N/SR/TB"
+
+
+def probe_keyframes(file_path: Path) -> List[float]:
+    """Instantes (s) dos keyframes do primeiro stream de vídeo, lidos dos pacotes (sem decodificar)"""
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags',
+           '-of', 'csv=p=0', str(file_path)]
+    with tracing.span("ffprobe:keyframes", category="ffmpeg", path=str(file_path)):
+        result = media_executor.run(cmd, text=True)
+
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(float(pts_time))
+    return sorted(keyframes)
+
+
+def plan_segments(keep: List[Interval], keyframes: List[float]) -> List[Tuple[str, float, float]]:
+    """
+    Divide cada intervalo mantido em trechos copiados e recodificados
+
+    Um intervalo [a, b) vira: [a, k1) recodificado, [k1, k2) copiado e [k2, b) recodificado,
+    onde k1 é o primeiro keyframe >= a e k2 o último keyframe <= b. Intervalos sem dois
+    keyframes internos são recodificados inteiros.
+
+    Returns:
+        List[Tuple[str, float, float]]: ('copy' ou 'encode', início, fim)
+    """
+    segments = []
+    for start, end in keep:
+        first = bisect.bisect_left(keyframes, start)
+        last = bisect.bisect_right(keyframes, end) - 1
+        if first >= len(keyframes) or last < 0 or keyframes[first] >= keyframes[last]:
+            segments.append(('encode', start, end))
+            continue
+
+        copy_start, copy_end = keyframes[first], keyframes[last]
+        if copy_start - start >= MIN_ENCODE_DURATION:
+            segments.append(('encode', start, copy_start))
+        segments.append(('copy', copy_start, copy_end))
+        if end - copy_end >= MIN_ENCODE_DURATION:
+            segments.append(('encode', copy_end, end))
+    return segments
+
+
+def _run(cmd: List[str], memory: Optional[int] = None):
+    media_executor.run(cmd, memory=memory)
+
+
+def _output_format(path: Path) -> List[str]:
+    formats = {'.m4a': 'ipod', '.mp3': 'mp3', **OUTPUT_FORMATS}
+    return ['-f', formats.get(path.suffix.lower(), 'mp4')]
+
+
+class JumpCutter:
+    """Aplica os mesmos cortes a todos os canais de uma gravação"""
+
+    def __init__(self, processor: VideoProcessor, keep: List[Interval],
+                 options: Optional[RenderOptions] = None):
+        """
+        Args:
+            processor: Gravação carregada
+            keep: Intervalos mantidos, na linha do tempo do microfone
+            options: Parâmetros de codificação; options.offsets alinha os canais (core.sync)
+        """
+        if not keep:
+            raise ValueError("Nenhum trecho com fala encontrado para manter")
+        self.processor = processor
+        self.keep = keep
+        self.options = options or RenderOptions()
+        self.offsets = self.options.offsets or {}
+        if not processor.channels:
+            processor.load_screenstudio_recording()
+
+    @property
+    def duration(self) -> float:
+        return kept_duration(self.keep)
+
+    def _video_encoder_args(self) -> List[str]:
+        return ['-c:v', 'libx264', '-preset', self.options.effective_preset, '-crf', str(self.options.crf),
+                '-pix_fmt', 'yuv420p', '-threads', str(self.options.threads)]
+
+    @tracing.traced("jump_cut:render", category="video")
+    def render(self, output_dir: Path,
+               on_progress: Optional[Callable[[float, float], None]] = None) -> Dict[str, Path]:
+        """
+        Renderiza todos os canais cortados em uma única execução do ffmpeg
+
+        Args:
+            output_dir: Pasta de saída (os arquivos mantêm os nomes dos canais)
+            on_progress: Função opcional chamada com (segundos codificados, duração)
+
+        Returns:
+            Dict[str, Path]: Canal -> arquivo gerado
+        """
+        output_dir.mkdir(parents=True, exist_ok=True)
+        channels = self.processor.channels
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-nostats', '-progress', 'pipe:1']
+        for path in channels.values():
+            cmd += ['-i', str(path)]
+
+        filters, outputs = [], []
+        for index, (channel, path) in enumerate(channels.items()):
+            media = self.processor.media[channel]
+            output_args = []
+            if media['width']:
+                shift = sync.video_sync_filter(self.offsets.get(channel, 0.0))
+                filters.append(f"[{index}:v]{shift}{video_cut_filter(self.keep)}[v{index}]")
+                output_args += ['-map', f'[v{index}]', *self._video_encoder_args()]
+            if media['has_audio']:
+                shift = sync.audio_sync_filter(self.offsets.get(channel, 0.0))
+                filters.append(f"[{index}:a]{shift}{audio_cut_filter(self.keep)}[a{index}]")
+                output_args += ['-map', f'[a{index}]',
+                                *AUDIO_ENCODERS.get(path.suffix.lower(), AUDIO_ENCODERS['.m4a'])]
+            outputs.append((channel, output_dir / path.name, output_args))
+
+        cmd += ['-filter_complex', ';'.join(filters)]
+        result = {}
+        with ExitStack() as stack:
+            for channel, output_file, output_args in outputs:
+                temp_path = stack.enter_context(file_utils.atomic_path(output_file))
+                cmd += [*output_args, *_output_format(output_file), temp_path]
+                result[channel] = output_file
+            logger.info(f"Renderizando {len(self.keep)} trechos mantidos ({self.duration:.1f}s) em uma passada")
+            memory = sum(media_executor.video_memory(media['width'], media['height'])
+                         for media in self.processor.media.values() if media['width'])
+            with tracing.span("ffmpeg:jump_cut", category="ffmpeg", segments=len(self.keep)):
+                run_ffmpeg(cmd, self.duration, on_progress, memory=memory or None)
+        return result
+
+    def _channel_keep(self, channel: str) -> List[Interval]:
+        return shift_intervals(self.keep, self.offsets.get(channel, 0.0))
+
+    def _cut_audio(self, channel: str, source: Path, output_file: Path):
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-i', str(source), '-map', '0:a:0',
+               '-af', audio_cut_filter(self._channel_keep(channel)),
+               *AUDIO_ENCODERS.get(output_file.suffix.lower(), AUDIO_ENCODERS['.m4a']),
+               *_output_format(output_file)]
+        with file_utils.atomic_path(output_file) as temp_path:
+            with tracing.span("ffmpeg:jump_cut_audio", category="ffmpeg"):
+                _run(cmd + [temp_path])
+
+    def _render_piece(self, source: Path, kind: str, start: float, end: float,
+                      piece: Path, encoder: List[str], memory: Optional[int] = None):
+        """Gera um trecho em MPEG-TS (parâmetros do codec em cada keyframe, para juntar depois)"""
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-ss', f'{start:.6f}', '-i', str(source),
+               '-t', f'{end - start:.6f}', '-map', '0:v:0']
+        if kind == 'copy':
+            cmd += ['-c', 'copy']
+        else:
+            cmd += [*encoder, '-preset', self.options.effective_preset, '-crf', str(self.options.crf)]
+        cmd += ['-avoid_negative_ts', 'make_zero', '-f', 'mpegts', str(piece)]
+        with tracing.span(f"ffmpeg:smart_{kind}", category="ffmpeg", duration=round(end - start, 3)):
+            _run(cmd, memory=memory if kind == 'encode' else None)
+
+    @tracing.traced("jump_cut:smart_render", category="video")
+    def smart_render(self, output_dir: Path, workers: Optional[int] = None,
+                     on_progress: Optional[Callable[[float, float], None]] = None) -> Dict[str, Path]:
+        """
+        Renderiza os canais cortados copiando os GOPs inteiros e recodificando só as bordas
+
+        Args:
+            output_dir: Pasta de saída (os arquivos mantêm os nomes dos canais)
+            workers: Execuções do ffmpeg em paralelo (padrão: o do ThreadPoolExecutor)
+            on_progress: Função opcional chamada com (segundos concluídos, total)
+
+        Returns:
+            Dict[str, Path]: Canal -> arquivo gerado
+        """
+        output_dir.mkdir(parents=True, exist_ok=True)
+        channels = self.processor.channels
+        work_dir = Path(tempfile.mkdtemp(prefix='.jump-cut-', dir=output_dir))
+        try:
+            tasks, lists = [], {}
+            for channel, path in channels.items():
+                if not self.processor.media[channel]['width']:
+                    continue
+                codec = self.processor.media[channel]['video_codec']
+                if codec not in SMART_ENCODERS:
+                    raise ValueError(f"Smart render não suporta o codec {codec} ({path.name})")
+
+                # A cópia de GOPs não passa por filtros: o offset desloca os intervalos do canal
+                segments = plan_segments(self._channel_keep(channel), probe_keyframes(path))
+                copied = sum(end - start for kind, start, end in segments if kind == 'copy')
+                logger.info(f"{path.name}: {len(segments)} trechos, "
+                            f"{copied / max(self.duration, 1e-9):.0%} copiado sem recodificar")
+                memory = media_executor.video_memory(self.processor.media[channel]['width'],
+                                                     self.processor.media[channel]['height'])
+                pieces = []
+                for index, (kind, start, end) in enumerate(segments):
+                    piece = work_dir / f"{channel}-{index:05d}.ts"
+                    pieces.append(piece)
+                    tasks.append((path, kind, start, end, piece, SMART_ENCODERS[codec], memory))
+                lists[channel] = pieces
+
+            total = sum(end - start for _, _, start, end, _, _, _ in tasks)
+            done = 0.0
+            if on_progress:
+                on_progress(done, total)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [(executor.submit(self._render_piece, *task), task[3] - task[2]) for task in tasks]
+                for future, duration in futures:
+                    future.result()
+                    done += duration
+                    if on_progress:
+                        on_progress(done, total)
+
+            result = {}
+            for channel, path in channels.items():
+                output_file = output_dir / path.name
+                if channel not in lists:
+                    self._cut_audio(channel, path, output_file)
+                    result[channel] = output_file
+                    continue
+
+                concat_list = work_dir / f"{channel}.txt"
+                concat_list.write_text(''.join(f"file '{piece.name}'\n" for piece in lists[channel]),
+                                       encoding='utf-8')
+                cmd = ['ffmpeg', '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', str(concat_list)]
+                maps = ['-map', '0:v']
+                if self.processor.media[channel]['has_audio']:
+                    cmd += ['-i', str(path)]
+                    maps += ['-map', '1:a:0', '-af', audio_cut_filter(self._channel_keep(channel)),
+                             *AUDIO_ENCODERS['.m4a']]
+                cmd += [*maps, '-c:v', 'copy', '-movflags', '+faststart', '-f', 'mp4']
+                with file_utils.atomic_path(output_file) as temp_path:
+                    with tracing.span("ffmpeg:smart_concat", category="ffmpeg", pieces=len(lists[channel])):
+                        _run(cmd + [temp_path])
+                result[channel] = output_file
+            return result
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
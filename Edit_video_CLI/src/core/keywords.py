@@ -0,0 +1,339 @@
+"""Extração local de palavras-chave e tags de transcrições (português e inglês)
+
+As candidatas são as palavras e as expressões de até MAX_PHRASE_WORDS palavras que aparecem
+entre stopwords e pontuação (como no RAKE). Cada palavra vale o seu TF-IDF e cada expressão
+repetida vale a soma do IDF das suas palavras dividida pela raiz do número de palavras, com a
+contagem em escala logarítmica. O IDF vem do índice de busca (core.search_index), ou seja, da
+própria biblioteca de transcrições: palavras que aparecem em quase todos os vídeos do canal
+("vídeo", "pessoal", o nome do canal) perdem peso. Sem índice, todas as palavras têm o mesmo IDF
+e só as stopwords ficam de fora.
+
+A contagem de palavras e expressões é vetorizada com NumPy: cada palavra vira um inteiro e as
+expressões viram códigos únicos contados com np.unique.
+
+O resultado serve para três coisas: tags e palavras-chave instantâneas e offline, um resumo
+compacto (palavras-chave e frases mais relevantes) enviado ao modelo no lugar da transcrição
+inteira, e um SEO gerado sem nenhuma chamada ao modelo (veja local_seo).
+"""
+import os
+import re
+import math
+import logging
+import unicodedata
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Expressões mais longas raramente são boas tags
+MAX_PHRASE_WORDS = 3
+
+# Uma palavra ou expressão só é candidata se aparece pelo menos esta quantidade de vezes
+MIN_COUNT = 2
+
+# Palavras mais curtas que isso são ignoradas
+MIN_WORD_LENGTH = 3
+
+# Tamanho máximo do resumo enviado ao modelo no modo compacto
+COMPACT_CHARS = 4000
+
+# Limites do YouTube: 500 caracteres somando todas as tags e 100 no título
+MAX_TAG_CHARS = 500
+MAX_TITLE_CHARS = 100
+
+STOPWORDS_PT = frozenset("""
+a à ao aos aquela aquelas aquele aqueles aquilo as às até com como da das de dela delas dele deles
+depois do dos e é ela elas ele eles em entre era eram essa essas esse esses esta está estamos estão
+estas estava estavam este estes eu são sou somos seria seriam havia foi fomos for foram fosse fossem
+fui há isso isto já lhe lhes mais
+mas me mesmo meu meus minha minhas muito na não nas nem no nos nós nossa nossas nosso nossos num numa
+o os ou para pela pelas pelo pelos por qual quando que quem se sem ser será seu seus só sua suas também
+te tem têm tinha tu tua tuas um uma umas uns você vocês vos ter sido sendo seja sejam vai vou vamos
+estar fazer faz feito pode podem poder aqui ali lá aí então agora assim bem tudo todo toda todos
+todas cada outro outra outros outras onde porque porquê pra pro pras pros tá tô né tipo coisa coisas
+gente pessoal galera beleza okay certo sim daí vez vezes ainda sobre mesma mesmos mesmas algum
+alguma alguns algumas nenhum nenhuma dessa desse desta deste nessa nesse nesta neste dá dar deu ver vê
+vão ficar fica ficou quer queria acho acha sei sabe olha olhar bom boa legal exemplo realmente
+basicamente simplesmente justamente primeiro primeira segundo segunda hoje dia olá oi tchau
+vários várias falar falando fala dizer disse usar usando obrigado obrigada inscreva
+""".split())
+
+STOPWORDS_EN = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most my
+myself no nor not now of off on once only or other our ours ourselves out over own same she should so
+some such than that the their theirs them themselves then there these they this those through to too
+under until up very was we were what when where which while who whom why will with would you your
+yours yourself yourselves also get got going gonna want like yeah okay ok right really actually let
+know think see thing things lot one two well way make makes made go goes say says said
+""".split())
+
+STOPWORDS = STOPWORDS_PT | STOPWORDS_EN
+
+# Palavras (com hífen ou apóstrofo internos), sem números
+WORD_RE = re.compile(r"[^\W\d_]+(?:[-'’][^\W\d_]+)*")
+# Pontuação que encerra uma expressão
+BREAK_RE = re.compile(r"[.,;:!?()\[\]{}\"“”«»…\n\r\t]+")
+SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+@dataclass
+class Keyword:
+    """Palavra ou expressão-chave"""
+    term: str
+    score: float
+    count: int
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def fold(word: str) -> str:
+    """Forma normalizada de uma palavra (minúsculas e sem acentos, como no índice de busca)"""
+    decomposed = unicodedata.normalize('NFKD', word.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+FOLDED_STOPWORDS = frozenset(fold(word) for word in STOPWORDS)
+
+
+class Idf:
+    """Frequência de documento de cada palavra (já normalizada com fold) em uma biblioteca"""
+
+    def __init__(self, documents: int = 0, frequencies: Optional[Dict[str, int]] = None):
+        self.documents = documents
+        self.frequencies = frequencies or {}
+
+    def __bool__(self) -> bool:
+        return self.documents > 0
+
+    def weight(self, word: str) -> float:
+        """IDF suavizado; sem estatísticas, 1 para todas as palavras"""
+        if not self.documents:
+            return 1.0
+        return math.log((self.documents + 1) / (self.frequencies.get(word, 0) + 1)) + 1
+
+
+_idf_cache: Dict[str, Tuple[tuple, Idf]] = {}
+
+
+def library_idf(index_path: Optional[Path] = None) -> Idf:
+    """
+    IDF das transcrições do índice de busca, reaproveitado enquanto o banco não muda
+
+    Sem índice (ou com um índice vazio), devolve um Idf vazio.
+    """
+    from . import search_index
+
+    path = Path(index_path) if index_path else search_index.default_path()
+    if not path.exists():
+        return Idf()
+    # O WAL recebe as escritas antes do banco, então as duas datas compõem a versão
+    version = tuple(os.stat(candidate).st_mtime_ns if candidate.exists() else 0
+                    for candidate in (path, path.with_name(path.name + '-wal')))
+    cached = _idf_cache.get(str(path))
+    if cached and cached[0] == version:
+        return cached[1]
+    try:
+        documents, frequencies = search_index.SearchIndex(path).document_frequencies()
+    except Exception as e:
+        logger.warning(f"Não foi possível ler o IDF do índice {path}: {e}")
+        return Idf()
+    idf = Idf(documents, frequencies)
+    _idf_cache[str(path)] = (version, idf)
+    return idf
+
+
+def _tokens(text: str) -> Tuple[List[int], List[str]]:
+    """
+    Ids das palavras do texto, com -1 no lugar de stopwords e pontuação
+
+    Returns:
+        Tuple[List[int], List[str]]: Sequência de ids e forma normalizada de cada id
+    """
+    ids: List[int] = []
+    vocabulary: Dict[str, int] = {}
+    words: List[str] = []
+    for fragment in BREAK_RE.split(text):
+        for surface in WORD_RE.findall(fragment):
+            word = fold(surface)
+            if len(word) < MIN_WORD_LENGTH or word in FOLDED_STOPWORDS:
+                ids.append(-1)
+                continue
+            if word not in vocabulary:
+                vocabulary[word] = len(words)
+                words.append(word)
+            ids.append(vocabulary[word])
+        ids.append(-1)
+    return ids, words
+
+
+def _surface_forms(text: str) -> Dict[str, str]:
+    """Forma mais frequente (com acentos) de cada palavra normalizada"""
+    counts: Dict[str, Dict[str, int]] = {}
+    for surface in WORD_RE.findall(text):
+        lower = surface.lower()
+        forms = counts.setdefault(fold(lower), {})
+        forms[lower] = forms.get(lower, 0) + 1
+    return {word: max(forms, key=forms.get) for word, forms in counts.items()}
+
+
+def extract_keywords(text: str, limit: int = 15, idf: Optional[Idf] = None) -> List[Keyword]:
+    """
+    Palavras e expressões-chave de uma transcrição
+
+    Args:
+        text: Transcrição
+        limit: Máximo de palavras-chave
+        idf: Estatísticas da biblioteca (padrão: library_idf())
+
+    Returns:
+        List[Keyword]: Da mais relevante para a menos relevante
+    """
+    import numpy as np
+
+    if idf is None:
+        idf = library_idf()
+    ids, words = _tokens(text)
+    if not words:
+        return []
+    sequence = np.array(ids, dtype=np.int64)
+    size = len(words)
+    weights = np.array([idf.weight(word) for word in words])
+    counts = np.bincount(sequence[sequence >= 0], minlength=size)
+
+    # Candidatas: (ids das palavras, contagem, pontuação)
+    candidates = [((word_id,), int(count), (1 + math.log(count)) * weights[word_id])
+                  for word_id, count in enumerate(counts) if count >= MIN_COUNT]
+    for length in range(2, MAX_PHRASE_WORDS + 1):
+        if len(sequence) < length:
+            break
+        columns = [sequence[offset:len(sequence) - length + 1 + offset] for offset in range(length)]
+        valid = np.logical_and.reduce([column >= 0 for column in columns])
+        codes = np.zeros(int(valid.sum()), dtype=np.int64)
+        for column in columns:
+            codes = codes * size + column[valid]
+        phrases, phrase_counts = np.unique(codes, return_counts=True)
+        for code, count in zip(phrases[phrase_counts >= MIN_COUNT], phrase_counts[phrase_counts >= MIN_COUNT]):
+            members = []
+            for _ in range(length):
+                code, word_id = divmod(int(code), size)
+                members.append(word_id)
+            members.reverse()
+            # Expressões que repetem a mesma palavra ("muito muito") não são tags
+            if len(set(members)) < length:
+                continue
+            # A raiz do tamanho evita que expressões longas ganhem só por somarem mais palavras
+            candidates.append((tuple(members), int(count),
+                               (1 + math.log(count)) * weights[members].sum() / math.sqrt(length)))
+
+    candidates.sort(key=lambda candidate: -candidate[2])
+    surface = _surface_forms(text)
+    chosen: List[Tuple[tuple, int]] = []
+    keywords: List[Keyword] = []
+    for members, count, score in candidates:
+        if len(keywords) >= limit:
+            break
+        # Sem estender uma expressão já escolhida, nem repetir uma palavra que quase só aparece dentro dela
+        redundant = False
+        for other, other_count in chosen:
+            inside = any(other[i:i + len(members)] == members for i in range(len(other) - len(members) + 1))
+            contains = any(members[i:i + len(other)] == other for i in range(len(members) - len(other) + 1))
+            if contains or (inside and count <= 2 * other_count):
+                redundant = True
+                break
+        if redundant:
+            continue
+        chosen.append((members, count))
+        keywords.append(Keyword(' '.join(surface.get(words[word_id], words[word_id]) for word_id in members),
+                                round(float(score), 3), count))
+    return keywords
+
+
+def candidate_tags(keywords: List[Keyword], limit: int = 15, max_chars: int = MAX_TAG_CHARS) -> List[str]:
+    """Tags a partir das palavras-chave, dentro do limite de caracteres do YouTube"""
+    tags: List[str] = []
+    total = 0
+    for keyword in keywords:
+        if len(tags) >= limit:
+            break
+        if keyword.term in tags or total + len(keyword.term) > max_chars:
+            continue
+        tags.append(keyword.term)
+        total += len(keyword.term)
+    return tags
+
+
+def key_sentences(text: str, keywords: List[Keyword], max_chars: int = COMPACT_CHARS) -> List[str]:
+    """
+    Frases da transcrição que mais concentram as palavras-chave, na ordem original
+
+    A pontuação de cada frase é a soma das pontuações das palavras-chave que ela contém,
+    dividida pela raiz do tamanho, para não favorecer frases longas.
+    """
+    sentences = [' '.join(sentence.split()) for sentence in SENTENCE_RE.split(text)]
+    # Frases repetidas (comuns em transcrições de fala) entram uma vez só
+    sentences = list(dict.fromkeys(sentence for sentence in sentences if sentence))
+    terms = [(fold(keyword.term), keyword.score) for keyword in keywords]
+    scored = []
+    for index, sentence in enumerate(sentences):
+        folded = fold(sentence)
+        score = sum(weight for term, weight in terms if term in folded)
+        if score:
+            scored.append((score / math.sqrt(len(sentence)), index))
+
+    chosen, total = [], 0
+    for _, index in sorted(scored, reverse=True):
+        if total + len(sentences[index]) > max_chars:
+            continue
+        chosen.append(index)
+        total += len(sentences[index]) + 1
+    return [sentences[index] for index in sorted(chosen)]
+
+
+def _title(keywords: List[Keyword]) -> str:
+    """Título a partir das principais palavras-chave"""
+    if not keywords:
+        return ''
+    first = keywords[0].term
+    title = first[:1].upper() + first[1:]
+    rest = [keyword.term for keyword in keywords[1:3]]
+    if rest:
+        title += ': ' + ', '.join(rest)
+    return title[:MAX_TITLE_CHARS].rsplit(' ', 1)[0] if len(title) > MAX_TITLE_CHARS else title
+
+
+def local_seo(text: str, keywords: Optional[List[Keyword]] = None, chapters: Optional[List[dict]] = None,
+              idf: Optional[Idf] = None) -> dict:
+    """
+    SEO gerado sem o modelo, no mesmo formato do generate_seo
+
+    O título junta as principais palavras-chave, a descrição usa as frases mais relevantes da
+    transcrição e as tags são as palavras-chave. Cada capítulo recebe como título a principal
+    palavra-chave do seu trecho.
+    """
+    from . import scenes
+
+    if idf is None:
+        idf = library_idf()
+    if keywords is None:
+        keywords = extract_keywords(text, idf=idf)
+    summary = ' '.join(key_sentences(text, keywords[:5], max_chars=600))
+    description = summary
+    if keywords:
+        description += f"\n\nNeste vídeo: {', '.join(keyword.term for keyword in keywords[:8])}."
+    seo_data = {
+        'title': _title(keywords),
+        'description': description.strip(),
+        'tags': candidate_tags(keywords),
+    }
+    if chapters:
+        titles = []
+        for excerpt in scenes.chapter_excerpts(chapters, text, max_chars=2000):
+            found = extract_keywords(excerpt, limit=1, idf=idf)
+            titles.append(found[0].term[:1].upper() + found[0].term[1:] if found else None)
+        seo_data['chapters'] = titles
+        scenes.apply_chapters(seo_data, chapters)
+    return seo_data
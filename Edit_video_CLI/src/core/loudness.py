@@ -0,0 +1,189 @@
+"""Medição de loudness integrado (EBU R128 / ITU-R BS.1770) com NumPy
+
+A medição é feita em uma única passada sobre o PCM, em blocos de tamanho fixo:
+- ponderação K: os dois biquads da BS.1770 (shelf de ~1.7 kHz e passa-altas de ~38 Hz),
+  aplicados como a resposta ao impulso equivalente via FFT com overlap-add
+- a energia filtrada é acumulada em janelas de 100 ms; os blocos de 400 ms com 75% de
+  sobreposição são somas de quatro janelas consecutivas
+- gate absoluto em -70 LUFS e gate relativo 10 LU abaixo da média dos blocos restantes
+
+A memória usada não depende da duração do arquivo além de uma energia por janela de 100 ms.
+"""
+import math
+import logging
+import functools
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from ..utils import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TARGET = -14.0      # LUFS (YouTube)
+DEFAULT_MAX_PEAK = -1.0     # dBFS
+ABSOLUTE_GATE = -70.0       # LUFS
+RELATIVE_GATE = -10.0       # LU
+BLOCK_BINS = 4              # 400 ms = 4 janelas de 100 ms
+
+# Duração da resposta ao impulso da ponderação K (a energia descartada fica abaixo de -100 dB)
+IMPULSE_SECONDS = 0.05
+
+# Tamanho da FFT do overlap-add; cada bloco tem FFT_SIZE - len(resposta) + 1 amostras, sem
+# preenchimento desperdiçado
+FFT_SIZE = 1 << 16
+
+
+@dataclass
+class LoudnessResult:
+    """Loudness integrado (LUFS) e pico de amostra (dBFS)"""
+    integrated: float
+    peak: float
+
+
+def k_weighting_coefficients(sample_rate: int):
+    """Coeficientes (b, a) dos dois biquads da ponderação K para a taxa dada (libebur128)"""
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = math.tan(math.pi * f0 / sample_rate)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+             [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = math.tan(math.pi * f0 / sample_rate)
+    a0 = 1 + k / q + k * k
+    highpass = ([1.0, -2.0, 1.0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    return shelf, highpass
+
+
+@functools.lru_cache(maxsize=8)
+def k_weighting_impulse(sample_rate: int):
+    """Resposta ao impulso da ponderação K, truncada em IMPULSE_SECONDS"""
+    import numpy as np
+
+    length = int(sample_rate * IMPULSE_SECONDS)
+    signal = np.zeros(length)
+    signal[0] = 1.0
+    for b, a in k_weighting_coefficients(sample_rate):
+        output = np.zeros(length)
+        x1 = x2 = y1 = y2 = 0.0
+        # Executado uma vez por taxa de amostragem; o filtro em si é aplicado via FFT
+        for n in range(length):
+            x0 = signal[n]
+            y0 = b[0] * x0 + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+            output[n] = y0
+            x2, x1, y2, y1 = x1, x0, y1, y0
+        signal = output
+    return signal
+
+
+class LoudnessMeter:
+    """Medidor incremental: chame add() com blocos de amostras e depois result()
+
+    add() aceita blocos de qualquer tamanho, mas blocos de `block_size` amostras aproveitam a
+    FFT inteira.
+    """
+
+    def __init__(self, sample_rate: int, channels: int):
+        import numpy as np
+
+        self.np = np
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.impulse = k_weighting_impulse(sample_rate)
+        self.block_size = FFT_SIZE - len(self.impulse) + 1
+        self.bin_size = sample_rate // 10
+        self.tail = np.zeros((len(self.impulse) - 1, channels))
+        self.leftover = np.zeros((0, channels))
+        self.bins = []
+        self.peak = 0.0
+        self._spectra = {}
+
+    def _filter(self, samples):
+        """Aplica a ponderação K a um bloco, continuando o filtro do bloco anterior (overlap-add)"""
+        np = self.np
+        length = len(samples) + len(self.impulse) - 1
+        size = 1 << (length - 1).bit_length()
+        if size not in self._spectra:
+            self._spectra[size] = np.fft.rfft(self.impulse, size)
+        filtered = np.fft.irfft(np.fft.rfft(samples, size, axis=0) * self._spectra[size][:, None],
+                                size, axis=0)[:length]
+        filtered[:len(self.tail)] += self.tail
+        self.tail = filtered[len(samples):].copy()
+        return filtered[:len(samples)]
+
+    def add(self, samples):
+        """
+        Adiciona amostras float em [-1, 1]
+
+        Args:
+            samples: np.ndarray com forma (amostras, canais)
+        """
+        np = self.np
+        if not len(samples):
+            return
+        self.peak = max(self.peak, float(np.abs(samples).max()))
+        squared = np.concatenate([self.leftover, self._filter(samples) ** 2])
+        full = len(squared) // self.bin_size * self.bin_size
+        if full:
+            self.bins.append(squared[:full].reshape(-1, self.bin_size, self.channels).sum(axis=1))
+        self.leftover = squared[full:]
+
+    def result(self) -> LoudnessResult:
+        """Calcula o loudness integrado com os gates absoluto e relativo"""
+        np = self.np
+        peak = 20 * math.log10(self.peak) if self.peak > 0 else -math.inf
+        if not self.bins or sum(len(b) for b in self.bins) < BLOCK_BINS:
+            return LoudnessResult(integrated=-math.inf, peak=peak)
+
+        # Energia média por canal de cada bloco de 400 ms (passo de 100 ms)
+        bins = np.concatenate(self.bins).sum(axis=1)
+        cumulative = np.concatenate([[0.0], np.cumsum(bins)])
+        blocks = (cumulative[BLOCK_BINS:] - cumulative[:-BLOCK_BINS]) / (BLOCK_BINS * self.bin_size)
+
+        with np.errstate(divide='ignore'):
+            loudness = -0.691 + 10 * np.log10(blocks)
+        gated = blocks[loudness > ABSOLUTE_GATE]
+        if not len(gated):
+            return LoudnessResult(integrated=-math.inf, peak=peak)
+
+        relative = -0.691 + 10 * math.log10(gated.mean()) + RELATIVE_GATE
+        gated = blocks[(loudness > ABSOLUTE_GATE) & (loudness > relative)]
+        return LoudnessResult(integrated=-0.691 + 10 * math.log10(gated.mean()), peak=peak)
+
+
+@tracing.traced("audio:measure_loudness", category="audio")
+def measure_segment(audio_segment) -> LoudnessResult:
+    """Mede o loudness de um AudioSegment do pydub em uma passada"""
+    import numpy as np
+
+    channels = audio_segment.channels
+    scale = float(1 << (8 * audio_segment.sample_width - 1))
+    samples = np.array(audio_segment.get_array_of_samples()).reshape(-1, channels)
+
+    meter = LoudnessMeter(audio_segment.frame_rate, channels)
+    for start in range(0, len(samples), meter.block_size):
+        meter.add(samples[start:start + meter.block_size] / scale)
+    return meter.result()
+
+
+def normalization_gain(result: LoudnessResult, target: float = DEFAULT_TARGET,
+                       max_peak: Optional[float] = DEFAULT_MAX_PEAK) -> Tuple[float, bool]:
+    """
+    Ganho (dB) para levar o áudio ao loudness alvo
+
+    Args:
+        result: Medição do áudio
+        target: Loudness integrado desejado (LUFS)
+        max_peak: Pico máximo permitido após o ganho (dBFS); None desativa o limite
+
+    Returns:
+        Tuple[float, bool]: Ganho em dB e se ele foi reduzido para respeitar o pico máximo
+    """
+    if result.integrated == -math.inf:
+        return 0.0, False
+    gain = target - result.integrated
+    if max_peak is not None and result.peak + gain > max_peak:
+        return max_peak - result.peak, True
+    return gain, False
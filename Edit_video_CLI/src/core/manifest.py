@@ -0,0 +1,116 @@
+"""Manifesto incremental das etapas do pipeline (estilo make)"""
+import os
+import json
+import hashlib
+import datetime
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..utils import file_utils, tracing
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Path) -> str:
+    """Calcula o SHA-256 do conteúdo de um arquivo, lendo em blocos"""
+    digest = hashlib.sha256()
+    with tracing.span("manifest:hash_file", category="io", bytes_in=tracing.file_size(path)):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Registra, para cada etapa, os hashes das entradas, os parâmetros e os hashes das saídas
+
+    Uma etapa está atualizada quando suas entradas e parâmetros não mudaram e todas as
+    saídas registradas ainda existem com o mesmo conteúdo. Os hashes ficam em cache por
+    tamanho e mtime, para que arquivos grandes não sejam lidos de novo a cada execução.
+    """
+
+    def __init__(self, path: Path, data: Optional[dict] = None):
+        self.path = path
+        self.data = data or {'version': MANIFEST_VERSION, 'files': {}, 'stages': {}}
+
+    @classmethod
+    def for_media(cls, mp3_path: Path) -> 'Manifest':
+        """Carrega (ou cria) o manifesto associado ao MP3 de uma entrada"""
+        path = mp3_path.with_name(f"{mp3_path.stem}.manifest.json")
+        data = None
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') != MANIFEST_VERSION:
+                    data = None
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Manifesto inválido em {path}, ignorando: {e}")
+                data = None
+        return cls(path, data)
+
+    def _key(self, path: Path) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.path.parent))
+
+    def fingerprint(self, path: Path) -> Optional[str]:
+        """Retorna o hash do arquivo, reaproveitando o cache se tamanho e mtime não mudaram"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        key = self._key(path)
+        cached = self.data['files'].get(key)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['sha256']
+
+        digest = hash_file(path)
+        self.data['files'][key] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def _hashes(self, paths: Iterable[Path]) -> Dict[str, Optional[str]]:
+        return {self._key(path): self.fingerprint(path) for path in paths}
+
+    def is_fresh(self, stage: str, inputs: List[Path], params: dict) -> bool:
+        """
+        Verifica se uma etapa pode ser pulada
+
+        Args:
+            stage: Nome da etapa
+            inputs: Arquivos de entrada da etapa
+            params: Parâmetros que influenciam a saída
+
+        Returns:
+            bool: True se entradas, parâmetros e saídas registradas não mudaram
+        """
+        entry = self.data['stages'].get(stage)
+        if not entry:
+            return False
+        if entry['params'] != json.loads(json.dumps(params)):
+            return False
+        if entry['inputs'] != self._hashes(inputs):
+            return False
+
+        base = self.path.parent
+        for key, digest in entry['outputs'].items():
+            if self.fingerprint(base / key) != digest:
+                return False
+        return True
+
+    def record(self, stage: str, inputs: List[Path], params: dict, outputs: List[Path]):
+        """Registra a execução bem-sucedida de uma etapa"""
+        self.data['stages'][stage] = {
+            'inputs': self._hashes(inputs),
+            'params': json.loads(json.dumps(params)),
+            'outputs': self._hashes(outputs),
+            'completed_at': datetime.datetime.now().isoformat(),
+        }
+
+    def save(self):
+        """Salva o manifesto de forma atômica"""
+        file_utils.atomic_write_text(self.path, json.dumps(self.data, indent=2, ensure_ascii=False))
@@ -1,10 +1,11 @@
 from pathlib import Path
 import json
 import logging
-import subprocess
 import datetime
 import re
 
+from ..utils import media_executor, tracing
+
 logger = logging.getLogger(__name__)
 
 class MetadataHandler:
@@ -12,6 +13,7 @@ class MetadataHandler:
         self.recording_path = recording_path
         self.metadata = {}
         
+    @tracing.traced("metadata:extract_screenstudio_metadata", category="metadata")
     def extract_screenstudio_metadata(self):
         """Extrai metadados de uma gravação do ScreenStudio"""
         logger.info(f"Extraindo metadados do ScreenStudio em {self.recording_path}")
@@ -54,6 +56,17 @@ class MetadataHandler:
         
         return self.metadata
     
+    @tracing.traced("metadata:estimate_sync", category="metadata")
+    def estimate_sync(self):
+        """Estima o deslocamento dos canais com áudio em relação ao microfone (veja core.sync)"""
+        from .sync import estimate_channel_offsets
+        
+        media = self.metadata.get('media') or self._extract_media_metadata()
+        channels = {name: Path(info['path']) for name, info in media.items() if 'path' in info}
+        has_audio = {name: 'audio' in info for name, info in media.items()}
+        self.metadata['sync'] = estimate_channel_offsets(channels, has_audio)
+        return self.metadata['sync']
+    
     def _extract_timestamp(self, log_content):
         """Extrai o timestamp da gravação do log"""
         timestamp_match = re.search(r'(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+)', log_content)
@@ -107,18 +120,9 @@ class MetadataHandler:
     
     def _get_media_info(self, file_path):
         """Obtém informações de um arquivo de mídia usando ffprobe"""
-        cmd = [
-            'ffprobe', 
-            '-v', 'quiet', 
-            '-print_format', 'json', 
-            '-show_format', 
-            '-show_streams',
-            str(file_path)
-        ]
-        
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            data = json.loads(result.stdout)
+            with tracing.span("ffprobe", category="ffmpeg", path=str(file_path)):
+                data = media_executor.probe(file_path)
             
             # Simplificar os dados
             info = {
@@ -171,8 +175,10 @@ class MetadataHandler:
         self.metadata['generated_at'] = datetime.datetime.now().isoformat()
         
         # Salvar no arquivo
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+        with tracing.span("metadata:save", category="io") as sp:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+            sp.bytes_out = tracing.file_size(output_path)
             
         logger.info(f"Metadados salvos em {output_path}")
         return True
@@ -231,4 +237,15 @@ class MetadataHandler:
                     summary.append(f"  Canais: {audio.get('channels', 0)}")
                     summary.append(f"  Taxa de Amostragem: {audio.get('sample_rate', 'Desconhecido')} Hz")
         
+        # Sincronização dos canais
+        sync_info = self.metadata.get('sync', {})
+        if sync_info:
+            summary.append("\nSincronização (em relação ao microfone):")
+            for media_type, info in sync_info.items():
+                if media_type == 'microphone':
+                    continue
+                status = "aplicado na renderização" if info.get('applied') else "não aplicado"
+                summary.append(f"- {media_type.title()}: {info['offset'] * 1000:+.1f} ms "
+                               f"(correlação {info['confidence']:.2f}, {status})")
+        
         return "\n".join(summary) 
\ No newline at end of file
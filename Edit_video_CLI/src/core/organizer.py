@@ -0,0 +1,194 @@
+"""Organização de gravações do ScreenStudio para pré-produção"""
+import re
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..utils.file_utils import place_file
+from . import integrity
+
+logger = logging.getLogger(__name__)
+
+SEO_TEMPLATE_NAME = 'channel-2-microphone-0-seo.json'
+
+DEFAULT_FILES_TO_KEEP = [
+    'channel-1-display-0.mp4',
+    'channel-2-microphone-0.mp3',
+    SEO_TEMPLATE_NAME,
+    'channel-3-webcam-0.mp4'
+]
+
+# Arquivos colocados ao mesmo tempo (cópias independentes usam bem discos rápidos)
+DEFAULT_COPY_WORKERS = 4
+
+
+@dataclass
+class OrganizeResult:
+    """Resultado da organização de uma gravação"""
+    title: str
+    destination: Path
+    copied: List[Path] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+    methods: Dict[str, str] = field(default_factory=dict)
+    total_bytes: int = 0
+    checksums: Optional[Path] = None
+
+
+def find_recording_path(recording_dir: Path) -> Tuple[Path, Path]:
+    """
+    Localiza a pasta 'recording' de uma gravação do ScreenStudio
+
+    Args:
+        recording_dir: Diretório da gravação (ex: Gravação.screenstudio)
+
+    Returns:
+        Tuple[Path, Path]: Diretório da gravação e pasta 'recording'
+    """
+    recording_path = recording_dir / 'recording'
+    if not recording_path.exists():
+        # Tenta encontrar uma pasta recording dentro do diretório fornecido
+        for item in recording_dir.iterdir():
+            if item.is_dir() and item.name == 'recording':
+                recording_path = item
+                recording_dir = item.parent
+                break
+
+        if not recording_path.exists():
+            raise FileNotFoundError(f"Pasta 'recording' não encontrada em {recording_dir}")
+
+    return recording_dir, recording_path
+
+
+def read_title(template_json: Path) -> str:
+    """Lê o título do arquivo JSON de SEO"""
+    if not template_json.exists():
+        raise FileNotFoundError(f"Arquivo '{template_json.name}' não encontrado em {template_json.parent}")
+
+    try:
+        with open(template_json, 'r', encoding='utf-8') as f:
+            json_data = json.load(f)
+    except json.JSONDecodeError:
+        raise ValueError(f"O arquivo {template_json} não é um JSON válido")
+
+    logger.debug(f"Conteúdo do JSON modelo: {json.dumps(json_data, indent=2)}")
+
+    title = json_data.get('title', '')
+    if not title:
+        raise ValueError("Não foi possível encontrar a chave 'title' no arquivo JSON")
+    return title
+
+
+def safe_folder_name(title: str, max_length: int = 50) -> str:
+    """Cria um nome de diretório seguro para o sistema de arquivos a partir do título"""
+    # Remover caracteres especiais e limitar o comprimento
+    safe_title = re.sub(r'[^\w\s-]', '', title).strip()
+    safe_title = re.sub(r'[-\s]+', '-', safe_title)
+
+    # Limitar o comprimento para evitar caminhos muito longos
+    if len(safe_title) > max_length:
+        safe_title = safe_title[:max_length]
+    return safe_title
+
+
+def unique_destination(parent: Path, name: str) -> Path:
+    """Retorna parent/name, adicionando um sufixo numérico se a pasta já existir"""
+    destination_path = parent / name
+    if destination_path.exists():
+        counter = 1
+        while (parent / f"{name}_{counter}").exists():
+            counter += 1
+        destination_path = parent / f"{name}_{counter}"
+    return destination_path
+
+
+def organize_recording(recording_dir: Path, files_to_keep: Optional[Sequence[str]] = None,
+                       progress=None, mode: str = 'copy', workers: int = DEFAULT_COPY_WORKERS,
+                       on_bytes: Optional[Callable[[int, int], None]] = None,
+                       checksums: bool = True) -> OrganizeResult:
+    """
+    Coloca os arquivos de uma gravação em uma pasta com o título do vídeo
+
+    A pasta é criada no mesmo nível do diretório da gravação, com o título lido de
+    channel-2-microphone-0-seo.json. Os arquivos são colocados em paralelo.
+
+    Args:
+        recording_dir: Diretório da gravação do ScreenStudio
+        files_to_keep: Arquivos a copiar (padrão: DEFAULT_FILES_TO_KEEP)
+        progress: Função opcional chamada com uma descrição a cada passo
+        mode: 'copy', 'reflink', 'hardlink' ou 'move' (veja file_utils.place_file)
+        workers: Arquivos colocados ao mesmo tempo
+        on_bytes: Função opcional chamada com (bytes concluídos, total de bytes); a contagem
+            recomeça ao calcular os checksums
+        checksums: Salvar checksums.json na pasta de destino para o comando verify
+
+    Returns:
+        OrganizeResult: Título, pasta de destino, arquivos copiados/ausentes e método usado em cada um
+    """
+    def report(description):
+        if progress:
+            progress(description)
+
+    recording_dir, recording_path = find_recording_path(recording_dir)
+
+    report("Extraindo título do arquivo JSON modelo...")
+    title = read_title(recording_path / SEO_TEMPLATE_NAME)
+    logger.debug(f"Título extraído: {title}")
+
+    report("Criando diretório destino...")
+    destination_path = unique_destination(recording_dir.parent, safe_folder_name(title))
+    destination_path.mkdir(exist_ok=True, parents=True)
+
+    result = OrganizeResult(title=title, destination=destination_path)
+
+    # Copiar apenas os arquivos necessários
+    sources = []
+    for file_name in (list(files_to_keep) if files_to_keep else DEFAULT_FILES_TO_KEEP):
+        source_file = recording_path / file_name
+        if source_file.exists():
+            sources.append(source_file)
+            result.total_bytes += source_file.stat().st_size
+        else:
+            logger.debug(f"Arquivo {file_name} não encontrado na pasta de origem")
+            result.missing.append(file_name)
+
+    report(f"Colocando {len(sources)} arquivos em {destination_path.name} ({mode})...")
+    lock = threading.Lock()
+    done = 0
+
+    def advance(count):
+        nonlocal done
+        with lock:
+            done += count
+            current = done
+        if on_bytes:
+            on_bytes(current, result.total_bytes)
+
+    def place(source_file):
+        return place_file(source_file, destination_path / source_file.name, mode, advance)
+
+    if on_bytes:
+        on_bytes(0, result.total_bytes)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            for source_file, method in zip(sources, executor.map(place, sources)):
+                result.copied.append(destination_path / source_file.name)
+                result.methods[source_file.name] = method
+                logger.debug(f"{source_file.name} colocado via {method}")
+    except OSError:
+        # Não deixar uma pasta vazia para trás (ex: --mode reflink sem suporte)
+        if not any(destination_path.iterdir()):
+            destination_path.rmdir()
+        raise
+
+    if checksums and result.copied:
+        report("Calculando checksums...")
+        # Com copy/reflink o cálculo usa a origem, para que verify compare a cópia com o original
+        files = {path.name: (recording_path / path.name if mode in ('copy', 'reflink') else path)
+                 for path in result.copied}
+        result.checksums = integrity.write_checksums(destination_path, files, on_bytes=on_bytes)
+
+    return result
@@ -0,0 +1,302 @@
+"""Pirâmide de picos (mínimo e máximo) para desenhar a forma de onda de gravações longas
+
+O áudio é decodificado uma única vez, em mono a DECODE_RATE Hz, em trechos paralelos pelo
+MediaExecutor. Cada trecho vira o nível 0 da pirâmide (mínimo e máximo de cada bloco de
+BASE_BLOCK amostras, com um reshape do NumPy) e os níveis seguintes saem do anterior, agrupando
+LEVEL_FACTOR picos por vez, até o nível mais largo ter no máximo MIN_LEVEL_PEAKS picos.
+
+Tudo vai para um arquivo binário ao lado da mídia (<nome>.peaks) com um cabeçalho fixo, a
+tabela de níveis e os picos em int16. Para desenhar um intervalo com N pixels, read escolhe o
+nível mais grosso que ainda tem pelo menos N picos no intervalo e lê só esse trecho do arquivo,
+então o custo depende do tamanho da saída e não da duração da gravação. O cabeçalho guarda o
+tamanho e a data de modificação da mídia, e o arquivo é refeito quando ela muda.
+"""
+import os
+import struct
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ..utils import file_utils, media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+PEAKS_SUFFIX = '.peaks'
+
+# Taxa de decodificação e amostras por pico no nível 0 (62,5 picos por segundo)
+DECODE_RATE = 16000
+BASE_BLOCK = 256
+
+# Picos do nível anterior agrupados em cada pico do nível seguinte
+LEVEL_FACTOR = 4
+
+# O nível mais largo tem no máximo esta quantidade de picos
+MIN_LEVEL_PEAKS = 1024
+
+# Trecho máximo decodificado por execução do ffmpeg (s), limita a memória de cada uma
+MAX_RANGE = 600.0
+
+MAGIC = b'EVPK'
+VERSION = 1
+# magic, versão, níveis, taxa, amostras por pico no nível 0, fator, tamanho e mtime da mídia, duração
+HEADER = struct.Struct('<4sHHIIIQqd')
+# Posição no arquivo e quantidade de picos de cada nível
+LEVEL = struct.Struct('<QQ')
+# Mínimo e máximo (int16) de cada pico
+PEAK_BYTES = 4
+
+
+def peaks_path_for(media: Path) -> Path:
+    """Arquivo de picos de uma mídia (<nome>.peaks, com a extensão da mídia no nome)"""
+    return media.with_name(media.name + PEAKS_SUFFIX)
+
+
+def block_peaks(samples, block: int = BASE_BLOCK):
+    """
+    Mínimo e máximo de cada bloco de amostras (o último bloco pode ser incompleto)
+
+    Returns:
+        np.ndarray: Matriz int16 (picos x 2) com mínimo e máximo
+    """
+    import numpy as np
+
+    usable = len(samples) - len(samples) % block
+    blocks = samples[:usable].reshape(-1, block)
+    peaks = np.stack([blocks.min(axis=1), blocks.max(axis=1)], axis=1)
+    if usable < len(samples):
+        rest = samples[usable:]
+        peaks = np.concatenate([peaks, [[rest.min(), rest.max()]]])
+    return peaks.astype(np.int16)
+
+
+def reduce_peaks(peaks, factor: int):
+    """Agrupa `factor` picos consecutivos em um (o último grupo pode ser incompleto)"""
+    import numpy as np
+
+    starts = np.arange(0, len(peaks), factor)
+    return np.stack([np.minimum.reduceat(peaks[:, 0], starts), np.maximum.reduceat(peaks[:, 1], starts)], axis=1)
+
+
+def build_pyramid(base, factor: int = LEVEL_FACTOR, min_peaks: int = MIN_LEVEL_PEAKS) -> list:
+    """Níveis da pirâmide a partir do nível 0, do mais detalhado para o mais largo"""
+    levels = [base]
+    while len(levels[-1]) > min_peaks:
+        levels.append(reduce_peaks(levels[-1], factor))
+    return levels
+
+
+@dataclass
+class PeakRange:
+    """Picos de um intervalo, prontos para desenhar (um pico por coluna)"""
+    start: float
+    end: float
+    samples_per_peak: float
+    sample_rate: int
+    min: list
+    max: list
+
+    def to_dict(self) -> dict:
+        return {'start': round(self.start, 3), 'end': round(self.end, 3),
+                'samples_per_peak': round(self.samples_per_peak, 2), 'sample_rate': self.sample_rate,
+                'bits': 16, 'min': self.min, 'max': self.max}
+
+
+class PeakFile:
+    """Leitura de um arquivo de picos; só o cabeçalho fica em memória"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"Arquivo de picos truncado: {self.path}")
+            (magic, version, levels, self.sample_rate, self.base_block, self.factor,
+             self.source_size, self.source_mtime_ns, self.duration) = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Arquivo de picos inválido ou de outra versão: {self.path}")
+            table = f.read(LEVEL.size * levels)
+        self.levels: List[Tuple[int, int]] = [LEVEL.unpack_from(table, index * LEVEL.size)
+                                              for index in range(levels)]
+
+    def samples_per_peak(self, level: int) -> int:
+        return self.base_block * self.factor ** level
+
+    def matches(self, media: Path) -> bool:
+        """True se o arquivo foi gerado a partir da versão atual da mídia"""
+        stat = os.stat(media)
+        return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
+
+    def level_for(self, seconds: float, width: int) -> int:
+        """Nível mais grosso com pelo menos `width` picos em `seconds` segundos"""
+        wanted = seconds * self.sample_rate / max(1, width)
+        level = 0
+        while level + 1 < len(self.levels) and self.samples_per_peak(level + 1) <= wanted:
+            level += 1
+        return level
+
+    def read_level(self, level: int, first: int, last: int):
+        """Picos [first, last) de um nível, lidos direto do arquivo"""
+        import numpy as np
+
+        offset, count = self.levels[level]
+        first, last = max(0, first), min(count, last)
+        if last <= first:
+            return np.zeros((0, 2), dtype=np.int16)
+        with open(self.path, 'rb') as f:
+            f.seek(offset + first * PEAK_BYTES)
+            return np.fromfile(f, dtype='<i2', count=(last - first) * 2).reshape(-1, 2)
+
+    def read(self, start: float = 0.0, end: Optional[float] = None, width: int = 1000) -> PeakRange:
+        """
+        Picos de um intervalo com no máximo `width` colunas
+
+        Args:
+            start: Início do intervalo (s)
+            end: Fim do intervalo (s; padrão: fim da mídia)
+            width: Colunas desejadas (em geral, a largura em pixels)
+
+        Returns:
+            PeakRange: Picos do intervalo; com zoom além do nível 0, menos colunas que width
+        """
+        import numpy as np
+
+        end = self.duration if end is None else min(end, self.duration)
+        start = max(0.0, min(start, end))
+        level = self.level_for(end - start, width)
+        size = self.samples_per_peak(level)
+        first = int(start * self.sample_rate // size)
+        last = int(-(-end * self.sample_rate // size))
+        peaks = self.read_level(level, first, last)
+        if len(peaks) > width:
+            # Cada coluna junta os picos que caem nela (no máximo LEVEL_FACTOR por coluna)
+            edges = np.unique(np.linspace(0, len(peaks), width + 1).astype(int)[:-1])
+            peaks = np.stack([np.minimum.reduceat(peaks[:, 0], edges), np.maximum.reduceat(peaks[:, 1], edges)],
+                             axis=1)
+        samples_per_column = (end - start) * self.sample_rate / len(peaks) if len(peaks) else float(size)
+        return PeakRange(start, end, samples_per_column, self.sample_rate,
+                         peaks[:, 0].tolist(), peaks[:, 1].tolist())
+
+    def silences(self, threshold: float = -40.0, min_silence: float = 0.5) -> List[dict]:
+        """
+        Silêncios aproximados a partir do nível 0, sem decodificar o áudio de novo
+
+        Um bloco é silencioso quando o seu pico fica abaixo de `threshold` dBFS; como o pico é
+        maior que a média usada por detect-silence, os silêncios saem um pouco mais curtos.
+        """
+        import numpy as np
+
+        peaks = self.read_level(0, 0, self.levels[0][1]).astype(np.int32)
+        limit = 32768 * 10 ** (threshold / 20)
+        quiet = np.maximum(np.abs(peaks[:, 0]), np.abs(peaks[:, 1])) < limit
+        # Inícios e fins das sequências de blocos silenciosos
+        edges = np.diff(np.concatenate([[0], quiet.astype(np.int8), [0]]))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        block = self.base_block / self.sample_rate
+        minimum = int(np.ceil(min_silence / block))
+        silences = []
+        for first, last in zip(starts.tolist(), ends.tolist()):
+            if last - first >= minimum:
+                start, end = first * block, min(last * block, self.duration)
+                silences.append({'start': round(start, 3), 'end': round(end, 3), 'duration': round(end - start, 3)})
+        return silences
+
+
+def write_peaks(path: Path, levels: list, media_stat: os.stat_result, duration: float,
+                sample_rate: int = DECODE_RATE, base_block: int = BASE_BLOCK, factor: int = LEVEL_FACTOR):
+    """Grava a pirâmide no formato lido por PeakFile (de forma atômica)"""
+    offset = HEADER.size + LEVEL.size * len(levels)
+    table = []
+    for peaks in levels:
+        table.append(LEVEL.pack(offset, len(peaks)))
+        offset += len(peaks) * PEAK_BYTES
+    with file_utils.atomic_path(path) as temp_path, open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(levels), sample_rate, base_block, factor,
+                            media_stat.st_size, media_stat.st_mtime_ns, duration))
+        f.write(b''.join(table))
+        for peaks in levels:
+            f.write(peaks.astype('<i2').tobytes())
+
+
+async def _decode_range(media: Path, first: int, count: Optional[int]):
+    """Decodifica `count` amostras a partir da amostra `first` e devolve o nível 0 do trecho"""
+    import numpy as np
+
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-ss', f"{first / DECODE_RATE:.6f}", '-i', str(media)]
+    if count is not None:
+        cmd += ['-t', f"{count / DECODE_RATE:.6f}"]
+    cmd += ['-map', '0:a:0', '-ac', '1', '-ar', str(DECODE_RATE), '-f', 's16le', 'pipe:1']
+    expected = (count if count is not None else int(MAX_RANGE * DECODE_RATE)) * 2
+    with tracing.span("ffmpeg:decode_peaks", category="ffmpeg", path=str(media), start=first / DECODE_RATE) as sp:
+        result = await media_executor.get_executor().run(cmd, memory=media_executor.DEFAULT_MEMORY + expected)
+        sp.bytes_out = len(result.stdout)
+
+    samples = np.frombuffer(result.stdout, dtype='<i2', count=len(result.stdout) // 2)
+    if count is not None:
+        # A busca do ffmpeg pode sobrar algumas amostras; os blocos precisam ficar alinhados
+        samples = samples[:count]
+    if not len(samples):
+        return np.zeros((0, 2), dtype=np.int16)
+    return block_peaks(samples)
+
+
+@tracing.traced("peaks:build", category="peaks")
+async def build_peaks_async(media: Path, output: Optional[Path] = None, jobs: Optional[int] = None) -> Path:
+    """
+    Decodifica a mídia e grava a pirâmide de picos
+
+    Args:
+        media: Arquivo de áudio ou vídeo (usa o primeiro stream de áudio)
+        output: Arquivo de picos (padrão: peaks_path_for(media))
+        jobs: Trechos decodificados ao mesmo tempo (padrão: o limite do MediaExecutor)
+
+    Returns:
+        Path: Arquivo de picos gravado
+    """
+    import numpy as np
+
+    output = output or peaks_path_for(media)
+    stat = os.stat(media)
+    executor = media_executor.get_executor()
+    info = await executor.probe(media)
+    if not any(stream.get('codec_type') == 'audio' for stream in info.get('streams', [])):
+        raise ValueError(f"Sem stream de áudio em {media}")
+    duration = float(info.get('format', {}).get('duration') or 0)
+
+    # Trechos com um número inteiro de blocos, para os picos de cada um se encaixarem
+    blocks = int(-(-duration * DECODE_RATE // BASE_BLOCK))
+    parts = max(jobs or executor.max_jobs, int(-(-duration // MAX_RANGE)), 1)
+    per_part = max(1, -(-blocks // parts))
+    starts = list(range(0, max(blocks, 1), per_part))
+    ranges = [(start * BASE_BLOCK, per_part * BASE_BLOCK if index + 1 < len(starts) else None)
+              for index, start in enumerate(starts)]
+    logger.info(f"{media.name}: {duration:.1f}s em {len(ranges)} trechos")
+
+    chunks = await asyncio.gather(*(_decode_range(media, first, count) for first, count in ranges))
+    base = np.concatenate(chunks) if chunks else np.zeros((0, 2), dtype=np.int16)
+    if not duration:
+        duration = len(base) * BASE_BLOCK / DECODE_RATE
+    levels = build_pyramid(base)
+    write_peaks(output, levels, stat, duration)
+    logger.info(f"Picos de {media.name}: {len(levels)} níveis, {output.stat().st_size / 1024:.0f} KB")
+    return output
+
+
+async def ensure_peaks_async(media: Path, force: bool = False, jobs: Optional[int] = None) -> Tuple[PeakFile, bool]:
+    """
+    Arquivo de picos atualizado da mídia, gerado só quando falta ou a mídia mudou
+
+    Returns:
+        Tuple[PeakFile, bool]: Arquivo de picos e se foi reaproveitado
+    """
+    path = peaks_path_for(media)
+    if not force and path.exists():
+        try:
+            peak_file = PeakFile(path)
+            if peak_file.matches(media):
+                return peak_file, True
+        except ValueError as e:
+            logger.warning(f"{e}; gerando de novo")
+    await build_peaks_async(media, path, jobs=jobs)
+    return PeakFile(path), False
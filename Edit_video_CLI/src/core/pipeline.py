@@ -0,0 +1,536 @@
+"""Pipeline de conversão, transcrição e geração de SEO para vários arquivos"""
+import os
+import json
+import glob
+import time
+import asyncio
+import logging
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import transcription, seo_generator, scenes, search_index
+from .manifest import Manifest
+from ..llm import gemini
+from ..llm.gemini import run_async
+from ..utils import file_utils, media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+VIDEO_FORMATS = ['.mp4', '.avi', '.mov', '.mkv', '.webm']
+AUDIO_FORMATS = ['.mp3', '.m4a', '.wav', '.ogg', '.flac']
+
+STAGES = ('convert', 'transcribe', 'seo')
+
+
+def mp3_path_for(input_file: Path) -> Path:
+    """Retorna o caminho do MP3 gerado a partir de um arquivo de entrada"""
+    return input_file.with_suffix('.mp3')
+
+
+def transcription_path_for(mp3_path: Path) -> Path:
+    """Retorna o caminho da transcrição gerada a partir de um MP3"""
+    return mp3_path.with_suffix('.txt')
+
+
+def seo_path_for(mp3_path: Path) -> Path:
+    """Retorna o caminho do JSON de SEO gerado a partir de um MP3"""
+    return mp3_path.with_name(f"{mp3_path.stem}-seo.json")
+
+
+def chapters_path_for(mp3_path: Path) -> Path:
+    """Retorna o caminho do JSON de capítulos associado a um MP3"""
+    return mp3_path.with_name(f"{mp3_path.stem}-chapters.json")
+
+
+def conversion_args(file_ext: str) -> List[str]:
+    """Retorna os argumentos de codificação do ffmpeg para converter a extensão dada em MP3"""
+    if file_ext in VIDEO_FORMATS:
+        # Para vídeo, extrair o áudio
+        return ['-q:a', '0', '-map', 'a']
+    if file_ext in AUDIO_FORMATS:
+        # Para áudio, converter para MP3
+        return ['-codec:a', 'libmp3lame', '-qscale:a', '2']
+    raise ValueError(f"Formato não suportado: {file_ext}")
+
+
+async def convert_to_mp3_async(input_file: Path,
+                               on_progress: Optional[Callable[[media_executor.JobProgress], None]] = None) -> Path:
+    """
+    Converte um arquivo de áudio/vídeo para MP3 usando ffmpeg (via MediaExecutor)
+
+    O MP3 é escrito em um arquivo temporário e renomeado ao final, para que uma
+    conversão interrompida nunca deixe um MP3 incompleto com o nome final.
+
+    Args:
+        input_file: Caminho do arquivo de entrada
+        on_progress: Função opcional chamada com o JobProgress da conversão
+
+    Returns:
+        Path: Caminho do MP3 (o próprio arquivo se já for MP3)
+    """
+    file_ext = input_file.suffix.lower()
+    if file_ext == '.mp3':
+        return input_file
+
+    mp3_path = mp3_path_for(input_file)
+    args = conversion_args(file_ext)
+    error_message = "Erro ao extrair áudio do vídeo" if file_ext in VIDEO_FORMATS else "Erro ao converter áudio"
+
+    executor = media_executor.get_executor()
+    duration = None
+    if on_progress:
+        info = await executor.probe(input_file)
+        duration = float(info['format'].get('duration', 0)) or None
+
+    with file_utils.atomic_path(mp3_path) as temp_path:
+        cmd = ['ffmpeg', '-i', str(input_file), *args, '-f', 'mp3', temp_path, '-y']
+        with tracing.span("ffmpeg:convert_to_mp3", category="ffmpeg",
+                          bytes_in=tracing.file_size(input_file)) as sp:
+            result = await executor.run(cmd, check=False, duration=duration, on_progress=on_progress)
+            if result.returncode != 0:
+                raise RuntimeError(f"{error_message}: {result.stderr}")
+            sp.bytes_out = tracing.file_size(temp_path)
+
+    return mp3_path
+
+
+def convert_to_mp3(input_file: Path,
+                   on_progress: Optional[Callable[[media_executor.JobProgress], None]] = None) -> Path:
+    """Versão síncrona de convert_to_mp3_async"""
+    return run_async(convert_to_mp3_async(input_file, on_progress))
+
+
+def denoise_for_upload(mp3_path: Path) -> Path:
+    """
+    Gera uma cópia temporária do MP3 com redução de ruído, para ser enviada no lugar dele
+
+    O arquivo fica na mesma pasta, com nome oculto; quem chama deve removê-lo depois do envio.
+    """
+    from .audio_processor import AudioProcessor
+
+    with tempfile.NamedTemporaryFile(prefix=f'.{mp3_path.stem}.denoised-', suffix='.mp3',
+                                     dir=mp3_path.parent, delete=False) as temp_file:
+        output = Path(temp_file.name)
+    try:
+        AudioProcessor(mp3_path).denoise(output)
+    except BaseException:
+        output.unlink(missing_ok=True)
+        raise
+    return output
+
+
+def _llm_params(**extra) -> dict:
+    """Parâmetros do LLM que influenciam as saídas das etapas de transcrição e SEO"""
+    gemini.load_environment()
+    return {'provider': 'gemini', 'model': gemini.PREFERRED_MODELS[0].strip(), **extra}
+
+
+@tracing.traced("pipeline:convert", category="pipeline")
+async def convert_stage_async(input_file: Path, force: bool = False,
+                              on_progress: Optional[Callable[[media_executor.JobProgress], None]] = None
+                              ) -> Tuple[Path, bool]:
+    """
+    Etapa de conversão para MP3 com reaproveitamento via manifesto
+
+    Args:
+        input_file: Arquivo de entrada
+        force: Ignorar o manifesto e executar a etapa de novo
+        on_progress: Função opcional chamada com o JobProgress da conversão
+
+    Returns:
+        Tuple[Path, bool]: Caminho do MP3 e se a saída anterior foi reaproveitada
+    """
+    file_ext = input_file.suffix.lower()
+    if file_ext == '.mp3':
+        return input_file, True
+
+    loop = asyncio.get_running_loop()
+    mp3_path = mp3_path_for(input_file)
+    manifest = Manifest.for_media(mp3_path)
+    params = {'args': conversion_args(file_ext)}
+
+    # O hash pode ler o arquivo inteiro, então roda fora do event loop
+    fresh = await loop.run_in_executor(None, manifest.is_fresh, 'convert', [input_file], params)
+    if fresh and not force:
+        logger.info(f"Conversão de {input_file} reaproveitada")
+        manifest.save()
+        return mp3_path, True
+
+    await convert_to_mp3_async(input_file, on_progress)
+    await loop.run_in_executor(None, manifest.record, 'convert', [input_file], params, [mp3_path])
+    manifest.save()
+    return mp3_path, False
+
+
+def convert_stage(input_file: Path, force: bool = False,
+                  on_progress: Optional[Callable[[media_executor.JobProgress], None]] = None) -> Tuple[Path, bool]:
+    """Versão síncrona de convert_stage_async"""
+    return run_async(convert_stage_async(input_file, force=force, on_progress=on_progress))
+
+
+@tracing.traced("pipeline:transcribe", category="pipeline")
+async def transcribe_stage_async(mp3_path: Path, force: bool = False, denoise: bool = False,
+                                 whole: bool = False) -> Tuple[str, Path, bool]:
+    """
+    Etapa de transcrição com reaproveitamento via manifesto
+
+    Por padrão a transcrição é feita por trechos (core.transcript_segments): mesmo quando o
+    manifesto não vale mais (o MP3 foi editado), os trechos que não mudaram saem do cache.
+
+    Args:
+        mp3_path: MP3 a ser transcrito
+        force: Ignorar o manifesto e executar a etapa de novo
+        denoise: Reduzir o ruído antes do envio (o MP3 original não é alterado)
+        whole: Enviar o áudio inteiro em uma requisição, sem o cache de trechos
+
+    Returns:
+        Tuple[str, Path, bool]: Texto, caminho da transcrição e se foi reaproveitada
+    """
+    loop = asyncio.get_running_loop()
+    manifest = Manifest.for_media(mp3_path)
+    output = transcription_path_for(mp3_path)
+    params = _llm_params(**({'denoise': True} if denoise else {}), **({'whole': True} if whole else {}))
+
+    # O hash pode ler o MP3 inteiro, então roda fora do event loop
+    fresh = await loop.run_in_executor(None, manifest.is_fresh, 'transcribe', [mp3_path], params)
+    if fresh and not force:
+        logger.info(f"Transcrição de {mp3_path} reaproveitada")
+        manifest.save()
+        return output.read_text(encoding='utf-8'), output, True
+
+    upload = mp3_path
+    if denoise:
+        upload = await loop.run_in_executor(None, denoise_for_upload, mp3_path)
+    try:
+        text = await transcription.transcribe_audio_async(str(upload), segmented=not whole)
+    finally:
+        if upload != mp3_path:
+            upload.unlink(missing_ok=True)
+    file_utils.atomic_write_text(output, text)
+    await loop.run_in_executor(None, manifest.record, 'transcribe', [mp3_path], params, [output])
+    manifest.save()
+    await loop.run_in_executor(None, search_index.notify, output)
+    return text, output, False
+
+
+@tracing.traced("pipeline:chapters", category="pipeline")
+async def chapters_stage_async(display: Path, audio: Path, mp3_path: Path, force: bool = False,
+                               keyframes: bool = False, offset: float = 0.0) -> Tuple[List[dict], Path, bool]:
+    """
+    Etapa de detecção de capítulos (veja core.scenes) com reaproveitamento via manifesto
+
+    O JSON fica ao lado do MP3 e é usado pela etapa de SEO quando existe.
+
+    Args:
+        display: Vídeo da tela
+        audio: Áudio da narração
+        mp3_path: MP3 da entrada (define onde ficam o JSON e o manifesto)
+        force: Ignorar o manifesto e executar a etapa de novo
+        keyframes: Decodificar apenas os keyframes da tela
+        offset: Offset da tela em relação ao áudio (s)
+
+    Returns:
+        Tuple[List[dict], Path, bool]: Capítulos, caminho do JSON e se foram reaproveitados
+    """
+    loop = asyncio.get_running_loop()
+    manifest = Manifest.for_media(mp3_path)
+    output = chapters_path_for(mp3_path)
+    params = {'fps': scenes.DEFAULT_FPS, 'width': scenes.DEFAULT_WIDTH, 'keyframes': keyframes,
+              'threshold': scenes.SCENE_THRESHOLD, 'min_chapter': scenes.MIN_CHAPTER, 'offset': offset}
+
+    # O hash pode ler o vídeo inteiro, então roda fora do event loop
+    fresh = await loop.run_in_executor(None, manifest.is_fresh, 'chapters', [display, audio], params)
+    if fresh and not force:
+        logger.info(f"Capítulos de {display} reaproveitados")
+        manifest.save()
+        with open(output, 'r', encoding='utf-8') as f:
+            return json.load(f), output, True
+
+    chapters = await scenes.detect_chapters_async(display, audio, keyframes=keyframes, offset=offset)
+    file_utils.atomic_write_text(output, json.dumps(chapters, indent=2))
+    await loop.run_in_executor(None, manifest.record, 'chapters', [display, audio], params, [output])
+    manifest.save()
+    return chapters, output, False
+
+
+@tracing.traced("pipeline:seo", category="pipeline")
+async def seo_stage_async(mp3_path: Path, style: str, force: bool = False,
+                          mode: str = 'full') -> Tuple[dict, Path, bool]:
+    """
+    Etapa de geração de SEO com reaproveitamento via manifesto
+
+    Se a etapa de capítulos gerou um JSON ao lado do MP3, os capítulos entram no prompt e a
+    descrição usa os timestamps detectados.
+
+    Args:
+        mp3_path: MP3 de origem (a transcrição é localizada a partir dele)
+        style: Estilo do SEO
+        force: Ignorar o manifesto e executar a etapa de novo
+        mode: Quanto da transcrição vai para o modelo (veja seo_generator.SEO_MODES)
+
+    Returns:
+        Tuple[dict, Path, bool]: Dados de SEO, caminho do JSON e se foram reaproveitados
+    """
+    manifest = Manifest.for_media(mp3_path)
+    transcription_path = transcription_path_for(mp3_path)
+    chapters_path = chapters_path_for(mp3_path)
+    output = seo_path_for(mp3_path)
+    if mode == 'local':
+        params = {'seo_mode': mode}
+    else:
+        params = _llm_params(style=style, **({'seo_mode': mode} if mode != 'full' else {}))
+    inputs = [transcription_path] + ([chapters_path] if chapters_path.exists() else [])
+
+    if not force and manifest.is_fresh('seo', inputs, params):
+        logger.info(f"SEO de {mp3_path} reaproveitado")
+        manifest.save()
+        with open(output, 'r', encoding='utf-8') as f:
+            return json.load(f), output, True
+
+    text = transcription_path.read_text(encoding='utf-8')
+    chapters = None
+    if chapters_path.exists():
+        with open(chapters_path, 'r', encoding='utf-8') as f:
+            chapters = json.load(f) or None
+    seo_data = await seo_generator.generate_seo_async(text, style=style, chapters=chapters, mode=mode)
+    file_utils.atomic_write_text(output, json.dumps(seo_data, indent=2))
+    manifest.record('seo', inputs, params, [output])
+    manifest.save()
+    await asyncio.get_running_loop().run_in_executor(None, search_index.notify, output)
+    return seo_data, output, False
+
+
+def transcribe_stage(mp3_path: Path, force: bool = False, denoise: bool = False,
+                     whole: bool = False) -> Tuple[str, Path, bool]:
+    """Versão síncrona de transcribe_stage_async"""
+    return run_async(transcribe_stage_async(mp3_path, force=force, denoise=denoise, whole=whole))
+
+
+def chapters_stage(display: Path, audio: Path, mp3_path: Path, force: bool = False,
+                   keyframes: bool = False, offset: float = 0.0) -> Tuple[List[dict], Path, bool]:
+    """Versão síncrona de chapters_stage_async"""
+    return run_async(chapters_stage_async(display, audio, mp3_path, force=force, keyframes=keyframes, offset=offset))
+
+
+def seo_stage(mp3_path: Path, style: str, force: bool = False, mode: str = 'full') -> Tuple[dict, Path, bool]:
+    """Versão síncrona de seo_stage_async"""
+    return run_async(seo_stage_async(mp3_path, style, force=force, mode=mode))
+
+
+def collect_inputs(patterns: Iterable[str], recursive: bool = False, prefer_video: bool = False) -> List[Path]:
+    """
+    Expande arquivos, diretórios e padrões glob em uma lista de arquivos suportados
+
+    Arquivos com o mesmo nome na mesma pasta gerariam o mesmo MP3, então só um deles é
+    mantido e a colisão vai para o log. Um vídeo e o MP3 convertido dele viram o MP3, que já é
+    o resultado da conversão, a menos que prefer_video peça o vídeo (etapas que leem a imagem,
+    como os capítulos). Entre dois arquivos que não são o MP3, fica o primeiro encontrado.
+
+    Args:
+        patterns: Caminhos de arquivos, diretórios ou padrões glob
+        recursive: Buscar também em subdiretórios
+        prefer_video: Manter o vídeo em vez do MP3 convertido dele
+
+    Returns:
+        List[Path]: Arquivos encontrados, sem duplicatas e em ordem estável
+    """
+    supported = set(VIDEO_FORMATS + AUDIO_FORMATS)
+    found: List[Path] = []
+
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            candidates = path.rglob('*') if recursive else path.iterdir()
+            found.extend(sorted(p for p in candidates if p.is_file()))
+        elif path.is_file():
+            found.append(path)
+        else:
+            found.extend(sorted(Path(p) for p in glob.glob(pattern, recursive=recursive)))
+
+    preferred = VIDEO_FORMATS if prefer_video else ('.mp3',)
+    by_target: Dict[Path, Path] = {}
+    for path in found:
+        if not path.is_file() or path.suffix.lower() not in supported:
+            continue
+        target = mp3_path_for(path).resolve()
+        current = by_target.get(target)
+        if current is None:
+            by_target[target] = path
+            continue
+        if current.resolve() == path.resolve():
+            continue
+        kept, dropped = current, path
+        if path.suffix.lower() in preferred and current.suffix.lower() not in preferred:
+            kept, dropped = path, current
+        by_target[target] = kept
+        logger.info(f"{dropped} ignorado: gera o mesmo {target.name} que {kept}")
+
+    return list(by_target.values())
+
+
+@dataclass
+class FileResult:
+    """Resultado do processamento de um arquivo no pipeline"""
+    input_file: Path
+    mp3_path: Optional[Path] = None
+    transcription_path: Optional[Path] = None
+    seo_path: Optional[Path] = None
+    title: Optional[str] = None
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    reused: List[str] = field(default_factory=list)
+    duplicate_of: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> dict:
+        return {
+            'input_file': str(self.input_file),
+            'mp3_path': str(self.mp3_path) if self.mp3_path else None,
+            'transcription_path': str(self.transcription_path) if self.transcription_path else None,
+            'seo_path': str(self.seo_path) if self.seo_path else None,
+            'title': self.title,
+            'failed_stage': self.failed_stage,
+            'error': self.error,
+            'timings': self.timings,
+            'reused': self.reused,
+            'duplicate_of': self.duplicate_of,
+        }
+
+
+class BatchPipeline:
+    """
+    Executa conversão, transcrição e SEO para vários arquivos em pipeline
+
+    As conversões rodam como processos do ffmpeg no MediaExecutor (até `workers` ao mesmo
+    tempo, dentro do limite global de CPU e memória), enquanto a transcrição e o SEO rodam em
+    um pool assíncrono limitado. Assim o arquivo N+1 é convertido enquanto o arquivo N está
+    sendo transcrito.
+
+    Cada etapa consulta o manifesto da entrada e é pulada quando suas entradas e
+    parâmetros não mudaram, de modo que um lote interrompido continua de onde parou.
+    """
+
+    def __init__(self, style: str = 'clickbait', workers: Optional[int] = None, concurrency: int = 2,
+                 on_event: Optional[Callable[[str, FileResult], None]] = None, force: bool = False,
+                 denoise: bool = False, chapters: bool = False, seo_mode: str = 'full',
+                 skip_duplicates: bool = False):
+        """
+        Args:
+            style: Estilo do SEO
+            workers: Conversões simultâneas (padrão: número de CPUs)
+            concurrency: Arquivos transcritos/gerando SEO ao mesmo tempo
+            on_event: Função chamada com (etapa, resultado) ao fim de cada etapa;
+                a etapa 'failed' indica falha do arquivo
+            force: Ignorar os manifestos e executar todas as etapas de novo
+            denoise: Reduzir o ruído do áudio antes do envio para transcrição
+            chapters: Detectar capítulos nas entradas de vídeo antes do SEO (veja core.scenes)
+            seo_mode: Quanto da transcrição vai para o modelo (veja seo_generator.SEO_MODES)
+            skip_duplicates: Antes de tudo, pular as entradas cujo áudio já está no índice de
+                impressões digitais ou aparece antes no lote (veja core.duplicates); essas
+                entradas geram o evento 'duplicate'
+        """
+        self.style = style
+        self.force = force
+        self.denoise = denoise
+        self.chapters = chapters
+        self.seo_mode = seo_mode
+        self.skip_duplicates = skip_duplicates
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = max(1, concurrency)
+        self.on_event = on_event
+
+    def _emit(self, stage: str, result: FileResult):
+        if self.on_event:
+            self.on_event(stage, result)
+
+    async def _convert(self, result: FileResult):
+        result.mp3_path, reused = await convert_stage_async(result.input_file, self.force)
+        if reused and result.input_file.suffix.lower() != '.mp3':
+            result.reused.append('convert')
+
+    async def _transcribe(self, result: FileResult):
+        _, result.transcription_path, reused = await transcribe_stage_async(
+            result.mp3_path, force=self.force, denoise=self.denoise
+        )
+        if reused:
+            result.reused.append('transcribe')
+
+    async def _chapters(self, result: FileResult):
+        _, _, reused = await chapters_stage_async(result.input_file, result.input_file, result.mp3_path,
+                                                  force=self.force)
+        if reused:
+            result.reused.append('chapters')
+
+    async def _seo(self, result: FileResult):
+        seo_data, result.seo_path, reused = await seo_stage_async(result.mp3_path, self.style, force=self.force,
+                                                                  mode=self.seo_mode)
+        if reused:
+            result.reused.append('seo')
+        result.title = seo_data.get('title')
+
+    async def _process(self, input_file: Path, convert_semaphore, semaphore) -> FileResult:
+        result = FileResult(input_file=input_file)
+        stage = 'convert'
+        try:
+            started = time.perf_counter()
+            async with convert_semaphore:
+                await self._convert(result)
+            result.timings[stage] = time.perf_counter() - started
+            self._emit(stage, result)
+
+            if self.chapters and input_file.suffix.lower() in VIDEO_FORMATS:
+                # Decodifica a tela no ffmpeg, então divide as vagas com as conversões
+                stage = 'chapters'
+                started = time.perf_counter()
+                async with convert_semaphore:
+                    await self._chapters(result)
+                result.timings[stage] = time.perf_counter() - started
+
+            async with semaphore:
+                stage = 'transcribe'
+                started = time.perf_counter()
+                await self._transcribe(result)
+                result.timings[stage] = time.perf_counter() - started
+                self._emit(stage, result)
+
+                stage = 'seo'
+                started = time.perf_counter()
+                await self._seo(result)
+                result.timings[stage] = time.perf_counter() - started
+                self._emit(stage, result)
+        except Exception as e:
+            result.failed_stage = stage
+            result.error = str(e)
+            logger.error(f"Falha em {input_file} na etapa '{stage}': {e}")
+            self._emit('failed', result)
+
+        return result
+
+    async def _skip_duplicate(self, input_file: Path, original: str) -> FileResult:
+        result = FileResult(input_file=input_file, duplicate_of=original)
+        logger.info(f"{input_file} pulado: mesmo áudio de {original}")
+        self._emit('duplicate', result)
+        return result
+
+    async def run_async(self, files: List[Path]) -> List[FileResult]:
+        """Processa todos os arquivos e retorna os resultados na ordem de entrada"""
+        found = {}
+        if self.skip_duplicates:
+            from . import duplicates
+            found = await duplicates.precheck_async(files, jobs=self.workers)
+        convert_semaphore = asyncio.Semaphore(self.workers)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return list(await asyncio.gather(
+            *(self._skip_duplicate(path, found[path].path) if path in found
+              else self._process(path, convert_semaphore, semaphore) for path in files)
+        ))
+
+    def run(self, files: List[Path]) -> List[FileResult]:
+        """Versão síncrona de run_async"""
+        return asyncio.run(self.run_async(files))
@@ -0,0 +1,368 @@
+"""Capítulos do vídeo a partir das mudanças de cena da tela e das pausas do microfone
+
+O canal de tela (channel-1-display-0.mp4) é decodificado pelo ffmpeg já reduzido a quadros
+em tons de cinza de DEFAULT_WIDTH pixels de largura, a poucos quadros por segundo (ou apenas
+os keyframes), e lido como bytes crus por um pipe. A diferença entre quadros consecutivos é
+calculada com NumPy para todos os quadros de uma vez: a pontuação de cada quadro é a fração
+de pixels que mudou mais que PIXEL_THRESHOLD níveis de cinza. A duração é dividida em
+trechos decodificados em paralelo pelo MediaExecutor.
+
+As mudanças de cena são aproximadas das pausas do microfone (detectadas num envelope de
+ENVELOPE_RATE amostras por segundo, veja core.sync) e combinadas com as pausas longas em
+capítulos com timestamps reais, usados pelo SEO no lugar dos timestamps inventados pelo modelo.
+"""
+import math
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from . import sync
+from ..utils import media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+# Largura dos quadros analisados (a altura segue a proporção do vídeo)
+DEFAULT_WIDTH = 160
+
+# Quadros analisados por segundo
+DEFAULT_FPS = 2.0
+
+# Diferença mínima de um pixel, em níveis de cinza, para contar como mudança
+PIXEL_THRESHOLD = 24
+
+# Fração mínima de pixels alterados para uma mudança de cena
+SCENE_THRESHOLD = 0.3
+
+# Trechos decodificados em paralelo têm no máximo esta duração (s), para limitar a memória
+MAX_RANGE = 600.0
+
+# Silêncio no envelope do microfone (dBFS) e duração mínima de uma pausa (s)
+SILENCE_THRESH = -40
+MIN_PAUSE = 0.7
+
+# Pausas a partir desta duração (s) viram candidatas a capítulo mesmo sem mudança de cena
+LONG_PAUSE = 2.0
+
+# Distância máxima (s) para aproximar uma mudança de cena de uma pausa
+SNAP_WINDOW = 5.0
+
+# Duração mínima de um capítulo (s) e limite de capítulos
+MIN_CHAPTER = 60.0
+MAX_CHAPTERS = 20
+
+# O YouTube só reconhece capítulos com pelo menos 3 timestamps, o primeiro em 0:00
+MIN_CHAPTERS = 3
+
+# Amostras por segundo do envelope do microfone (resolução de 10 ms)
+ENVELOPE_RATE = 100
+
+Range = Tuple[float, float]
+
+
+def format_timestamp(seconds: float) -> str:
+    """Timestamp no formato do YouTube (M:SS ou H:MM:SS)"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def split_ranges(duration: float, parts: int, max_range: float = MAX_RANGE) -> List[Range]:
+    """Divide a duração em trechos contíguos de tamanho parecido, cada um com até max_range segundos"""
+    if duration <= 0:
+        return []
+    count = max(parts, math.ceil(duration / max_range), 1)
+    step = duration / count
+    return [(index * step, min(duration, (index + 1) * step)) for index in range(count)]
+
+
+def frame_scores(frames):
+    """
+    Fração de pixels alterados entre cada quadro e o anterior
+
+    Args:
+        frames: Matriz uint8 (quadros x pixels)
+
+    Returns:
+        np.ndarray: len(frames) - 1 pontuações entre 0 e 1
+    """
+    import numpy as np
+
+    if len(frames) < 2:
+        return np.zeros(0, dtype=np.float32)
+    diff = np.abs(frames[1:].astype(np.int16) - frames[:-1].astype(np.int16))
+    return (diff > PIXEL_THRESHOLD).mean(axis=1, dtype=np.float32)
+
+
+def scene_cuts(scores, times, threshold: float = SCENE_THRESHOLD, min_gap: float = 1.0) -> List[dict]:
+    """
+    Mudanças de cena: quadros acima do limite, mantendo só o maior de cada rajada
+
+    Rolagens e animações geram vários quadros seguidos acima do limite; dentro de min_gap
+    segundos fica apenas o quadro com maior pontuação.
+    """
+    cuts = []
+    for score, time in zip(scores, times):
+        if score < threshold:
+            continue
+        if cuts and time - cuts[-1]['time'] < min_gap:
+            if score > cuts[-1]['score']:
+                cuts[-1] = {'time': float(time), 'score': float(score)}
+            continue
+        cuts.append({'time': float(time), 'score': float(score)})
+    return cuts
+
+
+async def _decode_range(video: Path, start: float, end: float, width: int, height: int,
+                        fps: float, keyframes: bool):
+    """Decodifica um trecho como quadros cinza (quadros x pixels) com o quadro i em start + i / fps"""
+    import numpy as np
+
+    length = end - start
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin']
+    if keyframes:
+        cmd += ['-skip_frame', 'nokey']
+    # Decodificação mais barata: os quadros viram miniaturas de qualquer forma
+    cmd += ['-skip_loop_filter', 'all', '-ss', f"{start:.3f}", '-i', str(video), '-t', f"{length:.3f}",
+            '-map', '0:v:0', '-an', '-sn',
+            '-vf', f"fps=fps={fps:g}:start_time=0,scale={width}:{height}:flags=area,format=gray",
+            '-f', 'rawvideo', 'pipe:1']
+
+    frame_size = width * height
+    expected = max(1, round(length * fps))
+    with tracing.span("ffmpeg:scene_frames", category="ffmpeg", path=str(video), start=start, end=end) as sp:
+        result = await media_executor.get_executor().run(
+            cmd, memory=media_executor.video_memory(width, height) + expected * frame_size)
+        sp.bytes_out = len(result.stdout)
+
+    count = min(len(result.stdout) // frame_size, expected)
+    return np.frombuffer(result.stdout, dtype=np.uint8, count=count * frame_size).reshape(count, frame_size)
+
+
+@tracing.traced("scenes:detect_scene_changes", category="scenes")
+async def detect_scene_changes_async(video: Path, fps: float = DEFAULT_FPS, width: int = DEFAULT_WIDTH,
+                                     keyframes: bool = False, jobs: Optional[int] = None,
+                                     threshold: float = SCENE_THRESHOLD) -> List[dict]:
+    """
+    Detecta as mudanças de cena de um vídeo
+
+    Args:
+        video: Arquivo de vídeo
+        fps: Quadros analisados por segundo
+        width: Largura dos quadros analisados
+        keyframes: Decodificar apenas os keyframes (bem mais rápido; a precisão passa a ser o
+            intervalo entre keyframes)
+        jobs: Trechos decodificados ao mesmo tempo (padrão: o limite do MediaExecutor)
+        threshold: Fração mínima de pixels alterados
+
+    Returns:
+        List[dict]: Mudanças de cena em ordem, com time (s) e score (0 a 1)
+    """
+    import numpy as np
+
+    executor = media_executor.get_executor()
+    info = await executor.probe(video)
+    stream = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), None)
+    if not stream:
+        raise ValueError(f"Sem stream de vídeo em {video}")
+    duration = float(info['format'].get('duration', 0))
+    height = max(2, int(round(width * stream['height'] / stream['width'] / 2)) * 2)
+
+    ranges = split_ranges(duration, jobs or executor.max_jobs)
+    logger.info(f"Analisando cenas de {video.name} ({duration:.0f}s, {len(ranges)} trechos, {width}x{height} "
+                f"a {fps:g} qps{', só keyframes' if keyframes else ''})")
+
+    async def analyze(start, end):
+        frames = await _decode_range(video, start, end, width, height, fps, keyframes)
+        # Só as pontuações e as bordas sobrevivem ao trecho, não os quadros decodificados
+        return frame_scores(frames), frames[:1].copy(), frames[-1:].copy()
+
+    results = await asyncio.gather(*(analyze(start, end) for start, end in ranges))
+
+    cuts = []
+    previous_last = None
+    for (start, _), (scores, first, last) in zip(ranges, results):
+        if not len(first):
+            continue
+        times = start + np.arange(1, len(scores) + 1) / fps
+        if previous_last is not None:
+            # Quadro de borda: o primeiro do trecho comparado com o último do anterior
+            scores = np.concatenate([frame_scores(np.concatenate([previous_last, first])), scores])
+            times = np.concatenate([[start], times])
+        cuts.extend(scene_cuts(scores, times, threshold))
+        previous_last = last
+    logger.info(f"{len(cuts)} mudanças de cena em {video.name}")
+    return cuts
+
+
+def speech_pauses(envelope, envelope_rate: int = ENVELOPE_RATE, silence_thresh: float = SILENCE_THRESH,
+                  min_pause: float = MIN_PAUSE) -> List[dict]:
+    """
+    Pausas no envelope de amplitude do microfone
+
+    Returns:
+        List[dict]: Pausas com start, end e duration (s), no formato de AudioProcessor.detect_silences
+    """
+    import numpy as np
+
+    if not len(envelope):
+        return []
+    level = 20 * np.log10(np.maximum(envelope, 1e-3) / 32768)
+    silent = np.concatenate([[False], level < silence_thresh, [False]])
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) >= min_pause * envelope_rate
+    return [{'start': s / envelope_rate, 'end': e / envelope_rate, 'duration': (e - s) / envelope_rate}
+            for s, e in zip(starts[keep], ends[keep])]
+
+
+def speech_position(envelope, times, envelope_rate: int = ENVELOPE_RATE,
+                    silence_thresh: float = SILENCE_THRESH) -> List[float]:
+    """
+    Fração da fala (0 a 1) já dita em cada instante
+
+    Usada para localizar o trecho da transcrição (texto sem tempos) que corresponde a cada
+    capítulo: o texto é proporcional ao tempo de fala, não ao tempo total.
+    """
+    import numpy as np
+
+    if not len(envelope):
+        return [0.0 for _ in times]
+    level = 20 * np.log10(np.maximum(envelope, 1e-3) / 32768)
+    spoken = np.concatenate([[0], np.cumsum(level >= silence_thresh)])
+    total = spoken[-1] or 1
+    indexes = np.clip((np.asarray(times) * envelope_rate).astype(np.int64), 0, len(spoken) - 1)
+    return [float(value) for value in spoken[indexes] / total]
+
+
+def find_chapters(cuts: List[dict], pauses: List[dict], duration: float,
+                  min_chapter: float = MIN_CHAPTER, max_chapters: int = MAX_CHAPTERS) -> List[dict]:
+    """
+    Escolhe o início dos capítulos
+
+    Cada mudança de cena é movida para o fim da pausa mais próxima (até SNAP_WINDOW segundos),
+    para o capítulo começar quando a fala recomeça; pausas longas sem mudança de cena entram
+    como candidatas mais fracas. As candidatas são escolhidas por peso, mantendo pelo menos
+    min_chapter segundos entre capítulos.
+
+    Returns:
+        List[dict]: Capítulos com start, end e source ('start', 'scene' ou 'pause'); vazio
+            quando não há pelo menos MIN_CHAPTERS capítulos
+    """
+    pause_ends = sorted(pauses, key=lambda pause: pause['end'])
+    candidates = []
+    snapped_pauses = set()
+    for cut in cuts:
+        nearest = min(range(len(pause_ends)), key=lambda i: _distance(pause_ends[i], cut['time']), default=None)
+        weight, time = cut['score'], cut['time']
+        if nearest is not None and _distance(pause_ends[nearest], cut['time']) <= SNAP_WINDOW:
+            time = pause_ends[nearest]['end']
+            weight += 0.5
+            snapped_pauses.add(nearest)
+        candidates.append((weight, time, 'scene'))
+    for index, pause in enumerate(pause_ends):
+        if index not in snapped_pauses and pause['duration'] >= LONG_PAUSE:
+            candidates.append((0.25 * min(1.0, pause['duration'] / (2 * LONG_PAUSE)), pause['end'], 'pause'))
+
+    chosen = [(0.0, 'start')]
+    for weight, time, source in sorted(candidates, key=lambda item: -item[0]):
+        if len(chosen) >= max_chapters:
+            break
+        if time < min_chapter or duration - time < min_chapter:
+            continue
+        if all(abs(time - start) >= min_chapter for start, _ in chosen):
+            chosen.append((time, source))
+
+    chosen.sort()
+    if len(chosen) < MIN_CHAPTERS:
+        return []
+    ends = [start for start, _ in chosen[1:]] + [duration]
+    return [{'start': round(start, 2), 'end': round(end, 2), 'source': source}
+            for (start, source), end in zip(chosen, ends)]
+
+
+def _distance(pause: dict, time: float) -> float:
+    """Distância entre um instante e uma pausa (0 quando está dentro dela)"""
+    if pause['start'] <= time <= pause['end']:
+        return 0.0
+    return min(abs(time - pause['start']), abs(time - pause['end']))
+
+
+@tracing.traced("scenes:chapters", category="scenes")
+async def detect_chapters_async(display: Path, audio: Path, fps: float = DEFAULT_FPS,
+                                keyframes: bool = False, min_chapter: float = MIN_CHAPTER,
+                                offset: float = 0.0) -> List[dict]:
+    """
+    Detecta os capítulos de uma gravação
+
+    Args:
+        display: Vídeo da tela
+        audio: Áudio da narração (microfone ou o próprio vídeo)
+        fps: Quadros analisados por segundo
+        keyframes: Decodificar apenas os keyframes
+        min_chapter: Duração mínima de um capítulo (s)
+        offset: Offset da tela em relação ao áudio (s, veja core.sync)
+
+    Returns:
+        List[dict]: Capítulos com start, end, source, timestamp e speech (fração da fala no
+            início e no fim, para localizar o trecho da transcrição)
+    """
+    loop = asyncio.get_running_loop()
+    # O envelope é decodificado em paralelo com os quadros da tela
+    cuts, envelope = await asyncio.gather(
+        detect_scene_changes_async(display, fps=fps, keyframes=keyframes),
+        loop.run_in_executor(None, sync.decode_envelope, audio, ENVELOPE_RATE),
+    )
+    for cut in cuts:
+        cut['time'] += offset
+
+    duration = len(envelope) / ENVELOPE_RATE
+    pauses = speech_pauses(envelope)
+    chapters = find_chapters(cuts, pauses, duration, min_chapter=min_chapter)
+    positions = speech_position(envelope, [chapter['start'] for chapter in chapters] + [duration])
+    for index, chapter in enumerate(chapters):
+        chapter['timestamp'] = format_timestamp(chapter['start'])
+        chapter['speech'] = [round(positions[index], 4), round(positions[index + 1], 4)]
+    logger.info(f"{len(chapters)} capítulos ({len(cuts)} mudanças de cena, {len(pauses)} pausas)")
+    return chapters
+
+
+def chapter_excerpts(chapters: List[dict], text: str, max_chars: int = 300) -> List[str]:
+    """Trecho da transcrição correspondente a cada capítulo (pela fração da fala)"""
+    excerpts = []
+    for chapter in chapters:
+        begin, end = (int(fraction * len(text)) for fraction in chapter.get('speech', (0, 0)))
+        # Começa na próxima palavra inteira
+        if begin > 0:
+            space = text.find(' ', begin)
+            begin = space + 1 if 0 <= space < end else begin
+        excerpt = ' '.join(text[begin:end].split())
+        if len(excerpt) > max_chars:
+            excerpt = excerpt[:max_chars].rsplit(' ', 1)[0]
+        excerpts.append(excerpt)
+    return excerpts
+
+
+def apply_chapters(seo_data: dict, chapters: List[dict]) -> dict:
+    """
+    Grava os capítulos no SEO com os títulos escolhidos pelo modelo
+
+    A lista de capítulos vai para seo_data['chapters'] e, se a descrição do modelo não tem
+    todos os timestamps, é acrescentada ao final dela no formato reconhecido pelo YouTube.
+    """
+    titles = seo_data.get('chapters') or []
+    entries = []
+    for index, chapter in enumerate(chapters):
+        title = titles[index] if index < len(titles) else None
+        if isinstance(title, dict):
+            title = title.get('title')
+        entries.append({'timestamp': chapter['timestamp'], 'start': chapter['start'],
+                        'title': str(title or f"Parte {index + 1}").strip()})
+    seo_data['chapters'] = entries
+
+    description = seo_data.get('description') or ''
+    if entries and not all(entry['timestamp'] in description for entry in entries):
+        lines = [f"{entry['timestamp']} {entry['title']}" for entry in entries]
+        seo_data['description'] = f"{description.rstrip()}\n\nCapítulos:\n" + '\n'.join(lines)
+    return seo_data
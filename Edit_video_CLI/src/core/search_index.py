@@ -0,0 +1,358 @@
+"""Índice de busca (SQLite FTS5) sobre as transcrições e os SEOs da biblioteca
+
+Cada vídeo vira uma linha do índice, identificada pelo caminho sem extensão (a chave), com o
+título, as tags e a descrição do `-seo.json` e o texto da transcrição (`.transcription.txt` ou
+o `.txt` do pipeline). A busca usa o ranking bm25 do FTS5, com peso maior para título e tags, e
+devolve um trecho com os termos encontrados.
+
+A atualização é incremental: `update` percorre as pastas indexadas e só relê os vídeos cujos
+arquivos mudaram de tamanho ou mtime, e as etapas de transcrição e SEO do pipeline atualizam o
+vídeo recém-gerado quando o índice existe (`notify`).
+"""
+import os
+import re
+import json
+import time
+import logging
+import sqlite3
+import contextlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT = 30.0
+
+TRANSCRIPTION_SUFFIX = '.transcription.txt'
+SEO_SUFFIX = '-seo.json'
+# Gerado pelo comando `seo` ao lado da transcrição (<nome>.transcription.seo.json ou <nome>.seo.json)
+SEO_COMMAND_SUFFIX = '.seo.json'
+
+# Peso de cada coluna no bm25 (título, tags, descrição, transcrição)
+COLUMN_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+# Marcadores dos termos encontrados nos trechos (o CLI os troca por estilo do rich)
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+# Palavras em volta dos termos encontrados em cada trecho
+SNIPPET_TOKENS = 16
+
+# Pastas ignoradas na varredura
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS videos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    transcription_path TEXT,
+    seo_path TEXT,
+    signature TEXT NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+    title, tags, description, transcription,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS videos_vocab USING fts5vocab(videos_fts, col);
+"""
+
+
+def default_path() -> Path:
+    """Banco padrão: EDIT_VIDEO_INDEX ou ~/.cache/edit-video/index.db"""
+    path = os.environ.get('EDIT_VIDEO_INDEX')
+    return Path(path) if path else Path.home() / '.cache' / 'edit-video' / 'index.db'
+
+
+def video_key(path: Path) -> Optional[Tuple[str, str]]:
+    """
+    Chave do vídeo e tipo ('transcription' ou 'seo') de um arquivo de saída
+
+    Um `.txt` comum só conta como transcrição quando há ao lado um MP3, um manifesto ou um SEO
+    com o mesmo nome, para não indexar anotações soltas.
+    """
+    name = path.name
+    if name.endswith(SEO_COMMAND_SUFFIX):
+        base = name[:-len(SEO_COMMAND_SUFFIX)]
+        if base.endswith('.transcription'):
+            base = base[:-len('.transcription')]
+        return str(path.with_name(base)), 'seo'
+    if name.endswith(SEO_SUFFIX):
+        return str(path.with_name(name[:-len(SEO_SUFFIX)])), 'seo'
+    if name.endswith(TRANSCRIPTION_SUFFIX):
+        return str(path.with_name(name[:-len(TRANSCRIPTION_SUFFIX)])), 'transcription'
+    if path.suffix == '.txt':
+        stem = path.with_suffix('')
+        siblings = (stem.with_suffix('.mp3'), stem.with_name(f"{stem.name}.manifest.json"),
+                    stem.with_name(f"{stem.name}{SEO_SUFFIX}"))
+        if any(sibling.exists() for sibling in siblings):
+            return str(stem), 'transcription'
+    return None
+
+
+def _signature(paths: Dict[str, Optional[str]]) -> str:
+    """Tamanho e mtime dos arquivos de um vídeo; muda quando algum deles muda"""
+    parts = {}
+    for kind, path in sorted(paths.items()):
+        if path:
+            stat = os.stat(path)
+            parts[kind] = [path, stat.st_size, stat.st_mtime_ns]
+    return json.dumps(parts)
+
+
+def _read_video(transcription_path: Optional[str], seo_path: Optional[str]) -> Tuple[str, str, str, str]:
+    """Colunas do índice (título, tags, descrição, transcrição) a partir dos arquivos"""
+    title = tags = description = transcription = ''
+    if seo_path:
+        try:
+            with open(seo_path, 'r', encoding='utf-8') as f:
+                seo = json.load(f)
+            title = str(seo.get('title') or '')
+            tags = ' '.join(str(tag) for tag in seo.get('tags') or [])
+            description = str(seo.get('description') or '')
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"SEO inválido em {seo_path}, ignorando: {e}")
+    if transcription_path:
+        with open(transcription_path, 'r', encoding='utf-8', errors='replace') as f:
+            transcription = f.read()
+    return title, tags, description, transcription
+
+
+def match_query(text: str) -> str:
+    """
+    Converte uma busca livre em uma consulta FTS5
+
+    Cada palavra vira um termo entre aspas (sem operadores acidentais) e todas precisam
+    aparecer; a última também casa como prefixo, para a busca funcionar enquanto se digita.
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        raise ValueError("Busca vazia")
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+@dataclass
+class SearchResult:
+    """Vídeo encontrado"""
+    key: str
+    title: str
+    snippet: str
+    rank: float
+    transcription_path: Optional[str]
+    seo_path: Optional[str]
+
+    def to_dict(self) -> dict:
+        snippet = self.snippet.replace(HIGHLIGHT_START, '').replace(HIGHLIGHT_END, '')
+        return {'key': self.key, 'title': self.title, 'snippet': snippet, 'rank': round(self.rank, 4),
+                'transcription_path': self.transcription_path, 'seo_path': self.seo_path}
+
+
+class SearchIndex:
+    """Acesso ao banco do índice; seguro entre threads e processos (uma conexão por operação)"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self, write: bool = False):
+        """Conexão com WAL; com write, tudo roda em uma transação com o lock de escrita"""
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            if not write:
+                yield db
+                return
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        finally:
+            db.close()
+
+    def roots(self) -> List[Path]:
+        """Pastas indexadas"""
+        with self._connect() as db:
+            return [Path(row['path']) for row in db.execute("SELECT path FROM roots ORDER BY path")]
+
+    def _scan(self, root: Path) -> Dict[str, Dict[str, str]]:
+        """Arquivos de saída encontrados sob root, agrupados por chave"""
+        found: Dict[str, Dict[str, str]] = {}
+        for directory, dirs, files in os.walk(root):
+            dirs[:] = [name for name in dirs if name not in SKIP_DIRS and not name.startswith('.')]
+            for name in files:
+                if not name.endswith(('.txt', SEO_SUFFIX, SEO_COMMAND_SUFFIX)):
+                    continue
+                match = video_key(Path(directory) / name)
+                if match:
+                    key, kind = match
+                    # Com .transcription.txt e .txt para o mesmo vídeo, fica o primeiro encontrado
+                    found.setdefault(key, {}).setdefault(kind, os.path.join(directory, name))
+        return found
+
+    def _write(self, db, key: str, paths: Dict[str, Optional[str]], signature: str):
+        columns = _read_video(paths.get('transcription'), paths.get('seo'))
+        row = db.execute("SELECT id FROM videos WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row:
+            db.execute("UPDATE videos SET transcription_path = ?, seo_path = ?, signature = ?, indexed_at = ? "
+                       "WHERE id = ?", (paths.get('transcription'), paths.get('seo'), signature, now, row['id']))
+            db.execute("DELETE FROM videos_fts WHERE rowid = ?", (row['id'],))
+            video_id = row['id']
+        else:
+            video_id = db.execute(
+                "INSERT INTO videos (key, transcription_path, seo_path, signature, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, paths.get('transcription'), paths.get('seo'), signature, now)).lastrowid
+        db.execute("INSERT INTO videos_fts (rowid, title, tags, description, transcription) VALUES (?, ?, ?, ?, ?)",
+                   (video_id, *columns))
+
+    def _delete(self, db, video_id: int):
+        db.execute("DELETE FROM videos_fts WHERE rowid = ?", (video_id,))
+        db.execute("DELETE FROM videos WHERE id = ?", (video_id,))
+
+    def update(self, roots: Optional[Iterable[Path]] = None) -> Dict[str, int]:
+        """
+        Indexa as pastas dadas (que passam a fazer parte do índice) ou todas as já indexadas
+
+        Só os vídeos novos ou com arquivos alterados são relidos; vídeos cujos arquivos sumiram
+        saem do índice.
+
+        Returns:
+            Dict[str, int]: Vídeos adicionados, atualizados, removidos e sem mudanças
+        """
+        roots = [Path(root).resolve() for root in roots] if roots else self.roots()
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        for root in roots:
+            found = self._scan(root)
+            prefix = str(root).rstrip(os.sep) + os.sep
+            with self._connect(write=True) as db:
+                db.execute("INSERT OR IGNORE INTO roots (path) VALUES (?)", (str(root),))
+                known = {row['key']: row for row in db.execute(
+                    "SELECT id, key, signature FROM videos WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))}
+                for key, paths in found.items():
+                    try:
+                        signature = _signature(paths)
+                        if key in known and known[key]['signature'] == signature:
+                            stats['unchanged'] += 1
+                            continue
+                        self._write(db, key, paths, signature)
+                    except OSError as e:
+                        # Arquivo removido ou ilegível durante a varredura: fica para a próxima
+                        logger.warning(f"Não foi possível indexar {key}: {e}")
+                        continue
+                    stats['updated' if key in known else 'added'] += 1
+                for key, row in known.items():
+                    if key not in found:
+                        self._delete(db, row['id'])
+                        stats['removed'] += 1
+        return stats
+
+    def update_video(self, key: str) -> bool:
+        """
+        Reindexa um vídeo pela chave (caminho sem extensão)
+
+        Returns:
+            bool: True se o vídeo tinha algum arquivo de saída e foi indexado
+        """
+        base = Path(key)
+        paths = {}
+        for kind, candidates in (('transcription', (base.with_name(base.name + TRANSCRIPTION_SUFFIX),
+                                                    base.with_name(base.name + '.txt'))),
+                                 ('seo', (base.with_name(base.name + SEO_SUFFIX),
+                                          base.with_name(base.name + '.transcription' + SEO_COMMAND_SUFFIX),
+                                          base.with_name(base.name + SEO_COMMAND_SUFFIX)))):
+            existing = next((path for path in candidates if path.exists()), None)
+            if existing:
+                paths[kind] = str(existing)
+        with self._connect(write=True) as db:
+            row = db.execute("SELECT id FROM videos WHERE key = ?", (key,)).fetchone()
+            if not paths:
+                if row:
+                    self._delete(db, row['id'])
+                return False
+            self._write(db, key, paths, _signature(paths))
+        return True
+
+    def search(self, query: str, limit: int = 10, raw: bool = False) -> List[SearchResult]:
+        """
+        Busca vídeos, do mais relevante para o menos relevante
+
+        Args:
+            query: Palavras buscadas (ou uma consulta FTS5 com raw)
+            limit: Máximo de resultados
+            raw: Usar a consulta como está (AND, OR, NEAR, "frase", prefixo*)
+
+        Raises:
+            ValueError: Consulta vazia ou inválida
+        """
+        match = query if raw else match_query(query)
+        weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+        sql = (f"SELECT v.key, v.transcription_path, v.seo_path, f.title, bm25(videos_fts, {weights}) AS rank, "
+               f"snippet(videos_fts, -1, ?, ?, '…', {SNIPPET_TOKENS}) AS snippet "
+               "FROM videos_fts AS f JOIN videos AS v ON v.id = f.rowid "
+               "WHERE videos_fts MATCH ? ORDER BY rank LIMIT ?")
+        with self._connect() as db:
+            try:
+                rows = db.execute(sql, (HIGHLIGHT_START, HIGHLIGHT_END, match, limit)).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f"Consulta inválida: {e}")
+        return [SearchResult(row['key'], row['title'], ' '.join(row['snippet'].split()), row['rank'],
+                             row['transcription_path'], row['seo_path']) for row in rows]
+
+    def document_frequencies(self) -> Tuple[int, Dict[str, int]]:
+        """
+        Número de transcrições e em quantas delas aparece cada termo (para o IDF de core.keywords)
+
+        Os termos saem como o tokenizador do índice os guarda: em minúsculas e sem acentos.
+        """
+        with self._connect() as db:
+            documents = db.execute("SELECT COUNT(*) FROM videos WHERE transcription_path IS NOT NULL").fetchone()[0]
+            frequencies = dict(db.execute("SELECT term, doc FROM videos_vocab WHERE col = 'transcription'"))
+        return documents, frequencies
+
+    def stats(self) -> dict:
+        """Pastas, vídeos e tamanho do banco"""
+        with self._connect() as db:
+            videos = db.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        return {'path': str(self.path), 'roots': [str(root) for root in self.roots()], 'videos': videos,
+                'bytes': self.path.stat().st_size}
+
+
+def notify(output: Path):
+    """
+    Atualiza no índice padrão o vídeo de uma transcrição ou SEO que acabou de ser gravado
+
+    Só age quando o índice já existe e o arquivo está sob uma pasta indexada; erros do índice
+    nunca interrompem quem gravou o arquivo.
+    """
+    path = default_path()
+    match = video_key(Path(output).resolve())
+    if not path.exists() or not match:
+        return
+    key = match[0]
+    try:
+        index = SearchIndex(path)
+        if any(key.startswith(str(root).rstrip(os.sep) + os.sep) for root in index.roots()):
+            index.update_video(key)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Não foi possível atualizar o índice de busca: {e}")
+
+
+def iter_highlights(snippet: str) -> Iterator[Tuple[str, bool]]:
+    """Partes de um trecho com a indicação de quais são termos encontrados"""
+    for index, part in enumerate(re.split(f"[{HIGHLIGHT_START}{HIGHLIGHT_END}]", snippet)):
+        if part:
+            yield part, index % 2 == 1
@@ -0,0 +1,230 @@
+"""Exportação de áudio codificada em paralelo, em segmentos
+
+A linha do tempo é dividida em N segmentos com fronteiras em múltiplos do tamanho do quadro
+do codec. Cada segmento é codificado por um processo ffmpeg separado, com alguns quadros de
+contexto antes (pre-roll) e depois (post-roll). Como o atraso do codificador é o mesmo em todos
+os processos, o quadro k0 = pre-roll / tamanho do quadro de um segmento cobre exatamente o
+mesmo trecho que o quadro seguinte do segmento anterior cobriria, e basta descartar os quadros
+de contexto para que a junção fique contínua, sem lacunas nem amostras repetidas. No MP3 o
+bit reservoir é desativado para que cada quadro dependa apenas dos próprios bytes.
+
+Os segmentos aparados são unidos pelo concat demuxer do ffmpeg com cópia de stream.
+"""
+import os
+import shutil
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from ..utils import file_utils, media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+# Quadros de contexto codificados antes e depois de cada segmento e depois descartados
+CONTEXT_FRAMES = 4
+
+# Segmentos menores que isso não compensam um processo a mais (s)
+MIN_SEGMENT_SECONDS = 10
+
+# Formato de saída -> (extensão dos segmentos, formato do segmento, formato final, argumentos do codificador)
+FORMATS = {
+    'mp3': ('mp3', 'mp3', 'mp3', ['-c:a', 'libmp3lame', '-reservoir', '0',
+                                  '-write_xing', '0', '-id3v2_version', '0']),
+    'm4a': ('aac', 'adts', 'ipod', ['-c:a', 'aac']),
+}
+
+_MP3_BITRATES = {
+    'v1': [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    'v2': [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+def supports(format_name: str) -> bool:
+    return format_name in FORMATS
+
+
+def frame_size(format_name: str, sample_rate: int) -> int:
+    """Amostras por quadro do codec"""
+    if format_name == 'mp3':
+        return 1152 if sample_rate >= 32000 else 576
+    return 1024
+
+
+def mp3_frames(data: bytes) -> List[Tuple[int, int]]:
+    """Posições (início, fim) de cada quadro MP3 (Layer III) em data"""
+    frames = []
+    position = 0
+    while position + 4 <= len(data):
+        b1, b2 = data[position + 1], data[position + 2]
+        if data[position] != 0xFF or (b1 & 0xE0) != 0xE0:
+            position += 1
+            continue
+        version = (b1 >> 3) & 0x03
+        bitrate_index, rate_index, padding = b2 >> 4, (b2 >> 2) & 0x03, (b2 >> 1) & 0x01
+        if version == 1 or bitrate_index in (0, 15) or rate_index == 3:
+            position += 1
+            continue
+        bitrate = _MP3_BITRATES['v1' if version == 3 else 'v2'][bitrate_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+        length = (144 if version == 3 else 72) * bitrate // sample_rate + padding
+        frames.append((position, position + length))
+        position += length
+    return frames
+
+
+def adts_frames(data: bytes) -> List[Tuple[int, int]]:
+    """Posições (início, fim) de cada quadro ADTS em data"""
+    frames = []
+    position = 0
+    while position + 7 <= len(data):
+        if data[position] != 0xFF or (data[position + 1] & 0xF0) != 0xF0:
+            position += 1
+            continue
+        length = ((data[position + 3] & 0x03) << 11) | (data[position + 4] << 3) | (data[position + 5] >> 5)
+        if length < 7:
+            position += 1
+            continue
+        frames.append((position, position + length))
+        position += length
+    return frames
+
+
+def plan_segments(total_samples: int, frame: int, count: int) -> List[Tuple[int, int]]:
+    """Divide [0, total_samples) em até `count` segmentos com fronteiras múltiplas de `frame`"""
+    frames_total = -(-total_samples // frame)
+    per_segment = max(1, -(-frames_total // max(1, count)))
+    segments = []
+    for first in range(0, frames_total, per_segment):
+        segments.append((first * frame, min(total_samples, (first + per_segment) * frame)))
+    return segments
+
+
+class SegmentedExporter:
+    """Codifica PCM 16 bits em paralelo e junta os segmentos sem lacunas"""
+
+    def __init__(self, pcm: bytes, sample_rate: int, channels: int, format_name: str,
+                 bitrate: str = '192k', workers: Optional[int] = None):
+        if format_name not in FORMATS:
+            raise ValueError(f"Exportação em segmentos não suporta {format_name}")
+        self.pcm = pcm
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.format_name = format_name
+        self.bitrate = bitrate
+        self.workers = workers or os.cpu_count() or 1
+        self.bytes_per_sample = 2 * channels
+        self.frame = frame_size(format_name, sample_rate)
+
+    @property
+    def total_samples(self) -> int:
+        return len(self.pcm) // self.bytes_per_sample
+
+    def _encode(self, index: int, start: int, end: int, last: bool, work_dir: Path,
+                on_seconds: Optional[Callable[[float], None]] = None) -> Path:
+        """
+        Codifica um segmento com contexto e mantém apenas os quadros do próprio segmento
+
+        on_seconds recebe os segundos do próprio segmento já codificados (sem o pre-roll).
+        """
+        extension, segment_format, _, encoder = FORMATS[self.format_name]
+        pre = min(CONTEXT_FRAMES * self.frame, start)
+        post = 0 if last else CONTEXT_FRAMES * self.frame
+        chunk = self.pcm[(start - pre) * self.bytes_per_sample:
+                         min(self.total_samples, end + post) * self.bytes_per_sample]
+
+        cmd = ['ffmpeg', '-v', 'error', '-f', 's16le', '-ar', str(self.sample_rate),
+               '-ac', str(self.channels), '-i', '-', *encoder, '-b:a', self.bitrate,
+               '-f', segment_format, '-']
+        with tracing.span("ffmpeg:encode_segment", category="ffmpeg", segment=index,
+                          bytes_in=len(chunk)) as sp:
+            # O out_time do ffmpeg conta o pre-roll, que não pertence ao segmento
+            progress = (lambda job: on_seconds(max(0.0, job.out_time - pre / self.sample_rate))) if on_seconds else None
+            result = media_executor.run(cmd, input=chunk, check=False, on_progress=progress)
+            if result.returncode != 0:
+                raise RuntimeError(f"Erro ao codificar segmento {index}: {result.stderr[-2000:]}")
+            sp.bytes_out = len(result.stdout)
+
+        parse = mp3_frames if self.format_name == 'mp3' else adts_frames
+        frames = parse(result.stdout)
+        first = pre // self.frame
+        count = None if last else (end - start) // self.frame
+        kept = frames[first:] if count is None else frames[first:first + count]
+        if not kept:
+            raise RuntimeError(f"Segmento {index} sem quadros após o corte")
+
+        path = work_dir / f"segment-{index:04d}.{extension}"
+        path.write_bytes(result.stdout[kept[0][0]:kept[-1][1]])
+        return path
+
+    @tracing.traced("audio:segmented_export", category="audio")
+    def export(self, output_path: Path,
+               on_progress: Optional[Callable[[media_executor.JobProgress], None]] = None) -> Path:
+        """
+        Codifica os segmentos em paralelo e os une com o concat demuxer (cópia de stream)
+
+        Args:
+            output_path: Arquivo de saída
+            on_progress: Função opcional chamada com o JobProgress somado de todos os segmentos
+                (done ao fim da junção); pode ser chamada de várias threads
+
+        Returns:
+            Path: Caminho do arquivo gerado
+        """
+        max_segments = max(1, int(self.total_samples / self.sample_rate // MIN_SEGMENT_SECONDS))
+        segments = plan_segments(self.total_samples, self.frame, min(self.workers, max_segments))
+        logger.info(f"Exportando {len(segments)} segmentos em paralelo ({self.workers} processos)")
+
+        seconds = [(end - start) / self.sample_rate for start, end in segments]
+        encoded = [0.0] * len(segments)
+        lock = threading.Lock()
+
+        def advance(index, value):
+            with lock:
+                encoded[index] = max(encoded[index], min(seconds[index], value))
+                progress = media_executor.JobProgress(out_time=sum(encoded), duration=sum(seconds))
+            on_progress(progress)
+
+        def encode(index, start, end):
+            report = (lambda value: advance(index, value)) if on_progress else None
+            path = self._encode(index, start, end, index == len(segments) - 1, work_dir, report)
+            if report:
+                report(seconds[index])
+            return path
+
+        work_dir = Path(tempfile.mkdtemp(prefix='.segments-', dir=output_path.parent))
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(encode, index, start, end) for index, (start, end) in enumerate(segments)]
+                paths = [future.result() for future in futures]
+
+            concat_list = work_dir / 'segments.txt'
+            concat_list.write_text(''.join(f"file '{path.name}'\n" for path in paths), encoding='utf-8')
+            _, _, output_format, _ = FORMATS[self.format_name]
+            cmd = ['ffmpeg', '-y', '-v', 'error', '-f', 'concat', '-safe', '0', '-i', str(concat_list),
+                   '-c', 'copy', '-f', output_format]
+            with file_utils.atomic_path(output_path) as temp_path:
+                with tracing.span("ffmpeg:concat_segments", category="ffmpeg", segments=len(paths)) as sp:
+                    result = media_executor.run(cmd + [temp_path], check=False)
+                    if result.returncode != 0:
+                        raise RuntimeError(f"Erro ao unir segmentos: {result.stderr[-2000:]}")
+                    sp.bytes_out = tracing.file_size(temp_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if on_progress:
+            on_progress(media_executor.JobProgress(out_time=sum(seconds), duration=sum(seconds), done=True))
+        return output_path
+
+
+def export_segment(audio_segment, output_path: Path, format_name: str, workers: Optional[int] = None,
+                   bitrate: str = '192k',
+                   on_progress: Optional[Callable[[media_executor.JobProgress], None]] = None) -> Path:
+    """Exporta um AudioSegment do pydub com codificação em paralelo (veja SegmentedExporter.export)"""
+    if audio_segment.sample_width != 2:
+        audio_segment = audio_segment.set_sample_width(2)
+    exporter = SegmentedExporter(audio_segment.raw_data, audio_segment.frame_rate, audio_segment.channels,
+                                 format_name, bitrate=bitrate, workers=workers)
+    return exporter.export(output_path, on_progress)
@@ -2,18 +2,33 @@
 import os
 from ..llm.factory import LLMFactory
 from ..llm.gemini import run_async
+from . import scenes, keywords
 
-def generate_seo(transcription_text, style="professional"):
+# full: transcrição inteira para o modelo; compact: palavras-chave e frases principais
+# extraídas localmente (core.keywords); local: SEO gerado sem o modelo
+SEO_MODES = ('full', 'compact', 'local')
+
+async def generate_seo_async(transcription_text, style="professional", chapters=None, mode="full"):
     """
     Gera SEO para YouTube com base em uma transcrição
     
     Args:
         transcription_text (str): Texto da transcrição
         style (str): Estilo do SEO (clickbait, professional, educational, neutral)
+        chapters (list): Capítulos detectados (veja core.scenes); a descrição usa os seus
+            timestamps em vez de timestamps inventados
+        mode (str): Quanto da transcrição vai para o modelo (veja SEO_MODES)
         
     Returns:
         dict: Dados de SEO (título, descrição, tags)
     """
+    if mode not in SEO_MODES:
+        raise ValueError(f"Modo de SEO inválido: {mode}")
+    
+    # Sem o modelo: título, descrição e tags a partir das palavras-chave
+    if mode == "local":
+        return keywords.local_seo(transcription_text, chapters=chapters)
+    
     # Usar o Gemini como provedor padrão
     llm_provider = "gemini"
     
@@ -28,10 +43,35 @@ def generate_seo(transcription_text, style="professional"):
     # Criar cliente LLM
     llm_client = LLMFactory.create_llm(llm_provider, api_key)
     
+    # Trecho da transcrição de cada capítulo, para o modelo dar um título a cada um
+    prompt_chapters = None
+    if chapters:
+        excerpts = scenes.chapter_excerpts(chapters, transcription_text)
+        prompt_chapters = [{'timestamp': chapter['timestamp'], 'excerpt': excerpt}
+                           for chapter, excerpt in zip(chapters, excerpts)]
+    
+    # No modo compacto, o modelo recebe só as frases principais e as palavras-chave
+    prompt_text, prompt_keywords, found = transcription_text, None, None
+    if mode == "compact":
+        found = keywords.extract_keywords(transcription_text)
+        prompt_keywords = [keyword.term for keyword in found]
+        prompt_text = "\n".join(keywords.key_sentences(transcription_text, found))
+    
     # Gerar SEO
-    seo_data = run_async(llm_client.generate_seo(transcription_text, style=style))
+    seo_data = await llm_client.generate_seo(prompt_text, style=style, chapters=prompt_chapters,
+                                             keywords=prompt_keywords)
     
     if not seo_data:
         raise ValueError("Não foi possível gerar SEO.")
+    
+    if found and not seo_data.get('tags'):
+        seo_data['tags'] = keywords.candidate_tags(found)
+    
+    if chapters:
+        scenes.apply_chapters(seo_data, chapters)
         
-    return seo_data 
\ No newline at end of file
+    return seo_data 
+
+def generate_seo(transcription_text, style="professional", chapters=None, mode="full"):
+    """Versão síncrona de generate_seo_async"""
+    return run_async(generate_seo_async(transcription_text, style=style, chapters=chapters, mode=mode))
@@ -0,0 +1,633 @@
+"""Serviço local do Editor de Vídeo (`edit-video serve`)
+
+Um processo de longa duração que mantém aquecido o que cada execução do CLI ou da extensão
+precisaria recriar: o interpretador com numpy/pydub/aiohttp já importados, a sessão HTTP do
+Gemini (conexões e TLS reaproveitados), o cache do ffprobe, os resultados recentes de análise e
+detecção de silêncio e o último áudio decodificado.
+
+A API é HTTP/JSON sobre um socket Unix (ou TCP em localhost):
+
+    GET    /health              estado do serviço
+    POST   /transcribe          {"file", "force", "denoise"}
+    POST   /seo                 {"file", "style", "force", "denoise", "chapters", "seo_mode"}
+    POST   /analyze             {"folder", "sync", "output_file"}
+    POST   /silence             {"file", "min_silence", "silence_threshold"}
+    POST   /peaks               {"file", "start", "end", "width", "silences", "min_silence", "silence_threshold"}
+    GET    /jobs                jobs conhecidos
+    GET    /jobs/{id}           estado e resultado de um job
+    GET    /jobs/{id}/events    eventos do job em NDJSON, do primeiro até o final
+    DELETE /jobs/{id}           cancela o job
+
+Cada POST cria um job e responde 202 na hora; os jobs rodam no agendador do serviço (no máximo
+`max_jobs` ao mesmo tempo, com o ffmpeg ainda limitado pelo MediaExecutor). Os eventos têm
+`type` igual a "stage", "progress", "done", "error" ou "cancelled" e, quando conhecido, o
+progresso total em `percent` (0-100).
+
+O serviço lê e escreve arquivos do usuário, então só atende o próprio usuário: o socket Unix é
+0600 e, em TCP, cada requisição precisa do token gravado em service_client.token_path() (também
+0600). Requisições com cabeçalho `Origin` (feitas por páginas no navegador) são recusadas, e os
+POSTs precisam de `Content-Type: application/json`, que um formulário HTML não consegue enviar.
+"""
+import os
+import hmac
+import json
+import time
+import uuid
+import secrets
+import socket
+import asyncio
+import logging
+import threading
+import collections
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from ..utils import media_executor, tracing
+from ..utils.service_client import default_address, parse_address, token_path
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ('transcribe', 'seo', 'analyze', 'silence', 'peaks')
+SEO_STYLES = ('clickbait', 'professional', 'educational', 'neutral')
+# Veja seo_generator.SEO_MODES (não importado aqui para não carregar o cliente do Gemini)
+SEO_MODES = ('full', 'compact', 'local')
+FINAL_STATES = ('done', 'error', 'cancelled')
+
+MAX_JOBS = 4                # jobs executados ao mesmo tempo
+FINISHED_JOBS = 200         # jobs terminados mantidos para consulta
+RESULT_CACHE_SIZE = 128     # resultados de análise/silêncio guardados
+
+# Memória máxima ocupada pelos áudios decodificados mantidos para novas detecções de silêncio
+AUDIO_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class InvalidJob(ValueError):
+    """Parâmetros inválidos para o job (resposta 400)"""
+
+
+@dataclass
+class Job:
+    """Um pedido ao serviço e o histórico dos seus eventos"""
+    id: str
+    kind: str
+    params: dict
+    loop: asyncio.AbstractEventLoop = field(repr=False)
+    status: str = 'queued'
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    events: List[dict] = field(default_factory=list, repr=False)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def to_dict(self, result: bool = True) -> dict:
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'params': self.params,
+            'status': self.status,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'error': self.error,
+        }
+        if result:
+            data['result'] = self.result
+        return data
+
+    def emit(self, type: str, **data):
+        """Registra um evento; pode ser chamado de qualquer thread"""
+        event = {'type': type, 'job': self.id, 'time': time.time(), **data}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._append(event)
+        else:
+            self.loop.call_soon_threadsafe(self._append, event)
+
+    def _append(self, event: dict):
+        self.events.append(event)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def finish(self, status: str, result: Optional[dict] = None, error: Optional[str] = None, **data):
+        """Marca o job como terminado e emite o evento final"""
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished = time.time()
+        if status == 'done':
+            self._append({'type': 'done', 'job': self.id, 'time': self.finished, 'percent': 100,
+                          'result': result, **data})
+        else:
+            self._append({'type': status, 'job': self.id, 'time': self.finished, 'error': error})
+
+    async def follow(self):
+        """Gera os eventos do job desde o primeiro, até o evento final"""
+        cursor = 0
+        while True:
+            changed = self._changed
+            while cursor < len(self.events):
+                event = self.events[cursor]
+                cursor += 1
+                yield event
+                if event['type'] in FINAL_STATES:
+                    return
+            await changed.wait()
+
+
+def _fingerprint(path: Path):
+    """Identifica o conteúdo de um arquivo (ou de todos os arquivos de uma pasta) sem lê-lo"""
+    if path.is_dir():
+        return tuple(sorted((str(p), p.stat().st_size, p.stat().st_mtime_ns)
+                            for p in path.rglob('*') if p.is_file()))
+    stat = path.stat()
+    return (str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def _require_path(params: dict, key: str, directory: bool = False) -> Path:
+    value = params.get(key)
+    if not value or not isinstance(value, str):
+        raise InvalidJob(f"Parâmetro obrigatório ausente: {key}")
+    path = Path(value).expanduser()
+    if not path.is_absolute():
+        raise InvalidJob(f"Use um caminho absoluto em {key}: {value}")
+    if directory and not path.is_dir():
+        raise InvalidJob(f"Diretório não encontrado: {path}")
+    if not directory and not path.is_file():
+        raise InvalidJob(f"Arquivo não encontrado: {path}")
+    return path
+
+
+class Service:
+    """Agendador de jobs e caches compartilhados pelas requisições"""
+
+    def __init__(self, max_jobs: int = MAX_JOBS):
+        self.max_jobs = max_jobs
+        self.jobs: Dict[str, Job] = collections.OrderedDict()
+        self.started = time.time()
+        self.results = collections.OrderedDict()
+        self.audio = collections.OrderedDict()
+        self._audio_lock = threading.Lock()
+        self._semaphore = None
+        self.stats = {'submitted': 0, 'cache_hits': 0, 'audio_hits': 0}
+
+    #
+    # Validação dos parâmetros de cada tipo de job
+    #
+
+    def _params_transcribe(self, params: dict) -> dict:
+        from .pipeline import AUDIO_FORMATS, VIDEO_FORMATS
+
+        path = _require_path(params, 'file')
+        if path.suffix.lower() not in VIDEO_FORMATS + AUDIO_FORMATS:
+            raise InvalidJob(f"Formato não suportado: {path.suffix}")
+        return {'file': str(path), 'force': bool(params.get('force')), 'denoise': bool(params.get('denoise')),
+                'whole': bool(params.get('whole'))}
+
+    def _params_seo(self, params: dict) -> dict:
+        style = params.get('style', 'clickbait')
+        if style not in SEO_STYLES:
+            raise InvalidJob(f"Estilo inválido: {style} (use {', '.join(SEO_STYLES)})")
+        seo_mode = params.get('seo_mode', 'full')
+        if seo_mode not in SEO_MODES:
+            raise InvalidJob(f"Modo de SEO inválido: {seo_mode} (use {', '.join(SEO_MODES)})")
+        return {**self._params_transcribe(params), 'style': style, 'chapters': bool(params.get('chapters')),
+                'seo_mode': seo_mode}
+
+    def _params_analyze(self, params: dict) -> dict:
+        output_file = params.get('output_file')
+        if output_file and not Path(output_file).is_absolute():
+            raise InvalidJob(f"Use um caminho absoluto em output_file: {output_file}")
+        return {'folder': str(_require_path(params, 'folder', directory=True)),
+                'sync': bool(params.get('sync', True)), 'output_file': output_file or None}
+
+    def _params_silence(self, params: dict) -> dict:
+        path = _require_path(params, 'file')
+        try:
+            return {'file': str(path),
+                    'min_silence': int(params.get('min_silence', 500)),
+                    'silence_threshold': int(params.get('silence_threshold', -40))}
+        except (TypeError, ValueError) as e:
+            raise InvalidJob(f"Parâmetro numérico inválido: {e}")
+
+    def _params_peaks(self, params: dict) -> dict:
+        path = _require_path(params, 'file')
+        try:
+            end = params.get('end')
+            return {'file': str(path),
+                    'start': max(0.0, float(params.get('start', 0))),
+                    'end': float(end) if end is not None else None,
+                    'width': max(1, int(params.get('width', 1000))),
+                    'silences': bool(params.get('silences')),
+                    'min_silence': int(params.get('min_silence', 500)),
+                    'silence_threshold': int(params.get('silence_threshold', -40))}
+        except (TypeError, ValueError) as e:
+            raise InvalidJob(f"Parâmetro numérico inválido: {e}")
+
+    def _cache_key(self, job: Job):
+        """Chave do cache de resultados; None para jobs com efeitos além do resultado"""
+        if job.kind == 'silence':
+            return ('silence', _fingerprint(Path(job.params['file'])),
+                    job.params['min_silence'], job.params['silence_threshold'])
+        if job.kind == 'analyze' and not job.params['output_file']:
+            return ('analyze', _fingerprint(Path(job.params['folder'])), job.params['sync'])
+        # Transcrição e SEO já são reaproveitadas pelo manifesto de cada arquivo, e os picos
+        # pelo próprio arquivo .peaks (cada leitura custa só o tamanho do intervalo)
+        return None
+
+    #
+    # Agendamento
+    #
+
+    def submit(self, kind: str, params: dict) -> Job:
+        """
+        Cria um job e o coloca na fila
+
+        Raises:
+            InvalidJob: Tipo desconhecido ou parâmetros inválidos
+        """
+        if kind not in JOB_KINDS:
+            raise InvalidJob(f"Tipo de job desconhecido: {kind}")
+        params = getattr(self, f"_params_{kind}")(params or {})
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, params=params, loop=asyncio.get_running_loop())
+        self.jobs[job.id] = job
+        self.stats['submitted'] += 1
+        self._prune()
+
+        key = self._cache_key(job)
+        if key is not None and key in self.results:
+            self.results.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            job.started = time.time()
+            job.finish('done', self.results[key], cached=True)
+            return job
+
+        job.emit('stage', stage='queued', message="Aguardando vaga...", percent=0)
+        job.task = asyncio.ensure_future(self._run(job, key))
+        return job
+
+    async def _run(self, job: Job, key):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_jobs)
+        try:
+            async with self._semaphore:
+                job.status = 'running'
+                job.started = time.time()
+                with tracing.span(f"service:{job.kind}", category="service", job=job.id):
+                    result = await getattr(self, f"_run_{job.kind}")(job)
+        except asyncio.CancelledError:
+            job.finish('cancelled', error="Job cancelado")
+            return
+        except Exception as e:
+            logger.exception(f"Erro no job {job.id} ({job.kind})")
+            job.finish('error', error=str(e))
+            return
+
+        if key is not None:
+            self.results[key] = result
+            while len(self.results) > RESULT_CACHE_SIZE:
+                self.results.popitem(last=False)
+        job.finish('done', result)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancela um job; jobs em threads (análise, silêncio) terminam a etapa atual antes"""
+        job = self.jobs.get(job_id)
+        if job is not None and job.task is not None and not job.task.done():
+            job.task.cancel()
+        return job
+
+    def cancel_all(self):
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINAL_STATES]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def health(self) -> dict:
+        states = collections.Counter(job.status for job in self.jobs.values())
+        executor = media_executor.get_executor()
+        return {
+            'status': 'ok',
+            'pid': os.getpid(),
+            'uptime': time.time() - self.started,
+            'max_jobs': self.max_jobs,
+            'jobs': dict(states),
+            'ffmpeg_running': executor.running,
+            'cache': {'results': len(self.results), 'audio': len(self.audio),
+                      'probes': executor.cached_probes},
+            'stats': self.stats,
+        }
+
+    #
+    # Execução de cada tipo de job
+    #
+
+    async def _run_transcribe(self, job: Job, seo: bool = False) -> dict:
+        from . import pipeline
+
+        params = job.params
+        input_file = Path(params['file'])
+        # Peso de cada etapa no progresso total (conversão, transcrição, SEO)
+        convert_weight, transcribe_weight = (40, 40) if seo else (50, 50)
+
+        def on_convert(progress):
+            if progress.fraction is not None:
+                job.emit('progress', stage='convert', percent=round(convert_weight * progress.fraction, 1))
+
+        job.emit('stage', stage='convert', message="Convertendo para MP3...", percent=0)
+        mp3_path, convert_reused = await pipeline.convert_stage_async(input_file, force=params['force'],
+                                                                      on_progress=on_convert)
+
+        job.emit('stage', stage='transcribe', percent=convert_weight,
+                 message="Reduzindo ruído e transcrevendo áudio..." if params['denoise'] else "Transcrevendo áudio...")
+        text, transcription_path, transcribe_reused = await pipeline.transcribe_stage_async(
+            mp3_path, force=params['force'], denoise=params['denoise'], whole=params['whole'])
+
+        reused = [stage for stage, flag in (('convert', convert_reused), ('transcribe', transcribe_reused)) if flag]
+        result = {'mp3': str(mp3_path), 'transcription_path': str(transcription_path),
+                  'transcription': text, 'reused': reused}
+        if not seo:
+            return result
+
+        if params['chapters'] and input_file.suffix.lower() in pipeline.VIDEO_FORMATS:
+            job.emit('stage', stage='chapters', percent=convert_weight + transcribe_weight,
+                     message="Detectando capítulos...")
+            _, chapters_path, chapters_reused = await pipeline.chapters_stage_async(
+                input_file, input_file, mp3_path, force=params['force'])
+            result['chapters_path'] = str(chapters_path)
+            if chapters_reused:
+                reused.append('chapters')
+
+        job.emit('stage', stage='seo', percent=convert_weight + transcribe_weight,
+                 message=f"Gerando SEO com estilo '{params['style']}'...")
+        seo_data, seo_path, seo_reused = await pipeline.seo_stage_async(mp3_path, params['style'],
+                                                                        force=params['force'],
+                                                                        mode=params['seo_mode'])
+        if seo_reused:
+            reused.append('seo')
+        return {**result, 'seo_path': str(seo_path), 'seo': seo_data}
+
+    async def _run_seo(self, job: Job) -> dict:
+        return await self._run_transcribe(job, seo=True)
+
+    async def _run_analyze(self, job: Job) -> dict:
+        from .metadata_handler import MetadataHandler
+
+        params = job.params
+
+        def work():
+            handler = MetadataHandler(Path(params['folder']))
+            handler.extract_screenstudio_metadata()
+            if params['sync']:
+                job.emit('stage', stage='sync', message="Sincronizando canais...")
+                handler.estimate_sync()
+            if params['output_file']:
+                handler.save_metadata(Path(params['output_file']))
+            return {'metadata': handler.metadata, 'summary': handler.generate_summary()}
+
+        job.emit('stage', stage='analyze', message="Analisando gravação...")
+        # Round-trip em JSON para devolver apenas tipos serializáveis
+        result = await asyncio.get_running_loop().run_in_executor(None, work)
+        return json.loads(json.dumps(result, default=str))
+
+    def _load_audio(self, job: Job, path: Path):
+        """AudioProcessor com o áudio carregado, reaproveitado enquanto o arquivo não mudar"""
+        from .audio_processor import AudioProcessor
+
+        key = _fingerprint(path)
+        with self._audio_lock:
+            if key in self.audio:
+                self.audio.move_to_end(key)
+                self.stats['audio_hits'] += 1
+                return self.audio[key]
+
+        def on_decode(progress):
+            if progress.fraction is not None:
+                job.emit('progress', stage='decode', percent=round(90 * progress.fraction, 1))
+
+        processor = AudioProcessor(path)
+        processor.load_audio(on_progress=on_decode)
+
+        with self._audio_lock:
+            self.audio[key] = processor
+            # Mantém ao menos o áudio atual, mesmo que sozinho passe do limite
+            while len(self.audio) > 1 and sum(len(cached.audio_segment.raw_data)
+                                              for cached in self.audio.values()) > AUDIO_CACHE_BYTES:
+                self.audio.popitem(last=False)
+        return processor
+
+    async def _run_silence(self, job: Job) -> dict:
+        params = job.params
+
+        def work():
+            processor = self._load_audio(job, Path(params['file']))
+            job.emit('stage', stage='detect', message="Detectando silêncio...", percent=90)
+            silences = processor.detect_silences(min_silence_len=params['min_silence'],
+                                                 silence_thresh=params['silence_threshold'])
+            return {'silences': silences, 'duration': len(processor.audio_segment) / 1000}
+
+        job.emit('stage', stage='decode', message="Carregando áudio...", percent=0)
+        return await asyncio.get_running_loop().run_in_executor(None, work)
+
+    async def _run_peaks(self, job: Job) -> dict:
+        from . import peaks
+
+        params = job.params
+        media = Path(params['file'])
+        job.emit('stage', stage='peaks', message="Calculando picos...", percent=0)
+        peak_file, reused = await peaks.ensure_peaks_async(media)
+
+        def work():
+            result = peak_file.read(params['start'], params['end'], params['width']).to_dict()
+            if params['silences']:
+                result['silences'] = peak_file.silences(params['silence_threshold'], params['min_silence'] / 1000)
+            return result
+
+        result = await asyncio.get_running_loop().run_in_executor(None, work)
+        return {'peaks_path': str(peak_file.path), 'duration': peak_file.duration,
+                'reused': ['peaks'] if reused else [], **result}
+
+
+def create_app(service: Service, token: Optional[str] = None):
+    """
+    Aplicação aiohttp com as rotas do serviço
+
+    Args:
+        service: Agendador dos jobs
+        token: Token exigido no cabeçalho Authorization (None: sem token, para o socket Unix)
+    """
+    from aiohttp import web
+
+    def error(status: int, message: str):
+        return web.json_response({'error': message}, status=status)
+
+    @web.middleware
+    async def guard(request, handler):
+        # Navegadores enviam Origin em requisições entre sites; os clientes do serviço não
+        if 'Origin' in request.headers:
+            return error(403, "Requisições de páginas web não são aceitas")
+        if token is not None:
+            authorization = request.headers.get('Authorization', '').encode('utf-8', 'replace')
+            if not hmac.compare_digest(authorization, f"Bearer {token}".encode('utf-8')):
+                return error(401, "Token do serviço ausente ou inválido")
+        return await handler(request)
+
+    def find(request):
+        return service.jobs.get(request.match_info['job_id'])
+
+    async def health(request):
+        return web.json_response(service.health())
+
+    async def submit(request):
+        kind = request.path.strip('/')
+        if request.content_type != 'application/json':
+            return error(415, "Envie os parâmetros com Content-Type: application/json")
+        try:
+            params = await request.json() if request.can_read_body else {}
+        except ValueError:
+            return error(400, "Corpo da requisição não é um JSON válido")
+        if not isinstance(params, dict):
+            return error(400, "O corpo da requisição deve ser um objeto JSON")
+        try:
+            job = service.submit(kind, params)
+        except InvalidJob as e:
+            return error(400, str(e))
+        return web.json_response(job.to_dict(), status=202)
+
+    async def list_jobs(request):
+        return web.json_response([job.to_dict(result=False) for job in service.jobs.values()])
+
+    async def get_job(request):
+        job = find(request)
+        if job is None:
+            return error(404, "Job não encontrado")
+        return web.json_response(job.to_dict())
+
+    async def events(request):
+        job = find(request)
+        if job is None:
+            return error(404, "Job não encontrado")
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        await response.prepare(request)
+        async for event in job.follow():
+            await response.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+        await response.write_eof()
+        return response
+
+    async def cancel(request):
+        job = service.cancel(request.match_info['job_id'])
+        if job is None:
+            return error(404, "Job não encontrado")
+        return web.json_response(job.to_dict(result=False))
+
+    app = web.Application(middlewares=[guard])
+    app.router.add_get('/health', health)
+    for kind in JOB_KINDS:
+        app.router.add_post(f'/{kind}', submit)
+    app.router.add_get('/jobs', list_jobs)
+    app.router.add_get('/jobs/{job_id}', get_job)
+    app.router.add_get('/jobs/{job_id}/events', events)
+    app.router.add_delete('/jobs/{job_id}', cancel)
+    return app
+
+
+def _socket_in_use(path: Path) -> bool:
+    """Verifica se há um processo escutando no socket Unix"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+
+def _write_token(path: Path, token: str):
+    """Grava o token em um arquivo novo legível só pelo usuário"""
+    path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    path.unlink(missing_ok=True)
+    # O_EXCL: não segue um link simbólico deixado no lugar do arquivo
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+
+
+async def serve(address: Optional[str] = None, max_jobs: int = MAX_JOBS, on_ready=None):
+    """
+    Executa o serviço até ser cancelado (Ctrl+C ou SIGTERM)
+
+    Args:
+        address: Socket Unix ou endereço TCP (padrão: service_client.default_address())
+        max_jobs: Jobs executados ao mesmo tempo
+        on_ready: Função chamada com o endereço quando o serviço começa a aceitar conexões
+
+    Raises:
+        RuntimeError: Já existe um serviço escutando no endereço
+    """
+    import signal
+    from aiohttp import web
+    from ..llm.gemini import GeminiClient
+
+    address = address or default_address()
+    kind, target = parse_address(address)
+    service = Service(max_jobs=max_jobs)
+    token = secrets.token_urlsafe(32) if kind == 'tcp' else None
+    runner = web.AppRunner(create_app(service, token), access_log=None)
+    await runner.setup()
+
+    socket_path = token_file = None
+    try:
+        if kind == 'unix':
+            socket_path = Path(target)
+            socket_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+            if socket_path.exists():
+                if _socket_in_use(socket_path):
+                    socket_path = None
+                    raise RuntimeError(f"Já existe um serviço escutando em {address}")
+                # Socket deixado por um serviço encerrado sem limpeza
+                socket_path.unlink()
+            site = web.UnixSite(runner, str(socket_path))
+            await site.start()
+            # Apenas o próprio usuário pode enviar jobs (o serviço lê e escreve seus arquivos)
+            os.chmod(socket_path, 0o600)
+        else:
+            host, port = target
+            if host not in ('127.0.0.1', 'localhost', '::1'):
+                logger.warning(f"Serviço exposto fora do localhost em {host}:{port}; "
+                               f"qualquer cliente da rede poderá ler e escrever arquivos desta máquina")
+            site = web.TCPSite(runner, host, port)
+            await site.start()
+            token_file = token_path()
+            _write_token(token_file, token)
+            logger.info(f"Token do serviço gravado em {token_file}")
+
+        await GeminiClient.open_shared_session()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        if hasattr(signal, 'SIGTERM'):
+            try:
+                loop.add_signal_handler(signal.SIGTERM, stop.set)
+            except NotImplementedError:
+                pass
+        logger.info(f"Serviço escutando em {address}")
+        if on_ready:
+            on_ready(address)
+        await stop.wait()
+    finally:
+        service.cancel_all()
+        await GeminiClient.close_shared_session()
+        await runner.cleanup()
+        media_executor.get_executor().cancel_all()
+        if socket_path is not None:
+            socket_path.unlink(missing_ok=True)
+        if token_file is not None:
+            token_file.unlink(missing_ok=True)
@@ -0,0 +1,155 @@
+"""Sincronização automática dos canais de uma gravação por correlação cruzada
+
+Cada canal com áudio é decodificado pelo ffmpeg em mono com taxa baixa, reduzido a um
+envelope de amplitude (ENVELOPE_RATE amostras por segundo) e comparado com o canal de
+referência (o microfone) por correlação cruzada via FFT do NumPy, em O(n log n). Uma hora
+de gravação vira ~720 mil amostras de envelope, e a correlação leva poucas dezenas de ms.
+
+O offset de um canal é o número de segundos a somar aos seus timestamps para alinhá-lo
+com a referência (equivalente ao -itsoffset do ffmpeg): positivo quando o canal começou a
+gravar depois da referência.
+"""
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from ..utils import media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+# Taxa da decodificação (o ffmpeg aplica o filtro anti-aliasing ao reduzir)
+DECODE_RATE = 8000
+
+# Amostras de envelope por segundo (resolução de 5 ms antes da interpolação)
+ENVELOPE_RATE = 200
+
+# Maior deslocamento procurado entre canais (s)
+MAX_OFFSET = 10.0
+
+# Abaixo desta correlação normalizada o offset estimado não é aplicado
+MIN_CONFIDENCE = 0.2
+
+REFERENCE_CHANNEL = 'microphone'
+
+
+def decode_envelope(file_path: Path, envelope_rate: int = ENVELOPE_RATE):
+    """
+    Decodifica o primeiro stream de áudio e retorna o envelope de amplitude
+
+    Returns:
+        np.ndarray: Envelope float32 com envelope_rate amostras por segundo
+    """
+    import numpy as np
+
+    cmd = ['ffmpeg', '-v', 'error', '-i', str(file_path), '-map', '0:a:0', '-ac', '1',
+           '-ar', str(DECODE_RATE), '-f', 's16le', '-']
+    with tracing.span("ffmpeg:decode_envelope", category="ffmpeg", path=str(file_path)) as sp:
+        result = media_executor.run(cmd)
+        sp.bytes_out = len(result.stdout)
+
+    samples = np.frombuffer(result.stdout, dtype='<i2').astype(np.float32)
+    block = DECODE_RATE // envelope_rate
+    usable = len(samples) - len(samples) % block
+    return np.abs(samples[:usable]).reshape(-1, block).mean(axis=1)
+
+
+def estimate_offset(reference, signal, envelope_rate: int = ENVELOPE_RATE,
+                    max_offset: float = MAX_OFFSET) -> Tuple[float, float]:
+    """
+    Estima o deslocamento de `signal` em relação a `reference` por correlação via FFT
+
+    Args:
+        reference: Envelope do canal de referência
+        signal: Envelope do canal a alinhar
+        envelope_rate: Amostras por segundo dos envelopes
+        max_offset: Maior deslocamento considerado (s)
+
+    Returns:
+        Tuple[float, float]: Offset em segundos (a somar aos timestamps de `signal`) e a
+            correlação normalizada no pico (0 a 1)
+    """
+    import numpy as np
+
+    with tracing.span("sync:estimate_offset", category="sync", samples=len(reference) + len(signal)):
+        a = (reference - reference.mean()) / (reference.std() or 1.0)
+        b = (signal - signal.mean()) / (signal.std() or 1.0)
+
+        size = 1 << int(len(a) + len(b) - 1).bit_length()
+        # corr[k] = sum_t a[t + k] * b[t]: o evento em b[t] aparece em a[t + k]
+        corr = np.fft.irfft(np.fft.rfft(a, size) * np.conj(np.fft.rfft(b, size)), size)
+
+        max_lag = min(int(max_offset * envelope_rate), size // 2 - 1)
+        lags = np.concatenate([corr[:max_lag + 1], corr[size - max_lag:]])
+        lag_values = np.concatenate([np.arange(max_lag + 1), np.arange(-max_lag, 0)])
+        peak = int(np.argmax(lags))
+        lag = float(lag_values[peak])
+
+        # Interpolação parabólica em torno do pico para resolução abaixo de uma amostra
+        if 0 < peak < len(lags) - 1 and lag_values[peak - 1] == lag - 1 and lag_values[peak + 1] == lag + 1:
+            left, center, right = lags[peak - 1], lags[peak], lags[peak + 1]
+            denominator = left - 2 * center + right
+            if denominator:
+                # float(): com NumPy 2 o resultado seria np.float32, que não vai para JSON
+                lag += float(0.5 * (left - right) / denominator)
+
+        overlap = min(len(a), len(b))
+        confidence = float(lags[peak] / overlap) if overlap else 0.0
+    return float(lag) / envelope_rate, max(0.0, min(1.0, confidence))
+
+
+def estimate_channel_offsets(channels: Dict[str, Path], has_audio: Dict[str, bool],
+                             max_offset: float = MAX_OFFSET) -> Dict[str, dict]:
+    """
+    Estima o offset de cada canal com áudio em relação ao microfone
+
+    Args:
+        channels: Canal -> arquivo
+        has_audio: Canal -> se o arquivo tem stream de áudio
+        max_offset: Maior deslocamento considerado (s)
+
+    Returns:
+        Dict[str, dict]: Canal -> {'offset': s, 'confidence': 0-1, 'applied': bool}; canais
+            sem áudio não aparecem e são tratados como alinhados à referência
+    """
+    if REFERENCE_CHANNEL not in channels or not has_audio.get(REFERENCE_CHANNEL):
+        logger.info("Sem canal de microfone com áudio; sincronização ignorada")
+        return {}
+
+    reference = decode_envelope(channels[REFERENCE_CHANNEL])
+    offsets = {REFERENCE_CHANNEL: {'offset': 0.0, 'confidence': 1.0, 'applied': False}}
+    for channel, path in channels.items():
+        if channel == REFERENCE_CHANNEL or not has_audio.get(channel):
+            continue
+        try:
+            offset, confidence = estimate_offset(reference, decode_envelope(path), max_offset=max_offset)
+        except media_executor.MediaError as e:
+            logger.warning(f"Não foi possível decodificar o áudio de {path.name}: {e}")
+            continue
+        applied = confidence >= MIN_CONFIDENCE and abs(offset) >= 1 / ENVELOPE_RATE
+        offsets[channel] = {'offset': round(float(offset), 4), 'confidence': round(float(confidence), 3),
+                             'applied': bool(applied)}
+        logger.info(f"Offset de {channel}: {offset * 1000:+.1f} ms (correlação {confidence:.2f})")
+    return offsets
+
+
+def applied_offsets(offsets: Optional[Dict[str, dict]]) -> Dict[str, float]:
+    """Canal -> offset (s) apenas para os offsets confiáveis"""
+    return {channel: info['offset'] for channel, info in (offsets or {}).items() if info.get('applied')}
+
+
+def video_sync_filter(offset: float) -> str:
+    """Filtro de vídeo que desloca o canal no tempo (atraso com o primeiro quadro, ou corte do início)"""
+    if offset > 0:
+        return f"tpad=start_duration={offset:.4f}:start_mode=clone,"
+    if offset < 0:
+        return f"trim=start={-offset:.4f},setpts=PTS-STARTPTS,"
+    return ''
+
+
+def audio_sync_filter(offset: float) -> str:
+    """Filtro de áudio que desloca o canal no tempo (silêncio no início, ou corte do início)"""
+    if offset > 0:
+        return f"adelay={int(round(offset * 1000))}:all=1,"
+    if offset < 0:
+        return f"atrim=start={-offset:.4f},asetpts=PTS-STARTPTS,"
+    return ''
@@ -0,0 +1,263 @@
+"""Candidatas a thumbnail extraídas dos keyframes da tela e da webcam
+
+Só os keyframes são decodificados (`-skip_frame nokey`): o ffmpeg descarta os demais quadros
+sem decodificá-los, então uma gravação de uma hora com um keyframe a cada poucos segundos vira
+algumas centenas de quadros. Os instantes dos keyframes vêm dos pacotes (veja
+jump_cut.probe_keyframes) e os keyframes de cada canal são divididos em trechos decodificados em
+paralelo pelo MediaExecutor, já reduzidos a ANALYSIS_WIDTH pixels de largura.
+
+Cada trecho é pontuado em lote com NumPy: nitidez (variância do laplaciano), brilho (distância
+de um meio-tom) e colorido (métrica de Hasler e Süsstrunk). As melhores candidatas, com um
+intervalo mínimo entre elas, são extraídas de novo em resolução de thumbnail.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .jump_cut import probe_keyframes
+from .scenes import format_timestamp
+from .video_processor import CHANNEL_FILES
+from ..utils import file_utils, media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+# Canais de onde saem as candidatas
+THUMBNAIL_CHANNELS = ('display', 'webcam')
+
+# Largura dos quadros pontuados e das imagens geradas (YouTube recomenda 1280x720)
+ANALYSIS_WIDTH = 320
+OUTPUT_WIDTH = 1280
+
+# Keyframes por execução do ffmpeg e por lote pontuado (limitam a memória de cada trecho)
+MAX_RANGE_FRAMES = 240
+SCORE_BATCH = 32
+
+# Peso de cada métrica na pontuação final
+WEIGHTS = {'sharpness': 0.5, 'brightness': 0.2, 'colorfulness': 0.3}
+
+# Intervalo mínimo entre candidatas escolhidas (s), para não repetir a mesma cena
+MIN_GAP = 20.0
+
+
+@dataclass
+class Candidate:
+    """Keyframe pontuado"""
+    channel: str
+    time: float
+    sharpness: float
+    brightness: float
+    colorfulness: float
+    score: float = 0.0
+    path: Optional[str] = None
+
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.time)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), 'timestamp': self.timestamp}
+
+
+def score_frames(frames):
+    """
+    Métricas de um lote de quadros RGB
+
+    Args:
+        frames: Matriz uint8 (quadros x altura x largura x 3)
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Variância do laplaciano, brilho médio (0 a 1)
+            e colorido de cada quadro
+    """
+    import numpy as np
+
+    rgb = frames.astype(np.float32)
+    red, green, blue = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    gray = 0.299 * red + 0.587 * green + 0.114 * blue
+
+    # Laplaciano de 4 vizinhos só no interior, sem copiar bordas
+    laplacian = (4 * gray[:, 1:-1, 1:-1] - gray[:, :-2, 1:-1] - gray[:, 2:, 1:-1]
+                 - gray[:, 1:-1, :-2] - gray[:, 1:-1, 2:])
+    sharpness = laplacian.reshape(len(frames), -1).var(axis=1)
+
+    brightness = gray.reshape(len(frames), -1).mean(axis=1) / 255
+
+    rg = (red - green).reshape(len(frames), -1)
+    yb = (0.5 * (red + green) - blue).reshape(len(frames), -1)
+    colorfulness = (np.sqrt(rg.std(axis=1) ** 2 + yb.std(axis=1) ** 2)
+                    + 0.3 * np.sqrt(rg.mean(axis=1) ** 2 + yb.mean(axis=1) ** 2))
+    return sharpness, brightness, colorfulness
+
+
+def rank(candidates: List[Candidate]) -> List[Candidate]:
+    """
+    Calcula a pontuação final e ordena as candidatas, da melhor para a pior
+
+    Nitidez e colorido são normalizados pelo maior valor entre todas as candidatas (a nitidez em
+    escala logarítmica); o brilho vale 1 em meio-tom e 0 em preto ou branco.
+    """
+    import numpy as np
+
+    if not candidates:
+        return []
+    sharpness = np.log1p([c.sharpness for c in candidates])
+    colorfulness = np.array([c.colorfulness for c in candidates])
+    brightness = 1 - 2 * np.abs(np.array([c.brightness for c in candidates]) - 0.5)
+    scores = (WEIGHTS['sharpness'] * sharpness / (sharpness.max() or 1)
+              + WEIGHTS['brightness'] * brightness
+              + WEIGHTS['colorfulness'] * colorfulness / (colorfulness.max() or 1))
+    for candidate, score in zip(candidates, scores):
+        candidate.score = round(float(score), 4)
+    return sorted(candidates, key=lambda c: -c.score)
+
+
+def pick(candidates: List[Candidate], count: int, min_gap: float = MIN_GAP) -> List[Candidate]:
+    """Melhores candidatas já ordenadas, com pelo menos min_gap segundos entre as do mesmo canal"""
+    chosen = []
+    for candidate in candidates:
+        if len(chosen) >= count:
+            break
+        if all(other.channel != candidate.channel or abs(other.time - candidate.time) >= min_gap
+               for other in chosen):
+            chosen.append(candidate)
+    return chosen
+
+
+async def _score_range(video: Path, channel: str, times: List[float], end: Optional[float],
+                       width: int, height: int) -> List[Candidate]:
+    """Decodifica os keyframes de um trecho e os pontua"""
+    import numpy as np
+
+    # As margens garantem que o keyframe inicial entra e o seguinte ao trecho fica de fora
+    start = max(0.0, times[0] - 0.001)
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-skip_frame', 'nokey', '-ss', f"{start:.3f}",
+           '-i', str(video)]
+    if end is not None:
+        cmd += ['-t', f"{end - 0.001 - start:.3f}"]
+    cmd += ['-map', '0:v:0', '-an', '-sn', '-fps_mode', 'passthrough',
+            '-vf', f"scale={width}:{height}:flags=area,format=rgb24", '-f', 'rawvideo', 'pipe:1']
+
+    frame_size = width * height * 3
+    with tracing.span("ffmpeg:thumbnail_keyframes", category="ffmpeg", path=str(video), frames=len(times)) as sp:
+        result = await media_executor.get_executor().run(
+            cmd, memory=media_executor.video_memory(width, height) + len(times) * frame_size)
+        sp.bytes_out = len(result.stdout)
+
+    count = min(len(result.stdout) // frame_size, len(times))
+    if not count:
+        return []
+    frames = np.frombuffer(result.stdout, dtype=np.uint8, count=count * frame_size).reshape(count, height, width, 3)
+    # Só as métricas saem daqui, não os quadros
+    candidates = []
+    for index in range(0, count, SCORE_BATCH):
+        metrics = score_frames(frames[index:index + SCORE_BATCH])
+        candidates.extend(Candidate(channel, round(time, 3), round(float(s), 2), round(float(b), 4),
+                                    round(float(c), 2))
+                          for time, s, b, c in zip(times[index:index + SCORE_BATCH], *metrics))
+    return candidates
+
+
+@tracing.traced("thumbnails:candidates", category="thumbnails")
+async def score_keyframes_async(video: Path, channel: str, jobs: Optional[int] = None) -> List[Candidate]:
+    """
+    Pontua todos os keyframes de um vídeo
+
+    Args:
+        video: Arquivo de vídeo
+        channel: Nome do canal (vai para as candidatas)
+        jobs: Trechos decodificados ao mesmo tempo (padrão: o limite do MediaExecutor)
+
+    Returns:
+        List[Candidate]: Uma candidata por keyframe, sem pontuação final (veja rank)
+    """
+    loop = asyncio.get_running_loop()
+    executor = media_executor.get_executor()
+    info = await executor.probe(video)
+    stream = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), None)
+    if not stream:
+        raise ValueError(f"Sem stream de vídeo em {video}")
+    width = ANALYSIS_WIDTH
+    height = max(2, int(round(width * stream['height'] / stream['width'] / 2)) * 2)
+
+    keyframes = await loop.run_in_executor(None, probe_keyframes, video)
+    if not keyframes:
+        return []
+    parts = max(jobs or executor.max_jobs, -(-len(keyframes) // MAX_RANGE_FRAMES))
+    size = -(-len(keyframes) // parts)
+    chunks = [keyframes[index:index + size] for index in range(0, len(keyframes), size)]
+    logger.info(f"{video.name}: {len(keyframes)} keyframes em {len(chunks)} trechos")
+
+    results = await asyncio.gather(*(
+        _score_range(video, channel, chunk, chunks[index + 1][0] if index + 1 < len(chunks) else None,
+                     width, height)
+        for index, chunk in enumerate(chunks)
+    ))
+    return [candidate for chunk in results for candidate in chunk]
+
+
+async def _extract(video: Path, time: float, output: Path, width: int):
+    """Extrai um quadro em resolução de thumbnail (busca direto no keyframe)"""
+    with file_utils.atomic_path(output) as temp_path:
+        cmd = ['ffmpeg', '-y', '-v', 'error', '-nostdin', '-ss', f"{time:.3f}", '-i', str(video),
+               '-frames:v', '1', '-vf', f"scale='min({width},iw)':-2", '-c:v', 'mjpeg', '-q:v', '2',
+               '-f', 'image2',
+               str(temp_path)]
+        await media_executor.get_executor().run(cmd)
+
+
+def channel_videos(source: Path) -> Dict[str, Path]:
+    """Canais de vídeo de uma gravação do ScreenStudio, ou o próprio arquivo como 'video'"""
+    if source.is_file():
+        return {'video': source}
+    from .organizer import find_recording_path
+
+    _, recording_path = find_recording_path(source)
+    videos = {}
+    for channel in THUMBNAIL_CHANNELS:
+        for name in CHANNEL_FILES[channel]:
+            if (recording_path / name).exists():
+                videos[channel] = recording_path / name
+                break
+    if not videos:
+        raise FileNotFoundError(f"Nenhum canal de vídeo encontrado em {recording_path}")
+    return videos
+
+
+@tracing.traced("thumbnails:extract", category="thumbnails")
+async def extract_thumbnails_async(source: Path, output_dir: Path, count: int = 5, jobs: Optional[int] = None,
+                                   width: int = OUTPUT_WIDTH, min_gap: float = MIN_GAP) -> List[Candidate]:
+    """
+    Escolhe e salva as melhores candidatas a thumbnail
+
+    Args:
+        source: Gravação do ScreenStudio (tela e webcam) ou arquivo de vídeo
+        output_dir: Pasta das imagens e do thumbnails.json
+        count: Número de imagens
+        jobs: Trechos decodificados ao mesmo tempo por canal
+        width: Largura máxima das imagens
+        min_gap: Intervalo mínimo entre candidatas do mesmo canal (s)
+
+    Returns:
+        List[Candidate]: Candidatas salvas, da melhor para a pior, com o caminho da imagem
+    """
+    videos = channel_videos(source)
+    per_channel = await asyncio.gather(*(score_keyframes_async(video, channel, jobs)
+                                         for channel, video in videos.items()))
+    candidates = rank([candidate for chunk in per_channel for candidate in chunk])
+    chosen = pick(candidates, count, min_gap)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for index, candidate in enumerate(chosen, 1):
+        name = f"thumb-{index:02d}-{candidate.channel}-{candidate.timestamp.replace(':', '-')}.jpg"
+        candidate.path = str(output_dir / name)
+    await asyncio.gather(*(_extract(videos[c.channel], c.time, Path(c.path), width) for c in chosen))
+
+    file_utils.save_json({
+        'source': str(source),
+        'candidates': len(candidates),
+        'thumbnails': [candidate.to_dict() for candidate in chosen],
+    }, output_dir / 'thumbnails.json')
+    logger.info(f"{len(chosen)} thumbnails de {len(candidates)} keyframes salvas em {output_dir}")
+    return chosen
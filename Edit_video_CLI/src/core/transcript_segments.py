@@ -0,0 +1,471 @@
+"""Transcrição por trechos com cache por impressão digital do áudio
+
+Em vez de mandar o áudio inteiro ao Gemini, a transcrição divide a fala em trechos nas pausas e
+guarda o texto de cada trecho num cache (SQLite) indexado por uma impressão digital das amostras.
+Ao transcrever de novo uma versão editada do mesmo áudio (outro `remove-silence`, o começo
+cortado, outro encode), só os trechos sem correspondência no cache são enviados.
+
+Para que os cortes caiam nos mesmos pontos nas duas versões, eles dependem só do conteúdo em
+volta de cada pausa, nunca da posição no arquivo:
+
+- as pausas candidatas são as de pelo menos MIN_GAP segundos, curtas o bastante para sobreviver
+  ao `remove-silence` (que deixa um pouco de silêncio em cada corte)
+- cada pausa recebe uma nota, o salto de volume entre a fala antes e depois dela
+- uma pausa vira corte quando tem a maior nota a até CUT_WINDOW segundos de fala de distância
+  (o tempo conta só a fala, então encurtar as pausas não muda a janela)
+
+A impressão digital de um trecho é o contorno espectral da fala: energia em bandas log-espaçadas
+de 250 a 3400 Hz em quadros de 16 ms, só nos quadros com fala, sem a média de cada quadro (volume)
+nem a média de cada banda (equalização), mais o volume de cada quadro (sem o volume médio). Dois
+trechos correspondem quando têm quase a mesma duração de fala e, em blocos de ~1 s, tanto o
+contorno espectral quanto o volume no melhor alinhamento (com uma pequena folga) têm correlação
+acima de MATCH_SIMILARITY. Fala sintética sem relação chega a ~0.6 só no contorno espectral; o
+volume, que segue o ritmo das sílabas, separa os dois casos.
+"""
+import os
+import time
+import asyncio
+import logging
+import sqlite3
+import contextlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ..utils import media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+BUSY_TIMEOUT = 30.0
+
+# Amostras analisadas (mono, Hz); as bandas vão até 3400 Hz
+ANALYSIS_RATE = 8000
+
+# Níveis de 4 ms, suavizados em 40 ms, para achar as pausas
+LEVEL_HOP = 32
+LEVEL_SMOOTH = 10
+
+# Abaixo do volume da fala (percentil 95) menos QUIET_DB, ou de FLOOR_DB, é silêncio (dB)
+QUIET_DB = 30.0
+FLOOR_DB = -55.0
+
+# Pausa mínima para um corte, janela de fala em volta de cada corte e fala usada na nota (s)
+MIN_GAP = 0.15
+CUT_WINDOW = 20.0
+CUT_CONTEXT = 1.0
+
+# Trechos com menos fala que isso se juntam ao anterior; trechos mais longos são divididos (s)
+MIN_SEGMENT = 5.0
+MAX_SEGMENT = 180.0
+
+# Impressão digital: janela da FFT, passo, quadros somados e bandas
+FFT_WINDOW = 256
+FFT_HOP = 32
+FRAME_POOL = 4
+BANDS = 16
+BAND_EDGES = (250.0, 3400.0)
+FEATURE_SCALE = 4.0  # passos por dB no int8
+FEATURES = BANDS + 1  # bandas e o volume do quadro
+
+# Comparação: quadros por bloco, folga de alinhamento, diferença de duração e similaridade mínima
+MATCH_BLOCK = 64
+MATCH_DRIFT = 12
+LENGTH_TOLERANCE = 0.06
+MATCH_SIMILARITY = 0.8
+PROBE_BLOCKS = 3
+
+# Trechos enviados: MP3 mono de 16 kHz (a taxa usada pelo Gemini) e envios simultâneos
+UPLOAD_RATE = 16000
+UPLOAD_BITRATE = '48k'
+UPLOAD_JOBS = 4
+
+# Formato das impressões digitais no cache; um cache de outro formato é descartado
+CACHE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    model TEXT NOT NULL,
+    frames INTEGER NOT NULL,
+    fingerprint BLOB NOT NULL,
+    text TEXT NOT NULL,
+    duration REAL NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_lookup ON segments (model, frames);
+"""
+
+
+def default_path() -> Path:
+    """Banco padrão: EDIT_VIDEO_TRANSCRIPT_CACHE ou ~/.cache/edit-video/transcripts.db"""
+    path = os.environ.get('EDIT_VIDEO_TRANSCRIPT_CACHE')
+    return Path(path) if path else Path.home() / '.cache' / 'edit-video' / 'transcripts.db'
+
+
+@dataclass
+class Segment:
+    """Trecho do áudio e o resultado da transcrição"""
+    start: float
+    end: float
+    speech: float = 0.0
+    text: str = ''
+    cached: bool = False
+    uploaded_bytes: int = 0
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class SegmentedTranscript:
+    """Texto completo e o que foi reaproveitado"""
+    text: str
+    segments: List[Segment]
+
+    @property
+    def reused(self) -> int:
+        return sum(1 for segment in self.segments if segment.cached)
+
+    @property
+    def uploaded_bytes(self) -> int:
+        return sum(segment.uploaded_bytes for segment in self.segments)
+
+    @property
+    def reused_seconds(self) -> float:
+        return sum(segment.duration for segment in self.segments if segment.cached)
+
+
+def _levels(samples):
+    """Nível (dB) de cada passo de LEVEL_HOP amostras, suavizado"""
+    import numpy as np
+
+    count = len(samples) // LEVEL_HOP
+    frames = samples[:count * LEVEL_HOP].reshape(count, LEVEL_HOP)
+    power = np.einsum('ij,ij->i', frames, frames) / LEVEL_HOP
+    if count >= LEVEL_SMOOTH:
+        power = np.convolve(power, np.ones(LEVEL_SMOOTH) / LEVEL_SMOOTH, mode='same')
+    return power, 10 * np.log10(np.maximum(power, 1e-12))
+
+
+def _quiet(levels):
+    """Passos em silêncio, relativos ao volume da fala"""
+    import numpy as np
+
+    if not len(levels):
+        return np.zeros(0, dtype=bool)
+    return levels < max(float(np.percentile(levels, 95)) - QUIET_DB, FLOOR_DB)
+
+
+def split_segments(samples, rate: int = ANALYSIS_RATE) -> List[Segment]:
+    """
+    Divide o áudio nas pausas escolhidas pelo conteúdo (veja a descrição do módulo)
+
+    Args:
+        samples: Amostras mono float32
+        rate: Taxa de amostragem
+
+    Returns:
+        List[Segment]: Trechos contíguos que cobrem o áudio inteiro
+    """
+    import numpy as np
+
+    power, levels = _levels(samples)
+    if not len(levels):
+        return [Segment(0.0, len(samples) / rate)] if len(samples) else []
+    quiet = _quiet(levels)
+    step = LEVEL_HOP / rate
+
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], quiet.astype(np.int8), [0]])))
+    starts, ends = edges[0::2], edges[1::2]
+    # Só pausas entre falas, não o silêncio do começo e do fim
+    keep = ((ends - starts) * step >= MIN_GAP) & (starts > 0) & (ends < len(levels))
+    starts, ends = starts[keep], ends[keep]
+
+    # Fala (em passos) antes de cada passo, e a potência acumulada só da fala
+    spoken = np.concatenate([[0], np.cumsum(~quiet)])
+    speech_power = np.concatenate([[0.0], np.cumsum(power[~quiet])])
+    position = spoken[starts]
+    context = int(CUT_CONTEXT / step)
+    low = np.maximum(position - context, 0)
+    high = np.minimum(position + context, len(speech_power) - 1)
+    before = (speech_power[position] - speech_power[low]) / np.maximum(position - low, 1)
+    after = (speech_power[high] - speech_power[position]) / np.maximum(high - position, 1)
+    scores = 10 * np.log10(np.maximum(after, 1e-12) / np.maximum(before, 1e-12))
+
+    # Corte onde a nota é a maior da janela (empate: a primeira pausa)
+    window = CUT_WINDOW / step
+    first = np.searchsorted(position, position - window, side='left')
+    last = np.searchsorted(position, position + window, side='right')
+    cuts = [index for index in range(len(starts))
+            if first[index] + int(np.argmax(scores[first[index]:last[index]])) == index]
+
+    gap_middles = (starts + ends) // 2
+    bounds = [0] + [int(gap_middles[index]) for index in cuts] + [len(levels)]
+    # Trechos longos demais (quase sem pausas fortes) são divididos na melhor pausa interna
+    index = 0
+    while index < len(bounds) - 1:
+        if (bounds[index + 1] - bounds[index]) * step > MAX_SEGMENT:
+            inside = np.flatnonzero((gap_middles > bounds[index]) & (gap_middles < bounds[index + 1]))
+            split = (gap_middles[inside[np.argmax(scores[inside])]] if len(inside)
+                     else (bounds[index] + bounds[index + 1]) // 2)
+            bounds.insert(index + 1, int(split))
+            continue
+        index += 1
+
+    segments = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        speech = float(spoken[end] - spoken[start]) * step
+        if segments and (speech < MIN_SEGMENT or segments[-1].speech < MIN_SEGMENT):
+            segments[-1].end = end * step
+            segments[-1].speech += speech
+            continue
+        segments.append(Segment(start * step, end * step, speech))
+    segments[-1].end = max(segments[-1].end, len(samples) / rate)
+    return segments
+
+
+def audio_fingerprint(samples, rate: int = ANALYSIS_RATE):
+    """
+    Impressão digital de um trecho: contorno espectral e volume (int8, quadros com fala x FEATURES)
+
+    Args:
+        samples: Amostras mono float32 do trecho
+        rate: Taxa de amostragem
+
+    Returns:
+        np.ndarray: Matriz int8 em passos de 1/FEATURE_SCALE dB
+    """
+    import numpy as np
+
+    count = (len(samples) - FFT_WINDOW) // FFT_HOP + 1
+    count -= count % FRAME_POOL
+    if count < FRAME_POOL:
+        return np.zeros((0, FEATURES), dtype=np.int8)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FFT_WINDOW)[::FFT_HOP][:count]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FFT_WINDOW).astype(np.float32), axis=1)) ** 2
+    bins = np.searchsorted(np.fft.rfftfreq(FFT_WINDOW, 1 / rate), np.geomspace(*BAND_EDGES, BANDS + 1))
+    cumulative = np.concatenate([np.zeros((count, 1), dtype=spectrum.dtype), np.cumsum(spectrum, axis=1)], axis=1)
+    bands = (cumulative[:, bins[1:]] - cumulative[:, bins[:-1]])
+    bands = bands.reshape(count // FRAME_POOL, FRAME_POOL, BANDS).mean(axis=1)
+
+    level = 10 * np.log10(bands.sum(axis=1) + 1e-12)
+    voiced = level >= max(float(np.percentile(level, 95)) - QUIET_DB, FLOOR_DB)
+    features = 10 * np.log10(bands[voiced] + 1e-12)
+    if not len(features):
+        return np.zeros((0, FEATURES), dtype=np.int8)
+    features -= features.mean(axis=1, keepdims=True)
+    features -= features.mean(axis=0, keepdims=True)
+    loudness = level[voiced] - level[voiced].mean()
+    features = np.column_stack([features, loudness])
+    return np.clip(np.round(features * FEATURE_SCALE), -127, 127).astype(np.int8)
+
+
+def _correlation(first, second) -> float:
+    import numpy as np
+
+    first = first - first.mean()
+    second = second - second.mean()
+    return float(first @ second / max(float(np.linalg.norm(first) * np.linalg.norm(second)), 1e-9))
+
+
+def _block_similarity(block, region) -> Tuple[float, float]:
+    """
+    Compara um bloco com as janelas do mesmo tamanho de uma região
+
+    Returns:
+        Tuple[float, float]: Maior correlação do contorno espectral e, na mesma janela, a
+            correlação do volume
+    """
+    import numpy as np
+
+    windows = np.lib.stride_tricks.sliding_window_view(region[:, :BANDS], len(block), axis=0)
+    windows = windows.reshape(len(windows), -1)
+    windows = windows - windows.mean(axis=1, keepdims=True)
+    target = block[:, :BANDS].T.ravel()
+    target = target - target.mean()
+    norms = np.linalg.norm(windows, axis=1) * np.linalg.norm(target)
+    scores = windows @ target / np.maximum(norms, 1e-9)
+    best = int(np.argmax(scores))
+    return float(scores[best]), _correlation(block[:, BANDS], region[best:best + len(block), BANDS])
+
+
+def similarity(first, second) -> float:
+    """
+    Semelhança (-1 a 1) entre duas impressões digitais
+
+    Cada bloco de MATCH_BLOCK quadros da primeira é procurado na posição proporcional da segunda,
+    com MATCH_DRIFT quadros de folga, e vale a menor das correlações do bloco (contorno espectral
+    e volume); o resultado é a mediana dos blocos. Durações de fala muito diferentes dão -1 direto.
+    """
+    import numpy as np
+
+    if not len(first) or not len(second):
+        return -1.0
+    if abs(len(first) - len(second)) > LENGTH_TOLERANCE * max(len(first), len(second)):
+        return -1.0
+    first = first.astype(np.float32)
+    second = second.astype(np.float32)
+    block = min(MATCH_BLOCK, len(first), len(second))
+    scale = len(second) / len(first)
+
+    def block_at(offset):
+        center = int(round(offset * scale))
+        low = max(0, min(center - MATCH_DRIFT, len(second) - block))
+        high = min(len(second), center + MATCH_DRIFT + block)
+        return min(_block_similarity(first[offset:offset + block], second[low:max(high, low + block)]))
+
+    offsets = np.arange(0, len(first) - block + 1, block)
+    # Alguns blocos espalhados primeiro: trechos diferentes saem sem comparar o resto
+    probe = offsets[np.linspace(0, len(offsets) - 1, min(PROBE_BLOCKS, len(offsets))).astype(int)]
+    scores = [block_at(offset) for offset in probe]
+    if max(scores) < MATCH_SIMILARITY:
+        return float(np.median(scores))
+    scores += [block_at(offset) for offset in offsets if offset not in probe]
+    return float(np.median(scores))
+
+
+class SegmentCache:
+    """Textos já transcritos por impressão digital; seguro entre threads e processos"""
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            if db.execute('PRAGMA user_version').fetchone()[0] != CACHE_VERSION:
+                db.execute('DROP TABLE IF EXISTS segments')
+                db.execute(f'PRAGMA user_version = {CACHE_VERSION}')
+            db.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            yield db
+        finally:
+            db.close()
+
+    def lookup(self, fingerprint, model: str) -> Optional[str]:
+        """Texto do trecho mais parecido do mesmo modelo, se algum passar de MATCH_SIMILARITY"""
+        import numpy as np
+
+        if not len(fingerprint):
+            return None
+        low = int(len(fingerprint) * (1 - LENGTH_TOLERANCE))
+        high = int(len(fingerprint) / (1 - LENGTH_TOLERANCE)) + 1
+        with self._connect() as db:
+            rows = db.execute("SELECT id, fingerprint, text FROM segments WHERE model = ? AND frames BETWEEN ? AND ?"
+                              " ORDER BY abs(frames - ?)", (model, low, high, len(fingerprint))).fetchall()
+        best, best_row = MATCH_SIMILARITY, None
+        for row in rows:
+            other = np.frombuffer(row['fingerprint'], dtype=np.int8).reshape(-1, FEATURES)
+            score = similarity(fingerprint, other)
+            if score >= best:
+                best, best_row = score, row
+        if best_row is None:
+            return None
+        with self._connect() as db:
+            db.execute("UPDATE segments SET used_at = ? WHERE id = ?", (time.time(), best_row['id']))
+        return best_row['text']
+
+    def store(self, fingerprint, model: str, text: str, duration: float):
+        """Guarda o texto de um trecho"""
+        if not len(fingerprint):
+            return
+        now = time.time()
+        with self._connect() as db:
+            db.execute("INSERT INTO segments (model, frames, fingerprint, text, duration, created_at, used_at)"
+                       " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (model, len(fingerprint), fingerprint.tobytes(), text, duration, now, now))
+
+    def count(self) -> int:
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+
+async def decode_samples(media: Path, rate: int = ANALYSIS_RATE):
+    """Áudio inteiro em mono float32 na taxa de análise"""
+    import numpy as np
+
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-i', str(media), '-map', '0:a:0', '-ac', '1',
+           '-ar', str(rate), '-f', 's16le', 'pipe:1']
+    with tracing.span("ffmpeg:decode_segments", category="ffmpeg", path=str(media)) as sp:
+        info = await media_executor.get_executor().probe(media)
+        duration = float(info.get('format', {}).get('duration') or 0)
+        result = await media_executor.get_executor().run(
+            cmd, memory=media_executor.DEFAULT_MEMORY + int(duration * rate) * 6)
+        sp.bytes_out = len(result.stdout)
+    samples = np.frombuffer(result.stdout, dtype='<i2', count=len(result.stdout) // 2)
+    return samples.astype(np.float32) / 32768
+
+
+async def encode_segment(media: Path, segment: Segment) -> bytes:
+    """Trecho em MP3 mono de 16 kHz, pronto para o envio"""
+    cmd = ['ffmpeg', '-v', 'error', '-nostdin', '-ss', f"{segment.start:.3f}", '-t', f"{segment.duration:.3f}",
+           '-i', str(media), '-map', '0:a:0', '-ac', '1', '-ar', str(UPLOAD_RATE),
+           '-c:a', 'libmp3lame', '-b:a', UPLOAD_BITRATE, '-f', 'mp3', 'pipe:1']
+    with tracing.span("ffmpeg:encode_segment", category="ffmpeg", path=str(media), start=segment.start) as sp:
+        result = await media_executor.get_executor().run(cmd)
+        sp.bytes_out = len(result.stdout)
+    return result.stdout
+
+
+@tracing.traced("transcription:segments", category="transcription")
+async def transcribe_segments_async(media: Path, llm_client, cache: Optional[SegmentCache] = None,
+                                    jobs: int = UPLOAD_JOBS) -> SegmentedTranscript:
+    """
+    Transcreve um áudio por trechos, reaproveitando o texto dos trechos já vistos
+
+    Os trechos novos vão para o cache assim que voltam, então uma transcrição interrompida
+    continua de onde parou. O texto é guardado sob o modelo que de fato respondeu (um modelo
+    alternativo ou o da requisição duplicada), e só é reaproveitado para o mesmo modelo.
+
+    Args:
+        media: Arquivo de áudio
+        llm_client: Cliente com transcribe_audio_data (GeminiClient)
+        cache: Cache dos trechos (padrão: default_path())
+        jobs: Trechos enviados ao mesmo tempo
+
+    Returns:
+        SegmentedTranscript: Texto e trechos
+    """
+    loop = asyncio.get_running_loop()
+    cache = cache or SegmentCache()
+    model = llm_client.model.strip()
+
+    samples = await decode_samples(media)
+    segments = await loop.run_in_executor(None, split_segments, samples)
+    limit = asyncio.Semaphore(jobs)
+
+    async def process(segment: Segment):
+        piece = samples[int(segment.start * ANALYSIS_RATE):int(segment.end * ANALYSIS_RATE)]
+        fingerprint = await loop.run_in_executor(None, audio_fingerprint, piece)
+        text = await loop.run_in_executor(None, cache.lookup, fingerprint, model)
+        if text is not None:
+            segment.text, segment.cached = text, True
+            return
+        if not len(fingerprint):
+            return  # Trecho sem fala
+        async with limit:
+            data = await encode_segment(media, segment)
+            segment.uploaded_bytes = len(data)
+            text, answered_by = await llm_client.transcribe_audio_data(
+                data, f"{media.name} @ {segment.start:.1f}s", model=model)
+        if not text:
+            raise ValueError(f"Não foi possível transcrever o trecho em {segment.start:.1f}s de {media}")
+        segment.text = text.strip()
+        await loop.run_in_executor(None, cache.store, fingerprint, answered_by.strip(), segment.text,
+                                   segment.duration)
+
+    with tracing.span("transcription:segments_process", category="transcription", segments=len(segments)):
+        await asyncio.gather(*(process(segment) for segment in segments))
+
+    result = SegmentedTranscript('\n\n'.join(s.text for s in segments if s.text), segments)
+    logger.info(f"{media.name}: {result.reused} de {len(segments)} trechos reaproveitados "
+                f"({result.reused_seconds:.0f}s); {result.uploaded_bytes / 1024:.0f} KB enviados")
+    return result
@@ -1,14 +1,17 @@
 """Módulo para transcrição de áudio"""
 import os
+from pathlib import Path
 from ..llm.factory import LLMFactory
 from ..llm.gemini import run_async
 
-def transcribe_audio(audio_file):
+async def transcribe_audio_async(audio_file, segmented=True):
     """
     Transcreve um arquivo de áudio usando serviços de IA
     
     Args:
         audio_file: Caminho para o arquivo de áudio
+        segmented: Transcrever por trechos, reaproveitando os trechos já transcritos (veja
+            core.transcript_segments); sem isso, o áudio inteiro vai em uma requisição
         
     Returns:
         str: Texto transcrito
@@ -28,9 +31,17 @@ def transcribe_audio(audio_file):
     llm_client = LLMFactory.create_llm(llm_provider, api_key)
     
     # Transcrever o áudio
-    transcription = run_async(llm_client.transcribe_audio(audio_file))
+    if segmented:
+        from .transcript_segments import transcribe_segments_async
+        transcription = (await transcribe_segments_async(Path(audio_file), llm_client)).text
+    else:
+        transcription = await llm_client.transcribe_audio(audio_file)
     
     if not transcription:
         raise ValueError("Não foi possível obter uma transcrição.")
         
-    return transcription 
\ No newline at end of file
+    return transcription 
+
+def transcribe_audio(audio_file, segmented=True):
+    """Versão síncrona de transcribe_audio_async"""
+    return run_async(transcribe_audio_async(audio_file, segmented))
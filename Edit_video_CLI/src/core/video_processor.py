@@ -0,0 +1,283 @@
+"""Composição dos canais de uma gravação do ScreenStudio em um único vídeo
+
+Toda a composição (escala da webcam, picture-in-picture e áudio do microfone) é feita
+por uma única invocação do ffmpeg com -filter_complex; nenhum quadro passa pelo Python.
+"""
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import sync
+from ..utils import file_utils, media_executor, tracing
+
+logger = logging.getLogger(__name__)
+
+# Nomes dos canais em um bundle do ScreenStudio (o primeiro que existir é usado)
+CHANNEL_FILES = {
+    'display': ['channel-1-display-0.mp4'],
+    'microphone': ['channel-2-microphone-0.m4a', 'channel-2-microphone-0.mp3'],
+    'webcam': ['channel-3-webcam-0.mp4'],
+}
+
+# Margem (px, na resolução de saída) entre o PiP e a borda
+PIP_MARGIN = 32
+
+PIP_POSITIONS = {
+    'top-left': (f'{PIP_MARGIN}', f'{PIP_MARGIN}'),
+    'top-right': (f'main_w-overlay_w-{PIP_MARGIN}', f'{PIP_MARGIN}'),
+    'bottom-left': (f'{PIP_MARGIN}', f'main_h-overlay_h-{PIP_MARGIN}'),
+    'bottom-right': (f'main_w-overlay_w-{PIP_MARGIN}', f'main_h-overlay_h-{PIP_MARGIN}'),
+    'center': ('(main_w-overlay_w)/2', '(main_h-overlay_h)/2'),
+}
+
+# Muxer do ffmpeg por extensão (a saída é escrita em um .part e renomeada)
+OUTPUT_FORMATS = {'.mp4': 'mp4', '.mov': 'mov', '.mkv': 'matroska', '.webm': 'webm'}
+
+# Altura da prévia reduzida
+PREVIEW_HEIGHT = 540
+
+
+@dataclass
+class RenderOptions:
+    """Parâmetros de codificação da composição"""
+    pip_webcam: bool = True
+    pip_position: str = 'bottom-right'
+    pip_scale: float = 0.25
+    preset: Optional[str] = None
+    crf: int = 23
+    threads: int = 0
+    preview: bool = False
+    audio_bitrate: str = '192k'
+    keep: Optional[List[Tuple[float, float]]] = None
+    offsets: Optional[Dict[str, float]] = None
+
+    @property
+    def effective_preset(self) -> str:
+        """Preset do libx264: ultrafast na prévia, veryfast (acima do tempo real em 4K) no resto"""
+        if self.preset:
+            return self.preset
+        return 'ultrafast' if self.preview else 'veryfast'
+
+
+def probe_media(file_path: Path) -> dict:
+    """
+    Obtém duração, resolução e presença de áudio de um arquivo com ffprobe
+
+    Returns:
+        dict: duration (s), width, height, video_codec (vazios se não houver vídeo) e has_audio
+    """
+    with tracing.span("ffprobe", category="ffmpeg", path=str(file_path)):
+        data = media_executor.probe(file_path)
+
+    info = {'duration': float(data['format'].get('duration', 0)), 'width': 0, 'height': 0,
+            'video_codec': '', 'has_audio': False}
+    for stream in data.get('streams', []):
+        if stream.get('codec_type') == 'video' and not info['width']:
+            info['width'] = stream.get('width', 0)
+            info['height'] = stream.get('height', 0)
+            info['video_codec'] = stream.get('codec_name', '')
+        elif stream.get('codec_type') == 'audio':
+            info['has_audio'] = True
+    return info
+
+
+def _even(value: float) -> int:
+    """Arredonda para o par mais próximo (exigido pelo yuv420p)"""
+    return max(2, int(round(value / 2)) * 2)
+
+
+def run_ffmpeg(cmd: List[str], duration: float,
+               on_progress: Optional[Callable[[float, float], None]] = None, memory: Optional[int] = None):
+    """
+    Executa o ffmpeg pelo MediaExecutor, lendo o progresso de -progress
+
+    Args:
+        cmd: Comando completo
+        duration: Duração esperada da saída (s), para o total do progresso
+        on_progress: Função opcional chamada com (segundos codificados, duração)
+        memory: Memória estimada do processo (bytes), para o orçamento do executor
+    """
+    def progress(job):
+        if on_progress:
+            on_progress(min(duration, job.out_time), duration)
+
+    media_executor.run(cmd, duration=duration, on_progress=progress, memory=memory)
+    if on_progress:
+        on_progress(duration, duration)
+
+
+class VideoProcessor:
+    def __init__(self, recording_path: Path):
+        self.recording_path = recording_path
+        self.channels: Dict[str, Path] = {}
+        self.media: Dict[str, dict] = {}
+        self.sync: Optional[Dict[str, dict]] = None
+
+    def _find_channel(self, names: List[str]) -> Optional[Path]:
+        # Os canais podem estar na raiz do bundle ou na pasta recording
+        for folder in (self.recording_path, self.recording_path / 'recording'):
+            for name in names:
+                if (folder / name).exists():
+                    return folder / name
+        return None
+
+    @tracing.traced("video:load_screenstudio_recording", category="video")
+    def load_screenstudio_recording(self) -> Dict[str, Path]:
+        """Localiza e inspeciona os canais da gravação"""
+        logger.info(f"Carregando gravação do ScreenStudio em {self.recording_path}")
+
+        if not self.recording_path.exists() or not self.recording_path.is_dir():
+            raise FileNotFoundError(f"Diretório de gravação não encontrado: {self.recording_path}")
+
+        for channel, names in CHANNEL_FILES.items():
+            path = self._find_channel(names)
+            if path:
+                self.channels[channel] = path
+                self.media[channel] = probe_media(path)
+
+        if 'display' not in self.channels:
+            raise FileNotFoundError(f"Canal de tela (channel-1-display-0.mp4) não encontrado em {self.recording_path}")
+
+        logger.info(f"Canais encontrados: {', '.join(self.channels)}")
+        return self.channels
+
+    def estimate_offsets(self) -> Dict[str, float]:
+        """
+        Estima o deslocamento de cada canal em relação ao microfone (veja core.sync)
+
+        Returns:
+            Dict[str, float]: Canal -> offset (s) para os offsets confiáveis
+        """
+        if not self.channels:
+            self.load_screenstudio_recording()
+        if self.sync is None:
+            has_audio = {channel: media['has_audio'] for channel, media in self.media.items()}
+            self.sync = sync.estimate_channel_offsets(self.channels, has_audio)
+        return sync.applied_offsets(self.sync)
+
+    def build_command(self, output_file: Path, options: RenderOptions) -> List[str]:
+        """
+        Monta o comando ffmpeg da composição
+
+        Args:
+            output_file: Arquivo de saída (o formato vem da extensão)
+            options: Parâmetros de composição e codificação
+
+        Returns:
+            List[str]: Argumentos do ffmpeg
+        """
+        if options.pip_position not in PIP_POSITIONS:
+            raise ValueError(f"Posição de PiP inválida: {options.pip_position}")
+        output_format = OUTPUT_FORMATS.get(output_file.suffix.lower())
+        if not output_format:
+            raise ValueError(f"Formato de saída não suportado: {output_file.suffix}")
+
+        display = self.media['display']
+        width, height = display['width'], display['height']
+        if options.preview and height > PREVIEW_HEIGHT:
+            width, height = _even(width * PREVIEW_HEIGHT / height), PREVIEW_HEIGHT
+
+        cmd = ['ffmpeg', '-y', '-hide_banner', '-nostats', '-progress', 'pipe:1',
+               '-threads', str(options.threads), '-i', str(self.channels['display'])]
+        inputs = {'display': 0}
+        for channel in ('webcam', 'microphone'):
+            if channel in self.channels and (channel != 'webcam' or options.pip_webcam):
+                inputs[channel] = len(inputs)
+                cmd += ['-threads', str(options.threads), '-i', str(self.channels[channel])]
+
+        # Cortes secos (jump cuts): o mesmo select em todos os canais mantém o alinhamento
+        video_cut = audio_cut = ''
+        if options.keep:
+            from .jump_cut import video_cut_filter, audio_cut_filter
+            video_cut = video_cut_filter(options.keep) + ','
+            audio_cut = audio_cut_filter(options.keep) + ','
+
+        # A sincronização desloca cada canal antes dos cortes, que usam a linha do tempo do microfone
+        offsets = options.offsets or {}
+
+        def video_chain(channel):
+            return sync.video_sync_filter(offsets.get(channel, 0.0)) + video_cut
+
+        def audio_chain(channel):
+            return sync.audio_sync_filter(offsets.get(channel, 0.0)) + audio_cut
+
+        filters = []
+        base = '0:v'
+        if video_chain('display') or (width, height) != (display['width'], display['height']):
+            filters.append(f"[0:v]{video_chain('display')}scale={width}:{height}[base]")
+            base = 'base'
+
+        if 'webcam' in inputs:
+            # A webcam é reduzida antes da sobreposição, para que o overlay trabalhe com poucos pixels
+            x, y = PIP_POSITIONS[options.pip_position]
+            filters.append(f"[{inputs['webcam']}:v]{video_chain('webcam')}"
+                           f"scale={_even(width * options.pip_scale)}:-2[pip]")
+            filters.append(f"[{base}][pip]overlay=x={x}:y={y}:eof_action=pass,format=yuv420p[v]")
+        else:
+            filters.append(f"[{base}]format=yuv420p[v]")
+
+        audio_input = audio_channel = None
+        if 'microphone' in inputs:
+            audio_input, audio_channel = f"{inputs['microphone']}:a", 'microphone'
+        elif display['has_audio']:
+            audio_input, audio_channel = '0:a', 'display'
+        if audio_input and audio_chain(audio_channel):
+            filters.append(f"[{audio_input}]{audio_chain(audio_channel).rstrip(',')}[a]")
+            audio_input = '[a]'
+
+        cmd += ['-filter_complex', ';'.join(filters), '-filter_complex_threads', str(options.threads),
+                '-map', '[v]']
+        if audio_input:
+            cmd += ['-map', audio_input]
+
+        cmd += ['-c:v', 'libx264', '-preset', options.effective_preset, '-crf', str(options.crf),
+                '-threads', str(options.threads),
+                '-c:a', 'aac', '-b:a', options.audio_bitrate]
+        if output_format in ('mp4', 'mov'):
+            cmd += ['-movflags', '+faststart']
+        cmd += ['-f', output_format]
+        return cmd
+
+    @tracing.traced("video:process_video", category="video")
+    def process_video(self, output_file: Path, pip_webcam: bool = True, pip_position: str = 'bottom-right',
+                      options: Optional[RenderOptions] = None,
+                      on_progress: Optional[Callable[[float, float], None]] = None) -> Path:
+        """
+        Renderiza a composição da gravação em uma única passada do ffmpeg
+
+        Args:
+            output_file: Arquivo de saída
+            pip_webcam: Sobrepor a webcam como picture-in-picture
+            pip_position: Posição do PiP
+            options: Parâmetros de codificação (pip_webcam e pip_position têm precedência)
+            on_progress: Função opcional chamada com (segundos codificados, duração)
+
+        Returns:
+            Path: Caminho do vídeo gerado
+        """
+        if not self.channels:
+            self.load_screenstudio_recording()
+
+        options = options or RenderOptions()
+        options.pip_webcam = pip_webcam
+        options.pip_position = pip_position
+
+        cmd = self.build_command(output_file, options)
+        duration = self.media['display']['duration']
+        if options.keep:
+            duration = sum(end - start for start, end in options.keep)
+        logger.info(f"Renderizando {self.recording_path} -> {output_file} "
+                    f"(preset={options.effective_preset}, crf={options.crf})")
+
+        with file_utils.atomic_path(output_file) as temp_path:
+            with tracing.span("ffmpeg:composite", category="ffmpeg",
+                              bytes_in=tracing.file_size(self.channels['display'])) as sp:
+                logger.debug(f"Comando: {' '.join(cmd + [temp_path])}")
+                display = self.media['display']
+                run_ffmpeg(cmd + [temp_path], duration, on_progress,
+                           memory=media_executor.video_memory(display['width'], display['height']))
+                sp.bytes_out = tracing.file_size(temp_path)
+
+        logger.info(f"Vídeo salvo em {output_file}")
+        return output_file
@@ -0,0 +1,420 @@
+"""Monitoramento de uma pasta para processar automaticamente gravações do ScreenStudio"""
+import os
+import sys
+import json
+import time
+import errno
+import struct
+import asyncio
+import logging
+import ctypes
+import ctypes.util
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from . import pipeline, organizer, sync
+from .metadata_handler import MetadataHandler
+from ..utils import file_utils, media_executor
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_SUFFIX = '.screenstudio'
+STATE_FILE_NAME = '.edit-video-watch.json'
+MICROPHONE_CANDIDATES = ('channel-2-microphone-0.m4a', 'channel-2-microphone-0.mp3', 'channel-2-microphone-0.wav')
+DISPLAY_FILE = 'channel-1-display-0.mp4'
+
+# Espera antes de tentar de novo um bundle que falhou, dobrada a cada falha seguida (s)
+RETRY_DELAY = 60.0
+RETRY_MAX_DELAY = 3600.0
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def bundle_signature(bundle: Path) -> Tuple[int, int, int]:
+    """
+    Calcula uma assinatura barata do conteúdo de um bundle
+
+    Returns:
+        Tuple[int, int, int]: Número de arquivos, tamanho total e maior mtime (ns)
+    """
+    count = total = latest = 0
+    stack = [str(bundle)]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            count += 1
+            total += stat.st_size
+            latest = max(latest, stat.st_mtime_ns)
+    return count, total, latest
+
+
+def microphone_file(bundle: Path) -> Path:
+    """Canal de microfone de uma gravação do ScreenStudio"""
+    _, recording_path = organizer.find_recording_path(bundle)
+    for name in MICROPHONE_CANDIDATES:
+        if (recording_path / name).exists():
+            return recording_path / name
+    raise FileNotFoundError(f"Canal de microfone não encontrado em {recording_path}")
+
+
+def analyze_bundle(bundle: Path):
+    """Extrai os metadados e a sincronização de uma gravação para <bundle>/metadata.json"""
+    handler = MetadataHandler(bundle)
+    handler.extract_screenstudio_metadata()
+    handler.estimate_sync()
+    handler.save_metadata(bundle / 'metadata.json')
+
+
+async def recording_chapters(bundle: Path, mp3_path: Path, force: bool = False) -> Optional[Path]:
+    """
+    Detecta os capítulos de uma gravação para a etapa de SEO (veja core.scenes)
+
+    Os capítulos são opcionais: sem canal de tela ou com falha na decodificação, o SEO é
+    gerado sem eles.
+
+    Returns:
+        Optional[Path]: JSON de capítulos, ou None se não foi possível detectá-los
+    """
+    loop = asyncio.get_running_loop()
+    _, recording_path = await loop.run_in_executor(None, organizer.find_recording_path, bundle)
+    display = recording_path / DISPLAY_FILE
+    if not display.exists():
+        logger.info(f"{bundle.name}: sem canal de tela, SEO sem capítulos")
+        return None
+
+    # Offset da tela estimado pela etapa analyze, quando confiável
+    offset = 0.0
+    metadata_path = bundle / 'metadata.json'
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            offset = sync.applied_offsets(json.load(f).get('sync')).get('display', 0.0)
+
+    microphone = await loop.run_in_executor(None, microphone_file, bundle)
+    try:
+        _, path, _ = await pipeline.chapters_stage_async(display, microphone, mp3_path, force=force,
+                                                      offset=offset)
+    except (media_executor.MediaError, ValueError) as e:
+        logger.warning(f"{bundle.name}: capítulos não detectados, SEO sem capítulos: {e}")
+        return None
+    return path
+
+
+class InotifySource:
+    """Fonte de eventos baseada em inotify (Linux), integrada ao event loop"""
+
+    def __init__(self, folder: Path, on_name: Callable[[Optional[str]], None]):
+        self.folder = folder
+        self.on_name = on_name
+        self.fd = None
+
+    @staticmethod
+    def available() -> bool:
+        return sys.platform.startswith('linux') and ctypes.util.find_library('c') is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+        mask = IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE | IN_MODIFY
+        if libc.inotify_add_watch(fd, os.fsencode(self.folder), mask) < 0:
+            os.close(fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch falhou para {self.folder}")
+        self.fd = fd
+        loop.add_reader(fd, self._read)
+
+    def _read(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return
+            raise
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+            offset += length
+            # Em caso de estouro da fila do kernel, pedir uma varredura completa
+            self.on_name(None if mask & IN_Q_OVERFLOW else name)
+
+    def stop(self, loop: asyncio.AbstractEventLoop):
+        if self.fd is not None:
+            loop.remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+
+
+class RateLimiter:
+    """Limita o número de operações por minuto (ex: chamadas à API)"""
+
+    def __init__(self, per_minute: Optional[float]):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class WatchStats:
+    """Contadores do monitoramento"""
+    discovered: int = 0
+    queued: int = 0
+    processed: int = 0
+    failed: int = 0
+    in_progress: Set[str] = field(default_factory=set)
+
+
+class FolderWatcher:
+    """
+    Monitora uma pasta e processa cada bundle .screenstudio novo pelo pipeline completo
+
+    Um bundle só entra na fila depois que seu conteúdo para de crescer por
+    stable_seconds. A fila é limitada (queue_size), então em rajadas de muitas
+    gravações a verificação de estabilidade espera espaço na fila em vez de acumular
+    trabalho. O processamento usa no máximo `concurrency` bundles ao mesmo tempo; os processos
+    do ffmpeg passam pelo MediaExecutor compartilhado e as chamadas à API têm um limite separado.
+    """
+
+    def __init__(self, folder: Path, style: str = 'clickbait', concurrency: int = 2,
+                 api_concurrency: int = 2, api_per_minute: Optional[float] = None,
+                 queue_size: int = 8, stable_seconds: float = 10.0, poll_interval: float = 2.0,
+                 process_existing: bool = True, use_inotify: bool = True,
+                 on_event: Optional[Callable[[str, Path, str], None]] = None):
+        """
+        Args:
+            folder: Pasta monitorada
+            style: Estilo do SEO
+            concurrency: Bundles processados ao mesmo tempo
+            api_concurrency: Chamadas simultâneas à API do Gemini
+            api_per_minute: Limite opcional de chamadas à API por minuto
+            queue_size: Tamanho máximo da fila de bundles prontos
+            stable_seconds: Tempo sem mudanças para considerar um bundle completo
+            poll_interval: Intervalo entre verificações (e varreduras sem inotify)
+            process_existing: Processar bundles já presentes ao iniciar
+            use_inotify: Usar inotify quando disponível
+            on_event: Função chamada com (evento, bundle, mensagem)
+        """
+        self.folder = folder
+        self.style = style
+        self.concurrency = max(1, concurrency)
+        self.api_semaphore = None
+        self.api_concurrency = max(1, api_concurrency)
+        self.api_limiter = None
+        self.api_per_minute = api_per_minute
+        self.queue_size = max(1, queue_size)
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.process_existing = process_existing
+        self.use_inotify = use_inotify
+        self.on_event = on_event
+        self.stats = WatchStats()
+        self.state_path = folder / STATE_FILE_NAME
+        self.state = self._load_state()
+        self._tracked: Set[str] = set()
+
+    def _emit(self, event: str, bundle: Path, message: str = ''):
+        logger.info(f"[{event}] {bundle.name} {message}".rstrip())
+        if self.on_event:
+            self.on_event(event, bundle, message)
+
+    def _load_state(self) -> Dict[str, dict]:
+        if self.state_path.exists():
+            try:
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Estado do monitoramento inválido, ignorando: {e}")
+                return {}
+            # Falhas de execuções anteriores são tentadas de novo logo ao iniciar
+            for entry in state.values():
+                if entry.get('status') == 'failed':
+                    entry.pop('retry_at', None)
+            return state
+        return {}
+
+    def _save_state(self):
+        file_utils.save_json(self.state, self.state_path)
+
+    def _is_done(self, bundle: Path) -> bool:
+        """Se o bundle não precisa entrar na fila (concluído, ignorado ou aguardando nova tentativa)"""
+        entry = self.state.get(bundle.name)
+        if not entry or tuple(entry.get('signature', ())) != bundle_signature(bundle):
+            return False
+        if entry.get('status') == 'failed':
+            return time.time() < entry.get('retry_at', 0.0)
+        return entry.get('status') in ('done', 'skipped')
+
+    def _candidates(self):
+        for entry in os.scandir(self.folder):
+            if entry.name.endswith(BUNDLE_SUFFIX) and entry.is_dir():
+                yield Path(entry.path)
+
+    def _track(self, name: Optional[str], queue: asyncio.Queue):
+        """Inicia a espera de estabilidade de um bundle (ou varre a pasta se name for None)"""
+        if name is None:
+            for bundle in self._candidates():
+                self._track(bundle.name, queue)
+            return
+        if not name.endswith(BUNDLE_SUFFIX) or name in self._tracked:
+            return
+        bundle = self.folder / name
+        if not bundle.is_dir() or self._is_done(bundle):
+            return
+        self._tracked.add(name)
+        self.stats.discovered += 1
+        self._emit('discovered', bundle)
+        asyncio.ensure_future(self._wait_stable(bundle, queue))
+
+    async def _wait_stable(self, bundle: Path, queue: asyncio.Queue):
+        """Espera o bundle parar de crescer e o coloca na fila (bloqueia se a fila estiver cheia)"""
+        loop = asyncio.get_running_loop()
+        last = None
+        stable_since = time.monotonic()
+        while True:
+            signature = await loop.run_in_executor(None, bundle_signature, bundle)
+            if signature != last:
+                last = signature
+                stable_since = time.monotonic()
+            elif time.monotonic() - stable_since >= self.stable_seconds and signature[0] > 0:
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        await queue.put(bundle)
+        self.stats.queued += 1
+        self._emit('queued', bundle, f"(fila: {queue.qsize()}/{self.queue_size})")
+
+    async def _api_call(self, coroutine_function, *args, **kwargs):
+        async with self.api_semaphore:
+            await self.api_limiter.wait()
+            return await coroutine_function(*args, **kwargs)
+
+    async def _process(self, bundle: Path):
+        """Executa analyze, converter-transcrever-seo (com capítulos) e pré-produção em um bundle"""
+        loop = asyncio.get_running_loop()
+        stage = 'analyze'
+        previous = self.state.get(bundle.name, {})
+        attempts = previous.get('attempts', 0) if previous.get('status') == 'failed' else 0
+        self.stats.in_progress.add(bundle.name)
+        try:
+            self._emit('started', bundle)
+            await loop.run_in_executor(None, analyze_bundle, bundle)
+
+            stage = 'convert'
+            microphone = await loop.run_in_executor(None, microphone_file, bundle)
+            mp3_path, _ = await pipeline.convert_stage_async(microphone)
+
+            stage = 'transcribe'
+            await self._api_call(pipeline.transcribe_stage_async, mp3_path)
+
+            stage = 'chapters'
+            await recording_chapters(bundle, mp3_path)
+
+            stage = 'seo'
+            await self._api_call(pipeline.seo_stage_async, mp3_path, self.style)
+
+            stage = 'pre-producao'
+            result = await loop.run_in_executor(None, organizer.organize_recording, bundle)
+
+            self.stats.processed += 1
+            self.state[bundle.name] = {'status': 'done', 'destination': str(result.destination)}
+            self._emit('done', bundle, f"-> {result.destination}")
+        except asyncio.CancelledError:
+            # Interrompido: o manifesto permite retomar na próxima execução
+            self.state.pop(bundle.name, None)
+            raise
+        except Exception as e:
+            self.stats.failed += 1
+            attempts += 1
+            delay = min(RETRY_MAX_DELAY, RETRY_DELAY * 2 ** (attempts - 1))
+            self.state[bundle.name] = {'status': 'failed', 'stage': stage, 'error': str(e),
+                                       'attempts': attempts, 'retry_at': time.time() + delay}
+            self._emit('failed', bundle, f"na etapa '{stage}': {e} (nova tentativa em {delay:.0f}s)")
+        finally:
+            self.stats.in_progress.discard(bundle.name)
+            self._tracked.discard(bundle.name)
+            if bundle.name in self.state:
+                # A assinatura inclui as saídas geradas, para não reprocessar o próprio resultado
+                self.state[bundle.name]['signature'] = list(bundle_signature(bundle))
+                self.state[bundle.name]['finished_at'] = time.time()
+                self._save_state()
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            bundle = await queue.get()
+            try:
+                await self._process(bundle)
+            finally:
+                queue.task_done()
+
+    async def run_async(self):
+        """Monitora a pasta até ser cancelado"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.api_semaphore = asyncio.Semaphore(self.api_concurrency)
+        self.api_limiter = RateLimiter(self.api_per_minute)
+
+        source = None
+        if self.use_inotify and InotifySource.available():
+            try:
+                source = InotifySource(self.folder, lambda name: self._track(name, queue))
+                source.start(loop)
+                logger.info(f"Monitorando {self.folder} com inotify")
+            except OSError as e:
+                logger.warning(f"inotify indisponível ({e}), usando varredura periódica")
+                source = None
+        if source is None:
+            logger.info(f"Monitorando {self.folder} com varredura a cada {self.poll_interval}s")
+
+        if self.process_existing:
+            self._track(None, queue)
+        else:
+            for bundle in self._candidates():
+                self.state.setdefault(bundle.name, {'status': 'skipped',
+                                                    'signature': list(bundle_signature(bundle))})
+
+        tasks = [asyncio.ensure_future(self._worker(queue)) for _ in range(self.concurrency)]
+        # Com inotify a varredura completa é só uma rede de segurança
+        rescan_interval = self.poll_interval if source is None else max(60.0, self.poll_interval)
+        try:
+            while True:
+                await asyncio.sleep(rescan_interval)
+                self._track(None, queue)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if source is not None:
+                source.stop(loop)
+
+    def run(self):
+        """Versão síncrona de run_async"""
+        asyncio.run(self.run_async())
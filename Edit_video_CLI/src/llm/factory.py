@@ -1,11 +1,7 @@
 """Fábrica para criar instâncias de LLM"""
 import os
 from typing import Optional, Dict, Any
-from dotenv import load_dotenv
-from .gemini import GeminiClient
-
-# Carregar variáveis de ambiente
-load_dotenv()
+from .gemini import GeminiClient, load_environment
 
 class LLMFactory:
     """Fábrica para criar instâncias de LLM"""
@@ -47,6 +43,9 @@ class LLMFactory:
         """
         provider = provider.lower()
         
+        # Carregar o .env apenas quando a chave é realmente necessária
+        load_environment()
+        
         env_vars = {
             "gemini": "GEMINI_API_KEY"
         }
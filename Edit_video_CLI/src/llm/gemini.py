@@ -1,30 +1,155 @@
 import os
 import json
 import logging
+import math
 import tempfile
 import time
 from pathlib import Path
-import aiohttp
 import asyncio
-from typing import Optional, Dict, List, Any
-from dotenv import load_dotenv
+from collections import deque
+from typing import Optional, Dict, List, Any, NamedTuple
 import base64
+import contextlib
+
+from ..utils import tracing
 
 logger = logging.getLogger(__name__)
 
-# Carregar variáveis de ambiente
-load_dotenv()
+_environment_loaded = False
+
+
+def _read_settings():
+    """Lê as configurações do módulo a partir das variáveis de ambiente"""
+    global GEMINI_API_KEY, PREFERRED_MODELS, DEBUG
+    global HEDGE_REQUESTS, HEDGE_PERCENTILE, HEDGE_BUDGET, HEDGE_MODEL, HEDGE_INITIAL_DELAY
+    
+    # Configurações
+    GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+    PREFERRED_MODELS = os.environ.get("PREFERRED_MODELS", "gemini-1.5-pro,gemini-pro,gemini-1.0-pro").split(',')
+    DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
+    
+    # Configurações de hedging (requisição duplicada quando a original demora demais)
+    HEDGE_REQUESTS = os.environ.get("HEDGE_REQUESTS", "False").lower() == "true"
+    HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))
+    HEDGE_BUDGET = float(os.environ.get("HEDGE_BUDGET", "0.1"))
+    HEDGE_MODEL = os.environ.get("HEDGE_MODEL") or None
+    HEDGE_INITIAL_DELAY = float(os.environ["HEDGE_INITIAL_DELAY"]) if os.environ.get("HEDGE_INITIAL_DELAY") else None
+
+
+def load_environment():
+    """
+    Carrega o arquivo .env (uma única vez) e atualiza as configurações do módulo
+    
+    É chamado apenas quando uma chave ou configuração da API é necessária, para que
+    comandos que não usam o Gemini não paguem pela leitura do .env.
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    from dotenv import load_dotenv
+    load_dotenv()
+    _read_settings()
+    _environment_loaded = True
+
+
+_read_settings()
+
+API_URL = "https://generativelanguage.googleapis.com/v1/models/{model}:generateContent"
+
+
+class GeminiResponse(NamedTuple):
+    """Resposta HTTP já lida da API do Gemini"""
+    status: int
+    text: str
+    json: Optional[Dict[str, Any]]
+    model: str
+
+
+class LatencyTracker:
+    """Janela deslizante de latências observadas para calcular percentis"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def record(self, seconds: float):
+        """Registra a latência (em segundos) de uma resposta"""
+        self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Retorna o percentil p das latências registradas
+        
+        Args:
+            p: Percentil desejado (0-100)
+            
+        Returns:
+            float: Latência em segundos, ou None se ainda não há amostras suficientes
+        """
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * (len(ordered) - 1)))))
+        return ordered[index]
 
-# Configurações
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-PREFERRED_MODELS = os.environ.get("PREFERRED_MODELS", "gemini-1.5-pro,gemini-pro,gemini-1.0-pro").split(',')
-DEBUG = os.environ.get("DEBUG", "False").lower() == "true"
 
 class GeminiClient:
     """Cliente para a API do Gemini"""
     
-    def __init__(self, api_key=None):
-        """Inicializa o cliente Gemini"""
+    # Latências e contadores compartilhados entre instâncias do mesmo processo,
+    # já que transcription/seo_generator criam um cliente novo a cada chamada
+    _latency_trackers: Dict[str, LatencyTracker] = {}
+    hedge_stats: Dict[str, int] = {"requests": 0, "hedged": 0, "hedge_wins": 0}
+    
+    # Sessão HTTP mantida aberta pelo `edit-video serve`; sem ela, cada envio abre a
+    # própria sessão (e paga DNS, TCP e TLS de novo)
+    _shared_session = None
+    _shared_loop = None
+    
+    @classmethod
+    async def open_shared_session(cls):
+        """Abre a sessão HTTP reaproveitada por todos os clientes do event loop atual"""
+        import aiohttp
+        
+        if cls._shared_session is None or cls._shared_session.closed:
+            cls._shared_session = aiohttp.ClientSession()
+            cls._shared_loop = asyncio.get_running_loop()
+        return cls._shared_session
+    
+    @classmethod
+    async def close_shared_session(cls):
+        """Fecha a sessão compartilhada aberta por open_shared_session"""
+        session, cls._shared_session, cls._shared_loop = cls._shared_session, None, None
+        if session is not None:
+            await session.close()
+    
+    @contextlib.asynccontextmanager
+    async def _session(self):
+        """Sessão compartilhada, se houver e pertencer a este loop, ou uma sessão própria"""
+        # aiohttp é importado sob demanda para não pesar no início do CLI
+        import aiohttp
+        
+        session = self._shared_session
+        if session is not None and not session.closed and self._shared_loop is asyncio.get_running_loop():
+            yield session
+            return
+        async with aiohttp.ClientSession() as session:
+            yield session
+    
+    def __init__(self, api_key=None, hedge=None, hedge_percentile=None, hedge_budget=None,
+                 hedge_model=None, hedge_initial_delay=None):
+        """
+        Inicializa o cliente Gemini
+        
+        Args:
+            api_key: Chave de API (opcional, usa GEMINI_API_KEY)
+            hedge: Ativa o envio de uma requisição duplicada quando a original demora
+            hedge_percentile: Percentil de latência medida após o qual a duplicata é enviada
+            hedge_budget: Fração máxima de requisições que podem gerar duplicatas (0-1)
+            hedge_model: Modelo usado na duplicata (padrão: o mesmo modelo)
+            hedge_initial_delay: Espera (s) usada antes de haver amostras suficientes
+        """
+        load_environment()
         self.api_key = api_key or GEMINI_API_KEY
         if not self.api_key:
             raise ValueError("API key não fornecida e não encontrada nas variáveis de ambiente")
@@ -32,9 +157,153 @@ class GeminiClient:
         # Usar modelo preferido em ordem de preferência
         self.model = PREFERRED_MODELS[0].strip()
         
+        self.hedge = HEDGE_REQUESTS if hedge is None else hedge
+        self.hedge_percentile = HEDGE_PERCENTILE if hedge_percentile is None else hedge_percentile
+        self.hedge_budget = HEDGE_BUDGET if hedge_budget is None else hedge_budget
+        self.hedge_model = hedge_model or HEDGE_MODEL
+        self.hedge_initial_delay = HEDGE_INITIAL_DELAY if hedge_initial_delay is None else hedge_initial_delay
+        
         if DEBUG:
             print(f"Usando modelo: {self.model}")
     
+    def _tracker(self, model, operation):
+        """Retorna o rastreador de latência de um par modelo/operação"""
+        key = f"{model}:{operation}"
+        if key not in self._latency_trackers:
+            self._latency_trackers[key] = LatencyTracker()
+        return self._latency_trackers[key]
+    
+    def _hedge_delay(self, model, operation):
+        """Calcula quanto esperar antes de enviar a duplicata (None = não duplicar)"""
+        if not self.hedge:
+            return None
+        
+        # Respeitar o orçamento de requisições extras
+        stats = self.hedge_stats
+        if stats["hedged"] >= math.ceil(self.hedge_budget * stats["requests"]):
+            return None
+        
+        delay = self._tracker(model, operation).percentile(self.hedge_percentile)
+        return delay if delay is not None else self.hedge_initial_delay
+    
+    async def _post(self, session, model, data, operation):
+        """
+        Envia uma requisição generateContent e lê a resposta completa
+        
+        A latência de respostas 200 entra no rastreador do modelo. Uma requisição cancelada
+        (a perdedora do hedging) entra com o tempo até o cancelamento: é só um limite inferior
+        da latência real, mas sem ela o rastreador guardaria apenas as respostas rápidas e o
+        percentil (e a espera antes da duplicata) cairia a cada hedge.
+        """
+        started = time.monotonic()
+        try:
+            response = await self._request(session, model, data, operation)
+        except asyncio.CancelledError:
+            self._tracker(model, operation).record(time.monotonic() - started)
+            raise
+        if response.status == 200:
+            self._tracker(model, operation).record(time.monotonic() - started)
+        return response
+    
+    async def _request(self, session, model, data, operation):
+        """Corpo de _post: serializa, envia e lê a resposta, sem medir a latência"""
+        url = API_URL.format(model=model)
+        headers = {"Content-Type": "application/json"}
+        params = {"key": self.api_key}
+        
+        with tracing.span("gemini:serialize", category="llm") as sp:
+            body = json.dumps(data)
+            sp.bytes_out = len(body)
+        
+        with tracing.span("gemini:request", category="llm", model=model, operation=operation,
+                          bytes_out=len(body)) as request_span:
+            # O tempo até os cabeçalhos inclui o upload e a latência do modelo
+            with tracing.span("gemini:upload_and_wait", category="llm", model=model, operation=operation):
+                response = await session.post(url, params=params, headers=headers, data=body)
+            
+            async with response:
+                with tracing.span("gemini:read_response", category="llm") as sp:
+                    response_text = await response.text()
+                    sp.bytes_in = len(response_text)
+                request_span.bytes_in = len(response_text)
+                request_span.set(status=response.status)
+            
+        if response.status != 200:
+            return GeminiResponse(response.status, response_text, None, model)
+        
+        with tracing.span("gemini:parse_json", category="llm", bytes_in=len(response_text)):
+            payload = json.loads(response_text)
+        return GeminiResponse(response.status, "", payload, model)
+    
+    async def _send(self, data, operation="text", model=None):
+        """
+        Envia o payload para um modelo (padrão: o modelo atual), com hedging opcional
+        
+        Se a resposta não chegar dentro do percentil configurado de latência, uma
+        requisição duplicada é enviada (ao mesmo modelo ou ao hedge_model) e a
+        primeira resposta bem-sucedida é usada; a outra é cancelada.
+        
+        Args:
+            data: Payload JSON da requisição
+            operation: Nome da operação, usado para separar as estatísticas de latência
+            model: Modelo da requisição original; passado por chamadas concorrentes em vez de
+                alterar self.model, que é compartilhado
+            
+        Returns:
+            GeminiResponse: Status, corpo e JSON da resposta vencedora (com o modelo que respondeu)
+        """
+        model = model or self.model
+        stats = self.hedge_stats
+        stats["requests"] += 1
+        
+        async with self._session() as session:
+            primary = asyncio.ensure_future(self._post(session, model, data, operation))
+            
+            delay = self._hedge_delay(model, operation)
+            if delay is None:
+                return await primary
+            
+            try:
+                done, _ = await asyncio.wait({primary}, timeout=delay)
+            except asyncio.CancelledError:
+                # asyncio.wait não cancela o que espera: sem isso a original seguiria sozinha
+                primary.cancel()
+                raise
+            if done:
+                return primary.result()
+            
+            stats["hedged"] += 1
+            hedge_model = self.hedge_model or model
+            logger.info(f"Sem resposta após {delay:.2f}s, enviando requisição duplicada para {hedge_model}")
+            hedge = asyncio.ensure_future(self._post(session, hedge_model, data, operation))
+            
+            pending = {primary, hedge}
+            winner = "nenhuma"
+            with tracing.span("gemini:hedge", category="llm", model=model, hedge_model=hedge_model,
+                              operation=operation, delay=round(delay, 3)) as hedge_span:
+                try:
+                    while pending:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            if task.exception() is not None or task.result().status != 200:
+                                continue
+                            if task is hedge:
+                                stats["hedge_wins"] += 1
+                            winner = "duplicata" if task is hedge else "original"
+                            return task.result()
+                    # Nenhuma das duas teve sucesso: devolver o erro (ou a exceção) da original
+                    return primary.result()
+                except asyncio.CancelledError:
+                    winner = "cancelada"
+                    raise
+                finally:
+                    for task in pending:
+                        task.cancel()
+                    hedge_span.set(winner=winner, **stats)
+                    logger.info(f"Hedging: venceu {winner}; {stats['hedged']} duplicatas e "
+                                f"{stats['hedge_wins']} vitórias em {stats['requests']} requisições")
+    
+    @tracing.traced("gemini:generate_text", category="llm")
     async def generate_text(self, prompt, max_tokens=4096):
         """
         Gera texto com o Gemini
@@ -46,9 +315,6 @@ class GeminiClient:
         Returns:
             str: Texto gerado
         """
-        url = f"https://generativelanguage.googleapis.com/v1/models/{self.model}:generateContent"
-        headers = {"Content-Type": "application/json"}
-        params = {"key": self.api_key}
         data = {
             "contents": [{"parts": [{"text": prompt}]}],
             "generationConfig": {
@@ -60,36 +326,36 @@ class GeminiClient:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, params=params, headers=headers, json=data) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        if DEBUG:
-                            print(f"Erro na API do Gemini ({response.status}): {error_text}")
+            response = await self._send(data, operation="text")
+            if response.status != 200:
+                error_text = response.text
+                if DEBUG:
+                    print(f"Erro na API do Gemini ({response.status}): {error_text}")
                         
-                        # Tentar modelo alternativo
-                        for model in PREFERRED_MODELS[1:]:
-                            if DEBUG:
-                                print(f"Tentando modelo alternativo: {model}")
-                            self.model = model.strip()
-                            result = await self.generate_text(prompt, max_tokens)
-                            if result:  # Se o modelo alternativo funcionou, retorne o resultado
-                                return result
+                # Tentar modelo alternativo
+                for model in PREFERRED_MODELS[1:]:
+                    if DEBUG:
+                        print(f"Tentando modelo alternativo: {model}")
+                    self.model = model.strip()
+                    result = await self.generate_text(prompt, max_tokens)
+                    if result:  # Se o modelo alternativo funcionou, retorne o resultado
+                        return result
                         
-                        raise Exception(f"Erro na API do Gemini: {error_text}")
+                raise Exception(f"Erro na API do Gemini: {error_text}")
                     
-                    result = await response.json()
+            result = response.json
                     
-                    if "candidates" in result and result["candidates"]:
-                        text = result["candidates"][0]["content"]["parts"][0]["text"]
-                        return text
+            if "candidates" in result and result["candidates"]:
+                text = result["candidates"][0]["content"]["parts"][0]["text"]
+                return text
                     
-                    return None
+            return None
         except Exception as e:
             if DEBUG:
                 print(f"Erro ao chamar API do Gemini: {str(e)}")
             raise
 
+    @tracing.traced("gemini:transcribe_audio", category="llm")
     async def transcribe_audio(self, audio_path):
         """
         Transcreve um arquivo de áudio usando o Gemini
@@ -105,19 +371,36 @@ class GeminiClient:
             raise FileNotFoundError(f"Arquivo não encontrado: {audio_path}")
             
         # Ler o arquivo de áudio
-        with open(audio_path, 'rb') as f:
-            audio_data = f.read()
+        with tracing.span("gemini:read_audio", category="io") as sp:
+            with open(audio_path, 'rb') as f:
+                audio_data = f.read()
+            sp.bytes_in = len(audio_data)
+
+        text, _ = await self.transcribe_audio_data(audio_data, audio_path)
+        return text
+
+    @tracing.traced("gemini:transcribe_audio_data", category="llm")
+    async def transcribe_audio_data(self, audio_data, label="áudio", model=None):
+        """
+        Transcreve um áudio MP3 já em memória (por exemplo, um trecho extraído pelo ffmpeg)
+        
+        Os modelos alternativos são tentados sem alterar self.model, então várias transcrições
+        podem rodar ao mesmo tempo com o mesmo cliente.
+        
+        Args:
+            audio_data: Bytes do MP3
+            label: Nome mostrado nas mensagens de depuração
+            model: Primeiro modelo tentado (padrão: o modelo atual)
             
+        Returns:
+            Tuple[Optional[str], str]: Texto transcrito e o modelo que respondeu
+        """
         # Codificar o áudio em base64
-        audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+        with tracing.span("gemini:base64_encode", category="llm", bytes_in=len(audio_data)) as sp:
+            audio_base64 = base64.b64encode(audio_data).decode('utf-8')
+            sp.bytes_out = len(audio_base64)
         
-        if DEBUG:
-            print(f"Enviando áudio para transcrição: {audio_path} ({len(audio_data) / 1024:.2f} KB)")
-            
-        # URL da API Gemini
-        url = f"https://generativelanguage.googleapis.com/v1/models/{self.model}:generateContent"
-        headers = {"Content-Type": "application/json"}
-        params = {"key": self.api_key}
+        logger.info(f"Enviando áudio para transcrição: {label} ({len(audio_data) / 1024:.2f} KB)")
         
         # Montar o payload para a API
         data = {
@@ -144,47 +427,48 @@ class GeminiClient:
             }
         }
         
-        # Fazer a requisição para a API
+        # Fazer a requisição para a API, com os modelos alternativos em caso de erro
+        first = (model or self.model).strip()
+        models = [first] + [alternative.strip() for alternative in PREFERRED_MODELS[1:]
+                            if alternative.strip() != first]
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, params=params, headers=headers, json=data) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        if DEBUG:
-                            print(f"Erro na API do Gemini ({response.status}): {error_text}")
-                        
-                        # Tentar modelo alternativo
-                        for model in PREFERRED_MODELS[1:]:
-                            if DEBUG:
-                                print(f"Tentando modelo alternativo: {model}")
-                            self.model = model.strip()
-                            # Chamada recursiva com o novo modelo
-                            result = await self.transcribe_audio(audio_path)
-                            if result:  # Se o modelo alternativo funcionou, retorne o resultado
-                                return result
-                        
-                        raise Exception(f"Erro na API do Gemini: {error_text}")
-                    
-                    result = await response.json()
-                    
-                    if "candidates" in result and result["candidates"]:
-                        # Extrair o texto da resposta
-                        text = result["candidates"][0]["content"]["parts"][0]["text"]
-                        return text
-                    
-                    return None
+            error_text = None
+            for attempt in models:
+                if attempt != first and DEBUG:
+                    print(f"Tentando modelo alternativo: {attempt}")
+                response = await self._send(data, operation="transcribe", model=attempt)
+                if response.status != 200:
+                    error_text = error_text or response.text
+                    if DEBUG:
+                        print(f"Erro na API do Gemini ({response.status}): {response.text}")
+                    continue
+                
+                result = response.json
+                if "candidates" in result and result["candidates"]:
+                    # Extrair o texto da resposta; a duplicata pode ter vindo do hedge_model
+                    return result["candidates"][0]["content"]["parts"][0]["text"], response.model
+                if error_text is None:
+                    # O modelo respondeu sem texto
+                    return None, response.model
+                
+            raise Exception(f"Erro na API do Gemini: {error_text}")
         except Exception as e:
             if DEBUG:
                 print(f"Erro ao chamar API do Gemini para transcrição: {str(e)}")
             raise
 
-    async def generate_seo(self, transcription, style="clickbait"):
+    @tracing.traced("gemini:generate_seo", category="llm")
+    async def generate_seo(self, transcription, style="clickbait", chapters=None, keywords=None):
         """
         Gera SEO para YouTube com base em uma transcrição
         
         Args:
             transcription: Texto da transcrição
             style: Estilo do SEO (clickbait, professional, educational, neutral)
+            chapters: Capítulos com 'timestamp' e 'excerpt' (trecho da transcrição); o modelo
+                devolve um título para cada um em "chapters"
+            keywords: Palavras-chave extraídas localmente (core.keywords); com elas, transcription
+                traz só as frases principais em vez da transcrição inteira
             
         Returns:
             dict: Dados de SEO (título, descrição, tags)
@@ -205,23 +489,48 @@ class GeminiClient:
         if DEBUG:
             print(f"Gerando SEO com estilo: {style}")
             
-        # URL da API Gemini
-        url = f"https://generativelanguage.googleapis.com/v1/models/{self.model}:generateContent"
-        headers = {"Content-Type": "application/json"}
-        params = {"key": self.api_key}
+        
+        # Timestamps só entram na descrição quando vêm da detecção de capítulos (core.scenes)
+        if chapters:
+            chapter_lines = "\n".join(f"        {chapter['timestamp']} - {chapter['excerpt']}" for chapter in chapters)
+            chapters_prompt = f"""
+        O vídeo tem {len(chapters)} capítulos. Estes são os timestamps reais e o trecho da transcrição de cada um:
+{chapter_lines}
+        
+        Inclua na descrição a lista de capítulos, um por linha no formato "MM:SS Título do capítulo",
+        usando exatamente esses timestamps, nessa ordem, sem adicionar nem remover capítulos.
+        """
+            description_hint = "Descrição completa para o vídeo, incluindo a lista de capítulos e call to action"
+            chapters_field = f',\n            "chapters": ["Título do capítulo 1", "..."] (exatamente {len(chapters)} títulos curtos, na ordem dos capítulos)'
+        else:
+            chapters_prompt = """
+        Não inclua timestamps na descrição: os tempos do vídeo não são conhecidos.
+        """
+            description_hint = "Descrição completa para o vídeo, incluindo call to action"
+            chapters_field = ""
+        
+        # Com palavras-chave, o texto é um resumo extraído da transcrição
+        if keywords:
+            source_desc = "neste resumo de uma transcrição"
+            transcription_label = f"""Palavras-chave da transcrição completa (use-as como base para as tags): {', '.join(keywords)}
+        
+        Frases principais da transcrição:"""
+        else:
+            source_desc = "nesta transcrição"
+            transcription_label = "Transcrição:"
         
         # Montar o prompt para a API
         prompt = f"""
-        Baseado nesta transcrição, gere um título, descrição e tags para YouTube. O estilo deve ser {style_desc}.
+        Baseado {source_desc}, gere um título, descrição e tags para YouTube. O estilo deve ser {style_desc}.
         
-        Transcrição:
+        {transcription_label}
         {truncated_transcription}
-        
+        {chapters_prompt}
         Retorne apenas um objeto JSON com o seguinte formato:
         {{
             "title": "Título do vídeo (máximo 100 caracteres)",
-            "description": "Descrição completa para o vídeo, incluindo timestamps e call to action",
-            "tags": ["tag1", "tag2", "tag3", "..."] (máximo 15 tags relevantes)
+            "description": "{description_hint}",
+            "tags": ["tag1", "tag2", "tag3", "..."] (máximo 15 tags relevantes){chapters_field}
         }}
         
         Não inclua nenhum texto além do JSON. Retorne o JSON válido sem formatação adicional.
@@ -249,54 +558,53 @@ class GeminiClient:
         
         # Fazer a requisição para a API
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, params=params, headers=headers, json=data) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        if DEBUG:
-                            print(f"Erro na API do Gemini ({response.status}): {error_text}")
+            response = await self._send(data, operation="seo")
+            if response.status != 200:
+                error_text = response.text
+                if DEBUG:
+                    print(f"Erro na API do Gemini ({response.status}): {error_text}")
                         
-                        # Tentar modelo alternativo
-                        for model in PREFERRED_MODELS[1:]:
-                            if DEBUG:
-                                print(f"Tentando modelo alternativo: {model}")
-                            self.model = model.strip()
-                            result = await self.generate_seo(transcription, style)
-                            if result:  # Se o modelo alternativo funcionou, retorne o resultado
-                                return result
+                # Tentar modelo alternativo
+                for model in PREFERRED_MODELS[1:]:
+                    if DEBUG:
+                        print(f"Tentando modelo alternativo: {model}")
+                    self.model = model.strip()
+                    result = await self.generate_seo(transcription, style, chapters, keywords)
+                    if result:  # Se o modelo alternativo funcionou, retorne o resultado
+                        return result
                         
-                        raise Exception(f"Erro na API do Gemini: {error_text}")
+                raise Exception(f"Erro na API do Gemini: {error_text}")
                     
-                    result = await response.json()
+            result = response.json
                     
-                    if "candidates" in result and result["candidates"]:
-                        # Extrair o texto da resposta
-                        response_text = result["candidates"][0]["content"]["parts"][0]["text"]
+            if "candidates" in result and result["candidates"]:
+                # Extrair o texto da resposta
+                response_text = result["candidates"][0]["content"]["parts"][0]["text"]
                         
-                        # Limpar a resposta se necessário
-                        json_str = response_text
-                        if "```json" in json_str:
-                            json_str = json_str.split("```json")[1].split("```")[0].strip()
-                        elif "```" in json_str:
-                            json_str = json_str.split("```")[1].split("```")[0].strip()
-                        
-                        try:
-                            seo_data = json.loads(json_str)
-                            return seo_data
-                        except json.JSONDecodeError as e:
-                            if DEBUG:
-                                print(f"Erro ao processar JSON de SEO: {str(e)}")
-                                print(f"Resposta recebida: {response_text}")
-                            raise Exception(f"Falha ao processar resposta de SEO: formato JSON inválido")
+                try:
+                    with tracing.span("seo:parse_json", category="llm", bytes_in=len(response_text)):
+                        seo_data = extract_seo_json(response_text)
+                    return seo_data
+                except json.JSONDecodeError as e:
+                    if DEBUG:
+                        print(f"Erro ao processar JSON de SEO: {str(e)}")
+                        print(f"Resposta recebida: {response_text}")
+                    raise Exception("Falha ao processar resposta de SEO: formato JSON inválido")
                     
-                    return None
+            return None
         except Exception as e:
             if DEBUG:
                 print(f"Erro ao chamar API do Gemini para SEO: {str(e)}")
             raise
 
-    async def analyze_content(self, transcription: str) -> Dict[str, Any]:
-        """Analisa o conteúdo da transcrição para extrair insights"""
+    @tracing.traced("gemini:analyze_content", category="llm")
+    async def analyze_content(self, transcription: str, keywords: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Analisa o conteúdo da transcrição para extrair insights
+
+        Com keywords (extraídas localmente por core.keywords), o modelo não precisa extraí-las:
+        elas entram no prompt como contexto e vão direto para o resultado.
+        """
         logger.info("Analisando conteúdo da transcrição")
         
         # Limitar o tamanho da transcrição
@@ -322,17 +630,18 @@ class GeminiClient:
                 {"time": "MM:SS", "description": "Descrição do momento"}
             ]
         }
-        
-        TRANSCRIÇÃO:
+        """
+        if keywords:
+            prompt += f"""
+        As palavras-chave já foram extraídas: {', '.join(keywords)}. Use-as como contexto e
+        retorne "keywords" vazio.
         """
         
-        prompt += limited_transcription
+        prompt += """
+        TRANSCRIÇÃO:
+        """ + limited_transcription
         
         # Semelhante à função de SEO, mas com prompt diferente
-        url = f"https://generativelanguage.googleapis.com/v1/models/{self.model}:generateContent"
-        
-        headers = {"Content-Type": "application/json"}
-        params = {"key": self.api_key}
         data = {
             "contents": [{"parts": [{"text": prompt}]}],
             "generationConfig": {
@@ -343,58 +652,82 @@ class GeminiClient:
         
         # Fazer a requisição (código semelhante ao de generate_seo)
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, params=params, headers=headers, json=data) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Erro na API Gemini: {response.status} - {error_text}")
-                        raise Exception(f"Erro na API: {response.status} - {error_text}")
+            response = await self._send(data, operation="analyze")
+            if response.status != 200:
+                error_text = response.text
+                logger.error(f"Erro na API Gemini: {response.status} - {error_text}")
+                raise Exception(f"Erro na API: {response.status} - {error_text}")
                     
-                    result = await response.json()
+            result = response.json
                     
-                    # Extrair a análise
-                    if 'candidates' in result and len(result['candidates']) > 0:
-                        candidate = result['candidates'][0]
-                        if 'content' in candidate and 'parts' in candidate['content']:
-                            parts = candidate['content']['parts']
-                            response_text = "".join(part.get('text', '') for part in parts)
+            # Extrair a análise
+            if 'candidates' in result and len(result['candidates']) > 0:
+                candidate = result['candidates'][0]
+                if 'content' in candidate and 'parts' in candidate['content']:
+                    parts = candidate['content']['parts']
+                    response_text = "".join(part.get('text', '') for part in parts)
                             
-                            # Extrair o JSON da resposta
-                            try:
-                                # Encontrar e extrair o objeto JSON
-                                import re
-                                json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
+                    # Extrair o JSON da resposta
+                    try:
+                        # Encontrar e extrair o objeto JSON
+                        import re
+                        json_match = re.search(r'```json\s*(.*?)\s*```', response_text, re.DOTALL)
                                 
-                                if json_match:
-                                    json_str = json_match.group(1)
-                                else:
-                                    # Tentar encontrar o objeto JSON sem os delimitadores de código
-                                    json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
-                                    if json_match:
-                                        json_str = json_match.group(1)
-                                    else:
-                                        json_str = response_text
+                        if json_match:
+                            json_str = json_match.group(1)
+                        else:
+                            # Tentar encontrar o objeto JSON sem os delimitadores de código
+                            json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
+                            if json_match:
+                                json_str = json_match.group(1)
+                            else:
+                                json_str = response_text
                                 
-                                # Analisar o JSON
-                                analysis_data = json.loads(json_str)
+                        # Analisar o JSON
+                        with tracing.span("analyze:parse_json", category="llm", bytes_in=len(json_str)):
+                            analysis_data = json.loads(json_str)
+                        if keywords:
+                            analysis_data['keywords'] = list(keywords)
                                 
-                                logger.info(f"Análise de conteúdo concluída")
-                                return analysis_data
+                        logger.info("Análise de conteúdo concluída")
+                        return analysis_data
                             
-                            except (json.JSONDecodeError, ValueError) as e:
-                                logger.error(f"Erro ao analisar JSON da resposta: {e}")
-                                return {
-                                    "error": str(e),
-                                    "raw_response": response_text[:500]
-                                }
+                    except (json.JSONDecodeError, ValueError) as e:
+                        logger.error(f"Erro ao analisar JSON da resposta: {e}")
+                        return {
+                            "error": str(e),
+                            "raw_response": response_text[:500]
+                        }
                     
-                    logger.error(f"Formato de resposta inesperado: {result}")
-                    raise Exception("Formato de resposta inesperado da API Gemini")
+            logger.error(f"Formato de resposta inesperado: {result}")
+            raise Exception("Formato de resposta inesperado da API Gemini")
             
         except Exception as e:
             logger.error(f"Erro ao chamar API do Gemini: {str(e)}")
             raise
 
+def extract_seo_json(response_text):
+    """
+    Extrai o objeto JSON de SEO da resposta do modelo
+    
+    Args:
+        response_text: Texto da resposta, possivelmente com blocos de código markdown
+        
+    Returns:
+        dict: Dados de SEO
+        
+    Raises:
+        json.JSONDecodeError: Se o conteúdo não for um JSON válido
+    """
+    # Limpar a resposta se necessário
+    json_str = response_text
+    if "```json" in json_str:
+        json_str = json_str.split("```json")[1].split("```")[0].strip()
+    elif "```" in json_str:
+        json_str = json_str.split("```")[1].split("```")[0].strip()
+    
+    return json.loads(json_str)
+
 # Função auxiliar para executar tarefas assíncronas
 def run_async(coroutine):
     """Executa uma corotina de forma síncrona"""
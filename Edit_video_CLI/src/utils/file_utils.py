@@ -1,6 +1,12 @@
 """Utilitários para manipulação de arquivos"""
 import os
 import json
+import uuid
+import errno
+import shutil
+from contextlib import contextmanager
+
+from . import tracing
 
 def is_valid_audio(file_path):
     """
@@ -24,5 +30,187 @@ def save_json(data, file_path):
         data (dict): Dados a serem salvos
         file_path (str): Caminho do arquivo de saída
     """
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False) 
\ No newline at end of file
+    atomic_write_text(file_path, json.dumps(data, indent=2, ensure_ascii=False))
+
+@contextmanager
+def atomic_path(file_path):
+    """
+    Fornece um caminho temporário que substitui file_path apenas se o bloco terminar sem erro
+    
+    O arquivo temporário fica no mesmo diretório do destino, para que a troca seja um
+    rename atômico. Assim uma falha no meio da escrita nunca deixa um arquivo incompleto
+    com o nome final.
+    
+    Args:
+        file_path (str): Caminho do arquivo de destino
+        
+    Yields:
+        str: Caminho temporário onde o conteúdo deve ser escrito
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    name = os.path.basename(file_path)
+    temp_path = os.path.join(directory, f".{name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.part")
+    try:
+        yield temp_path
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+def atomic_write_text(file_path, text):
+    """
+    Escreve texto em um arquivo de forma atômica (arquivo temporário e rename)
+    
+    Args:
+        file_path (str): Caminho do arquivo de saída
+        text (str): Conteúdo a ser escrito
+    """
+    with tracing.span("io:write", category="io", path=str(file_path)) as sp:
+        with atomic_path(file_path) as temp_path:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            sp.bytes_out = tracing.file_size(temp_path)
+
+
+# Modos de colocação de arquivos aceitos por place_file
+PLACEMENT_MODES = ('copy', 'reflink', 'hardlink', 'move')
+
+# ioctl FICLONE do Linux (_IOW(0x94, 9, int)): btrfs, XFS e outros com reflink
+_FICLONE = 0x40049409
+
+# Tamanho dos blocos de cópia (também a granularidade do progresso)
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+
+def _reflink(source_fd, destination_fd):
+    """Clona o conteúdo via FICLONE; levanta OSError se o sistema de arquivos não suportar"""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        raise OSError("reflink não suportado nesta plataforma")
+    fcntl.ioctl(destination_fd, _FICLONE, source_fd)
+
+def _copy_file_range(source_fd, destination_fd, size, on_progress):
+    """Copia dentro do kernel com os.copy_file_range, sem passar os dados pelo espaço do usuário"""
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError("copy_file_range não disponível")
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(source_fd, destination_fd, min(COPY_CHUNK_SIZE, size - copied))
+        if count == 0:
+            break
+        copied += count
+        on_progress(count)
+    return copied
+
+def _chunked_copy(source_fd, destination_fd, on_progress):
+    """Cópia em blocos grandes reutilizando o mesmo buffer"""
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(source_fd, 'rb', buffering=0, closefd=False) as source:
+        while True:
+            count = source.readinto(buffer)
+            if not count:
+                break
+            written = 0
+            while written < count:
+                written += os.write(destination_fd, view[written:count])
+            on_progress(count)
+
+def copy_file_fast(source, destination, on_progress=None, require_reflink=False):
+    """
+    Copia um arquivo usando o método mais barato suportado pelo sistema de arquivos
+    
+    Ordem de tentativa: reflink (FICLONE, sem copiar dados), os.copy_file_range
+    (cópia no kernel) e, por fim, cópia em blocos. O destino é escrito de forma
+    atômica e recebe as permissões e datas da origem, como shutil.copy2.
+    
+    Args:
+        source (str): Arquivo de origem
+        destination (str): Caminho do arquivo de destino
+        on_progress (callable): Função chamada com o número de bytes copiados a cada bloco
+        require_reflink (bool): Falhar em vez de copiar os dados se o reflink não for suportado
+        
+    Returns:
+        str: Método usado ('reflink', 'copy_file_range' ou 'chunked')
+    """
+    on_progress = on_progress or (lambda count: None)
+    size = os.path.getsize(source)
+    
+    with tracing.span("io:copy", category="io", path=str(source), bytes_in=size) as sp:
+        with atomic_path(destination) as temp_path:
+            source_fd = os.open(source, os.O_RDONLY)
+            try:
+                destination_fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    method = None
+                    try:
+                        _reflink(source_fd, destination_fd)
+                        on_progress(size)
+                        method = 'reflink'
+                    except OSError:
+                        if require_reflink:
+                            raise OSError(f"O sistema de arquivos não suporta reflink: {destination}")
+                    
+                    if method is None:
+                        try:
+                            if _copy_file_range(source_fd, destination_fd, size, on_progress) == size:
+                                method = 'copy_file_range'
+                        except OSError:
+                            pass
+                    
+                    if method is None:
+                        # copy_file_range pode ter escrito parte do arquivo antes de falhar
+                        os.lseek(source_fd, 0, os.SEEK_SET)
+                        os.ftruncate(destination_fd, 0)
+                        os.lseek(destination_fd, 0, os.SEEK_SET)
+                        _chunked_copy(source_fd, destination_fd, on_progress)
+                        method = 'chunked'
+                finally:
+                    os.close(destination_fd)
+            finally:
+                os.close(source_fd)
+            shutil.copystat(source, temp_path)
+        sp.set(method=method)
+        sp.bytes_out = size
+    return method
+
+def place_file(source, destination, mode='copy', on_progress=None):
+    """
+    Coloca um arquivo no destino conforme o modo escolhido
+    
+    Args:
+        source (str): Arquivo de origem
+        destination (str): Caminho do arquivo de destino
+        mode (str): 'copy' (reflink quando possível, senão cópia), 'reflink' (apenas reflink),
+            'hardlink' (novo nome para o mesmo conteúdo) ou 'move' (origem deixa de existir)
+        on_progress (callable): Função chamada com o número de bytes colocados
+        
+    Returns:
+        str: Método efetivamente usado
+    """
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(f"Modo inválido: {mode} (use {', '.join(PLACEMENT_MODES)})")
+    on_progress = on_progress or (lambda count: None)
+    
+    if mode == 'hardlink':
+        os.link(source, destination)
+        on_progress(os.path.getsize(destination))
+        return 'hardlink'
+    
+    if mode == 'move':
+        size = os.path.getsize(source)
+        try:
+            os.rename(source, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Outro sistema de arquivos: copia e só então remove a origem
+            method = copy_file_fast(source, destination, on_progress)
+            os.unlink(source)
+            return f'move ({method})'
+        on_progress(size)
+        return 'move'
+    
+    return copy_file_fast(source, destination, on_progress, require_reflink=(mode == 'reflink'))
@@ -0,0 +1,435 @@
+"""Execução compartilhada do ffmpeg/ffprobe
+
+Todas as chamadas a ferramentas externas passam por um único MediaExecutor, que:
+- roda cada processo como subprocesso do asyncio (stdout, stderr e stdin lidos/escritos juntos,
+  sem risco de travar com pipes cheios)
+- lê o progresso real de `-progress` (tempo, quadros e bytes) em vez de avanços fixos
+- limita os processos simultâneos pelo número de CPUs e por um orçamento de memória, para que
+  etapas em paralelo (lote, watcher, exportação em segmentos) dividam a máquina sem disputa
+- mata o processo em timeout ou cancelamento (inclusive Ctrl+C)
+
+O limite é compartilhado entre threads e event loops: as funções síncronas run() e probe()
+podem ser chamadas de threads de pools diferentes e continuam respeitando o mesmo orçamento.
+"""
+import os
+import json
+import asyncio
+import logging
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# Memória estimada por processo quando quem chama não informa (bytes)
+PROBE_MEMORY = 32 * 1024 * 1024
+DEFAULT_MEMORY = 256 * 1024 * 1024
+
+# Fração da memória disponível usada como orçamento padrão
+MEMORY_FRACTION = 0.5
+
+# Timeout padrão do ffprobe (s)
+PROBE_TIMEOUT = 60
+
+# Resultados do ffprobe guardados em memória, por (caminho, tamanho, mtime)
+PROBE_CACHE_SIZE = 256
+
+# Quantidade de stderr guardada para mensagens de erro (bytes)
+STDERR_TAIL = 64 * 1024
+
+# Chaves emitidas por -progress
+PROGRESS_KEYS = {'frame', 'fps', 'stream_0_0_q', 'bitrate', 'total_size', 'out_time_us', 'out_time_ms',
+                 'out_time', 'dup_frames', 'drop_frames', 'speed', 'progress'}
+
+
+class MediaError(RuntimeError):
+    """Falha de um processo do ffmpeg/ffprobe"""
+
+    def __init__(self, cmd: Sequence[str], returncode: Optional[int], stderr: str, message: Optional[str] = None):
+        self.cmd = list(cmd)
+        self.returncode = returncode
+        self.stderr = stderr
+        tool = Path(self.cmd[0]).name if self.cmd else 'processo'
+        super().__init__(message or f"{tool} falhou (código {returncode}): {stderr[-2000:].strip()}")
+
+
+class MediaTimeout(MediaError):
+    """O processo passou do timeout e foi encerrado"""
+
+
+@dataclass
+class JobProgress:
+    """Progresso de um processo do ffmpeg, lido de -progress"""
+    out_time: float = 0.0       # segundos de saída produzidos
+    frame: int = 0
+    total_size: int = 0         # bytes escritos
+    speed: float = 0.0          # múltiplo do tempo real
+    duration: Optional[float] = None
+    done: bool = False
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if self.done:
+            return 1.0
+        if not self.duration:
+            return None
+        return min(1.0, self.out_time / self.duration)
+
+
+@dataclass
+class JobResult:
+    returncode: int
+    stdout: Union[bytes, str]
+    stderr: str
+
+
+def available_memory() -> int:
+    """Memória disponível no sistema (bytes), ou a memória física quando não há como medir"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 8 * 1024 * 1024 * 1024
+
+
+def video_memory(width: int, height: int, frames: int = 64) -> int:
+    """Estimativa da memória de uma codificação de vídeo: `frames` quadros yuv420p em buffer"""
+    return DEFAULT_MEMORY + int(width * height * 1.5) * frames
+
+
+def writes_stdout(cmd: Sequence[str]) -> bool:
+    """Se a saída do ffmpeg é o stdout ('-' ou pipe:1 como último argumento)"""
+    return bool(cmd) and cmd[-1] in ('-', 'pipe:', 'pipe:1')
+
+
+def with_progress(cmd: Sequence[str]) -> List[str]:
+    """Acrescenta -progress ao comando (em stderr quando o stdout carrega a saída)"""
+    cmd = list(cmd)
+    if '-progress' in cmd:
+        return cmd
+    target = 'pipe:2' if writes_stdout(cmd) else 'pipe:1'
+    return [cmd[0], '-progress', target, '-nostats', *cmd[1:]]
+
+
+def _progress_stream(cmd: Sequence[str]) -> Optional[int]:
+    """Descritor (1 ou 2) para onde o comando envia -progress, se enviar"""
+    if '-progress' not in cmd:
+        return None
+    index = list(cmd).index('-progress')
+    target = cmd[index + 1] if index + 1 < len(cmd) else ''
+    return {'pipe:1': 1, 'pipe:': 1, 'pipe:2': 2}.get(target)
+
+
+def parse_progress_line(line: bytes, progress: JobProgress) -> Optional[str]:
+    """
+    Atualiza `progress` com uma linha key=value de -progress
+
+    Cada bloco de -progress termina com progress=continue (ou progress=end na última vez).
+
+    Returns:
+        Optional[str]: A chave lida, ou None se a linha não é de -progress (vai para o stderr)
+    """
+    key, _, value = line.decode('utf-8', errors='replace').strip().partition('=')
+    if key not in PROGRESS_KEYS:
+        return None
+    try:
+        if key == 'out_time_us' and value.isdigit():
+            progress.out_time = int(value) / 1e6
+        elif key == 'frame':
+            progress.frame = int(value)
+        elif key == 'total_size' and value.isdigit():
+            progress.total_size = int(value)
+        elif key == 'speed' and value.endswith('x'):
+            progress.speed = float(value[:-1])
+    except ValueError:
+        pass
+    if key == 'progress':
+        progress.done = value == 'end'
+    return key
+
+
+class _Limiter:
+    """Semáforo de processos e memória, seguro entre threads e event loops (ordem de chegada)"""
+
+    def __init__(self, slots: int, memory: int):
+        self.slots = max(1, slots)
+        self.memory = memory
+        self.used_slots = 0
+        self.used_memory = 0
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+
+    def _fits(self, memory: int) -> bool:
+        # Um processo maior que o orçamento inteiro ainda roda sozinho, para não travar
+        return self.used_slots < self.slots and (self.used_memory + memory <= self.memory or self.used_slots == 0)
+
+    def _take(self, memory: int):
+        self.used_slots += 1
+        self.used_memory += memory
+
+    def _wake(self):
+        while self._waiters and self._fits(self._waiters[0]['memory']):
+            waiter = self._waiters.popleft()
+            self._take(waiter['memory'])
+            waiter['granted'] = True
+            try:
+                waiter['loop'].call_soon_threadsafe(_resolve, waiter['future'])
+            except RuntimeError:
+                # Event loop já fechado: devolve a vaga
+                waiter['granted'] = False
+                self.used_slots -= 1
+                self.used_memory -= waiter['memory']
+
+    async def acquire(self, memory: int):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self._fits(memory):
+                self._take(memory)
+                return
+            waiter = {'memory': memory, 'loop': loop, 'future': loop.create_future(), 'granted': False}
+            self._waiters.append(waiter)
+        try:
+            await waiter['future']
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter['granted']:
+                    self.used_slots -= 1
+                    self.used_memory -= memory
+                    self._wake()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, memory: int):
+        with self._lock:
+            self.used_slots -= 1
+            self.used_memory -= memory
+            self._wake()
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class MediaExecutor:
+    """Executa ffmpeg/ffprobe com limite de processos e de memória"""
+
+    def __init__(self, max_jobs: Optional[int] = None, memory_budget: Optional[int] = None):
+        """
+        Args:
+            max_jobs: Processos simultâneos (padrão: FFMPEG_MAX_JOBS ou o número de CPUs)
+            memory_budget: Memória somada dos processos simultâneos em bytes (padrão:
+                FFMPEG_MEMORY_BUDGET_MB ou metade da memória disponível)
+        """
+        if max_jobs is None:
+            max_jobs = int(os.environ.get('FFMPEG_MAX_JOBS') or os.cpu_count() or 1)
+        if memory_budget is None:
+            budget_mb = os.environ.get('FFMPEG_MEMORY_BUDGET_MB')
+            memory_budget = (int(budget_mb) * 1024 * 1024 if budget_mb
+                             else int(available_memory() * MEMORY_FRACTION))
+        self.max_jobs = max_jobs
+        self.memory_budget = memory_budget
+        self._limiter = _Limiter(max_jobs, memory_budget)
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._probe_cache = collections.OrderedDict()
+        self._probe_lock = threading.Lock()
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    @property
+    def cached_probes(self) -> int:
+        return len(self._probe_cache)
+
+    async def run(self, cmd: Sequence[Union[str, Path]], *, input: Optional[bytes] = None, text: bool = False,
+                  timeout: Optional[float] = None, memory: Optional[int] = None,
+                  duration: Optional[float] = None, on_progress: Optional[Callable[[JobProgress], None]] = None,
+                  check: bool = True) -> JobResult:
+        """
+        Executa um comando quando houver vaga
+
+        Args:
+            cmd: Comando (o primeiro elemento é o executável)
+            input: Bytes enviados ao stdin
+            text: Decodificar o stdout como texto
+            timeout: Tempo máximo de execução (s), sem contar a espera por vaga
+            memory: Memória estimada do processo (bytes)
+            duration: Duração esperada da saída (s), para JobProgress.fraction
+            on_progress: Chamada com JobProgress a cada atualização (adiciona -progress ao comando)
+            check: Lançar MediaError quando o código de saída não for 0
+
+        Returns:
+            JobResult: Código de saída, stdout e o final do stderr
+        """
+        cmd = [str(part) for part in cmd]
+        if on_progress:
+            cmd = with_progress(cmd)
+        if memory is None:
+            memory = PROBE_MEMORY if Path(cmd[0]).name.startswith('ffprobe') else DEFAULT_MEMORY
+
+        await self._limiter.acquire(memory)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            with self._running_lock:
+                self._running.add(process)
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    self._communicate(process, cmd, input, duration, on_progress), timeout
+                )
+            except asyncio.TimeoutError:
+                await self._kill(process)
+                raise MediaTimeout(cmd, process.returncode, '',
+                                   f"{Path(cmd[0]).name} passou do limite de {timeout:g}s e foi encerrado")
+            except BaseException:
+                await self._kill(process)
+                raise
+            finally:
+                with self._running_lock:
+                    self._running.discard(process)
+        finally:
+            self._limiter.release(memory)
+
+        result = JobResult(process.returncode, stdout.decode('utf-8', errors='replace') if text else stdout, stderr)
+        if check and result.returncode != 0:
+            raise MediaError(cmd, result.returncode, stderr)
+        return result
+
+    async def _communicate(self, process, cmd, input, duration, on_progress):
+        progress_fd = _progress_stream(cmd) if on_progress else None
+        progress = JobProgress(duration=duration)
+        tail = bytearray()
+
+        def parse(line: bytes) -> bool:
+            key = parse_progress_line(line, progress)
+            if key == 'progress':
+                on_progress(progress)
+            return key is not None
+
+        async def feed():
+            try:
+                process.stdin.write(input)
+                await process.stdin.drain()
+                process.stdin.close()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        async def read_stdout():
+            if progress_fd != 1:
+                return await process.stdout.read()
+            async for line in process.stdout:
+                parse(line)
+            return b''
+
+        async def read_stderr():
+            async for line in process.stderr:
+                if progress_fd == 2 and parse(line):
+                    continue
+                tail.extend(line)
+                if len(tail) > STDERR_TAIL:
+                    del tail[:len(tail) - STDERR_TAIL]
+
+        tasks = [read_stdout(), read_stderr()]
+        if input is not None:
+            tasks.append(feed())
+        stdout = (await asyncio.gather(*tasks))[0]
+        await process.wait()
+        return stdout, tail.decode('utf-8', errors='replace')
+
+    async def _kill(self, process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    def cancel_all(self):
+        """Encerra todos os processos em execução (pode ser chamado de qualquer thread)"""
+        with self._running_lock:
+            processes = list(self._running)
+        for process in processes:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+
+    async def probe(self, path: Union[str, Path], timeout: Optional[float] = PROBE_TIMEOUT) -> dict:
+        """
+        Formato e streams de um arquivo (JSON do ffprobe)
+
+        O resultado fica em cache enquanto o tamanho e o mtime do arquivo não mudarem, o que
+        só faz diferença em processos longos (`edit-video serve`, watcher).
+        """
+        try:
+            stat = os.stat(path)
+            key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            key = None
+
+        with self._probe_lock:
+            cached = self._probe_cache.get(key) if key else None
+            if cached is not None:
+                self._probe_cache.move_to_end(key)
+        if cached is not None:
+            # Guardado como texto para que cada chamador receba um dict próprio
+            return json.loads(cached)
+
+        cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_format', '-show_streams', str(path)]
+        result = await self.run(cmd, text=True, timeout=timeout)
+        info = json.loads(result.stdout)
+        if key:
+            with self._probe_lock:
+                self._probe_cache[key] = result.stdout
+                while len(self._probe_cache) > PROBE_CACHE_SIZE:
+                    self._probe_cache.popitem(last=False)
+        return info
+
+
+_executor: Optional[MediaExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> MediaExecutor:
+    """Executor compartilhado pelo processo"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = MediaExecutor()
+        return _executor
+
+
+def _run_sync(coroutine):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # Chamado de dentro de um event loop: roda em outra thread em vez de aninhar loops
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coroutine).result()
+
+
+def run(cmd: Sequence[Union[str, Path]], **kwargs) -> JobResult:
+    """Versão síncrona de MediaExecutor.run no executor compartilhado"""
+    return _run_sync(get_executor().run(cmd, **kwargs))
+
+
+def probe(path: Union[str, Path], timeout: Optional[float] = PROBE_TIMEOUT) -> dict:
+    """Versão síncrona de MediaExecutor.probe no executor compartilhado"""
+    return _run_sync(get_executor().probe(path, timeout=timeout))
@@ -0,0 +1,197 @@
+"""Cliente do serviço local (`edit-video serve`)
+
+Usa apenas a biblioteca padrão (http.client e socket), para que o modo cliente do CLI não
+importe aiohttp, pydub ou numpy: o trabalho pesado e os caches ficam no processo do serviço.
+
+Endereços aceitos:
+- caminho de um socket Unix (`/tmp/edit-video.sock` ou `unix:/tmp/edit-video.sock`)
+- endereço TCP local (`http://127.0.0.1:8765` ou `127.0.0.1:8765`)
+
+Em TCP o serviço exige o token que grava ao iniciar em token_path() (arquivo 0600 do usuário),
+enviado no cabeçalho `Authorization: Bearer <token>`.
+"""
+import os
+import json
+import socket
+import http.client
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+from urllib.parse import urlsplit
+
+# Porta usada quando não há sockets Unix (Windows) ou quando `serve --port` é usado sem valor
+DEFAULT_PORT = 8765
+
+# Tempo máximo para conectar e receber a resposta de uma requisição curta (s)
+REQUEST_TIMEOUT = 10.0
+
+
+class ServiceUnavailable(ConnectionError):
+    """Não há serviço escutando no endereço"""
+
+
+class ServiceError(RuntimeError):
+    """O serviço recusou a requisição ou o job falhou"""
+
+
+def _runtime_dir() -> Path:
+    runtime = os.environ.get('XDG_RUNTIME_DIR') or str(Path.home() / '.cache')
+    return Path(runtime) / 'edit-video'
+
+
+def default_address() -> str:
+    """Endereço padrão: EDIT_VIDEO_SERVER ou um socket Unix no diretório de runtime do usuário"""
+    address = os.environ.get('EDIT_VIDEO_SERVER')
+    if address:
+        return address
+    if not hasattr(socket, 'AF_UNIX'):
+        return f"http://127.0.0.1:{DEFAULT_PORT}"
+    return str(_runtime_dir() / 'serve.sock')
+
+
+def token_path() -> Path:
+    """Arquivo do token do serviço em TCP: EDIT_VIDEO_TOKEN_FILE ou serve.token no diretório do usuário"""
+    path = os.environ.get('EDIT_VIDEO_TOKEN_FILE')
+    return Path(path).expanduser() if path else _runtime_dir() / 'serve.token'
+
+
+def read_token() -> Optional[str]:
+    """Token gravado pelo serviço, ou None se não houver serviço TCP no ar"""
+    try:
+        return token_path().read_text(encoding='utf-8').strip() or None
+    except OSError:
+        return None
+
+
+def parse_address(address: str):
+    """
+    Separa um endereço em ('unix', caminho) ou ('tcp', (host, porta))
+
+    Raises:
+        ValueError: Endereço em formato desconhecido
+    """
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    if address.startswith(('/', '.', '~')):
+        return 'unix', os.path.expanduser(address)
+    parts = urlsplit(address if '://' in address else f"http://{address}")
+    if parts.scheme != 'http' or not parts.hostname:
+        raise ValueError(f"Endereço do serviço inválido: {address}")
+    return 'tcp', (parts.hostname, parts.port or DEFAULT_PORT)
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    """HTTPConnection sobre um socket Unix"""
+
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__('localhost', timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+class ServiceClient:
+    """Envia jobs ao serviço e acompanha seus eventos"""
+
+    def __init__(self, address: Optional[str] = None, timeout: float = REQUEST_TIMEOUT):
+        self.address = address or default_address()
+        self.kind, self.target = parse_address(self.address)
+        self.timeout = timeout
+
+    def _connection(self, timeout: Optional[float]):
+        if self.kind == 'unix':
+            return _UnixConnection(self.target, timeout=timeout)
+        host, port = self.target
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _open(self, method: str, path: str, body: Optional[dict] = None, timeout: Optional[float] = None):
+        connection = self._connection(timeout)
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        if self.kind == 'tcp':
+            # Lido a cada requisição: o serviço gera um token novo sempre que reinicia
+            token = read_token()
+            if token:
+                headers['Authorization'] = f"Bearer {token}"
+        try:
+            connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                               headers=headers)
+            response = connection.getresponse()
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            connection.close()
+            raise ServiceUnavailable(f"Serviço não encontrado em {self.address}") from e
+        except OSError:
+            connection.close()
+            raise
+        if response.status >= 400:
+            try:
+                message = json.loads(response.read()).get('error')
+            except ValueError:
+                message = None
+            connection.close()
+            raise ServiceError(message or f"O serviço respondeu {response.status} {response.reason}")
+        return connection, response
+
+    def request(self, method: str, path: str, body: Optional[dict] = None) -> dict:
+        """Requisição com resposta JSON"""
+        connection, response = self._open(method, path, body, timeout=self.timeout)
+        try:
+            return json.loads(response.read())
+        finally:
+            connection.close()
+
+    def health(self) -> dict:
+        """Estado do serviço (pid, tempo no ar, jobs e caches)"""
+        return self.request('GET', '/health')
+
+    def submit(self, kind: str, params: dict) -> dict:
+        """Cria um job ('transcribe', 'seo', 'analyze', 'silence' ou 'peaks') e retorna seu estado inicial"""
+        return self.request('POST', f"/{kind}", params)
+
+    def cancel(self, job_id: str) -> dict:
+        """Cancela um job na fila ou em execução"""
+        return self.request('DELETE', f"/jobs/{job_id}")
+
+    def events(self, job_id: str) -> Iterator[dict]:
+        """Eventos do job (NDJSON), desde o primeiro, até o evento final"""
+        # Sem timeout de leitura: uma transcrição pode passar minutos sem eventos
+        connection, response = self._open('GET', f"/jobs/{job_id}/events")
+        try:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            connection.close()
+
+    def run(self, kind: str, params: dict, on_event: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Cria um job e espera o resultado, repassando os eventos
+
+        Args:
+            kind: Tipo do job
+            params: Parâmetros do job (caminhos absolutos)
+            on_event: Chamada com cada evento recebido
+
+        Returns:
+            dict: Resultado do job
+
+        Raises:
+            ServiceError: O job falhou ou foi cancelado
+        """
+        job = self.submit(kind, params)
+        try:
+            for event in self.events(job['id']):
+                if on_event:
+                    on_event(event)
+                if event['type'] == 'done':
+                    return event['result']
+                if event['type'] in ('error', 'cancelled'):
+                    raise ServiceError(event.get('error') or "Job cancelado")
+        except KeyboardInterrupt:
+            try:
+                self.cancel(job['id'])
+            except (OSError, ServiceError):
+                pass
+            raise
+        raise ServiceError("A conexão com o serviço terminou antes do fim do job")
@@ -0,0 +1,261 @@
+"""Instrumentação por etapas (spans) com exportação no formato Chrome trace-event
+
+Uso:
+    from ..utils import tracing
+
+    with tracing.span("ffmpeg:convert", category="audio", bytes_in=size) as sp:
+        ...
+        sp.bytes_out = output_size
+
+Quando o rastreamento está desativado (padrão), `span` devolve um objeto vazio
+compartilhado e o custo é apenas uma verificação de flag.
+"""
+import os
+import sys
+import json
+import time
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_enabled = False
+_trace_memory = False
+_origin = 0.0
+_spans: List[dict] = []
+_open_spans: List['Span'] = []
+_lock = threading.Lock()
+_task_ids: Dict[int, int] = {}
+
+
+class _NullSpan:
+    """Span usado quando o rastreamento está desativado; ignora atributos"""
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Intervalo medido: tempo de parede, CPU do processo, bytes e pico de memória"""
+
+    def __init__(self, name: str, category: str, args: dict):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.bytes_in = args.pop('bytes_in', None)
+        self.bytes_out = args.pop('bytes_out', None)
+        self.peak_memory = 0
+
+    def set(self, **args):
+        """Adiciona argumentos livres ao span (aparecem no trace)"""
+        self.args.update(args)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(trace_memory: bool = True):
+    """
+    Ativa o rastreamento para o restante do processo
+
+    Args:
+        trace_memory: Medir o pico de memória Python com tracemalloc (mais custoso)
+    """
+    global _enabled, _trace_memory, _origin
+    _enabled = True
+    _origin = time.perf_counter()
+    _trace_memory = trace_memory
+    if trace_memory:
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def _rss_peak_kb() -> Optional[int]:
+    """Pico de RSS do processo (KB)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # No macOS ru_maxrss é em bytes; no Linux em KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def _thread_id() -> int:
+    """Identificador da 'thread' no trace: a task asyncio atual ou a thread do SO"""
+    try:
+        import asyncio
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is None:
+        return threading.get_ident() % 100000
+    with _lock:
+        return _task_ids.setdefault(id(task), 100000 + len(_task_ids))
+
+
+def _update_memory_peaks():
+    """Propaga o pico do tracemalloc para os spans abertos e reinicia o pico"""
+    import tracemalloc
+    _, peak = tracemalloc.get_traced_memory()
+    for open_span in _open_spans:
+        open_span.peak_memory = max(open_span.peak_memory, peak)
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+@contextmanager
+def span(name: str, category: str = 'app', **args):
+    """
+    Mede um trecho de código
+
+    O tempo de CPU vem de time.process_time e os.times, que medem o processo inteiro (e os seus
+    subprocessos), não o span: por isso vai para o trace como process_cpu_ms e child_cpu_ms.
+    Em spans que rodam ao mesmo tempo que outros (tasks assíncronas, threads), ele inclui a CPU
+    gasta pelos demais e só o tempo de parede é do próprio span.
+
+    Args:
+        name: Nome do span (ex: "gemini:request")
+        category: Categoria (ex: "audio", "llm", "io")
+        **args: Argumentos extras; bytes_in e bytes_out são tratados à parte
+    """
+    if not _enabled:
+        yield _NULL_SPAN
+        return
+
+    current = Span(name, category, args)
+    if _trace_memory:
+        with _lock:
+            _update_memory_peaks()
+            _open_spans.append(current)
+
+    tid = _thread_id()
+    children = os.times()
+    cpu_start = time.process_time()
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        ended = time.perf_counter()
+        cpu = time.process_time() - cpu_start
+        children_end = os.times()
+        child_cpu = (children_end.children_user + children_end.children_system
+                     - children.children_user - children.children_system)
+
+        if _trace_memory:
+            with _lock:
+                _update_memory_peaks()
+                if current in _open_spans:
+                    _open_spans.remove(current)
+
+        event_args = dict(current.args)
+        event_args['process_cpu_ms'] = round(cpu * 1000, 3)
+        if child_cpu:
+            event_args['child_cpu_ms'] = round(child_cpu * 1000, 3)
+        if current.bytes_in is not None:
+            event_args['bytes_in'] = current.bytes_in
+        if current.bytes_out is not None:
+            event_args['bytes_out'] = current.bytes_out
+        if _trace_memory:
+            event_args['peak_py_memory_kb'] = current.peak_memory // 1024
+        rss = _rss_peak_kb()
+        if rss is not None:
+            event_args['peak_rss_kb'] = rss
+
+        with _lock:
+            _spans.append({
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((started - _origin) * 1e6, 1),
+                'dur': round((ended - started) * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': event_args,
+            })
+
+
+def traced(name: str, category: str = 'app'):
+    """Decorador que envolve uma função (síncrona ou assíncrona) em um span"""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await function(*args, **kwargs)
+                with span(name, category):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with span(name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def file_size(path) -> Optional[int]:
+    """Tamanho do arquivo em bytes, ou None se não existir (só calculado com o rastreamento ativo)"""
+    if not _enabled:
+        return None
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+
+def events() -> List[dict]:
+    """Retorna uma cópia dos eventos registrados"""
+    with _lock:
+        return list(_spans)
+
+
+def write_chrome_trace(path):
+    """Salva os spans no formato Chrome trace-event (chrome://tracing, Perfetto)"""
+    data = {
+        'traceEvents': sorted(events(), key=lambda event: event['ts']),
+        'displayTimeUnit': 'ms',
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def summary() -> List[dict]:
+    """
+    Agrega os spans por nome
+
+    Returns:
+        List[dict]: Uma linha por nome com contagem, tempo total, CPU do processo durante os
+            spans (veja span), bytes e pico de memória, em ordem decrescente de tempo total
+    """
+    rows: Dict[str, dict] = {}
+    for event in events():
+        row = rows.setdefault(event['name'], {
+            'name': event['name'], 'category': event['cat'], 'count': 0, 'wall_ms': 0.0,
+            'process_cpu_ms': 0.0, 'child_cpu_ms': 0.0, 'bytes_in': 0, 'bytes_out': 0, 'peak_py_memory_kb': 0,
+        })
+        args = event['args']
+        row['count'] += 1
+        row['wall_ms'] += event['dur'] / 1000
+        row['process_cpu_ms'] += args.get('process_cpu_ms', 0)
+        row['child_cpu_ms'] += args.get('child_cpu_ms', 0)
+        row['bytes_in'] += args.get('bytes_in') or 0
+        row['bytes_out'] += args.get('bytes_out') or 0
+        row['peak_py_memory_kb'] = max(row['peak_py_memory_kb'], args.get('peak_py_memory_kb', 0))
+    return sorted(rows.values(), key=lambda row: row['wall_ms'], reverse=True)
@@ -0,0 +1,102 @@
+"""Testes das impressões digitais por picos espectrais e da busca de duplicatas"""
+import asyncio
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import speech_like_samples
+from src.core import duplicates
+from src.utils.media_executor import MediaError
+
+RATE = duplicates.DECODE_RATE
+
+
+def _library(tmp_path, audio):
+    """Arquivos de mentira: o índice só lê o caminho, o tamanho e o mtime"""
+    files = []
+    for name in audio:
+        media = tmp_path / name
+        media.write_bytes(name.encode())
+        files.append(media)
+    return files
+
+
+def test_bad_file_does_not_abort_precheck(tmp_path, monkeypatch):
+    samples = speech_like_samples(120, RATE, seed=7)
+    audio = {'aula.mp4': samples, 'sem-audio.mp4': None, 'aula-copia.mp4': samples * 0.5}
+    files = _library(tmp_path, audio)
+
+    async def fingerprint_media_async(media):
+        if audio[media.name] is None:
+            raise MediaError(['ffmpeg'], 1, "Stream map '0:a:0' matches no streams")
+        return duplicates.fingerprint_samples(audio[media.name])
+
+    monkeypatch.setattr(duplicates, 'fingerprint_media_async', fingerprint_media_async)
+    index = duplicates.FingerprintIndex(tmp_path / 'fingerprints.db')
+    found = asyncio.run(duplicates.precheck_async(files, index))
+
+    assert list(found) == [files[2]]
+    assert found[files[2]].path == str(files[0].resolve())
+    assert index.media_id(files[1]) is None
+
+
+def _indexed(tmp_path, audio):
+    index = duplicates.FingerprintIndex(tmp_path / 'fingerprints.db')
+    for media in _library(tmp_path, audio):
+        index.add(media, duplicates.fingerprint_samples(audio[media.name]))
+    return index
+
+
+def test_reexport_is_duplicate_and_excerpt_has_offset(tmp_path):
+    samples = speech_like_samples(120, RATE, seed=11)
+    index = _indexed(tmp_path, {'aula.mp4': samples})
+    noise = np.random.default_rng(3).standard_normal(len(samples)) * 0.01 * np.abs(samples).max()
+
+    [match] = index.matches(duplicates.fingerprint_samples(samples * 0.7 + noise))
+    assert match.duplicate
+    assert match.offset == pytest.approx(0.0, abs=0.02)
+
+    [match] = index.matches(duplicates.fingerprint_samples(samples[30 * RATE:60 * RATE]))
+    assert match.kind == 'near-duplicate'
+    assert match.offset == pytest.approx(30.0, abs=0.02)
+    assert match.overlap >= duplicates.DUPLICATE_OVERLAP
+    assert match.other_overlap < 0.4
+
+
+def test_unrelated_audio_does_not_match(tmp_path):
+    index = _indexed(tmp_path, {'aula.mp4': speech_like_samples(120, RATE, seed=11)})
+    assert index.matches(duplicates.fingerprint_samples(speech_like_samples(120, RATE, seed=12))) == []
+    assert index.matches(duplicates.fingerprint_samples(np.zeros(10 * RATE))) == []
+
+
+def _fake_fingerprints(monkeypatch, audio):
+    async def fingerprint_media_async(media):
+        return duplicates.fingerprint_samples(audio[media.name])
+
+    monkeypatch.setattr(duplicates, 'fingerprint_media_async', fingerprint_media_async)
+
+
+def test_resumed_mp3_is_not_a_duplicate_of_its_source(tmp_path, monkeypatch):
+    samples = speech_like_samples(120, RATE, seed=5)
+    audio = {'aula.mp4': samples, 'aula.mp3': samples * 0.8}
+    _fake_fingerprints(monkeypatch, audio)
+    [video, mp3] = _library(tmp_path, audio)
+    index = duplicates.FingerprintIndex(tmp_path / 'fingerprints.db')
+
+    # Primeira execução indexa o vídeo; ao retomar, collect_inputs entrega só o MP3 convertido
+    assert asyncio.run(duplicates.precheck_async([video], index)) == {}
+    assert asyncio.run(duplicates.precheck_async([mp3], index)) == {}
+
+
+def test_deleted_recording_is_ignored_and_pruned(tmp_path, monkeypatch):
+    samples = speech_like_samples(120, RATE, seed=9)
+    audio = {'aula.mp4': samples, 'aula-reexport.mp4': samples * 0.6}
+    _fake_fingerprints(monkeypatch, audio)
+    [original, reexport] = _library(tmp_path, audio)
+    index = duplicates.FingerprintIndex(tmp_path / 'fingerprints.db')
+    asyncio.run(duplicates.precheck_async([original], index))
+
+    original.unlink()
+    assert asyncio.run(duplicates.precheck_async([reexport], index)) == {}
+    assert index.media_id(original) is None
+    assert index.stats()['files'] == 1
@@ -0,0 +1,118 @@
+"""Testes da cópia rápida (reflink, copy_file_range e blocos) e dos modos de colocação"""
+import errno
+import os
+
+import pytest
+
+from src.utils import file_utils
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    # Blocos pequenos para que a cópia passe por vários blocos
+    monkeypatch.setattr(file_utils, 'COPY_CHUNK_SIZE', 1000)
+    path = tmp_path / 'aula.mp4'
+    path.write_bytes(os.urandom(4500))
+    os.utime(path, (1_600_000_000, 1_600_000_000))
+    return path
+
+
+def _no_reflink(source_fd, destination_fd):
+    raise OSError(errno.EOPNOTSUPP, "sem reflink")
+
+
+def _fake_copy_file_range(fail_after=None):
+    """copy_file_range em espaço do usuário; com fail_after, falha depois de copiar esses bytes"""
+    copied = [0]
+
+    def copy_file_range(source_fd, destination_fd, count):
+        if fail_after is not None and copied[0] >= fail_after:
+            raise OSError(errno.EXDEV, "entre sistemas de arquivos")
+        written = os.write(destination_fd, os.read(source_fd, count))
+        copied[0] += written
+        return written
+    return copy_file_range
+
+
+def _copy(source, destination, **kwargs):
+    progress = []
+    method = file_utils.copy_file_fast(str(source), str(destination), progress.append, **kwargs)
+    return method, progress
+
+
+def test_reflink_is_tried_first(source, tmp_path, monkeypatch):
+    def reflink(source_fd, destination_fd):
+        os.write(destination_fd, os.read(source_fd, 1 << 20))
+    monkeypatch.setattr(file_utils, '_reflink', reflink)
+    destination = tmp_path / 'copia.mp4'
+
+    method, progress = _copy(source, destination)
+
+    assert (method, progress) == ('reflink', [4500])
+    assert destination.read_bytes() == source.read_bytes()
+    assert destination.stat().st_mtime == source.stat().st_mtime
+
+
+def test_copy_file_range_when_reflink_is_not_supported(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, '_reflink', _no_reflink)
+    monkeypatch.setattr(os, 'copy_file_range', _fake_copy_file_range(), raising=False)
+    destination = tmp_path / 'copia.mp4'
+
+    method, progress = _copy(source, destination)
+
+    assert method == 'copy_file_range'
+    assert progress == [1000, 1000, 1000, 1000, 500]
+    assert destination.read_bytes() == source.read_bytes()
+
+
+def test_chunked_copy_restarts_after_partial_copy_file_range(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, '_reflink', _no_reflink)
+    monkeypatch.setattr(os, 'copy_file_range', _fake_copy_file_range(fail_after=2000), raising=False)
+    destination = tmp_path / 'copia.mp4'
+
+    method, _ = _copy(source, destination)
+
+    assert method == 'chunked'
+    assert destination.read_bytes() == source.read_bytes()
+
+
+def test_chunked_copy_without_copy_file_range(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, '_reflink', _no_reflink)
+    monkeypatch.delattr(os, 'copy_file_range', raising=False)
+    destination = tmp_path / 'copia.mp4'
+
+    method, progress = _copy(source, destination)
+
+    assert (method, sum(progress)) == ('chunked', 4500)
+    assert destination.read_bytes() == source.read_bytes()
+
+
+def test_required_reflink_fails_without_leaving_files(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_utils, '_reflink', _no_reflink)
+
+    with pytest.raises(OSError, match='reflink'):
+        file_utils.place_file(str(source), str(tmp_path / 'copia.mp4'), mode='reflink')
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['aula.mp4']
+
+
+def test_move_across_file_systems_copies_then_removes(source, tmp_path, monkeypatch):
+    content = source.read_bytes()
+    monkeypatch.setattr(file_utils, '_reflink', _no_reflink)
+    monkeypatch.delattr(os, 'copy_file_range', raising=False)
+
+    def rename(source_path, destination_path):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+    monkeypatch.setattr(os, 'rename', rename)
+    destination = tmp_path / 'movido.mp4'
+
+    assert file_utils.place_file(str(source), str(destination), mode='move') == 'move (chunked)'
+    assert not source.exists()
+    assert destination.read_bytes() == content
+
+
+def test_hardlink_and_invalid_mode(source, tmp_path):
+    destination = tmp_path / 'link.mp4'
+    assert file_utils.place_file(str(source), str(destination), mode='hardlink') == 'hardlink'
+    assert destination.stat().st_ino == source.stat().st_ino
+    with pytest.raises(ValueError):
+        file_utils.place_file(str(source), str(tmp_path / 'x.mp4'), mode='symlink')
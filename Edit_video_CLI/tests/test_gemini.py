@@ -0,0 +1,135 @@
+"""Testes do cliente do Gemini sem acesso à rede"""
+import asyncio
+
+import pytest
+
+from src.llm import gemini
+from src.llm.gemini import GeminiClient, GeminiResponse
+
+
+def _client(monkeypatch, answers):
+    """Cliente cujo _send responde por modelo: status 200 com o texto, ou o status de erro"""
+    gemini.load_environment()
+    monkeypatch.setattr(gemini, 'PREFERRED_MODELS', ['modelo-a', 'modelo-b', 'modelo-c'])
+    client = GeminiClient(api_key='teste')
+    client.model = 'modelo-a'
+    sent = []
+
+    async def send(data, operation="text", model=None):
+        sent.append(model)
+        await asyncio.sleep(0.01)
+        answer = answers[model]
+        if isinstance(answer, int):
+            return GeminiResponse(answer, "erro", None, model)
+        return GeminiResponse(200, "", {"candidates": [{"content": {"parts": [{"text": answer}]}}]}, model)
+
+    monkeypatch.setattr(client, '_send', send)
+    return client, sent
+
+
+def test_fallback_reports_answering_model_without_changing_client(monkeypatch):
+    client, sent = _client(monkeypatch, {'modelo-a': 503, 'modelo-b': 'texto do b', 'modelo-c': 'texto do c'})
+
+    text, model = asyncio.run(client.transcribe_audio_data(b'mp3'))
+
+    assert (text, model) == ('texto do b', 'modelo-b')
+    assert sent == ['modelo-a', 'modelo-b']
+    assert client.model == 'modelo-a'
+
+
+def test_concurrent_transcriptions_keep_their_models(monkeypatch):
+    client, sent = _client(monkeypatch, {'modelo-a': 503, 'modelo-b': 'texto do b', 'modelo-c': 'texto do c'})
+
+    async def run():
+        return await asyncio.gather(*(client.transcribe_audio_data(b'mp3', model=model)
+                                      for model in ('modelo-a', 'modelo-c', 'modelo-a', 'modelo-c')))
+
+    results = asyncio.run(run())
+
+    assert [model for _, model in results] == ['modelo-b', 'modelo-c', 'modelo-b', 'modelo-c']
+    assert client.model == 'modelo-a'
+
+
+def _hedging_client(monkeypatch, answers):
+    """Cliente com hedging após 50 ms cujo _request responde por modelo com (atraso, status)"""
+    gemini.load_environment()
+    monkeypatch.setattr(GeminiClient, 'hedge_stats', {"requests": 0, "hedged": 0, "hedge_wins": 0})
+    monkeypatch.setattr(GeminiClient, '_latency_trackers', {})
+    client = GeminiClient(api_key='teste', hedge=True, hedge_budget=1.0, hedge_model='modelo-b',
+                          hedge_initial_delay=0.05)
+
+    async def request(session, model, data, operation):
+        delay, status = answers[model]
+        await asyncio.sleep(delay)
+        return GeminiResponse(status, f"erro do {model}", {} if status == 200 else None, model)
+
+    monkeypatch.setattr(client, '_request', request)
+    return client
+
+
+def _cancel_send_after(client, seconds, calls):
+    """Cancela o chamador de _send depois de alguns segundos e devolve o estado de cada requisição"""
+    request = client._request
+
+    async def tracked_request(session, model, data, operation):
+        calls[model] = 'enviada'
+        try:
+            return await request(session, model, data, operation)
+        except asyncio.CancelledError:
+            calls[model] = 'cancelada'
+            raise
+
+    client._request = tracked_request
+
+    async def run():
+        caller = asyncio.ensure_future(client._send({}, model='modelo-a'))
+        await asyncio.sleep(seconds)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        # Uma volta do loop para as requisições canceladas tratarem o cancelamento; a cópia é
+        # feita antes de asyncio.run cancelar por conta própria o que ainda estiver pendente
+        await asyncio.sleep(0)
+        return dict(calls)
+
+    return asyncio.run(run())
+
+
+def test_cancelling_during_hedge_delay_cancels_the_original(monkeypatch):
+    client = _hedging_client(monkeypatch, {'modelo-a': (0.5, 200), 'modelo-b': (0.01, 200)})
+
+    calls = _cancel_send_after(client, 0.02, {})
+
+    assert calls == {'modelo-a': 'cancelada'}
+    assert GeminiClient.hedge_stats["hedged"] == 0
+
+
+def test_cancelling_during_hedge_race_cancels_both_requests(monkeypatch):
+    client = _hedging_client(monkeypatch, {'modelo-a': (0.5, 200), 'modelo-b': (0.5, 200)})
+
+    calls = _cancel_send_after(client, 0.1, {})
+
+    assert calls == {'modelo-a': 'cancelada', 'modelo-b': 'cancelada'}
+    assert GeminiClient.hedge_stats == {"requests": 1, "hedged": 1, "hedge_wins": 0}
+
+
+def test_hedge_wins_and_cancelled_original_is_recorded(monkeypatch):
+    client = _hedging_client(monkeypatch, {'modelo-a': (0.5, 200), 'modelo-b': (0.01, 200)})
+
+    response = asyncio.run(client._send({}, model='modelo-a'))
+
+    assert response.model == 'modelo-b'
+    assert GeminiClient.hedge_stats == {"requests": 1, "hedged": 1, "hedge_wins": 1}
+    # A original cancelada entra no rastreador com o tempo que já tinha esperado
+    [censored] = client._tracker('modelo-a', 'text').samples
+    assert 0.05 <= censored < 0.5
+    assert len(client._tracker('modelo-b', 'text').samples) == 1
+
+
+def test_when_both_fail_the_original_error_is_returned(monkeypatch):
+    client = _hedging_client(monkeypatch, {'modelo-a': (0.1, 500), 'modelo-b': (0.01, 503)})
+
+    response = asyncio.run(client._send({}, model='modelo-a'))
+
+    assert (response.status, response.text) == (500, "erro do modelo-a")
+    assert GeminiClient.hedge_stats["hedge_wins"] == 0
@@ -0,0 +1,105 @@
+"""Testes do manifesto de checksums por blocos e da verificação de pastas"""
+import hashlib
+import json
+import mmap
+import os
+
+import pytest
+
+from src.core import integrity, organizer
+
+BLOCK = mmap.ALLOCATIONGRANULARITY
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Blocos pequenos para exercitar arquivos de vários blocos sem gravar centenas de MB
+    monkeypatch.setattr(integrity, 'BLOCK_SIZE', BLOCK)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / 'Aula'
+    folder.mkdir()
+    (folder / 'tela.mp4').write_bytes(os.urandom(BLOCK * 3 + 100))
+    (folder / 'audio.mp3').write_bytes(os.urandom(500))
+    (folder / 'vazio.json').write_bytes(b'')
+    return folder
+
+
+def _write(folder):
+    return integrity.write_checksums(folder, {path.name: path for path in folder.iterdir()})
+
+
+def test_digests_match_sha256(folder):
+    manifest = json.loads(_write(folder).read_text())
+    data = (folder / 'tela.mp4').read_bytes()
+
+    tela = manifest['files']['tela.mp4']
+    assert tela['blocks'] == [hashlib.sha256(data[offset:offset + BLOCK]).hexdigest()
+                              for offset in range(0, len(data), BLOCK)]
+    assert tela['sha256'] == integrity.combine_blocks(tela['blocks'])
+    # Um único bloco: o digest é o SHA-256 do arquivo inteiro
+    audio = (folder / 'audio.mp3').read_bytes()
+    assert manifest['files']['audio.mp3']['sha256'] == hashlib.sha256(audio).hexdigest()
+    assert manifest['files']['vazio.json']['sha256'] == hashlib.sha256(b'').hexdigest()
+
+
+def test_matching_folder_passes_and_is_skipped_next_time(folder):
+    _write(folder)
+
+    first = integrity.verify_folder(folder)
+    assert first.passed and sorted(first.ok) == ['audio.mp3', 'tela.mp4', 'vazio.json']
+
+    second = integrity.verify_folder(folder)
+    assert second.passed and second.ok == [] and len(second.skipped) == 3
+    assert len(integrity.verify_folder(folder, full=True).ok) == 3
+
+
+def test_corrupted_and_missing_files_fail(folder):
+    _write(folder)
+    integrity.verify_folder(folder)
+
+    tela = folder / 'tela.mp4'
+    data = bytearray(tela.read_bytes())
+    data[2 * BLOCK + 7] ^= 0xFF
+    stat = tela.stat()
+    tela.write_bytes(bytes(data))
+    # Mesmo com o mtime restaurado, full recalcula tudo
+    os.utime(tela, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    (folder / 'audio.mp3').unlink()
+    with open(folder / 'vazio.json', 'wb') as f:
+        f.write(b'{}')
+
+    result = integrity.verify_folder(folder, full=True)
+
+    assert not result.passed
+    assert result.corrupted['tela.mp4'] == f"bloco 2 diferente (a partir do byte {2 * BLOCK})"
+    assert result.corrupted['vazio.json'] == "tamanho 2 != 0"
+    assert result.missing == ['audio.mp3']
+    # Arquivos com problema deixam de contar como verificados
+    assert integrity.verify_folder(folder).skipped == []
+
+
+def _recording(tmp_path):
+    recording = tmp_path / 'Gravacao.screenstudio' / 'recording'
+    recording.mkdir(parents=True)
+    (recording / organizer.SEO_TEMPLATE_NAME).write_text(json.dumps({'title': 'Aula de Python'}))
+    (recording / 'channel-1-display-0.mp4').write_bytes(os.urandom(BLOCK * 2 + 1))
+    (recording / 'channel-2-microphone-0.mp3').write_bytes(os.urandom(300))
+    return recording
+
+
+def test_move_mode_hashes_the_moved_files(tmp_path):
+    recording = _recording(tmp_path)
+    originals = {path.name: path.read_bytes() for path in recording.iterdir()}
+
+    result = organizer.organize_recording(recording.parent, mode='move')
+
+    assert result.destination == tmp_path / 'Aula-de-Python'
+    assert sorted(result.methods.values()) == ['move'] * 3
+    assert not (recording / 'channel-1-display-0.mp4').exists()
+    manifest = json.loads(result.checksums.read_text())
+    for name, content in originals.items():
+        assert manifest['files'][name]['size'] == len(content)
+    assert integrity.verify_folder(result.destination).passed
@@ -0,0 +1,129 @@
+"""Testes da fila de jobs em SQLite e do worker"""
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core import job_queue
+from src.core.job_queue import JobQueue, QueueWorker
+
+
+def _job_row(queue, job_id):
+    with queue._connect() as db:
+        return db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+
+@pytest.fixture
+def queue(tmp_path):
+    target = tmp_path / 'aula.mp4'
+    target.write_bytes(b'video')
+    queue = JobQueue(tmp_path / 'queue.db')
+    queue.add(target)
+    return queue
+
+
+def test_complete_stage_renews_the_lease(queue):
+    job = queue.claim('worker', lease=10.0)
+    started = time.time()
+    # A etapa terminou com o lease quase vencido
+    with queue._connect(write=True) as db:
+        db.execute("UPDATE jobs SET lease_expires = ? WHERE id = ?", (started + 0.5, job.id))
+
+    assert queue.complete_stage(job, 'worker', started, lease=10.0)
+    row = _job_row(queue, job.id)
+    assert row['stage'] == 'transcribe'
+    assert row['lease_expires'] >= started + 9.0
+    assert queue.claim('outro', lease=10.0) is None
+    assert not queue.complete_stage(job, 'outro', started)
+
+
+def test_cancelled_job_is_released_off_the_event_loop(queue, monkeypatch):
+    stage_started = asyncio.Event()
+    released_in = []
+
+    async def run_stage(job):
+        stage_started.set()
+        await asyncio.sleep(60)
+
+    release = queue.release
+
+    def tracked_release(job, owner):
+        released_in.append(threading.current_thread())
+        release(job, owner)
+
+    monkeypatch.setattr(job_queue, 'run_stage', run_stage)
+    monkeypatch.setattr(queue, 'release', tracked_release)
+    worker = QueueWorker(queue, concurrency=1)
+
+    async def run():
+        task = asyncio.ensure_future(worker.run_async())
+        await stage_started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+    assert released_in and released_in[0] is not threading.main_thread()
+    row = _job_row(queue, 1)
+    assert (row['status'], row['stage'], row['lease_owner']) == ('queued', 'convert', None)
+
+
+def test_expired_leases_count_as_attempts_until_the_job_fails(queue):
+    for attempt in range(1, job_queue.MAX_ATTEMPTS):
+        # O worker "morre": o lease já nasce vencido e ninguém o renova
+        job = queue.claim(f'worker-{attempt}', lease=-1.0)
+        assert job is not None and job.attempts == attempt - 1
+
+    job = queue.claim('ultimo', lease=-1.0)
+    assert job.attempts == job_queue.MAX_ATTEMPTS - 1
+    assert queue.claim('outro') is None
+
+    row = _job_row(queue, job.id)
+    assert (row['status'], row['attempts'], row['lease_owner']) == ('failed', job_queue.MAX_ATTEMPTS, None)
+    assert "lease expirado" in row['error']
+    with queue._connect() as db:
+        statuses = [r['status'] for r in db.execute("SELECT status FROM runs ORDER BY id")]
+    assert statuses == ['lost'] * (job_queue.MAX_ATTEMPTS - 1) + ['failed']
+
+
+def test_recover_counts_dead_workers_as_attempts(queue):
+    queue.claim(f'{socket.gethostname()}:999999999:morto', lease=60.0)
+    assert queue.recover() == 1
+    row = _job_row(queue, 1)
+    assert (row['status'], row['attempts']) == ('queued', 1)
+
+
+def test_heartbeat_does_not_wait_for_busy_stage_executor(queue, monkeypatch):
+    heartbeats = []
+
+    async def run_stage(job):
+        if job.stage == 'convert':
+            # Ocupa a única thread do executor padrão por vários intervalos de heartbeat
+            await asyncio.get_running_loop().run_in_executor(None, time.sleep, 0.5)
+
+    heartbeat = queue.heartbeat
+
+    def tracked_heartbeat(*args):
+        heartbeats.append((time.monotonic(), threading.current_thread().name))
+        return heartbeat(*args)
+
+    monkeypatch.setattr(job_queue, 'run_stage', run_stage)
+    monkeypatch.setattr(queue, 'heartbeat', tracked_heartbeat)
+    worker = QueueWorker(queue, concurrency=1, lease=0.3, drain=True)
+
+    async def run():
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        started = time.monotonic()
+        await worker.run_async()
+        return started
+
+    started = asyncio.run(run())
+
+    during_stage = [name for at, name in heartbeats if at - started < 0.5]
+    assert len(during_stage) >= 3
+    assert all(name.startswith('queue-heartbeat') for _, name in heartbeats)
+    assert _job_row(queue, 1)['status'] == 'done'
@@ -0,0 +1,33 @@
+"""Testes dos intervalos mantidos e dos filtros de corte do jump cut"""
+import re
+
+import pytest
+
+from src.core.jump_cut import cut_offset_expression, keep_intervals, video_cut_filter
+
+
+def _evaluate(expression, time):
+    """Avalia a expressão de deslocamento do ffmpeg para um instante T"""
+    return eval(expression, {'gte': lambda a, b: float(a >= b), 'T': time})
+
+
+def test_keep_intervals_pad_silences_and_skip_short_ones():
+    # O silêncio de 0,1 s some com a margem de 0,1 s de cada lado
+    silences = [{'start': 3.0, 'end': 3.1}, {'start': 1.0, 'end': 2.0}, {'start': 5.0, 'end': 6.5}]
+    assert keep_intervals(silences, 6.0, padding=0.1) == [(0.0, 1.1), (1.9, 5.1)]
+
+
+@pytest.mark.parametrize('time, output', [(1.0, 0.0), (1.5, 0.5), (2.0, 1.0), (4.5, 1.0), (4.75, 1.25),
+                                          (10.0, 1.25), (11.0, 2.25)])
+def test_kept_frames_keep_their_timestamps(time, output):
+    # Quadros em instantes irregulares (taxa variável) saem no mesmo lugar relativo ao áudio
+    keep = [(1.0, 2.0), (4.5, 4.75), (10.0, 12.0)]
+    assert time - _evaluate(cut_offset_expression(keep), time) == pytest.approx(output)
+
+
+def test_video_filter_uses_timestamps_not_frame_numbers():
+    keep = [(0.0, 1.0), (2.0, 3.0)]
+    cut = video_cut_filter(keep)
+    assert 'N/FRAME_RATE' not in cut
+    assert re.fullmatch(r"select='between\(t,0\.000,1\.000\)\+between\(t,2\.000,3\.000\)',"
+                        r"setpts='PTS-\(0\.000\+1\.000\*gte\(T,2\.000\)\)/TB'", cut)
@@ -0,0 +1,43 @@
+"""Testes da extração local de palavras-chave"""
+from src.core.keywords import Idf, candidate_tags, extract_keywords, fold
+
+TEXT = ("Hoje vamos configurar o servidor Nginx. O servidor Nginx recebe as requisições. "
+        "Depois configuramos o certificado digital no servidor Nginx. "
+        "Sem certificado digital o navegador reclama. Pessoal, pessoal, pessoal!")
+
+
+def _terms(keywords):
+    return [keyword.term for keyword in keywords]
+
+
+def test_fold_lowercases_and_strips_accents():
+    assert fold('Edição') == 'edicao'
+    assert fold('PROGRAMAÇÃO') == 'programacao'
+
+
+def test_repeated_phrases_win_and_stopwords_are_ignored():
+    keywords = extract_keywords(TEXT, idf=Idf())
+    terms = _terms(keywords)
+    assert terms[0] == 'servidor nginx'
+    assert 'certificado digital' in terms
+    # Stopwords nunca viram palavra-chave, por mais que se repitam
+    assert 'pessoal' not in terms
+    # Palavras que só aparecem dentro de uma expressão escolhida não se repetem sozinhas
+    assert 'nginx' not in terms and 'servidor' not in terms
+    assert [keyword.count for keyword in keywords if keyword.term == 'servidor nginx'] == [3]
+    assert [keyword.score for keyword in keywords] == sorted((keyword.score for keyword in keywords), reverse=True)
+
+
+def test_library_idf_lowers_common_words():
+    # "servidor" e "nginx" aparecem em todo vídeo do canal; "certificado" é raro
+    idf = Idf(100, {'servidor': 100, 'nginx': 100, 'certificado': 2, 'digital': 5})
+    assert _terms(extract_keywords(TEXT, idf=idf))[0] == 'certificado digital'
+
+
+def test_surface_form_keeps_accents_and_limits():
+    text = "A edição de vídeo é fácil. Edição de vídeo com cortes. Mais edição, menos vídeo."
+    keywords = extract_keywords(text, limit=1, idf=Idf())
+    assert len(keywords) == 1
+    assert 'edição' in keywords[0].term
+    assert extract_keywords("é de que o a", idf=Idf()) == []
+    assert candidate_tags(extract_keywords(TEXT, idf=Idf()), max_chars=14) == ['servidor nginx']
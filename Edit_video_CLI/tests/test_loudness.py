@@ -0,0 +1,61 @@
+"""Testes da medição de loudness contra sinais de referência da EBU Tech 3341"""
+import math
+
+import numpy as np
+import pytest
+
+from src.core import loudness
+
+RATE = 48000
+
+
+def _sine(seconds, dbfs, channels=2, frequency=1000.0):
+    t = np.arange(int(seconds * RATE)) / RATE
+    tone = 10 ** (dbfs / 20) * np.sin(2 * np.pi * frequency * t)
+    return np.repeat(tone[:, None], channels, axis=1)
+
+
+def _measure(samples, chunk=None):
+    meter = loudness.LoudnessMeter(RATE, samples.shape[1])
+    chunk = chunk or meter.block_size
+    for start in range(0, len(samples), chunk):
+        meter.add(samples[start:start + chunk])
+    return meter.result()
+
+
+def test_stereo_sine_reads_its_level():
+    # EBU Tech 3341, caso 1: seno estéreo de 1 kHz a -23 dBFS mede -23.0 LUFS
+    result = _measure(_sine(20, -23.0))
+    assert result.integrated == pytest.approx(-23.0, abs=0.1)
+    assert result.peak == pytest.approx(-23.0, abs=0.01)
+
+
+def test_relative_gate_ignores_quiet_passages():
+    # EBU Tech 3341, caso 3: -36 / -23 / -36 dBFS por 10 / 60 / 10 s mede -23.0 LUFS
+    samples = np.concatenate([_sine(10, -36.0), _sine(60, -23.0), _sine(10, -36.0)])
+    assert _measure(samples).integrated == pytest.approx(-23.0, abs=0.1)
+
+
+def test_block_size_does_not_change_the_result():
+    samples = np.concatenate([_sine(5, -30.0), _sine(5, -18.0, frequency=100.0)])
+    assert _measure(samples, chunk=10007).integrated == pytest.approx(_measure(samples).integrated, abs=1e-6)
+
+
+def test_silence_has_no_loudness():
+    result = _measure(np.zeros((RATE * 2, 1)))
+    assert result.integrated == -math.inf
+    assert loudness.normalization_gain(result) == (0.0, False)
+
+
+def test_gain_respects_peak_limit():
+    result = loudness.LoudnessResult(integrated=-20.0, peak=-3.0)
+    assert loudness.normalization_gain(result, target=-14.0) == (2.0, True)
+    assert loudness.normalization_gain(result, target=-14.0, max_peak=None) == (6.0, False)
+
+
+def test_measure_segment_scales_integer_samples():
+    from pydub import AudioSegment
+
+    pcm = np.round(_sine(10, -23.0) * 32767).astype('<i2')
+    segment = AudioSegment(pcm.tobytes(), frame_rate=RATE, sample_width=2, channels=2)
+    assert loudness.measure_segment(segment).integrated == pytest.approx(-23.0, abs=0.1)
@@ -0,0 +1,84 @@
+"""Testes do manifesto incremental: quando uma etapa é reaproveitada e quando é refeita"""
+import asyncio
+import os
+
+from src.core import pipeline, seo_generator, search_index
+from src.core.manifest import Manifest
+
+
+def _recorded(tmp_path, params=None):
+    """Manifesto salvo com a etapa 'transcribe' de aula.mp3 -> aula.txt"""
+    source = tmp_path / 'aula.mp3'
+    source.write_bytes(b'audio')
+    output = tmp_path / 'aula.txt'
+    output.write_text('transcrição', encoding='utf-8')
+    manifest = Manifest.for_media(source)
+    manifest.record('transcribe', [source], params or {'model': 'a'}, [output])
+    manifest.save()
+    return source, output
+
+
+def test_unchanged_stage_is_reused_after_reload(tmp_path):
+    source, _ = _recorded(tmp_path)
+
+    manifest = Manifest.for_media(source)
+    assert manifest.is_fresh('transcribe', [source], {'model': 'a'})
+    assert not manifest.is_fresh('seo', [source], {'model': 'a'})
+
+
+def test_changed_input_invalidates_stage(tmp_path):
+    source, _ = _recorded(tmp_path)
+    source.write_bytes(b'outro audio')
+
+    assert not Manifest.for_media(source).is_fresh('transcribe', [source], {'model': 'a'})
+
+
+def test_touched_input_with_same_content_is_still_fresh(tmp_path):
+    source, _ = _recorded(tmp_path)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert Manifest.for_media(source).is_fresh('transcribe', [source], {'model': 'a'})
+
+
+def test_changed_params_invalidate_stage(tmp_path):
+    source, _ = _recorded(tmp_path, {'model': 'a', 'denoise': False})
+
+    manifest = Manifest.for_media(source)
+    assert not manifest.is_fresh('transcribe', [source], {'model': 'b', 'denoise': False})
+    assert not manifest.is_fresh('transcribe', [source], {'model': 'a', 'denoise': True})
+    assert not manifest.is_fresh('transcribe', [source], {'model': 'a'})
+
+
+def test_changed_or_missing_output_invalidates_stage(tmp_path):
+    source, output = _recorded(tmp_path)
+    output.write_text('editada à mão', encoding='utf-8')
+    assert not Manifest.for_media(source).is_fresh('transcribe', [source], {'model': 'a'})
+
+    output.unlink()
+    assert not Manifest.for_media(source).is_fresh('transcribe', [source], {'model': 'a'})
+
+
+def test_seo_stage_is_reused_until_transcription_or_mode_changes(tmp_path, monkeypatch):
+    mp3_path = tmp_path / 'aula.mp3'
+    transcription = pipeline.transcription_path_for(mp3_path)
+    transcription.write_text('primeira versão', encoding='utf-8')
+    generated = []
+
+    async def generate_seo_async(text, style, chapters=None, mode='full'):
+        generated.append((text, mode))
+        return {'title': text}
+
+    monkeypatch.setattr(seo_generator, 'generate_seo_async', generate_seo_async)
+    monkeypatch.setattr(search_index, 'notify', lambda path: None)
+
+    def seo(mode='local'):
+        data, _, reused = asyncio.run(pipeline.seo_stage_async(mp3_path, 'neutral', mode=mode))
+        return data['title'], reused
+
+    assert seo() == ('primeira versão', False)
+    assert seo() == ('primeira versão', True)
+    transcription.write_text('segunda versão', encoding='utf-8')
+    assert seo() == ('segunda versão', False)
+    assert seo(mode='compact') == ('segunda versão', False)
+    assert generated == [('primeira versão', 'local'), ('segunda versão', 'local'), ('segunda versão', 'compact')]
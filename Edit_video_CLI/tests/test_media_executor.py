@@ -0,0 +1,117 @@
+"""Testes do limitador de processos/memória e da leitura de -progress do MediaExecutor"""
+import asyncio
+import stat
+
+import pytest
+
+from src.utils.media_executor import JobProgress, MediaExecutor, _Limiter, parse_progress_line, with_progress
+
+BLOCKS = b"""frame=120
+fps=59.9
+bitrate=1200.5kbits/s
+total_size=524288
+out_time_us=2000000
+out_time=00:00:02.000000
+speed=1.5x
+progress=continue
+frame=N/A
+total_size=N/A
+out_time_us=4000000
+speed=N/A
+progress=end
+"""
+
+
+def _parse(lines):
+    progress = JobProgress(duration=8.0)
+    snapshots = []
+    for line in lines:
+        if parse_progress_line(line, progress) == 'progress':
+            snapshots.append((progress.out_time, progress.frame, progress.total_size, progress.speed,
+                              progress.fraction, progress.done))
+    return snapshots
+
+
+def test_progress_blocks_update_the_job():
+    assert _parse(BLOCKS.splitlines(keepends=True)) == [
+        (2.0, 120, 524288, 1.5, 0.25, False),
+        # Valores N/A mantêm o último valor lido; progress=end completa a fração
+        (4.0, 120, 524288, 1.5, 1.0, True),
+    ]
+
+
+def test_other_lines_are_not_progress():
+    progress = JobProgress()
+    assert parse_progress_line(b"[mp3 @ 0x1] Estimating duration from bitrate\n", progress) is None
+    assert parse_progress_line(b"size=N/A time=00:00:01.00\n", progress) is None
+    assert progress == JobProgress()
+
+
+def test_progress_goes_to_stderr_when_stdout_is_the_output():
+    assert with_progress(['ffmpeg', '-i', 'a.mp4', 'b.mp3']) == \
+        ['ffmpeg', '-progress', 'pipe:1', '-nostats', '-i', 'a.mp4', 'b.mp3']
+    assert with_progress(['ffmpeg', '-i', 'a.mp4', '-f', 'wav', '-'])[1:3] == ['-progress', 'pipe:2']
+
+
+def test_executor_reads_progress_from_a_real_process(tmp_path):
+    # "ffmpeg" falso: escreve o progresso no stdout e uma mensagem no stderr
+    fake = tmp_path / 'ffmpeg'
+    fake.write_text("#!/bin/sh\nprintf '%s' '" + BLOCKS.decode() + "'\necho 'aviso qualquer' >&2\n")
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+    updates = []
+
+    result = asyncio.run(MediaExecutor(max_jobs=1, memory_budget=1 << 30).run(
+        [str(fake), '-i', 'a.mp4', 'b.mp3'], duration=8.0, on_progress=lambda p: updates.append(p.fraction)))
+
+    assert updates == [0.25, 1.0]
+    assert result.stderr.strip() == 'aviso qualquer'
+
+
+def test_limiter_waits_for_memory_and_keeps_arrival_order():
+    async def scenario():
+        limiter = _Limiter(slots=3, memory=100)
+        order = []
+
+        async def job(name, memory, hold):
+            await limiter.acquire(memory)
+            order.append(name)
+            await asyncio.sleep(hold)
+            limiter.release(memory)
+
+        # b não cabe na memória junto com a; c caberia, mas chegou depois de b e espera a vez
+        await asyncio.gather(job('a', 60, 0.05), job('b', 60, 0.01), job('c', 10, 0.01))
+        return order, limiter.used_slots, limiter.used_memory
+
+    assert asyncio.run(scenario()) == (['a', 'b', 'c'], 0, 0)
+
+
+def test_limiter_runs_oversized_process_alone_and_respects_slots():
+    async def scenario():
+        limiter = _Limiter(slots=1, memory=100)
+        await limiter.acquire(500)
+        assert (limiter.used_slots, limiter.used_memory) == (1, 500)
+        waiter = asyncio.ensure_future(limiter.acquire(1))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        limiter.release(500)
+        await asyncio.wait_for(waiter, 1)
+        assert (limiter.used_slots, limiter.used_memory) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_gives_back_its_place():
+    async def scenario():
+        limiter = _Limiter(slots=1, memory=100)
+        await limiter.acquire(50)
+        cancelled = asyncio.ensure_future(limiter.acquire(50))
+        following = asyncio.ensure_future(limiter.acquire(50))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        limiter.release(50)
+        await asyncio.wait_for(following, 1)
+        return limiter.used_slots, limiter.used_memory, len(limiter._waiters)
+
+    assert asyncio.run(scenario()) == (1, 50, 0)
@@ -0,0 +1,74 @@
+"""Testes da pirâmide de picos: os mínimos e máximos lidos têm que ser exatos"""
+import os
+
+import numpy as np
+import pytest
+
+from src.core.peaks import BASE_BLOCK, DECODE_RATE, PeakFile, block_peaks, build_pyramid, write_peaks
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(7)
+    # Duração que não fecha um bloco nem um grupo de picos, para exercitar os restos
+    data = (rng.standard_normal(DECODE_RATE * 300 + 1234) * 3000).clip(-32768, 32767).astype(np.int16)
+    data[DECODE_RATE * 100] = 32767
+    data[DECODE_RATE * 200 + 17] = -32768
+    return data
+
+
+@pytest.fixture
+def peak_file(tmp_path, samples):
+    media = tmp_path / 'aula.wav'
+    media.write_bytes(b'audio')
+    path = tmp_path / 'aula.wav.peaks'
+    write_peaks(path, build_pyramid(block_peaks(samples)), os.stat(media), len(samples) / DECODE_RATE)
+    return PeakFile(path), media
+
+
+def _expected(samples, first_sample, edges, last_sample):
+    """Mínimo e máximo calculados direto das amostras de cada coluna"""
+    bounds = [first_sample + edge for edge in edges] + [min(last_sample, len(samples))]
+    columns = [samples[begin:end] for begin, end in zip(bounds[:-1], bounds[1:])]
+    return [int(column.min()) for column in columns], [int(column.max()) for column in columns]
+
+
+def test_block_peaks_match_samples(samples):
+    peaks = block_peaks(samples)
+    assert len(peaks) == -(-len(samples) // BASE_BLOCK)
+    block = samples[5 * BASE_BLOCK:6 * BASE_BLOCK]
+    assert peaks[5].tolist() == [block.min(), block.max()]
+    rest = samples[len(samples) - len(samples) % BASE_BLOCK:]
+    assert peaks[-1].tolist() == [rest.min(), rest.max()]
+
+
+@pytest.mark.parametrize('width', [100, 800, 5000])
+def test_full_read_is_exact_per_column(peak_file, samples, width):
+    peaks, media = peak_file
+    assert peaks.matches(media)
+    result = peaks.read(width=width)
+    assert 0 < len(result.min) <= width
+    assert min(result.min) == -32768 and max(result.max) == 32767
+
+    level = peaks.level_for(peaks.duration, width)
+    size = peaks.samples_per_peak(level)
+    count = peaks.levels[level][1]
+    edges = list(range(count))
+    if count > width:
+        edges = np.unique(np.linspace(0, count, width + 1).astype(int)[:-1]).tolist()
+    assert (result.min, result.max) == _expected(samples, 0, [edge * size for edge in edges], count * size)
+
+
+def test_partial_read_covers_the_interval(peak_file, samples):
+    peaks, _ = peak_file
+    result = peaks.read(99.5, 100.5, width=200)
+    level = peaks.level_for(1.0, 200)
+    size = peaks.samples_per_peak(level)
+    first = int(99.5 * DECODE_RATE // size)
+    last = int(-(-100.5 * DECODE_RATE // size))
+    assert len(result.min) == last - first
+    assert (result.min, result.max) == _expected(samples, first * size, [index * size for index in range(last - first)],
+                                                  last * size)
+    assert max(result.max) == 32767
+    # Intervalo fora da mídia é cortado na duração
+    assert peaks.read(299.0, 1000.0, width=10).end == pytest.approx(peaks.duration)
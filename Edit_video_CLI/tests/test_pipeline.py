@@ -0,0 +1,90 @@
+"""Testes da coleta de entradas e do pipeline em lote, com as etapas substituídas"""
+import asyncio
+import logging
+
+from src.core import pipeline
+from src.core.pipeline import BatchPipeline
+
+
+def _touch(tmp_path, *names):
+    for name in names:
+        (tmp_path / name).write_bytes(b'')
+    return [tmp_path / name for name in names]
+
+
+def test_collect_inputs_keeps_converted_mp3_and_logs_collisions(tmp_path, caplog):
+    _touch(tmp_path, 'aula.mp4', 'aula.mp3', 'intro.mov', 'intro.mkv', 'notas.txt')
+
+    with caplog.at_level(logging.INFO, logger=pipeline.__name__):
+        found = pipeline.collect_inputs([str(tmp_path)])
+
+    assert sorted(p.name for p in found) == ['aula.mp3', 'intro.mkv']
+    assert "aula.mp4 ignorado" in caplog.text
+    assert "intro.mov ignorado" in caplog.text
+
+
+def test_collect_inputs_prefers_video_for_video_stages(tmp_path):
+    _touch(tmp_path, 'aula.mp3', 'aula.mp4', 'podcast.mp3')
+
+    found = pipeline.collect_inputs([str(tmp_path)], prefer_video=True)
+
+    assert sorted(p.name for p in found) == ['aula.mp4', 'podcast.mp3']
+
+
+def test_collect_inputs_deduplicates_repeated_paths(tmp_path, caplog):
+    [media] = _touch(tmp_path, 'aula.mp4')
+
+    with caplog.at_level(logging.INFO, logger=pipeline.__name__):
+        found = pipeline.collect_inputs([str(media), str(tmp_path), str(tmp_path / '*.mp4')])
+
+    assert found == [media]
+    assert "ignorado" not in caplog.text
+
+
+def _fake_stages(monkeypatch, calls, fail=()):
+    """Etapas de mentira que registram as chamadas e falham nos arquivos pedidos"""
+    async def convert(input_file, force=False):
+        calls.append(('convert', input_file.name))
+        await asyncio.sleep(0)
+        return pipeline.mp3_path_for(input_file), input_file.suffix == '.mp3'
+
+    async def chapters(input_file, video, mp3_path, force=False):
+        calls.append(('chapters', input_file.name))
+        return None, None, False
+
+    async def transcribe(mp3_path, force=False, denoise=False):
+        calls.append(('transcribe', mp3_path.name))
+        if mp3_path.stem in fail:
+            raise RuntimeError("API fora do ar")
+        return "texto", pipeline.transcription_path_for(mp3_path), False
+
+    async def seo(mp3_path, style, force=False, mode='full'):
+        calls.append(('seo', mp3_path.name))
+        return {'title': f"{mp3_path.stem} ({style})"}, pipeline.seo_path_for(mp3_path), True
+
+    monkeypatch.setattr(pipeline, 'convert_stage_async', convert)
+    monkeypatch.setattr(pipeline, 'chapters_stage_async', chapters)
+    monkeypatch.setattr(pipeline, 'transcribe_stage_async', transcribe)
+    monkeypatch.setattr(pipeline, 'seo_stage_async', seo)
+
+
+def test_batch_pipeline_runs_every_stage_and_reports_failures(tmp_path, monkeypatch):
+    calls, events = [], []
+    _fake_stages(monkeypatch, calls, fail={'ruim'})
+    files = _touch(tmp_path, 'aula.mp4', 'ruim.mp4', 'podcast.mp3')
+
+    results = BatchPipeline(style='neutral', workers=2, chapters=True,
+                            on_event=lambda stage, result: events.append((stage, result.input_file.name))).run(files)
+
+    assert [r.input_file for r in results] == files
+    aula, ruim, podcast = results
+    assert aula.ok and aula.title == "aula (neutral)"
+    assert set(aula.timings) == {'convert', 'chapters', 'transcribe', 'seo'}
+    assert aula.reused == ['seo']
+    assert (ruim.failed_stage, ruim.error) == ('transcribe', "API fora do ar")
+    assert ('seo', 'ruim.mp3') not in calls
+    # Capítulos só para vídeos; em um MP3 de entrada não há conversão para contar como reaproveitada
+    assert ('chapters', 'podcast.mp3') not in calls
+    assert podcast.reused == ['seo']
+    assert ('failed', 'ruim.mp4') in events
+    assert [stage for stage, name in events if name == 'aula.mp4'] == ['convert', 'transcribe', 'seo']
@@ -0,0 +1,53 @@
+"""Testes da escolha de capítulos a partir de mudanças de cena e pausas"""
+import numpy as np
+
+from src.core import scenes
+
+
+def _pause(start, end):
+    return {'start': start, 'end': end, 'duration': end - start}
+
+
+def test_scene_cuts_snap_to_the_end_of_the_nearest_pause():
+    cuts = [{'time': 120.0, 'score': 0.9}, {'time': 300.0, 'score': 0.8}]
+    pauses = [_pause(117.5, 118.6), _pause(301.0, 302.2), _pause(450.0, 451.0)]
+
+    chapters = scenes.find_chapters(cuts, pauses, duration=600.0)
+
+    assert [(c['start'], c['end'], c['source']) for c in chapters] == [
+        (0.0, 118.6, 'start'), (118.6, 302.2, 'scene'), (302.2, 600.0, 'scene')]
+
+
+def test_long_pauses_fill_in_and_chapters_keep_min_length():
+    cuts = [{'time': 200.0, 'score': 0.9}, {'time': 230.0, 'score': 0.95}]
+    pauses = [_pause(398.0, 402.0), _pause(500.0, 500.8)]
+
+    chapters = scenes.find_chapters(cuts, pauses, duration=700.0, min_chapter=60.0)
+
+    # Os dois cortes estão a menos de 60 s: fica o mais forte; a pausa longa vira capítulo
+    assert [(c['start'], c['source']) for c in chapters] == [(0.0, 'start'), (230.0, 'scene'), (402.0, 'pause')]
+    assert all(c['end'] - c['start'] >= 60.0 for c in chapters)
+
+
+def test_too_few_chapters_returns_nothing():
+    cuts = [{'time': 100.0, 'score': 0.9}]
+    assert scenes.find_chapters(cuts, [], duration=300.0) == []
+    # Cortes perto demais do começo ou do fim não contam
+    assert scenes.find_chapters([{'time': 10.0, 'score': 1.0}, {'time': 290.0, 'score': 1.0}],
+                                [], duration=300.0) == []
+
+
+def test_max_chapters_keeps_the_strongest_cuts():
+    cuts = [{'time': 100.0 * index, 'score': index / 10} for index in range(1, 10)]
+    chapters = scenes.find_chapters(cuts, [], duration=1000.0, max_chapters=4)
+
+    assert [c['start'] for c in chapters] == [0.0, 700.0, 800.0, 900.0]
+
+
+def test_speech_pauses_from_envelope():
+    rate = scenes.ENVELOPE_RATE
+    envelope = np.full(10 * rate, 3000.0)
+    envelope[2 * rate:3 * rate] = 10.0            # pausa de 1 s
+    envelope[6 * rate:6 * rate + rate // 2] = 10.0  # curta demais
+
+    assert scenes.speech_pauses(envelope) == [{'start': 2.0, 'end': 3.0, 'duration': 1.0}]
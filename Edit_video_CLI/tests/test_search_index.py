@@ -0,0 +1,63 @@
+"""Testes do índice de busca (SQLite FTS5) sobre transcrições e SEOs"""
+import json
+import os
+
+import pytest
+
+from src.core.search_index import SearchIndex
+
+
+def _write(path, content):
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def library(tmp_path):
+    folder = tmp_path / 'videos'
+    folder.mkdir()
+    _write(folder / 'aula1.transcription.txt', "Hoje vamos falar de decoradores em Python e de programação funcional.")
+    _write(folder / 'aula1-seo.json', {'title': 'Decoradores em Python', 'tags': ['python', 'decoradores'],
+                                       'description': 'Uma aula sobre decoradores.'})
+    _write(folder / 'aula2.transcription.txt', "Nesta aula de edição de vídeo cortamos os silêncios. Python aparece pouco.")
+    # Anotação solta, sem MP3, manifesto ou SEO ao lado: não é transcrição
+    _write(folder / 'notas.txt', "decoradores decoradores decoradores")
+    return folder
+
+
+def test_update_indexes_only_new_or_changed_videos(tmp_path, library):
+    index = SearchIndex(tmp_path / 'index.db')
+    assert index.update([library]) == {'added': 2, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    assert index.update() == {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 2}
+
+    transcription = library / 'aula2.transcription.txt'
+    _write(transcription, "Agora a aula fala de legendas.")
+    os.utime(transcription, ns=(1, 1))
+    (library / 'aula1-seo.json').unlink()
+    (library / 'aula1.transcription.txt').unlink()
+    assert index.update() == {'added': 0, 'updated': 1, 'removed': 1, 'unchanged': 0}
+    assert [result.key for result in index.search('legendas')] == [str(library.resolve() / 'aula2')]
+    assert index.search('silêncios') == []
+
+
+def test_search_ranks_title_matches_first_and_ignores_accents(tmp_path, library):
+    index = SearchIndex(tmp_path / 'index.db')
+    index.update([library])
+
+    results = index.search('python')
+    assert [result.key for result in results] == [str(library.resolve() / 'aula1'), str(library.resolve() / 'aula2')]
+    assert results[0].title == 'Decoradores em Python'
+    assert results[0].seo_path.endswith('aula1-seo.json')
+
+    assert [result.key for result in index.search('programacao')] == [str(library.resolve() / 'aula1')]
+    # A última palavra também casa como prefixo
+    assert len(index.search('python decora')) == 1
+
+
+def test_invalid_queries_raise_value_error(tmp_path, library):
+    index = SearchIndex(tmp_path / 'index.db')
+    index.update([library])
+    with pytest.raises(ValueError):
+        index.search('  ')
+    with pytest.raises(ValueError):
+        index.search('python AND', raw=True)
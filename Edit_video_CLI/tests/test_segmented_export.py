@@ -0,0 +1,115 @@
+"""Testes da exportação em segmentos: parsers de quadros, plano e junção sem lacunas"""
+import struct
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.core import segmented_export
+from src.core.segmented_export import SegmentedExporter, adts_frames, mp3_frames, plan_segments
+from src.utils.media_executor import JobProgress, JobResult
+
+RATE = 44100
+MP3_FRAME = 1152
+
+
+def _mp3_frame(label: int, padding: int = 0) -> bytes:
+    """Quadro MPEG-1 Layer III de 128 kbps a 44,1 kHz (417 bytes, 418 com padding)"""
+    header = bytes([0xFF, 0xFB, 0x90 | (padding << 1), 0x00])
+    return header + bytes([label % 256]) * (144 * 128000 // RATE + padding - 4)
+
+
+def _adts_frame(label: int, length: int = 200) -> bytes:
+    header = bytes([0xFF, 0xF1, 0x50, 0x80 | (length >> 11), (length >> 3) & 0xFF, ((length & 0x07) << 5) | 0x1F,
+                    0xFC])
+    return header + bytes([label % 256]) * (length - 7)
+
+
+def test_mp3_frames_follow_header_lengths_and_skip_garbage():
+    # ID3 ou lixo no começo, padding variável e um cabeçalho inválido (bitrate 15) no meio
+    data = b'ID3\x00' + _mp3_frame(1) + _mp3_frame(2, padding=1) + b'\xff\xfb\xf0\x00' + _mp3_frame(3)
+    frames = mp3_frames(data)
+    assert [end - start for start, end in frames] == [417, 418, 417]
+    assert frames[0][0] == 4
+    assert [data[start + 4] for start, _ in frames] == [1, 2, 3]
+
+    # MPEG-2 (22,05 kHz, 64 kbps): 72 * bitrate / taxa
+    mpeg2 = bytes([0xFF, 0xF3, 0x80, 0x00]) + bytes(72 * 64000 // 22050 - 4)
+    assert mp3_frames(mpeg2 * 2) == [(0, 208), (208, 416)]
+
+
+def test_adts_frames_use_the_length_field():
+    data = b'\x00\x01' + _adts_frame(1, 200) + _adts_frame(2, 371) + _adts_frame(3, 8)
+    assert [(end - start) for start, end in adts_frames(data)] == [200, 371, 8]
+    # Comprimento menor que o cabeçalho não é quadro
+    assert adts_frames(bytes([0xFF, 0xF1, 0x50, 0x80, 0x00, 0x1F, 0xFC])) == []
+
+
+@pytest.mark.parametrize('total, count', [(MP3_FRAME * 100, 4), (MP3_FRAME * 100 + 7, 3), (500, 8), (MP3_FRAME * 3, 8)])
+def test_plan_segments_cover_everything_on_frame_boundaries(total, count):
+    segments = plan_segments(total, MP3_FRAME, count)
+    assert segments[0][0] == 0 and segments[-1][1] == total
+    assert len(segments) <= count
+    assert all(previous[1] == following[0] for previous, following in zip(segments, segments[1:]))
+    assert all(start % MP3_FRAME == 0 for start, _ in segments)
+
+
+def _fake_run(monkeypatch):
+    """
+    ffmpeg falso: o "codificador" escreve um quadro MP3 por quadro de PCM, rotulado com a
+    primeira amostra (o índice absoluto do quadro), e o concat junta os arquivos da lista
+    """
+    def run(cmd, input=None, check=True, on_progress=None, **kwargs):
+        if '-f' in cmd and cmd[cmd.index('-f') + 1] == 'concat':
+            listing = Path(cmd[cmd.index('-i') + 1])
+            names = [line.split("'")[1] for line in listing.read_text().splitlines()]
+            Path(cmd[-1]).write_bytes(b''.join((listing.parent / name).read_bytes() for name in names))
+            return JobResult(0, b'', '')
+        samples = np.frombuffer(input, dtype='<i2')
+        frames = [_mp3_frame(int(samples[offset])) for offset in range(0, len(samples), MP3_FRAME)]
+        if on_progress:
+            on_progress(JobProgress(out_time=len(samples) / RATE, done=True))
+        return JobResult(0, b''.join(frames), '')
+
+    monkeypatch.setattr(segmented_export.media_executor, 'run', run)
+
+
+def test_export_joins_segments_without_gaps_or_repeats(tmp_path, monkeypatch):
+    _fake_run(monkeypatch)
+    monkeypatch.setattr(segmented_export, 'MIN_SEGMENT_SECONDS', 1)
+    total_frames = 200
+    # Cada amostra guarda o índice do seu quadro (mod 256 cabe no rótulo de um byte)
+    pcm = np.repeat(np.arange(total_frames, dtype='<i2') % 256, MP3_FRAME)[:-300].tobytes()
+    progress = []
+
+    exporter = SegmentedExporter(pcm, RATE, 1, 'mp3', workers=4)
+    output = exporter.export(tmp_path / 'saida.mp3', on_progress=progress.append)
+
+    data = output.read_bytes()
+    labels = [data[start + 4] for start, _ in mp3_frames(data)]
+    assert labels == [index % 256 for index in range(total_frames)]
+    assert not list(tmp_path.glob('.segments-*'))
+
+    fractions = [job.fraction for job in progress]
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0 and progress[-1].done
+    assert progress[-2].out_time == pytest.approx(exporter.total_samples / RATE)
+
+
+def test_trimmed_segment_starts_at_its_own_frame(tmp_path, monkeypatch):
+    _fake_run(monkeypatch)
+    pcm = np.repeat(np.arange(40, dtype='<i2'), MP3_FRAME).tobytes()
+    exporter = SegmentedExporter(pcm, RATE, 1, 'mp3', workers=2)
+
+    # Segmento do meio: descarta CONTEXT_FRAMES quadros antes e depois
+    path = exporter._encode(1, 10 * MP3_FRAME, 20 * MP3_FRAME, False, tmp_path)
+    labels = [path.read_bytes()[start + 4] for start, _ in mp3_frames(path.read_bytes())]
+    assert labels == list(range(10, 20))
+
+    path = exporter._encode(2, 20 * MP3_FRAME, 40 * MP3_FRAME, True, tmp_path)
+    labels = [path.read_bytes()[start + 4] for start, _ in mp3_frames(path.read_bytes())]
+    assert labels == list(range(20, 40))
+
+
+def test_unsupported_format_is_rejected():
+    with pytest.raises(ValueError):
+        SegmentedExporter(struct.pack('<h', 0), RATE, 1, 'flac')
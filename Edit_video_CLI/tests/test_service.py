@@ -0,0 +1,51 @@
+"""Testes das proteções da API HTTP do serviço local"""
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.core.service import Service, create_app
+
+TOKEN = 'token-de-teste'
+
+
+def _request(method, path, token=TOKEN, **kwargs):
+    """Executa uma requisição contra o app e retorna (status, corpo JSON)"""
+    async def run():
+        client = TestClient(TestServer(create_app(Service(), token)))
+        await client.start_server()
+        try:
+            response = await client.request(method, path, **kwargs)
+            return response.status, await response.json()
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+
+def _auth(token=TOKEN):
+    return {'Authorization': f"Bearer {token}"}
+
+
+def test_health_requires_token():
+    assert _request('GET', '/health')[0] == 401
+    assert _request('GET', '/health', headers=_auth('outro'))[0] == 401
+    assert _request('GET', '/health', headers=_auth())[0] == 200
+
+
+def test_unix_socket_mode_needs_no_token():
+    assert _request('GET', '/health', token=None)[0] == 200
+
+
+def test_browser_requests_are_rejected():
+    headers = {**_auth(), 'Origin': 'https://exemplo.com'}
+    assert _request('GET', '/health', headers=headers)[0] == 403
+    assert _request('POST', '/silence', headers=headers, json={'file': '/x.wav'})[0] == 403
+
+
+def test_post_requires_json_content_type():
+    status, body = _request('POST', '/silence', headers={**_auth(), 'Content-Type': 'text/plain'},
+                            data='{"file": "/x.wav"}')
+    assert status == 415
+
+    status, body = _request('POST', '/silence', headers=_auth(), json={'file': '/nao/existe.wav'})
+    assert status == 400
+    assert body['error'] == 'Arquivo não encontrado: /nao/existe.wav'
@@ -0,0 +1,56 @@
+"""Tempo de início a frio de `edit-video --help` contra um orçamento fixo
+
+O orçamento pode ser ajustado com EDIT_VIDEO_STARTUP_BUDGET (segundos) em máquinas lentas.
+"""
+import os
+import sys
+import time
+import statistics
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Orçamento (segundos) para a mediana de `edit-video --help`, incluindo o interpretador
+BUDGET = float(os.environ.get('EDIT_VIDEO_STARTUP_BUDGET', '0.25'))
+RUNS = 7
+
+# Módulos que não devem ser carregados só para exibir a ajuda
+HEAVY_MODULES = ['rich', 'pydub', 'aiohttp', 'dotenv', 'numpy', 'src.llm.gemini']
+
+HEAVY_CHECK = f"""
+import sys
+sys.argv = ['edit-video', '--help']
+from src.main import main
+try:
+    main()
+except SystemExit:
+    pass
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+sys.stderr.write(','.join(loaded))
+"""
+
+
+def _measure(runs):
+    """Tempo de parede de `python -m src.main --help` em processos novos"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'src.main', '--help'], cwd=PROJECT_ROOT,
+                       capture_output=True, check=True)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def test_help_starts_within_budget():
+    # Uma execução de aquecimento para que o cache de bytecode já exista
+    _measure(1)
+    median = statistics.median(_measure(RUNS))
+    assert median <= BUDGET, f"edit-video --help: mediana {median * 1000:.1f} ms, orçamento {BUDGET * 1000:.0f} ms"
+
+
+def test_help_does_not_import_heavy_modules():
+    result = subprocess.run([sys.executable, '-c', HEAVY_CHECK], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True)
+    loaded = [name for name in result.stderr.strip().split(',') if name]
+    assert loaded == []
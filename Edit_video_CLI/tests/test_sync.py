@@ -0,0 +1,44 @@
+"""Testes da sincronização de canais por correlação cruzada"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from src.core import sync
+
+
+def _envelope(seconds, seed=0):
+    """Envelope de amplitude com rajadas aleatórias, como o de fala"""
+    rng = np.random.default_rng(seed)
+    bursts = (rng.random(seconds * sync.ENVELOPE_RATE) < 0.05).astype(np.float32)
+    kernel = np.hanning(20).astype(np.float32)
+    return np.convolve(bursts, kernel, mode='same').astype(np.float32) + 0.01
+
+
+def _shift(envelope, seconds):
+    """Canal que começou a gravar `seconds` depois da referência"""
+    return envelope[int(seconds * sync.ENVELOPE_RATE):]
+
+
+def test_estimate_offset_finds_shift():
+    reference = _envelope(60)
+    offset, confidence = sync.estimate_offset(reference, _shift(reference, 1.25))
+
+    assert type(offset) is float
+    assert abs(offset - 1.25) < 1 / sync.ENVELOPE_RATE
+    assert confidence > 0.9
+
+
+def test_channel_offsets_are_json_serializable(monkeypatch):
+    reference = _envelope(60)
+    envelopes = {'mic.m4a': reference, 'screen.mp4': _shift(reference, 0.5),
+                 'camera.mp4': _shift(reference, 2.0)}
+    monkeypatch.setattr(sync, 'decode_envelope', lambda path: envelopes[Path(path).name])
+
+    channels = {'microphone': Path('mic.m4a'), 'screen': Path('screen.mp4'), 'camera': Path('camera.mp4')}
+    offsets = sync.estimate_channel_offsets(channels, {name: True for name in channels})
+
+    assert json.loads(json.dumps(offsets)) == offsets
+    assert offsets['screen']['applied'] is True
+    assert abs(offsets['screen']['offset'] - 0.5) < 0.01
+    assert abs(offsets['camera']['offset'] - 2.0) < 0.01
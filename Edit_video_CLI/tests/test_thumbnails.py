@@ -0,0 +1,70 @@
+"""Testes da pontuação e da escolha de candidatas a thumbnail com quadros sintéticos"""
+import numpy as np
+import pytest
+
+from src.core.thumbnails import Candidate, pick, rank, score_frames
+
+HEIGHT, WIDTH = 36, 64
+
+
+def _frames():
+    rng = np.random.default_rng(5)
+    gray = np.full((HEIGHT, WIDTH, 3), 128, dtype=np.uint8)
+    black = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    # Xadrez de alto contraste: muito laplaciano, nada de cor
+    checker = ((np.indices((HEIGHT, WIDTH)).sum(axis=0) % 2) * 255).astype(np.uint8)
+    sharp = np.repeat(checker[..., None], 3, axis=2)
+    # Metade vermelha e metade azul: muita cor, laplaciano só na divisa
+    colorful = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    colorful[:, :WIDTH // 2, 0] = 220
+    colorful[:, WIDTH // 2:, 2] = 220
+    noisy = rng.integers(100, 156, size=(HEIGHT, WIDTH, 3), dtype=np.uint8)
+    return np.stack([gray, black, sharp, colorful, noisy])
+
+
+def test_metrics_of_synthetic_frames():
+    sharpness, brightness, colorfulness = score_frames(_frames())
+
+    # Quadro liso não tem bordas nem cor
+    assert sharpness[0] == pytest.approx(0.0) and colorfulness[0] == pytest.approx(0.0)
+    assert brightness[0] == pytest.approx(128 / 255, abs=1e-3)
+    assert brightness[1] == 0.0
+    assert np.argmax(sharpness) == 2
+    assert np.argmax(colorfulness) == 3
+    assert colorfulness[2] == pytest.approx(0.0, abs=1e-3)
+    # Ruído leve é mais nítido que o liso e menos que o xadrez
+    assert sharpness[0] < sharpness[4] < sharpness[2]
+
+
+def test_metrics_do_not_depend_on_batch():
+    frames = _frames()
+    together = score_frames(frames)
+    for index in range(len(frames)):
+        alone = score_frames(frames[index:index + 1])
+        assert [metric[0] for metric in alone] == pytest.approx([metric[index] for metric in together], rel=1e-5)
+
+
+def test_rank_prefers_sharp_midtone_colorful_frames():
+    candidates = [
+        Candidate('display', 0.0, sharpness=0.0, brightness=0.0, colorfulness=0.0),      # tela preta
+        Candidate('display', 30.0, sharpness=5000.0, brightness=0.5, colorfulness=60.0),
+        Candidate('webcam', 30.0, sharpness=5000.0, brightness=0.95, colorfulness=60.0),  # estourada
+        Candidate('webcam', 60.0, sharpness=50.0, brightness=0.5, colorfulness=10.0),
+    ]
+    ranked = rank(candidates)
+    assert [(c.channel, c.time) for c in ranked] == [('display', 30.0), ('webcam', 30.0),
+                                                     ('webcam', 60.0), ('display', 0.0)]
+    assert ranked[0].score == pytest.approx(1.0)
+    assert ranked[-1].score == 0.0
+    assert rank([]) == []
+
+
+def test_pick_keeps_a_gap_per_channel():
+    ranked = [Candidate('display', time, 0, 0, 0, score=score)
+              for time, score in [(100.0, 0.9), (110.0, 0.8), (130.0, 0.7), (5.0, 0.6)]]
+    ranked.insert(1, Candidate('webcam', 105.0, 0, 0, 0, score=0.85))
+
+    assert [(c.channel, c.time) for c in pick(ranked, 3)] == [('display', 100.0), ('webcam', 105.0),
+                                                             ('display', 130.0)]
+    assert [c.time for c in pick(ranked, 10, min_gap=0)] == [100.0, 105.0, 110.0, 130.0, 5.0]
+    assert len(pick(ranked, 10)) == 4
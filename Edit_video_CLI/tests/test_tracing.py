@@ -0,0 +1,37 @@
+"""Testes dos spans de tracing"""
+import asyncio
+
+import pytest
+
+from src.utils import tracing
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(tracing, '_spans', [])
+    monkeypatch.setattr(tracing, '_open_spans', [])
+    # O monkeypatch restaura as flags do módulo que enable altera
+    for name in ('_enabled', '_trace_memory', '_origin'):
+        monkeypatch.setattr(tracing, name, getattr(tracing, name))
+    tracing.enable(trace_memory=False)
+
+
+def test_cpu_is_reported_as_process_wide(enabled):
+    async def busy(name):
+        with tracing.span(name, category='test'):
+            await asyncio.sleep(0.01)
+            sum(range(200_000))
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(busy('a'), busy('b'))
+
+    asyncio.run(run())
+
+    events = {event['name']: event for event in tracing.events()}
+    assert set(events) == {'a', 'b'}
+    for event in events.values():
+        assert 'cpu_ms' not in event['args']
+        assert event['args']['process_cpu_ms'] >= 0
+    rows = {row['name']: row for row in tracing.summary()}
+    assert rows['a']['process_cpu_ms'] == events['a']['args']['process_cpu_ms']
@@ -0,0 +1,86 @@
+"""Testes das impressões digitais e do cache da transcrição por trechos"""
+import asyncio
+
+import numpy as np
+
+from benchmarks.synthetic import speech_like_samples
+from src.core import transcript_segments as ts
+
+RATE = ts.ANALYSIS_RATE
+
+
+def _pieces(samples):
+    return [samples[int(s.start * RATE):int(s.end * RATE)] for s in ts.split_segments(samples)]
+
+
+def _cache(tmp_path, samples):
+    """Cache com os trechos de `samples`, cada um com o texto 'trecho <n>'"""
+    cache = ts.SegmentCache(tmp_path / 'transcripts.db')
+    for number, piece in enumerate(_pieces(samples)):
+        cache.store(ts.audio_fingerprint(piece), 'modelo', f"trecho {number}", len(piece) / RATE)
+    return cache
+
+
+def test_same_speech_matches_after_gain_and_noise():
+    piece = speech_like_samples(30, RATE, seed=1)
+    rng = np.random.default_rng(0)
+    edited = piece * 0.5 + rng.normal(0, 1e-3, len(piece)).astype(np.float32)
+
+    assert ts.similarity(ts.audio_fingerprint(edited), ts.audio_fingerprint(piece)) >= ts.MATCH_SIMILARITY
+
+
+def test_unrelated_speech_does_not_match():
+    first = [ts.audio_fingerprint(piece) for piece in _pieces(speech_like_samples(120, RATE, seed=1))]
+    second = [ts.audio_fingerprint(piece) for piece in _pieces(speech_like_samples(120, RATE, seed=2))]
+
+    best = max(ts.similarity(a, b) for a in first for b in second)
+    assert best < ts.MATCH_SIMILARITY
+
+
+def test_cache_reuses_segments_of_an_edited_version(tmp_path):
+    samples = speech_like_samples(180, RATE, seed=3)
+    cache = _cache(tmp_path, samples)
+    stored = len(_pieces(samples))
+
+    # Começo cortado e volume menor: os cortes seguintes caem nos mesmos pontos
+    edited = samples[int(9.5 * RATE):] * 0.7
+    texts = [cache.lookup(ts.audio_fingerprint(piece), 'modelo') for piece in _pieces(edited)]
+    reused = [text for text in texts if text is not None]
+
+    assert len(reused) >= stored - 2
+    assert len(set(reused)) == len(reused)
+    assert cache.lookup(ts.audio_fingerprint(_pieces(edited)[-1]), 'outro-modelo') is None
+
+
+def test_cache_rejects_unrelated_recording(tmp_path):
+    cache = _cache(tmp_path, speech_like_samples(180, RATE, seed=3))
+
+    for piece in _pieces(speech_like_samples(180, RATE, seed=4)):
+        assert cache.lookup(ts.audio_fingerprint(piece), 'modelo') is None
+
+
+def test_text_is_cached_under_the_model_that_answered(tmp_path, monkeypatch):
+    samples = speech_like_samples(60, RATE, seed=5)
+
+    async def decode_samples(media, rate=RATE):
+        return samples
+
+    async def encode_segment(media, segment):
+        return b'mp3'
+
+    class Client:
+        model = 'modelo-a'
+
+        async def transcribe_audio_data(self, data, label, model=None):
+            # O modelo pedido falhou e o alternativo respondeu
+            return f"texto de {label}", 'modelo-b'
+
+    monkeypatch.setattr(ts, 'decode_samples', decode_samples)
+    monkeypatch.setattr(ts, 'encode_segment', encode_segment)
+    cache = ts.SegmentCache(tmp_path / 'transcripts.db')
+    result = asyncio.run(ts.transcribe_segments_async(tmp_path / 'aula.mp3', Client(), cache))
+
+    fingerprint = ts.audio_fingerprint(_pieces(samples)[0])
+    assert result.reused == 0 and result.text
+    assert cache.lookup(fingerprint, 'modelo-a') is None
+    assert cache.lookup(fingerprint, 'modelo-b') is not None
@@ -0,0 +1,68 @@
+"""Testes do comando ffmpeg da composição (montado sem executar nada)"""
+from pathlib import Path
+
+import pytest
+
+from src.core.video_processor import RenderOptions, VideoProcessor
+
+
+def _processor(webcam=True, microphone=True):
+    processor = VideoProcessor(Path('/gravacao.screenstudio'))
+    processor.channels['display'] = Path('/gravacao.screenstudio/channel-1-display-0.mp4')
+    processor.media['display'] = {'duration': 60.0, 'width': 1920, 'height': 1080, 'video_codec': 'h264',
+                                  'has_audio': False}
+    if webcam:
+        processor.channels['webcam'] = Path('/gravacao.screenstudio/channel-3-webcam-0.mp4')
+        processor.media['webcam'] = {'duration': 60.0, 'width': 1280, 'height': 720, 'video_codec': 'h264',
+                                     'has_audio': False}
+    if microphone:
+        processor.channels['microphone'] = Path('/gravacao.screenstudio/channel-2-microphone-0.m4a')
+        processor.media['microphone'] = {'duration': 60.0, 'width': 0, 'height': 0, 'video_codec': '',
+                                         'has_audio': True}
+    return processor
+
+
+def _value_after(cmd, flag):
+    return [cmd[index + 1] for index, part in enumerate(cmd) if part == flag]
+
+
+def test_threads_are_set_per_input_filter_graph_and_encoder():
+    cmd = _processor().build_command(Path('final.mp4'), RenderOptions(threads=6))
+
+    inputs = [index for index, part in enumerate(cmd) if part == '-i']
+    assert len(inputs) == 3
+    # -threads é opção de entrada: precede cada -i (decodificação de cada canal)
+    assert all(cmd[index - 2:index] == ['-threads', '6'] for index in inputs)
+    assert _value_after(cmd, '-filter_complex_threads') == ['6']
+    assert cmd.index('-filter_complex_threads') == cmd.index('-filter_complex') + 2
+    # E a última ocorrência vale para o codificador, depois do -c:v
+    encoder = cmd.index('-c:v')
+    assert cmd[encoder:].index('-threads') < cmd[encoder:].index('-f')
+    assert _value_after(cmd[encoder:], '-threads') == ['6']
+    assert _value_after(cmd, '-threads') == ['6'] * 4
+
+
+def test_without_webcam_only_used_inputs_get_threads():
+    cmd = _processor(webcam=False).build_command(Path('final.mkv'), RenderOptions(threads=0))
+    assert _value_after(cmd, '-i') == ['/gravacao.screenstudio/channel-1-display-0.mp4',
+                                       '/gravacao.screenstudio/channel-2-microphone-0.m4a']
+    assert _value_after(cmd, '-threads') == ['0', '0', '0']
+    assert _value_after(cmd, '-f') == ['matroska']
+    assert '-movflags' not in cmd
+
+
+def test_filter_graph_and_preview():
+    cmd = _processor().build_command(Path('final.mp4'), RenderOptions(preview=True, keep=[(0.0, 10.0)]))
+    [graph] = _value_after(cmd, '-filter_complex')
+    assert graph.startswith("[0:v]select=")
+    assert 'scale=960:540[base]' in graph
+    assert "[2:a]aselect=" in graph
+    assert _value_after(cmd, '-map') == ['[v]', '[a]']
+    assert _value_after(cmd, '-preset') == ['ultrafast']
+
+
+def test_invalid_options_raise_value_error():
+    with pytest.raises(ValueError):
+        _processor().build_command(Path('final.avi'), RenderOptions())
+    with pytest.raises(ValueError):
+        _processor().build_command(Path('final.mp4'), RenderOptions(pip_position='meio'))
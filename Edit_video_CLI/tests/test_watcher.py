@@ -0,0 +1,47 @@
+"""Testes do estado do monitoramento de pasta"""
+import time
+
+from src.core import watcher
+from src.core.watcher import FolderWatcher
+
+
+def _bundle(folder, name='gravacao.screenstudio'):
+    bundle = folder / name
+    bundle.mkdir()
+    (bundle / 'project.json').write_text('{}')
+    return bundle
+
+
+def _entry(bundle, status, **extra):
+    return dict(status=status, signature=list(watcher.bundle_signature(bundle)), **extra)
+
+
+def test_done_bundle_is_not_requeued(tmp_path):
+    bundle = _bundle(tmp_path)
+    folder_watcher = FolderWatcher(tmp_path)
+    folder_watcher.state[bundle.name] = _entry(bundle, 'done')
+    assert folder_watcher._is_done(bundle)
+
+    (bundle / 'project.json').write_text('{"alterado": true}')
+    assert not folder_watcher._is_done(bundle)
+
+
+def test_failed_bundle_waits_for_backoff(tmp_path):
+    bundle = _bundle(tmp_path)
+    folder_watcher = FolderWatcher(tmp_path)
+    folder_watcher.state[bundle.name] = _entry(bundle, 'failed', attempts=1, retry_at=time.time() + 60)
+    assert folder_watcher._is_done(bundle)
+
+    folder_watcher.state[bundle.name]['retry_at'] = time.time() - 1
+    assert not folder_watcher._is_done(bundle)
+
+
+def test_failed_bundle_is_retried_on_restart(tmp_path):
+    bundle = _bundle(tmp_path)
+    folder_watcher = FolderWatcher(tmp_path)
+    folder_watcher.state[bundle.name] = _entry(bundle, 'failed', attempts=3, retry_at=time.time() + 3600)
+    folder_watcher._save_state()
+
+    restarted = FolderWatcher(tmp_path)
+    assert not restarted._is_done(bundle)
+    assert restarted.state[bundle.name]['attempts'] == 3
@@ -3,6 +3,7 @@ import * as path from 'path';
 import * as fs from 'fs';
 import { AudioProcessor } from './audioProcessor';
 import { GeminiClient } from './geminiClient';
+import { ServiceClient, ServiceUnavailableError } from './serviceClient';
 import { WebviewManager } from './webviewManager';
 import { TranscriptionResult } from './types';
 import { GEMINI_API_KEY } from './config';
@@ -35,6 +36,36 @@ export function activate(context: vscode.ExtensionContext): void {
 
             progress.report({ increment: 0, message: 'Iniciando...' });
             
+            // Com o serviço do CLI configurado (`edit-video serve`), o processamento roda nele
+            const serverAddress = vscode.workspace.getConfiguration('audioTranscription').get<string>('server.address');
+            if (serverAddress) {
+              try {
+                let reported = 0;
+                const result = await new ServiceClient(serverAddress).run('seo', { file: uri.fsPath, style: 'clickbait' }, (event) => {
+                  if (event.percent !== undefined && event.percent > reported) {
+                    progress.report({ increment: event.percent - reported, message: event.message });
+                    reported = event.percent;
+                  } else if (event.message) {
+                    progress.report({ message: event.message });
+                  }
+                }, token);
+                
+                const transcriptionDocument = await vscode.workspace.openTextDocument(vscode.Uri.file(result.transcription_path));
+                await vscode.window.showTextDocument(transcriptionDocument);
+                const seoDocument = await vscode.workspace.openTextDocument(vscode.Uri.file(result.seo_path));
+                await vscode.window.showTextDocument(seoDocument, { viewColumn: vscode.ViewColumn.Beside });
+                
+                vscode.window.showInformationMessage(`Título gerado: ${result.seo.title}`);
+                return;
+              } catch (error) {
+                if (!(error instanceof ServiceUnavailableError)) {
+                  throw error;
+                }
+                // Serviço fora do ar: seguir com o processamento local
+                console.log(error.message);
+              }
+            }
+            
             // Etapa 1: Converter para MP3
             progress.report({ increment: 5, message: 'Convertendo para MP3...' });
             const mp3Path = await audioProcessor.processAudio(uri.fsPath);
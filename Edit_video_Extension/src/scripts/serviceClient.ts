@@ -0,0 +1,188 @@
+import * as http from 'http';
+import * as fs from 'fs';
+import * as os from 'os';
+import * as path from 'path';
+
+/**
+ * Evento emitido por um job do serviço local (`edit-video serve`)
+ */
+export interface ServiceEvent {
+  type: 'stage' | 'progress' | 'done' | 'error' | 'cancelled';
+  job: string;
+  stage?: string;
+  message?: string;
+  percent?: number;
+  result?: any;
+  error?: string;
+}
+
+/**
+ * Cancelamento de um job; compatível com o `CancellationToken` do VS Code
+ */
+export interface CancellationSignal {
+  readonly isCancellationRequested: boolean;
+  onCancellationRequested(listener: () => any): { dispose(): any };
+}
+
+/**
+ * Erro lançado quando não há serviço escutando no endereço configurado
+ */
+export class ServiceUnavailableError extends Error {}
+
+/**
+ * Token que o serviço grava ao escutar em TCP (veja service_client.token_path no CLI)
+ */
+function readServiceToken(): string | undefined {
+  const runtime = process.env.XDG_RUNTIME_DIR || path.join(os.homedir(), '.cache');
+  const tokenFile = process.env.EDIT_VIDEO_TOKEN_FILE || path.join(runtime, 'edit-video', 'serve.token');
+  try {
+    return fs.readFileSync(tokenFile, 'utf-8').trim() || undefined;
+  } catch {
+    return undefined;
+  }
+}
+
+/**
+ * Cliente do serviço local do CLI (`edit-video serve`)
+ *
+ * Aceita um socket Unix (`/caminho/serve.sock` ou `unix:/caminho/serve.sock`) ou um endereço
+ * TCP local (`http://127.0.0.1:8765`). Os jobs rodam no processo do serviço, que já mantém a
+ * sessão do Gemini e os caches aquecidos. Em TCP, envia o token gravado pelo serviço.
+ */
+export class ServiceClient {
+  private socketPath?: string;
+  private host = '127.0.0.1';
+  private port = 8765;
+
+  constructor(private address: string) {
+    if (address.startsWith('unix:')) {
+      this.socketPath = address.slice('unix:'.length);
+    } else if (address.startsWith('/')) {
+      this.socketPath = address;
+    } else {
+      const url = new URL(address.includes('://') ? address : `http://${address}`);
+      this.host = url.hostname;
+      this.port = url.port ? Number(url.port) : this.port;
+    }
+  }
+
+  /**
+   * Abre uma requisição e devolve a resposta sem ler o corpo
+   */
+  private open(method: string, path: string, body?: object): Promise<http.IncomingMessage> {
+    return new Promise((resolve, reject) => {
+      const payload = body ? JSON.stringify(body) : undefined;
+      const headers: http.OutgoingHttpHeaders = payload
+        ? { 'Content-Type': 'application/json', 'Content-Length': Buffer.byteLength(payload) }
+        : {};
+      const token = this.socketPath ? undefined : readServiceToken();
+      if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+      }
+      const request = http.request({
+        method,
+        path,
+        socketPath: this.socketPath,
+        host: this.socketPath ? undefined : this.host,
+        port: this.socketPath ? undefined : this.port,
+        headers
+      }, resolve);
+      request.on('error', (error: NodeJS.ErrnoException) => {
+        if (error.code === 'ENOENT' || error.code === 'ECONNREFUSED') {
+          reject(new ServiceUnavailableError(`Serviço não encontrado em ${this.address}`));
+        } else {
+          reject(error);
+        }
+      });
+      if (payload) {
+        request.write(payload);
+      }
+      request.end();
+    });
+  }
+
+  /**
+   * Requisição com resposta JSON
+   */
+  private async request(method: string, path: string, body?: object): Promise<any> {
+    const response = await this.open(method, path, body);
+    // Decodifica como texto no stream: um caractere de vários bytes pode vir dividido em dois chunks
+    response.setEncoding('utf8');
+    let text = '';
+    for await (const chunk of response) {
+      text += chunk;
+    }
+    const data = text ? JSON.parse(text) : {};
+    if ((response.statusCode || 500) >= 400) {
+      throw new Error(data.error || `O serviço respondeu ${response.statusCode}`);
+    }
+    return data;
+  }
+
+  /**
+   * Cria um job ('transcribe', 'seo', 'analyze', 'silence' ou 'peaks') e espera o resultado
+   * @param kind Tipo do job
+   * @param params Parâmetros do job (caminhos absolutos)
+   * @param onEvent Chamada com cada evento recebido
+   * @param cancellation Ao ser acionado, cancela o job no serviço e fecha a conexão na hora
+   * @returns Resultado do job
+   */
+  public async run(kind: string, params: object, onEvent?: (event: ServiceEvent) => void,
+                   cancellation?: CancellationSignal): Promise<any> {
+    const job = await this.request('POST', `/${kind}`, params);
+    const response = await this.open('GET', `/jobs/${job.id}/events`);
+    response.setEncoding('utf8');
+
+    // Não espera o próximo evento (que pode demorar minutos em uma etapa longa): o DELETE vai
+    // direto para o serviço e a leitura dos eventos é interrompida
+    let cancelled = false;
+    const cancel = () => {
+      if (cancelled) {
+        return;
+      }
+      cancelled = true;
+      this.request('DELETE', `/jobs/${job.id}`).catch((error) => console.log(error.message));
+      response.destroy();
+    };
+    const subscription = cancellation?.onCancellationRequested(cancel);
+    if (cancellation?.isCancellationRequested) {
+      cancel();
+    }
+
+    let buffer = '';
+    try {
+      for await (const chunk of response) {
+        buffer += chunk;
+        let newline: number;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+          const line = buffer.slice(0, newline).trim();
+          buffer = buffer.slice(newline + 1);
+          if (!line) {
+            continue;
+          }
+          const event: ServiceEvent = JSON.parse(line);
+          onEvent?.(event);
+          if (event.type === 'done') {
+            response.destroy();
+            return event.result;
+          }
+          if (event.type === 'error' || event.type === 'cancelled') {
+            response.destroy();
+            throw new Error(event.error || 'Job cancelado');
+          }
+        }
+      }
+    } catch (error) {
+      // Fechar a resposta interrompe a leitura com erro; para quem chamou, é só o cancelamento
+      if (!cancelled) {
+        throw error;
+      }
+    } finally {
+      subscription?.dispose();
+    }
+    if (cancelled) {
+      throw new Error('Job cancelado');
+    }
+    throw new Error('A conexão com o serviço terminou antes do fim do job');
+  }
+}